@@ -25,15 +25,8 @@ from PyQt5 import QtCore, QtWidgets
 from anylabeling.app_info import __appname__, __version__, __url__
 from anylabeling.config import get_config
 from anylabeling import config as anylabeling_config
-from anylabeling.views.mainwindow import MainWindow
+from anylabeling.startup_profiler import StartupProfiler
 from anylabeling.views.labeling.logger import logger
-from anylabeling.views.labeling.utils import new_icon, gradient_text
-from anylabeling.views.labeling.utils.update_checker import (
-    check_for_updates_async,
-)
-
-# NOTE: Do not remove this import, it is required for loading translations
-from anylabeling.resources import resources
 
 
 def main():
@@ -52,6 +45,11 @@ def main():
         action="store_true",
         help="disable automatic update check on startup",
     )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="print a breakdown of the startup and import times",
+    )
     parser.add_argument(
         "filename",
         nargs="?",
@@ -142,6 +140,25 @@ def main():
     )
     args = parser.parse_args()
 
+    profiler = None
+    if args.profile_startup:
+        profiler = StartupProfiler()
+        profiler.start()
+
+    # The GUI is imported after parsing the arguments, so that its import
+    # time can be profiled
+    from anylabeling.views.mainwindow import MainWindow
+    from anylabeling.views.labeling.utils import new_icon, gradient_text
+    from anylabeling.views.labeling.utils.update_checker import (
+        check_for_updates_async,
+    )
+
+    # NOTE: Do not remove this import, it is required for loading translations
+    from anylabeling.resources import resources  # noqa: F401
+
+    if profiler is not None:
+        profiler.mark("import GUI modules")
+
     if hasattr(args, "flags"):
         if os.path.isfile(args.flags):
             with codecs.open(args.flags, "r", encoding="utf-8") as f:
@@ -170,6 +187,7 @@ def main():
     config_file_or_yaml = config_from_args.pop("config")
     logger_level = config_from_args.pop("logger_level")
     no_auto_update_check = config_from_args.pop("no_auto_update_check", False)
+    config_from_args.pop("profile_startup")
 
     logger.setLevel(getattr(logging, logger_level.upper()))
     logger.info(
@@ -187,6 +205,9 @@ def main():
         )
         sys.exit(1)
 
+    if profiler is not None:
+        profiler.mark("load config")
+
     output_file = None
     output_dir = None
     if output is not None:
@@ -222,6 +243,9 @@ def main():
             f"Failed to load translation for {language}. "
             "Using default language.",
         )
+    if profiler is not None:
+        profiler.mark("create QApplication")
+
     win = MainWindow(
         app,
         config=config,
@@ -244,6 +268,17 @@ def main():
 
     win.showMaximized()
     win.raise_()
+
+    if profiler is not None:
+        profiler.mark("create and show main window")
+
+        def report_startup():
+            profiler.mark("first event loop iteration")
+            profiler.stop()
+            logger.info(profiler.report())
+
+        QtCore.QTimer.singleShot(0, report_startup)
+
     sys.exit(app.exec())
 
 
@@ -112,8 +112,9 @@ class SegmentAnythingONNX:
             "has_mask_input": onnx_has_mask_input,
             "orig_im_size": np.array(self.input_size, dtype=np.float32),
         }
-        masks, _, _ = self.decoder_session.get_ort_inference(
-            None, decoder_inputs, False
+        # Prompts with the same number of points reuse the output buffers
+        masks, _, _ = self.decoder_session.run_bound(
+            inputs=decoder_inputs, extract=False
         )
 
         # Transform the masks back to the original image size.
@@ -16,11 +16,13 @@ from ..engines import OnnxBaseModel
 from ..types import AutoLabelingResult
 from ..trackers import BOTSORT, BYTETracker
 from ..utils import (
-    letterbox,
+    letterbox_blob,
+    pack_blob,
     scale_boxes,
     scale_coords,
     point_in_bbox,
     masks2segments,
+    scale_masks,
     xyxy2xywh,
     xywhr2xyxyxyxy,
     non_max_suppression_v5,
@@ -50,6 +52,7 @@ class YOLO(Model):
             "point": QCoreApplication.translate("Model", "Point"),
             "polygon": QCoreApplication.translate("Model", "Polygon"),
             "rectangle": QCoreApplication.translate("Model", "Rectangle"),
+            "mask": QCoreApplication.translate("Model", "Mask"),
         }
         default_output_mode = "rectangle"
 
@@ -99,6 +102,8 @@ class YOLO(Model):
         self.filter_classes = self.config.get("filter_classes", None)
         self.nc = len(self.classes)
         self.input_shape = (self.input_height, self.input_width)
+        # Input blob reused across frames of the same size
+        self.blob = None
         if self.anchors:
             self.nl = len(self.anchors)
             self.na = len(self.anchors[0]) // 2
@@ -225,18 +230,23 @@ class YOLO(Model):
             if self.task == "det" and not isinstance(outputs, (tuple, list)):
                 outputs = [outputs]
         else:
-            outputs = self.net.get_ort_inference(blob=blob, extract=False)
+            # Frames of a video or project share one input shape, so the
+            # outputs are written into the same buffers every time
+            outputs = self.net.run_bound(blob=blob, extract=False)
         return outputs
 
     def preprocess(self, image, upsample_mode="letterbox"):
         self.img_height, self.img_width = image.shape[:2]
+        if upsample_mode == "letterbox":
+            self.blob, _, _ = letterbox_blob(
+                image, self.input_shape, out=self.blob
+            )
+            return self.blob
         # Upsample
         if upsample_mode == "resize":
             input_img = cv2.resize(
                 image, (self.input_width, self.input_height)
             )
-        elif upsample_mode == "letterbox":
-            input_img = letterbox(image, self.input_shape)[0]
         elif upsample_mode == "centercrop":
             m = min(self.img_height, self.img_width)
             top = (self.img_height - m) // 2
@@ -255,15 +265,9 @@ class YOLO(Model):
                 fy=ratio_height,
                 interpolation=cv2.INTER_LINEAR,
             )
-        # Transpose
-        input_img = input_img.transpose(2, 0, 1)
-        # Expand
-        input_img = input_img[np.newaxis, :, :, :].astype(np.float32)
-        # Contiguous
-        input_img = np.ascontiguousarray(input_img)
-        # Norm
-        blob = input_img / 255.0
-        return blob
+        # Transpose, cast and norm in one pass
+        self.blob = pack_blob(input_img, out=self.blob)
+        return self.blob
 
     def postprocess(self, preds):
         if self.model_type in [
@@ -405,10 +409,15 @@ class YOLO(Model):
 
         points = [[] for _ in range(len(boxes))]
         if self.task == "seg" and masks is not None:
-            points = [
-                scale_coords(self.input_shape, x, image.shape, normalize=False)
-                for x in masks2segments(masks, self.epsilon_factor)
-            ]
+            if self.output_mode == "mask":
+                points = list(masks)
+            else:
+                points = [
+                    scale_coords(
+                        self.input_shape, x, image.shape, normalize=False
+                    )
+                    for x in masks2segments(masks, self.epsilon_factor)
+                ]
         track_ids = [[] for _ in range(len(boxes))]
         if self.tracker is not None and (len(boxes) > 0):
             if self.task == "obb":
@@ -445,7 +454,13 @@ class YOLO(Model):
                     box, score, i, class_id, track_id
                 )
                 shapes.append(shape)
-            if self.task == "seg":
+            if self.task == "seg" and self.output_mode == "mask":
+                shape = self.create_mask_shape(
+                    point, score, class_id, track_id
+                )
+                if shape is not None:
+                    shapes.append(shape)
+            elif self.task == "seg":
                 if len(point) < 3:
                     continue
                 shape = self.create_polygon_shape(
@@ -517,6 +532,41 @@ class YOLO(Model):
             shape.group_id = int(track_id)
         return shape
 
+    def create_mask_shape(
+        self,
+        mask: np.ndarray,
+        score: Union[float, str],
+        class_id: Union[int, str],
+        track_id: Union[int, str],
+    ) -> Shape:
+        """
+        Create a mask shape from a mask of the model input.
+
+        Args:
+            mask (np.ndarray): A (h, w) mask in the letterboxed input space.
+            score (Union[float, str]): The confidence score of the mask.
+            class_id (Union[int, str]): The class ID of the mask.
+            track_id (Union[int, str]): The track ID of the mask.
+
+        Returns:
+            shape (Shape): A Shape object holding the mask at image size,
+                or None if the mask is empty.
+        """
+        mask = scale_masks(
+            mask[None].astype(np.float32), self.image_shape[:2]
+        )[0]
+        mask = mask > 0.5
+        if not mask.any():
+            return None
+        shape = Shape(flags={}, shape_type="mask")
+        shape.set_mask(mask)
+        shape.label = str(self.classes[int(class_id)])
+        shape.score = float(score)
+        shape.selected = False
+        if self.tracker and track_id:
+            shape.group_id = int(track_id)
+        return shape
+
     def create_polygon_shape(
         self,
         point: np.ndarray,
@@ -280,6 +280,12 @@ _ON_NEXT_FILES_CHANGED_MODELS = [
 ]
 
 
+# --- predict_shapes_pipelined ---
+_PIPELINED_PREDICTION_MODELS = [
+    "grounding_dino_api",
+]
+
+
 # --- update_thumbnail_display ---
 _THUMBNAIL_RENDER_MODELS = {
     "rmbg": ("x-anylabeling-matting", ".png"),
@@ -0,0 +1,82 @@
+"""Index of parsed model configs, cached across launches"""
+
+import hashlib
+import os
+import pickle
+
+import yaml
+
+from anylabeling.config import YAML_LOADER
+from anylabeling.views.labeling.logger import logger
+
+INDEX_VERSION = 1
+DEFAULT_INDEX_PATH = os.path.join(
+    os.path.expanduser("~"), "xanylabeling_data", "cache", "model_configs.pkl"
+)
+
+
+class ModelConfigIndex:
+    """Parsed YAML files, keyed by their path and a hash of their content.
+
+    The index is read in one go; only files whose content changed since
+    the last launch are parsed again. Entries are stored pickled, so that
+    every `load` returns a fresh copy the caller may modify.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or DEFAULT_INDEX_PATH
+        self.entries = self._read()  # path -> (digest, pickled config)
+        self.used = set()
+        self.dirty = False
+
+    def _read(self):
+        try:
+            with open(self.path, "rb") as f:
+                index = pickle.load(f)
+            if index.get("version") == INDEX_VERSION:
+                return index["entries"]
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring invalid config index {self.path}: {e}")
+        return {}
+
+    def load(self, path):
+        """Get the content of a YAML file, parsing it only if it changed"""
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        key = os.path.normcase(os.path.abspath(path))
+        self.used.add(key)
+
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == digest:
+            return pickle.loads(entry[1])
+
+        config = yaml.load(data, Loader=YAML_LOADER)
+        self.entries[key] = (digest, pickle.dumps(config))
+        self.dirty = True
+        return config
+
+    def save(self):
+        """Write the index if it changed, dropping files no longer used"""
+        unused = self.entries.keys() - self.used
+        for key in unused:
+            del self.entries[key]
+        if not (self.dirty or unused):
+            return
+
+        temp_path = f"{self.path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(temp_path, "wb") as f:
+                pickle.dump(
+                    {"version": INDEX_VERSION, "entries": self.entries},
+                    f,
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Failed to save config index {self.path}: {e}")
+        self.dirty = False
+        self.used = set()
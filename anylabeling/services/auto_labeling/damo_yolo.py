@@ -12,6 +12,7 @@ from anylabeling.views.labeling.utils.opencv import qt_img_to_rgb_cv_img
 from .model import Model
 from .types import AutoLabelingResult
 from .engines.build_onnx_engine import OnnxBaseModel
+from .utils.preprocess import pack_blob
 
 
 class DAMO_YOLO(Model):
@@ -78,21 +79,15 @@ class DAMO_YOLO(Model):
 
     def preprocess(self, input_image):
         src_h, src_w, _ = input_image.shape
-        _, dst_c, dst_h, dst_w = self.input_shape
-        transformed_image = np.ones((dst_h, dst_w, dst_c), dtype=np.uint8)
+        _, _, dst_h, dst_w = self.input_shape
         ratio_hw = min(dst_h / src_h, dst_w / src_w)
         new_h, new_w = int(ratio_hw * src_h), int(ratio_hw * src_w)
         image = cv2.resize(
             input_image, (new_w, new_h), interpolation=cv2.INTER_LINEAR
         )
-        transformed_image[:new_h, :new_w, :] = image
-        transformed_image = transformed_image.transpose((2, 0, 1))
-        transformed_image = np.ascontiguousarray(transformed_image).astype(
-            "float32"
-        )
-        if len(transformed_image.shape) == 3:
-            transformed_image = transformed_image[None]
-        return transformed_image, ratio_hw
+        # Padded at the bottom right, pixel values are kept as they are
+        blob = pack_blob(image, size=(dst_w, dst_h), color=1, scale=1.0)
+        return blob, ratio_hw
 
     def postprocess(self, predictions, ratio_hw):
         scores = predictions[0].squeeze(axis=0)
@@ -1,9 +1,20 @@
 import os
+from collections import OrderedDict
+
+import numpy as np
 import onnx
 import onnxruntime as ort
 
+from ..instrumentation import INFERENCE, timed
+
 
 class OnnxBaseModel:
+    # Number of input shapes `run_bound` keeps output buffers for
+    MAX_BINDINGS = 8
+    # Providers `run_bound` uses I/O binding with. On the CPU provider it
+    # saves no copy and measures no faster than a plain run.
+    BINDING_PROVIDERS = ("CUDAExecutionProvider", "TensorrtExecutionProvider")
+
     def __init__(
         self, model_path, device_type: str = "cpu", log_severity_level: int = 3
     ):
@@ -24,13 +35,22 @@ class OnnxBaseModel:
             sess_options=self.sess_opts,
         )
         self.model_path = model_path
+        self.inputs = self.ort_session.get_inputs()
+        self.outputs = self.ort_session.get_outputs()
+        self.input_names = [node.name for node in self.inputs]
+        self.output_names = [node.name for node in self.outputs]
+        self.bindings = OrderedDict()
+        self.use_binding = any(
+            provider in self.BINDING_PROVIDERS
+            for provider in self.ort_session.get_providers()
+        )
 
+    @timed(INFERENCE)
     def get_ort_inference(
         self, blob, inputs=None, extract=True, squeeze=False
     ):
         if inputs is None:
-            inputs = self.get_input_name()
-            outs = self.ort_session.run(None, {inputs: blob})
+            outs = self.ort_session.run(None, {self.input_names[0]: blob})
         else:
             outs = self.ort_session.run(None, inputs)
         if extract:
@@ -39,14 +59,116 @@ class OnnxBaseModel:
             outs = outs.squeeze(axis=0)
         return outs
 
+    @timed(INFERENCE)
+    def run_bound(self, blob=None, inputs=None, extract=True, squeeze=False):
+        """
+        Run the model through I/O binding with reusable output buffers.
+
+        Inputs are bound without copying, and outputs are written into
+        buffers kept per input shapes, so repeated runs with the same
+        shapes, e.g. decoding prompts or tracking over a video, do not
+        allocate outputs. Models whose output shapes depend on the data
+        fall back to outputs allocated by ONNX Runtime. Without a
+        provider in `BINDING_PROVIDERS`, this is a plain run.
+
+        Note:
+            The returned arrays may be overwritten by the next run with
+            the same input shapes; copy them to keep them.
+
+        Args:
+            blob (numpy.ndarray): Input of single-input models.
+            inputs (dict): Inputs by name, instead of `blob`.
+            extract (bool): Return the first output only.
+            squeeze (bool): Drop the batch axis of the first output.
+
+        Returns:
+            numpy.ndarray or list: The output(s) of the model.
+        """
+        if inputs is None:
+            inputs = {self.input_names[0]: blob}
+        if self.use_binding:
+            outs = self.run_bindings(inputs)
+        else:
+            outs = self.ort_session.run(None, inputs)
+        if not extract:
+            return list(outs)
+        outs = outs[0]
+        if squeeze:
+            outs = outs.squeeze(axis=0)
+        return outs
+
+    def run_bindings(self, inputs):
+        """Run through the I/O binding of the input shapes"""
+        inputs = {
+            name: np.ascontiguousarray(value) for name, value in inputs.items()
+        }
+        key = tuple(
+            (name, value.shape, value.dtype.str)
+            for name, value in inputs.items()
+        )
+        binding = self.get_binding(key)
+        try:
+            return self.run_binding(binding, inputs)
+        except Exception:
+            if binding["buffers"] is None:
+                raise
+            # The output shapes depend on the data, not just the inputs
+            binding = self.get_binding(key, dynamic=True)
+            return self.run_binding(binding, inputs)
+
+    def run_binding(self, binding, inputs):
+        """Run an I/O binding and get its outputs"""
+        io_binding = binding["io"]
+        for name, value in inputs.items():
+            io_binding.bind_cpu_input(name, value)
+        if binding["dynamic"]:
+            # Let ONNX Runtime allocate outputs of the new shapes
+            for name in self.output_names:
+                io_binding.bind_output(name, "cpu")
+        self.ort_session.run_with_iobinding(io_binding)
+        if binding["buffers"] is not None:
+            return binding["buffers"]
+        outs = io_binding.copy_outputs_to_cpu()
+        if not binding["dynamic"]:
+            self.bind_buffers(binding, outs)
+        return outs
+
+    def get_binding(self, key, dynamic=False):
+        """Get the I/O binding of some input shapes, creating it if needed"""
+        binding = self.bindings.get(key)
+        if binding is not None and not dynamic:
+            self.bindings.move_to_end(key)
+            return binding
+        io_binding = self.ort_session.io_binding()
+        for name in self.output_names:
+            io_binding.bind_output(name, "cpu")
+        binding = {"io": io_binding, "buffers": None, "dynamic": dynamic}
+        self.bindings[key] = binding
+        self.bindings.move_to_end(key)
+        while len(self.bindings) > self.MAX_BINDINGS:
+            self.bindings.popitem(last=False)
+        return binding
+
+    def bind_buffers(self, binding, outs):
+        """Bind outputs to preallocated buffers for the next runs"""
+        for name, out in zip(self.output_names, outs):
+            binding["io"].bind_output(
+                name,
+                "cpu",
+                element_type=out.dtype.type,
+                shape=out.shape,
+                buffer_ptr=out.ctypes.data,
+            )
+        binding["buffers"] = outs
+
     def get_input_name(self):
-        return self.ort_session.get_inputs()[0].name
+        return self.input_names[0]
 
     def get_input_shape(self):
-        return self.ort_session.get_inputs()[0].shape
+        return self.inputs[0].shape
 
     def get_output_name(self):
-        return [out.name for out in self.ort_session.get_outputs()]
+        return list(self.output_names)
 
     def get_metadata_info(self, field):
         model = onnx.load(self.model_path)
@@ -1,5 +1,4 @@
 import os
-import cv2
 import numpy as np
 
 from typing import Dict
@@ -15,6 +14,7 @@ from anylabeling.views.labeling.utils.opencv import qt_img_to_rgb_cv_img
 from .model import Model
 from .types import AutoLabelingResult
 from .utils.general import Args
+from .utils.preprocess import resize_blob
 from .engines.build_onnx_engine import OnnxBaseModel
 
 
@@ -84,17 +84,13 @@ class Grounding_DINO(Model):
 
     def preprocess(self, image, text_prompt):
         # Resize the image
-        image = cv2.resize(
-            image, self.target_size, interpolation=cv2.INTER_LINEAR
+        image = resize_blob(
+            image,
+            self.target_size,
+            mean=(0.485, 0.456, 0.406),
+            std=(0.229, 0.224, 0.225),
         )
 
-        image = image.astype(np.float32) / 255.0
-        mean = np.array([0.485, 0.456, 0.406])
-        std = np.array([0.229, 0.224, 0.225])
-        image = (image - mean) / std
-        image = np.transpose(image, (2, 0, 1))
-        image = np.expand_dims(image, 0).astype(np.float32)
-
         # encoder texts
         captions = self.get_caption(str(text_prompt))
         tokenized_raw_results = self.net.tokenizer.encode(captions)
@@ -1,10 +1,13 @@
 import base64
 import cv2
+import hashlib
 import json
 import os
 import re
 import requests
 import time
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 
 from PyQt5 import QtCore
 from PyQt5.QtCore import QCoreApplication
@@ -15,6 +18,287 @@ from anylabeling.views.labeling.utils.opencv import qt_img_to_rgb_cv_img
 from .model import Model
 from .types import AutoLabelingResult
 
+DEFAULT_API_BASE_URL = "https://api.deepdataspace.com"
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.expanduser("~"), "xanylabeling_data", "cache", "grounding_dino_api"
+)
+DEFAULT_CACHE_MAX_ENTRIES = 10000
+
+
+class GroundingDinoAPIClient:
+    """Pipelined client for the task-based Grounding DINO API.
+
+    Up to `max_in_flight` tasks are kept submitted at once. Pending tasks
+    are polled together over one keep-alive session; the poll interval
+    starts at `min_poll_interval` and grows up to `max_poll_interval`
+    while no task finishes, then drops back.
+    """
+
+    def __init__(
+        self,
+        api_base_url,
+        headers,
+        max_in_flight=4,
+        min_poll_interval=0.25,
+        max_poll_interval=2.0,
+        poll_backoff=1.5,
+        task_timeout=60,
+    ):
+        api_base_url = api_base_url.rstrip("/")
+        self.detection_url = f"{api_base_url}/v2/task/grounding_dino/detection"
+        self.status_url_template = f"{api_base_url}/v2/task_status/{{}}"
+        self.headers = headers
+        self.max_in_flight = max(1, max_in_flight)
+        self.min_poll_interval = min_poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.poll_backoff = poll_backoff
+        self.task_timeout = task_timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=max(10, self.max_in_flight))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def submit(self, payload):
+        """Create a detection task and return its uuid"""
+        resp = self.session.post(
+            url=self.detection_url,
+            json=payload,
+            headers=self.headers,
+            timeout=30,
+        )
+        resp.raise_for_status()
+        json_resp = resp.json()
+        logger.debug(f"Initial API response: {json_resp}")
+
+        if (
+            json_resp.get("code") != 0
+            or "data" not in json_resp
+            or "task_uuid" not in json_resp["data"]
+        ):
+            error_msg = json_resp.get("msg", "Unknown error initiating task.")
+            logger.error(f"API Error (initiate): {error_msg}")
+            raise ValueError("Unknown error initiating task.")
+
+        task_uuid = json_resp["data"]["task_uuid"]
+        logger.info(f"Task initiated with UUID: {task_uuid}")
+        return task_uuid
+
+    def get_status(self, task_uuid):
+        """Get the status data of a task"""
+        resp = self.session.get(
+            self.status_url_template.format(task_uuid),
+            headers=self.headers,
+            timeout=10,
+        )
+        resp.raise_for_status()
+        json_resp = resp.json()
+        logger.debug(f"Polling response: {json_resp}")
+
+        if json_resp.get("code") != 0:
+            error_msg = json_resp.get("msg", "Unknown error checking status.")
+            logger.error(f"API Error (polling): {error_msg}")
+            raise ValueError("Unknown error checking status.")
+        return json_resp.get("data", {})
+
+    def run(self, payloads):
+        """Run detection tasks, keeping several of them in flight.
+
+        Args:
+            payloads (iterable): Request payloads, None for a request that
+                is not needed. It is consumed lazily, a few items ahead of
+                the results.
+
+        Yields:
+            list or Exception: The detected objects of each payload, in
+                input order, or the error that made its task fail. None
+                for a None payload.
+        """
+        payloads = enumerate(payloads)
+        tasks = {}  # index -> [submit future, task uuid, start time]
+        results = {}  # index -> objects or exception
+        next_index = num_submitted = 0
+        exhausted = False
+        interval = self.min_poll_interval
+
+        with ThreadPoolExecutor(self.max_in_flight) as executor:
+            while True:
+                # Bound both the tasks in flight and the results waiting
+                # for an earlier, slower task
+                while (
+                    not exhausted
+                    and len(tasks) < self.max_in_flight
+                    and num_submitted < next_index + 2 * self.max_in_flight
+                ):
+                    try:
+                        index, payload = next(payloads)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    num_submitted += 1
+                    if payload is None:
+                        results[index] = None
+                        continue
+                    future = executor.submit(self.submit, payload)
+                    tasks[index] = [future, None, None]
+
+                while next_index in results:
+                    yield results.pop(next_index)
+                    next_index += 1
+
+                if not tasks:
+                    if exhausted:
+                        return
+                    continue
+
+                time.sleep(interval)
+                if self._poll(executor, tasks, results):
+                    interval = self.min_poll_interval
+                else:
+                    interval = min(
+                        interval * self.poll_backoff, self.max_poll_interval
+                    )
+
+    def _poll(self, executor, tasks, results):
+        """Poll all submitted tasks once, return the number finished"""
+        num_finished = 0
+
+        def finish(index, result):
+            nonlocal num_finished
+            del tasks[index]
+            results[index] = result
+            num_finished += 1
+
+        for index, task in list(tasks.items()):
+            future, task_uuid, _ = task
+            if task_uuid is None and future.done():
+                try:
+                    task[1] = future.result()
+                    task[2] = time.monotonic()
+                except Exception as e:
+                    finish(index, e)
+
+        polled = [index for index, task in tasks.items() if task[1]]
+
+        def get_status(task_uuid):
+            try:
+                return self.get_status(task_uuid)
+            except Exception as e:
+                return e
+
+        statuses = executor.map(
+            get_status, [tasks[index][1] for index in polled]
+        )
+        for index, status_data in zip(polled, statuses):
+            _, task_uuid, start_time = tasks[index]
+            if isinstance(status_data, Exception):
+                finish(index, status_data)
+                continue
+
+            task_status = status_data.get("status")
+            if task_status in ["waiting", "running"]:
+                if time.monotonic() - start_time > self.task_timeout:
+                    logger.warning(
+                        f"Task {task_uuid} timed out after {self.task_timeout} seconds."
+                    )
+                    finish(index, ValueError("Task timed out."))
+                continue
+
+            logger.info(
+                f"Task {task_uuid} finished with status '{task_status}' in "
+                f"{time.monotonic() - start_time:.2f} seconds."
+            )
+            if task_status == "success":
+                result_data = status_data.get("result", {})
+                finish(index, result_data.get("objects", []))
+            else:
+                error_msg = status_data.get(
+                    "error", "Task failed with unknown error."
+                )
+                logger.error(f"Task {task_uuid} failed: {error_msg}")
+                finish(
+                    index, ValueError(f"Task {task_uuid} failed: {error_msg}")
+                )
+
+        return num_finished
+
+    def close(self):
+        self.session.close()
+
+
+class ResponseCache:
+    """Detected objects stored on disk, one JSON file per request key.
+
+    The modification time of a file records its last use. Once there are
+    more than `max_entries` files, the least recently used are removed,
+    down to 90% of the limit so that eviction does not run on every put.
+    """
+
+    def __init__(self, cache_dir, max_entries=DEFAULT_CACHE_MAX_ENTRIES):
+        self.cache_dir = cache_dir
+        self.max_entries = max(1, max_entries)
+        self._num_entries = None  # counted on the first put
+
+    @staticmethod
+    def make_key(image_hash, *params):
+        data = json.dumps([image_hash, *params])
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                objects = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return objects
+
+    def put(self, key, objects):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._path(key)
+            is_new = not os.path.exists(path)
+            with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+                json.dump(objects, f)
+            os.replace(f"{path}.tmp", path)
+            if self._num_entries is None:
+                self._num_entries = len(self._entries())
+            elif is_new:
+                self._num_entries += 1
+            if self._num_entries > self.max_entries:
+                self._evict(self.max_entries * 9 // 10)
+        except OSError as e:
+            logger.warning(f"Failed to cache API response: {e}")
+
+    def _entries(self):
+        return [
+            entry
+            for entry in os.scandir(self.cache_dir)
+            if entry.name.endswith(".json")
+        ]
+
+    def _evict(self, num_kept):
+        """Remove the least recently used entries"""
+        entries = []
+        for entry in self._entries():
+            try:
+                entries.append((entry.stat().st_mtime_ns, entry.path))
+            except OSError:
+                pass
+        entries.sort()
+        num_removed = max(0, len(entries) - num_kept)
+        for _, path in entries[:num_removed]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._num_entries = len(entries) - num_removed
+        logger.debug(f"Evicted {num_removed} cached API responses.")
+
 
 class Grounding_DINO_API(Model):
     """Grounding DINO API model"""
@@ -46,14 +330,10 @@ class Grounding_DINO_API(Model):
     def __init__(self, model_config, on_message) -> None:
         super().__init__(model_config, on_message)
 
-        self.api_base_url = "https://api.deepdataspace.com"
-        self.model_name = "GroundingDino-1.6-Pro"
-        self.detection_url = (
-            f"{self.api_base_url.rstrip('/')}/v2/task/grounding_dino/detection"
-        )
-        self.status_url_template = (
-            f"{self.api_base_url.rstrip('/')}/v2/task_status/{{task_uuid}}"
+        self.api_base_url = self.config.get(
+            "api_base_url", DEFAULT_API_BASE_URL
         )
+        self.model_name = "GroundingDino-1.6-Pro"
 
         self.bbox_threshold = self.config["conf_threshold"]
         self.iou_threshold = self.config["iou_threshold"]
@@ -63,6 +343,19 @@ class Grounding_DINO_API(Model):
             "Content-Type": "application/json",
             "Token": os.getenv("GROUNDING_DINO_API_TOKEN", ""),
         }
+        self.client = GroundingDinoAPIClient(
+            self.api_base_url,
+            self.headers,
+            max_in_flight=self.config.get("max_in_flight", 4),
+        )
+        self.cache = None
+        if self.config.get("cache_responses", True):
+            self.cache = ResponseCache(
+                self.config.get("cache_dir", DEFAULT_CACHE_DIR),
+                self.config.get(
+                    "cache_max_entries", DEFAULT_CACHE_MAX_ENTRIES
+                ),
+            )
 
     def set_auto_labeling_api_token(self, token):
         """Set the API token for the model"""
@@ -92,14 +385,8 @@ class Grounding_DINO_API(Model):
         """Toggle the preservation of existing annotations based on the checkbox state."""
         self.replace = not state
 
-    def predict_shapes(self, image, image_path=None, text_prompt=None):
-        """
-        Predict shapes from image using the Grounding DINO API.
-        """
-        if image is None:
-            logger.warning("Input image is None.")
-            return AutoLabelingResult([], replace=self.replace)
-
+    def check_text_prompt(self, text_prompt):
+        """Validate the API token and the text prompt, return the prompt"""
         if not self.headers["Token"]:
             raise ValueError(
                 "API Token is not configured. Please set it before calling."
@@ -115,11 +402,20 @@ class Grounding_DINO_API(Model):
                 f"Invalid text prompt format. "
                 f"It should be English words separated by '.' (e.g., 'cat.dog')."
             )
+        return text_prompt
+
+    def cache_key(self, cv_image, text_prompt):
+        """Key of a request: image content, model, prompt and thresholds"""
+        image_hash = hashlib.sha256(cv_image.tobytes()).hexdigest()
+        return ResponseCache.make_key(
+            f"{image_hash}-{cv_image.shape}",
+            self.model_name,
+            text_prompt,
+            self.bbox_threshold,
+            self.iou_threshold,
+        )
 
-        cv_image = qt_img_to_rgb_cv_img(image, image_path)
-        if cv_image is None:
-            raise ValueError("Failed to convert input image to OpenCV format.")
-
+    def build_payload(self, cv_image, text_prompt):
         # Encode image to base64 as PNG
         is_success, buffer = cv2.imencode(".png", cv_image)
         if not is_success:
@@ -127,7 +423,7 @@ class Grounding_DINO_API(Model):
         img_base64 = base64.b64encode(buffer).decode("utf-8")
         img_data_uri = f"data:image/png;base64,{img_base64}"
 
-        payload = {
+        return {
             "model": self.model_name,
             "image": img_data_uri,
             "prompt": {"type": "text", "text": text_prompt},
@@ -136,132 +432,127 @@ class Grounding_DINO_API(Model):
             "iou_threshold": self.iou_threshold,
         }
 
+    @staticmethod
+    def objects_to_shapes(objects):
         shapes = []
-        try:
-            logger.info(
-                f"Sending request to {self.detection_url} with payload: "
-                f"model: {self.model_name}, "
-                f"prompt: {text_prompt}, "
-                f"targets: {['bbox']}, "
-                f"bbox_threshold: {self.bbox_threshold}, "
-                f"iou_threshold: {self.iou_threshold}"
-            )
-
-            start_time = time.time()
-            resp = requests.post(
-                url=self.detection_url,
-                json=payload,
-                headers=self.headers,
-                timeout=30,
-            )
-            resp.raise_for_status()
-            json_resp = resp.json()
-            logger.debug(f"Initial API response: {json_resp}")
-
-            if (
-                json_resp.get("code") != 0
-                or "data" not in json_resp
-                or "task_uuid" not in json_resp["data"]
-            ):
-                error_msg = json_resp.get(
-                    "msg", "Unknown error initiating task."
-                )
-                logger.error(f"API Error (initiate): {error_msg}")
-                raise ValueError("Unknown error initiating task.")
-
-            task_uuid = json_resp["data"]["task_uuid"]
-            logger.info(f"Task initiated with UUID: {task_uuid}")
-
-            status_url = self.status_url_template.format(task_uuid=task_uuid)
-            polling_attempts = 0
-            max_polling_attempts = 30
-            while polling_attempts < max_polling_attempts:
-                polling_attempts += 1
-                time.sleep(1)
-                logger.debug(
-                    f"Polling status for task {task_uuid} (Attempt {polling_attempts})"
-                )
-                resp = requests.get(
-                    status_url, headers=self.headers, timeout=10
-                )
-                resp.raise_for_status()
-                json_resp = resp.json()
-                logger.debug(f"Polling response: {json_resp}")
-
-                if json_resp.get("code") != 0:
-                    error_msg = json_resp.get(
-                        "msg", "Unknown error checking status."
+        logger.info(f"Received {len(objects)} objects from API.")
+        for obj in objects:
+            bbox = obj.get("bbox")
+            label = obj.get("category")
+            score = obj.get("score")
+
+            if bbox and label is not None and score is not None:
+                try:
+                    x1, y1, x2, y2 = map(int, bbox)
+                    shape = Shape(
+                        label=str(label),
+                        score=float(score),
+                        shape_type="rectangle",
+                    )
+                    shape.add_point(QtCore.QPointF(x1, y1))
+                    shape.add_point(QtCore.QPointF(x2, y1))
+                    shape.add_point(QtCore.QPointF(x2, y2))
+                    shape.add_point(QtCore.QPointF(x1, y2))
+                    shapes.append(shape)
+                except (ValueError, TypeError) as coord_err:
+                    logger.warning(
+                        f"Skipping object due to invalid bbox format {bbox}: {coord_err}"
                     )
-                    logger.error(f"API Error (polling): {error_msg}")
-                    raise ValueError("Unknown error checking status.")
-
-                status_data = json_resp.get("data", {})
-                task_status = status_data.get("status")
-
-                if task_status not in ["waiting", "running"]:
-                    break
             else:
-                logger.warning(
-                    f"Task {task_uuid} timed out after {max_polling_attempts} seconds."
-                )
-                raise ValueError("Task timed out.")
+                logger.warning(f"Skipping object with missing data: {obj}")
+        return shapes
 
-            end_time = time.time()
-            logger.info(
-                f"Task {task_uuid} finished with status '{task_status}' in {end_time - start_time:.2f} seconds."
-            )
+    def predict_shapes(self, image, image_path=None, text_prompt=None):
+        """
+        Predict shapes from image using the Grounding DINO API.
+        """
+        if image is None:
+            logger.warning("Input image is None.")
+            return AutoLabelingResult([], replace=self.replace)
 
-            if task_status == "failed":
-                error_msg = status_data.get(
-                    "error", "Task failed with unknown error."
-                )
-                logger.error(f"Task {task_uuid} failed: {error_msg}")
-                raise ValueError(f"Task {task_uuid} failed: {error_msg}")
-            elif task_status == "success":
-                result_data = status_data.get("result", {})
-                objects = result_data.get("objects", [])
-                logger.info(f"Received {len(objects)} objects from API.")
-
-                for obj in objects:
-                    bbox = obj.get("bbox")
-                    label = obj.get("category")
-                    score = obj.get("score")
-
-                    if bbox and label is not None and score is not None:
-                        try:
-                            x1, y1, x2, y2 = map(int, bbox)
-                            shape = Shape(
-                                label=str(label),
-                                score=float(score),
-                                shape_type="rectangle",
-                            )
-                            shape.add_point(QtCore.QPointF(x1, y1))
-                            shape.add_point(QtCore.QPointF(x2, y1))
-                            shape.add_point(QtCore.QPointF(x2, y2))
-                            shape.add_point(QtCore.QPointF(x1, y2))
-                            shapes.append(shape)
-                        except (ValueError, TypeError) as coord_err:
-                            logger.warning(
-                                f"Skipping object due to invalid bbox format {bbox}: {coord_err}"
-                            )
-                    else:
-                        logger.warning(
-                            f"Skipping object with missing data: {obj}"
-                        )
+        results = self.predict_shapes_pipelined(
+            [(image, image_path)], text_prompt
+        )
+        try:
+            result = next(results)
+        finally:
+            results.close()
+        if isinstance(result, Exception):
+            return AutoLabelingResult([], replace=self.replace)
+        return result
 
-        except requests.exceptions.RequestException as req_err:
-            logger.error(f"API Request failed: {req_err}")
-        except json.JSONDecodeError as json_err:
-            logger.error(f"Failed to decode API response: {json_err}")
-        except Exception as e:
-            logger.error(
-                f"An unexpected error occurred during API prediction: {e}",
-                exc_info=True,
-            )
+    def predict_shapes_pipelined(self, images, text_prompt):
+        """
+        Predict shapes for many images, keeping several API tasks in
+        flight. Cached responses are reused without calling the API.
+
+        Args:
+            images (iterable): (image, image_path) pairs. `image` may be
+                None to read the image from `image_path`.
+            text_prompt (str): Categories separated by '.'.
+
+        Yields:
+            AutoLabelingResult or Exception: One result per image, in
+                input order, or the error that made the image fail, e.g.
+                an unreadable file or a failed task.
+        """
+        text_prompt = self.check_text_prompt(text_prompt)
+        logger.info(
+            f"Sending requests to {self.client.detection_url} with payload: "
+            f"model: {self.model_name}, "
+            f"prompt: {text_prompt}, "
+            f"targets: {['bbox']}, "
+            f"bbox_threshold: {self.bbox_threshold}, "
+            f"iou_threshold: {self.iou_threshold}"
+        )
 
-        result = AutoLabelingResult(shapes, replace=self.replace)
-        return result
+        # Images are read, looked up in the cache and encoded only when
+        # the client asks for the next payload
+        entries = []  # (cache key, cached objects or error) of each image
+
+        def payloads():
+            for image, image_path in images:
+                try:
+                    cv_image = qt_img_to_rgb_cv_img(image, image_path)
+                    if cv_image is None:
+                        raise ValueError(
+                            "Failed to convert input image to OpenCV format."
+                        )
+                    key = self.cache_key(cv_image, text_prompt)
+                    objects = self.cache.get(key) if self.cache else None
+                    payload = None
+                    if objects is None:
+                        payload = self.build_payload(cv_image, text_prompt)
+                except Exception as e:
+                    logger.error(f"Failed to read image {image_path}: {e}")
+                    key, objects, payload = None, e, None
+                entries.append((key, objects))
+                yield payload
+
+        responses = self.client.run(payloads())
+        try:
+            for index, response in enumerate(responses):
+                key, objects = entries[index]
+                entries[index] = None
+                if isinstance(objects, Exception):
+                    yield objects
+                    continue
+                if objects is not None:
+                    logger.debug("Using cached API response.")
+                elif isinstance(response, Exception):
+                    logger.error(f"API Request failed: {response}")
+                    yield response
+                    continue
+                else:
+                    objects = response
+                    if self.cache:
+                        self.cache.put(key, objects)
+                yield AutoLabelingResult(
+                    self.objects_to_shapes(objects), replace=self.replace
+                )
+        finally:
+            responses.close()
 
     def unload(self):
         """Unload the model"""
-        pass
+        self.client.close()
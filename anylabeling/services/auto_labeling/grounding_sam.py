@@ -26,6 +26,7 @@ from .model import Model
 from .types import AutoLabelingResult
 from .lru_cache import LRUCache
 from .utils.general import Args
+from .utils.preprocess import resize_blob
 from .engines.build_onnx_engine import OnnxBaseModel
 
 
@@ -243,6 +244,7 @@ class GroundingSAM(Model):
             "polygon": QCoreApplication.translate("Model", "Polygon"),
             "rectangle": QCoreApplication.translate("Model", "Rectangle"),
             "rotation": QCoreApplication.translate("Model", "Rotation"),
+            "mask": QCoreApplication.translate("Model", "Mask"),
         }
         default_output_mode = "polygon"
 
@@ -331,17 +333,13 @@ class GroundingSAM(Model):
 
     def preprocess(self, image, text_prompt, img_mask=None):
         # Resize the image
-        image = cv2.resize(
-            image, self.target_size, interpolation=cv2.INTER_LINEAR
+        image = resize_blob(
+            image,
+            self.target_size,
+            mean=(0.485, 0.456, 0.406),
+            std=(0.229, 0.224, 0.225),
         )
 
-        image = image.astype(np.float32) / 255.0
-        mean = np.array([0.485, 0.456, 0.406])
-        std = np.array([0.229, 0.224, 0.225])
-        image = (image - mean) / std
-        image = np.transpose(image, (2, 0, 1))
-        image = np.expand_dims(image, 0).astype(np.float32)
-
         # encoder texts
         captions = self.get_caption(str(text_prompt))
         tokenized_raw_results = self.net.tokenizer.encode(captions)
@@ -451,6 +449,16 @@ class GroundingSAM(Model):
         masks[masks > 0.0] = 255
         masks[masks <= 0.0] = 0
         masks = masks.astype(np.uint8)
+        if self.output_mode == "mask":
+            if not masks.any():
+                return [] if label is None else None
+            # Keep the pixels, holes included, instead of contours
+            shape = Shape(flags={}, shape_type="mask")
+            shape.set_mask(masks > 0)
+            shape.label = "AUTOLABEL_OBJECT" if label is None else label
+            shape.selected = False
+            return [shape] if label is None else shape
+
         contours, _ = cv2.findContours(
             masks, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE
         )
@@ -594,7 +602,8 @@ class GroundingSAM(Model):
                     else:
                         masks = masks[0]
                     results = self.post_process(masks, label=label)
-                    shapes.append(results)
+                    if results is not None:
+                        shapes.append(results)
                 result = AutoLabelingResult(shapes, replace=False)
             else:
                 point_coords, point_labels = self.get_input_points()
@@ -24,6 +24,7 @@ from .model import Model
 from .types import AutoLabelingResult
 from .lru_cache import LRUCache
 from .utils.general import Args
+from .utils.preprocess import resize_blob
 from .engines.build_onnx_engine import OnnxBaseModel
 from .__base__.sam2 import SegmentAnything2ONNX
 
@@ -144,17 +145,13 @@ class GroundingSAM2(Model):
 
     def preprocess(self, image, text_prompt):
         # Resize the image
-        image = cv2.resize(
-            image, self.target_size, interpolation=cv2.INTER_LINEAR
+        image = resize_blob(
+            image,
+            self.target_size,
+            mean=(0.485, 0.456, 0.406),
+            std=(0.229, 0.224, 0.225),
         )
 
-        image = image.astype(np.float32) / 255.0
-        mean = np.array([0.485, 0.456, 0.406])
-        std = np.array([0.229, 0.224, 0.225])
-        image = (image - mean) / std
-        image = np.transpose(image, (2, 0, 1))
-        image = np.expand_dims(image, 0).astype(np.float32)
-
         # encoder texts
         captions = self.get_caption(str(text_prompt))
         tokenized_raw_results = self.net.tokenizer.encode(captions)
@@ -0,0 +1,291 @@
+"""Per-stage timing and memory of model predictions.
+
+Every `Model.predict_shapes` call is measured as one call record: wall
+time spent decoding the image, preprocessing, running the session,
+postprocessing and building shapes, and the peak resident memory during
+the call. Records are aggregated per model into percentiles, shown in
+the inference statistics panel and written by the batch runner.
+
+Stages are timed exclusively: a stage nested in another one, e.g. a
+session run inside a cascade's postprocess, is not counted twice.
+Whatever is not covered by a stage is counted as building shapes.
+"""
+
+import csv
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+import numpy as np
+
+from anylabeling.views.labeling.logger import logger
+from .model_pool import get_process_memory
+
+DECODE = "decode"
+PREPROCESS = "preprocess"
+INFERENCE = "inference"
+POSTPROCESS = "postprocess"
+SHAPES = "shapes"
+STAGES = (DECODE, PREPROCESS, INFERENCE, POSTPROCESS, SHAPES)
+TOTAL = "total"
+
+PERCENTILES = (50, 90, 99)
+MAX_RECORDS = 10000
+DEFAULT_DUMP_DIR = os.path.join(
+    os.path.expanduser("~"), "xanylabeling_data", "stats"
+)
+
+_state = threading.local()
+
+
+def reset_peak_memory():
+    """Reset the peak resident memory of this process, if supported.
+
+    Only Linux can reset it, see `clear_refs` in proc(5).
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def get_peak_memory():
+    """Get the peak resident memory of this process in bytes.
+
+    Falls back to the current resident memory when the peak is unknown.
+    """
+    try:
+        with open("/proc/self/status", "r") as f:
+            match = re.search(r"VmHWM:\s+(\d+) kB", f.read())
+        if match:
+            return int(match.group(1)) * 1024
+    except OSError:
+        pass
+    return get_process_memory()
+
+
+@contextmanager
+def stage(name):
+    """Time a stage of the prediction running on this thread.
+
+    Does nothing outside of `measure_call`, so instrumented helpers
+    cost nothing when called on their own.
+    """
+    record = getattr(_state, "record", None)
+    if record is None:
+        yield
+        return
+
+    frame = [time.perf_counter(), 0.0]  # start, time in nested stages
+    _state.stack.append(frame)
+    try:
+        yield
+    finally:
+        _state.stack.pop()
+        elapsed = time.perf_counter() - frame[0]
+        record[name] = record.get(name, 0.0) + elapsed - frame[1]
+        if _state.stack:
+            _state.stack[-1][1] += elapsed
+
+
+def timed(name):
+    """Decorate a function to time it as the given stage"""
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+
+        wrapper.__instrumented__ = True
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def measure_call(model_name, stats=None):
+    """Record one prediction of a model.
+
+    Nested calls, e.g. a model calling the `predict_shapes` of its base
+    class, are part of the outer call.
+
+    Args:
+        model_name (str): Name the call is aggregated under.
+        stats (InferenceStats, optional): Where to add the record,
+            `inference_stats` by default.
+    """
+    if getattr(_state, "record", None) is not None:
+        yield
+        return
+
+    reset = reset_peak_memory()
+    memory = None if reset else get_process_memory()
+    record = _state.record = {}
+    _state.stack = []
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        total = time.perf_counter() - start
+        _state.record = None
+        record[SHAPES] = max(
+            0.0,
+            record.get(SHAPES, 0.0)
+            + total
+            - sum(record.get(name, 0.0) for name in STAGES),
+        )
+        record[TOTAL] = total
+        peak = get_peak_memory()
+        if memory is not None and peak is not None:
+            peak = max(memory, peak)
+        record["peak_rss"] = peak
+        (stats or inference_stats).add(model_name, record)
+
+
+def summarize(values):
+    values = np.asarray(values, dtype=np.float64) * 1000
+    summary = {"mean": float(values.mean())}
+    for q, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+        summary[f"p{q}"] = float(value)
+    summary["max"] = float(values.max())
+    return summary
+
+
+class InferenceStats:
+    """Call records of model predictions, aggregated per model.
+
+    Only the latest `max_records` calls of each model are kept.
+    """
+
+    def __init__(self, max_records=MAX_RECORDS):
+        self.max_records = max_records
+        self._records = {}  # model name -> deque of call records
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def add(self, model_name, record):
+        with self._lock:
+            records = self._records.get(model_name)
+            if records is None:
+                records = self._records[model_name] = deque(
+                    maxlen=self.max_records
+                )
+            records.append(record)
+            collectors = list(self._collectors)
+        for collector in collectors:
+            collector.add(model_name, record)
+
+    def models(self):
+        with self._lock:
+            return list(self._records)
+
+    def records(self, model_name):
+        with self._lock:
+            return list(self._records.get(model_name, ()))
+
+    def reset(self, model_name=None):
+        with self._lock:
+            if model_name is None:
+                self._records.clear()
+            else:
+                self._records.pop(model_name, None)
+
+    @contextmanager
+    def recording(self):
+        """Collect the calls made until exit into separate stats.
+
+        Yields:
+            InferenceStats: The calls recorded meanwhile, e.g. one batch.
+        """
+        collector = InferenceStats(self.max_records)
+        with self._lock:
+            self._collectors.append(collector)
+        try:
+            yield collector
+        finally:
+            with self._lock:
+                self._collectors.remove(collector)
+
+    def summary(self, model_name=None):
+        """Get the percentiles of every stage, in milliseconds.
+
+        Returns:
+            dict: Per model name, the number of `calls`, the `peak_rss`
+                in bytes (None if unknown) and `stages`, mapping each
+                stage and "total" to its mean, p50, p90, p99 and max.
+        """
+        names = self.models() if model_name is None else [model_name]
+        summary = {}
+        for name in names:
+            records = self.records(name)
+            if not records:
+                continue
+            peaks = [r["peak_rss"] for r in records if r["peak_rss"]]
+            summary[name] = {
+                "calls": len(records),
+                "peak_rss": max(peaks) if peaks else None,
+                "stages": {
+                    key: summarize([r.get(key, 0.0) for r in records])
+                    for key in STAGES + (TOTAL,)
+                },
+            }
+        return summary
+
+    def dump(self, path, model_name=None):
+        """Write the summary to a JSON or CSV file, by its extension"""
+        summary = self.summary(model_name)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if os.path.splitext(path)[1].lower() == ".csv":
+            columns = ["mean", *(f"p{q}" for q in PERCENTILES), "max"]
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(
+                    ["model", "stage", "calls"]
+                    + [f"{column}_ms" for column in columns]
+                    + ["peak_rss_mb"]
+                )
+                for name, entry in summary.items():
+                    peak = entry["peak_rss"]
+                    peak = "" if peak is None else round(peak / 2**20, 1)
+                    for key, values in entry["stages"].items():
+                        writer.writerow(
+                            [name, key, entry["calls"]]
+                            + [round(values[c], 3) for c in columns]
+                            + [peak]
+                        )
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(summary, f, ensure_ascii=False, indent=2)
+        return path
+
+
+def dump_batch_stats(stats, dump_dir=None):
+    """Write the stats of a batch run as JSON and CSV.
+
+    Returns:
+        list: Paths of the written files, empty if nothing was recorded.
+    """
+    if not stats.models():
+        return []
+    dump_dir = dump_dir or DEFAULT_DUMP_DIR
+    base = os.path.join(dump_dir, time.strftime("batch_%Y%m%d_%H%M%S"))
+    paths = []
+    for ext in (".json", ".csv"):
+        try:
+            paths.append(stats.dump(base + ext))
+        except OSError as e:
+            logger.warning(f"Failed to write inference stats: {e}")
+    if paths:
+        logger.info(f"Inference stats written to {', '.join(paths)}")
+    return paths
+
+
+inference_stats = InferenceStats()
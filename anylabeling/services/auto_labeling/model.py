@@ -1,28 +1,27 @@
+import functools
 import os
 import pathlib
 import yaml
 import onnx
-import urllib.request
 import time
 from urllib.parse import urlparse
-from urllib.error import URLError
-
-import ssl
-
-ssl._create_default_https_context = (
-    ssl._create_unverified_context
-)  # Prevent issue when downloading models behind a proxy
-
-import socket
-
-socket.setdefaulttimeout(240)  # Prevent timeout when downloading models
 
 from abc import abstractmethod
 
 from PyQt5.QtCore import QCoreApplication, QFile, QObject
 from PyQt5.QtGui import QImage
 
+from .instrumentation import (
+    DECODE,
+    INFERENCE,
+    POSTPROCESS,
+    PREPROCESS,
+    measure_call,
+    stage,
+    timed,
+)
 from .types import AutoLabelingResult
+from .utils.download import download_file
 from anylabeling.config import get_config
 from anylabeling.views.labeling.logger import logger
 from anylabeling.views.labeling.label_file import LabelFile, LabelFileError
@@ -33,9 +32,10 @@ class Model(QObject):
         "https://github.com/CVHub520/X-AnyLabeling/releases/tag"
     )
 
-    # Add retry settings
-    MAX_RETRIES = 2
+    # Download settings
+    MAX_RETRIES = 5
     RETRY_DELAY = 3  # seconds
+    DOWNLOAD_WORKERS = 4
 
     class Meta(QObject):
         required_config_names = []
@@ -45,6 +45,31 @@ class Model(QObject):
         }
         default_output_mode = "rectangle"
 
+    def __init_subclass__(cls, **kwargs):
+        """Instrument the prediction stages defined by a model class.
+
+        Every `predict_shapes` call is recorded per model name, and
+        methods named after a stage, e.g. `preprocess`, `inference` or
+        `postprocess_v10`, are timed as that stage.
+        """
+        super().__init_subclass__(**kwargs)
+        for name, attr in list(vars(cls).items()):
+            is_static = isinstance(attr, staticmethod)
+            func = attr.__func__ if is_static else attr
+            if not callable(func) or getattr(func, "__instrumented__", False):
+                continue
+            if name == "predict_shapes":
+                wrapper = _measured(func)
+            elif PREPROCESS in name:
+                wrapper = timed(PREPROCESS)(func)
+            elif POSTPROCESS in name:
+                wrapper = timed(POSTPROCESS)(func)
+            elif name == INFERENCE:
+                wrapper = timed(INFERENCE)(func)
+            else:
+                continue
+            setattr(cls, name, staticmethod(wrapper) if is_static else wrapper)
+
     def __init__(self, model_config, on_message) -> None:
         super().__init__()
         self.on_message = on_message
@@ -101,28 +126,24 @@ class Model(QObject):
             logger.error(f"An error occurred during data migration: {str(e)}")
             return False
 
-    def download_with_retry(self, url, dest_path, progress_callback):
-        """Download file with retry mechanism"""
-        for attempt in range(self.MAX_RETRIES):
-            try:
-                if attempt > 0:
-                    logger.warning(
-                        f"Retry attempt {attempt + 1}/{self.MAX_RETRIES}"
-                    )
-                urllib.request.urlretrieve(url, dest_path, progress_callback)
-                return True
-            except URLError as e:
-                delay = self.RETRY_DELAY * (attempt + 1)
-                if attempt < self.MAX_RETRIES - 1:
-                    error_msg = f"Connection failed, retrying in {delay}s... (Attempt {attempt + 1}/{self.MAX_RETRIES} failed)"
-                    logger.warning(error_msg)
-                    self.on_message(error_msg)
-                    time.sleep(delay)
-                else:
-                    logger.warning(
-                        f"All download attempts failed ({self.MAX_RETRIES} tries)"
-                    )
-                    raise e
+    def download_with_retry(
+        self, url, dest_path, progress_callback, sha256=None
+    ):
+        """Download file with retry mechanism.
+
+        Interrupted downloads resume from the `.part` file they left, and
+        the file is verified against `sha256` when given.
+        """
+        return download_file(
+            url,
+            dest_path,
+            sha256=sha256,
+            progress_callback=progress_callback,
+            on_retry=self.on_message,
+            num_workers=self.DOWNLOAD_WORKERS,
+            max_retries=self.MAX_RETRIES,
+            retry_delay=self.RETRY_DELAY,
+        )
 
     def get_model_abs_path(self, model_config, model_path_field_name):
         """
@@ -229,11 +250,21 @@ class Model(QObject):
                 download_url[:20] + "..." + download_url[-20:]
             )
 
+        # Optional checksum, e.g. `model_path_sha256`
+        sha256 = model_config.get(f"{model_path_field_name}_sha256")
+
         logger.info(f"Downloading {download_url} to {model_abs_path}")
         try:
-
-            def _progress(count, block_size, total_size):
-                percent = int(count * block_size * 100 / total_size)
+            last_percent = None
+
+            def _progress(downloaded, total_size):
+                nonlocal last_percent
+                if not total_size:
+                    return
+                percent = int(downloaded * 100 / total_size)
+                if percent == last_percent:
+                    return
+                last_percent = percent
                 self.on_message(
                     QCoreApplication.translate(
                         "Model", "Downloading {download_url}: {percent}%"
@@ -242,7 +273,9 @@ class Model(QObject):
                     )
                 )
 
-            self.download_with_retry(download_url, model_abs_path, _progress)
+            self.download_with_retry(
+                download_url, model_abs_path, _progress, sha256
+            )
 
         except Exception as e:  # noqa
             logger.error(
@@ -280,16 +313,19 @@ class Model(QObject):
     def load_image_from_filename(filename):
         """Load image from labeling file and return image data and image path."""
         label_file = os.path.splitext(filename)[0] + ".json"
-        if QFile.exists(label_file) and LabelFile.is_label_file(label_file):
-            try:
-                label_file = LabelFile(label_file)
-            except LabelFileError as e:
-                logger.error("Error reading {}: {}".format(label_file, e))
-                return None, None
-            image_data = label_file.image_data
-        else:
-            image_data = LabelFile.load_image_file(filename)
-        image = QImage.fromData(image_data)
+        with stage(DECODE):
+            if QFile.exists(label_file) and LabelFile.is_label_file(
+                label_file
+            ):
+                try:
+                    label_file = LabelFile(label_file)
+                except LabelFileError as e:
+                    logger.error("Error reading {}: {}".format(label_file, e))
+                    return None, None
+                image_data = label_file.image_data
+            else:
+                image_data = LabelFile.load_image_file(filename)
+            image = QImage.fromData(image_data)
         if image.isNull():
             logger.error("Error reading {}".format(filename))
         return image
@@ -306,3 +342,16 @@ class Model(QObject):
         Set output mode
         """
         self.output_mode = mode
+
+
+def _measured(predict_shapes):
+    """Record every call of a `predict_shapes` under the model name"""
+
+    @functools.wraps(predict_shapes)
+    def wrapper(self, *args, **kwargs):
+        config = getattr(self, "config", None) or {}
+        with measure_call(config.get("name", type(self).__name__)):
+            return predict_shapes(self, *args, **kwargs)
+
+    wrapper.__instrumented__ = True
+    return wrapper
@@ -1,16 +1,22 @@
 import os
 import copy
 import time
-import yaml
 import importlib.resources as pkg_resources
 from threading import Lock
 
-from PyQt5.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
+from PyQt5.QtCore import QObject, Qt, QThread, pyqtSignal, pyqtSlot
 
 import anylabeling.configs as auto_labeling_configs
+from anylabeling.app_info import __preferred_device__
 from anylabeling.utils import GenericWorker
 from anylabeling.views.labeling.logger import logger
-from anylabeling.config import get_config, save_config
+from anylabeling.config import get_config, get_default_config, save_config
+from anylabeling.services.auto_labeling.config_index import ModelConfigIndex
+from anylabeling.services.auto_labeling.model_pool import (
+    ModelPool,
+    get_default_max_models,
+    get_process_memory,
+)
 from anylabeling.services.auto_labeling.types import AutoLabelingResult
 from anylabeling.services.auto_labeling.utils import TimeoutContext
 from anylabeling.services.auto_labeling import (
@@ -24,6 +30,7 @@ from anylabeling.services.auto_labeling import (
     _AUTO_LABELING_PRESERVE_EXISTING_ANNOTATIONS_STATE_MODELS,
     _AUTO_LABELING_PROMPT_MODELS,
     _ON_NEXT_FILES_CHANGED_MODELS,
+    _PIPELINED_PREDICTION_MODELS,
 )
 
 
@@ -41,6 +48,7 @@ class ModelManager(QObject):
     prediction_finished = pyqtSignal()
     request_next_files_requested = pyqtSignal()
     output_modes_changed = pyqtSignal(dict, str)
+    resident_models_changed = pyqtSignal(list)
 
     def __init__(self):
         super().__init__()
@@ -54,32 +62,55 @@ class ModelManager(QObject):
         self.model_execution_thread = None
         self.model_execution_thread_lock = Lock()
 
+        # Models stay loaded when switching to another one, up to limits.
+        # The shipped config provides the limits a user config leaves out.
+        pool_config = dict(get_default_config()["model_pool"])
+        pool_config.update(get_config().get("model_pool") or {})
+        max_models = pool_config["max_models"]
+        if max_models is None:
+            max_models = get_default_max_models(__preferred_device__)
+        self.model_pool = ModelPool(
+            max_models, pool_config["memory_budget_mb"]
+        )
+        # Remember whether the model being loaded enabled auto segmentation,
+        # to restore it when switching back to the model
+        self._auto_segmentation = False
+        self.auto_segmentation_model_selected.connect(
+            lambda: setattr(self, "_auto_segmentation", True),
+            Qt.DirectConnection,
+        )
+        self.auto_segmentation_model_unselected.connect(
+            lambda: setattr(self, "_auto_segmentation", False),
+            Qt.DirectConnection,
+        )
+
+        self.config_index = ModelConfigIndex()
         self.load_model_configs()
 
     def load_model_configs(self):
         """Load model configs"""
         # Load list of default models
-        with pkg_resources.open_text(
-            auto_labeling_configs, "models.yaml"
-        ) as f:
-            model_list = yaml.safe_load(f)
+        model_list = self.config_index.load(
+            pkg_resources.files(auto_labeling_configs).joinpath("models.yaml")
+        )
 
         # Load list of custom models
-        custom_models = get_config().get("custom_models", [])
+        config = get_config()
+        custom_models = config.get("custom_models", [])
         for custom_model in custom_models:
             custom_model["is_custom_model"] = True
 
         # Remove invalid/not found custom models
-        custom_models = [
+        valid_custom_models = [
             custom_model
             for custom_model in custom_models
             if os.path.isfile(custom_model.get("config_file", ""))
         ]
-        config = get_config()
-        config["custom_models"] = custom_models
-        save_config(config)
+        if len(valid_custom_models) != len(custom_models):
+            config["custom_models"] = valid_custom_models
+            save_config(config)
 
-        model_list += custom_models
+        model_list += valid_custom_models
 
         # Load model configs
         model_configs = []
@@ -91,21 +122,20 @@ class ModelManager(QObject):
                 resource_path = pkg_resources.files(
                     auto_labeling_configs
                 ).joinpath("auto_labeling", config_file_name)
-                with open(resource_path, "r", encoding="utf-8") as f:
-                    model_config = yaml.safe_load(f)
-                    model_config["config_file"] = str(config_file)
+                model_config = self.config_index.load(resource_path)
+                model_config["config_file"] = str(config_file)
             else:  # Config file is in local file system
-                with open(config_file, "r", encoding="utf-8") as f:
-                    model_config = yaml.safe_load(f)
-                    model_config["config_file"] = os.path.normpath(
-                        os.path.abspath(config_file)
-                    )
+                model_config = self.config_index.load(config_file)
+                model_config["config_file"] = os.path.normpath(
+                    os.path.abspath(config_file)
+                )
             is_custom = model.get("is_custom_model", False)
             model_config["is_custom_model"] = is_custom
             if is_custom and not model_config["name"].startswith("_custom_"):
                 model_config["name"] = f"_custom_{model_config['name']}"
 
             model_configs.append(model_config)
+        self.config_index.save()
 
         # Sort by last used
         for i, model_config in enumerate(model_configs):
@@ -171,9 +201,8 @@ class ModelManager(QObject):
         # Check config file content
         model_config = {}
         try:
-            with open(config_file, "r", encoding="utf-8") as f:
-                model_config = yaml.safe_load(f)
-                model_config["config_file"] = os.path.abspath(config_file)
+            model_config = self.config_index.load(config_file)
+            model_config["config_file"] = os.path.abspath(config_file)
         except Exception as e:
             logger.error(
                 "An error occurred while loading the custom model: "
@@ -312,10 +341,25 @@ class ModelManager(QObject):
 
     def _load_model(self, model_id):  # noqa: C901
         """Load and return model info"""
+        config_file = self.model_configs[model_id]["config_file"]
+        source_config = {
+            key: value
+            for key, value in self.model_configs[model_id].items()
+            if key != "last_used"
+        }
+        entry = self.model_pool.get(config_file)
+        if entry is not None:
+            if entry["source_config"] == source_config:
+                return self._activate_resident_model(entry)
+            # The config file was changed since the model was loaded
+            self.model_pool.remove(config_file)
+
+        # The current model stays resident, unless the pool is full
         if self.loaded_model_config is not None:
-            self.loaded_model_config["model"].unload()
             self.loaded_model_config = None
             self.auto_segmentation_model_unselected.emit()
+        self.model_pool.make_room()
+        memory_before = get_process_memory()
 
         model_config = copy.deepcopy(self.model_configs[model_id])
         if model_config["type"] == "yolov5":
@@ -1843,9 +1887,46 @@ class ModelManager(QObject):
         else:
             raise Exception(f"Unknown model type: {model_config['type']}")
 
+        memory_after = get_process_memory()
+        memory = 0
+        if memory_before is not None and memory_after is not None:
+            memory = memory_after - memory_before
+        self.model_pool.add(
+            config_file,
+            model_config,
+            memory,
+            source_config=source_config,
+            auto_segmentation=self._auto_segmentation,
+        )
+        self.model_pool.trim(keep=config_file)
+        self.resident_models_changed.emit(self.model_pool.keys())
+
+        self.loaded_model_config = model_config
+        return self.loaded_model_config
+
+    def _activate_resident_model(self, entry):
+        """Switch to a model of the pool without loading it again"""
+        model_config = entry["model_config"]
+        if entry["auto_segmentation"]:
+            self.auto_segmentation_model_selected.emit()
+        else:
+            self.auto_segmentation_model_unselected.emit()
+        logger.info(f"✅ Switched to resident model: {model_config['type']}")
+        self.resident_models_changed.emit(self.model_pool.keys())
+
         self.loaded_model_config = model_config
         return self.loaded_model_config
 
+    def get_resident_model(self, name):
+        """Get a loaded model by model name, e.g. to share its session
+        between the stages of a pipeline.
+
+        Returns:
+            Model: The model, or None if it is not resident.
+        """
+        model_config = self.model_pool.find(name)
+        return model_config["model"] if model_config else None
+
     def set_cache_auto_label(self, text, gid):
         """Set cache auto label"""
         if (
@@ -1930,8 +2011,15 @@ class ModelManager(QObject):
     def unload_model(self):
         """Unload model"""
         if self.loaded_model_config is not None:
-            self.loaded_model_config["model"].unload()
+            self.model_pool.remove(self.loaded_model_config["config_file"])
             self.loaded_model_config = None
+            self.resident_models_changed.emit(self.model_pool.keys())
+
+    def unload_all_models(self):
+        """Unload the current and all resident models"""
+        self.loaded_model_config = None
+        self.model_pool.clear()
+        self.resident_models_changed.emit([])
 
     def predict_shapes(
         self,
@@ -2044,6 +2132,25 @@ class ModelManager(QObject):
             )
             self.model_execution_thread.start()
 
+    def supports_pipelined_prediction(self):
+        """Check if the loaded model can predict many images at once"""
+        return (
+            self.loaded_model_config is not None
+            and self.loaded_model_config["type"]
+            in _PIPELINED_PREDICTION_MODELS
+        )
+
+    def predict_shapes_pipelined(self, image_files, text_prompt=None):
+        """Predict shapes for a list of images, overlapping the requests.
+
+        Returns:
+            iterator: One AutoLabelingResult per image, in order, or the
+                exception that made the image fail.
+        """
+        return self.loaded_model_config["model"].predict_shapes_pipelined(
+            ((None, image_file) for image_file in image_files), text_prompt
+        )
+
     def on_next_files_changed(self, next_files):
         """Run prediction on next files in advance to save inference time later"""
         if self.loaded_model_config is None:
@@ -0,0 +1,142 @@
+"""Pool of loaded models kept resident between model switches"""
+
+import os
+import threading
+from collections import OrderedDict
+
+from anylabeling.views.labeling.logger import logger
+
+
+def get_process_memory():
+    """Get the resident memory of this process in bytes, None if unknown"""
+    try:
+        import psutil
+
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def get_default_max_models(device):
+    """Number of models kept loaded when the config leaves it unset.
+
+    The memory of a model is measured as process memory, which does not
+    include the VRAM it holds on a GPU, so a GPU only keeps the model in
+    use loaded.
+    """
+    return 1 if device == "GPU" else 2
+
+
+class ModelPool:
+    """Loaded models, least recently used first.
+
+    Up to `max_models` models stay loaded, and their total memory stays
+    within `memory_budget_mb` when it is set. The memory of a model is
+    the growth of the process memory while loading it, so it includes
+    sessions and buffers, not only the weights.
+    """
+
+    def __init__(self, max_models=1, memory_budget_mb=0):
+        self.max_models = max(1, int(max_models))
+        self.memory_budget = int(memory_budget_mb or 0) * 1024 * 1024
+        self._entries = OrderedDict()  # config file -> entry
+        self._lock = threading.RLock()
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def keys(self):
+        """Get the config files of the resident models, most recent last"""
+        with self._lock:
+            return list(self._entries)
+
+    def get(self, key):
+        """Get a resident model entry and mark it as the most recent.
+
+        Returns:
+            dict: The entry, with the `model_config` the model was loaded
+                with, or None if the model is not resident.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def find(self, name):
+        """Get the model config of a resident model by model name"""
+        with self._lock:
+            for entry in self._entries.values():
+                if entry["model_config"].get("name") == name:
+                    return entry["model_config"]
+        return None
+
+    def add(self, key, model_config, memory=0, **info):
+        """Add a loaded model as the most recently used.
+
+        Args:
+            key (str): Config file of the model.
+            model_config (dict): Model config, with the model under "model".
+            memory (int): Memory used by the model in bytes, 0 if unknown.
+            **info: Stored with the entry.
+        """
+        with self._lock:
+            self._entries[key] = {
+                "model_config": model_config,
+                "memory": max(0, memory or 0),
+                **info,
+            }
+            self._entries.move_to_end(key)
+
+    def memory_usage(self):
+        with self._lock:
+            return sum(entry["memory"] for entry in self._entries.values())
+
+    def make_room(self):
+        """Unload the least recently used models to free a slot"""
+        with self._lock:
+            while len(self._entries) >= self.max_models:
+                self.remove(next(iter(self._entries)))
+
+    def trim(self, keep=None):
+        """Unload the least recently used models over the limits.
+
+        Args:
+            keep (str, optional): Config file of a model never unloaded,
+                e.g. the one just loaded.
+        """
+        with self._lock:
+            for key in list(self._entries):
+                over_budget = (
+                    self.memory_budget
+                    and self.memory_usage() > self.memory_budget
+                )
+                if len(self._entries) <= self.max_models and not over_budget:
+                    break
+                if key != keep:
+                    self.remove(key)
+
+    def remove(self, key):
+        """Unload a model and remove it from the pool"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        model_config = entry["model_config"]
+        logger.info(f"Unloading resident model: {model_config.get('name')}")
+        try:
+            model_config["model"].unload()
+        except Exception as e:  # noqa
+            logger.warning(f"Failed to unload {model_config.get('name')}: {e}")
+
+    def clear(self):
+        for key in self.keys():
+            self.remove(key)
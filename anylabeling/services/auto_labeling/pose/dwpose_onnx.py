@@ -1,7 +1,9 @@
-from typing import List, Tuple
+import mmap
+from typing import Tuple
 
 import cv2
 import numpy as np
+import onnx
 
 
 def preprocess(
@@ -15,100 +17,174 @@ def preprocess(
 
     Returns:
         tuple:
-        - resized_img (np.ndarray): Preprocessed image.
-        - center (np.ndarray): Center of image.
-        - scale (np.ndarray): Scale of image.
+        - resized_img (np.ndarray): Preprocessed crops in shape (N, h, w, 3).
+        - center (np.ndarray): Centers of the crops in shape (N, 2).
+        - scale (np.ndarray): Scales of the crops in shape (N, 2).
     """
     # get shape of image
     img_shape = img.shape[:2]
-    out_img, out_center, out_scale = [], [], []
     if len(out_bbox) == 0:
         out_bbox = [[0, 0, img_shape[1], img_shape[0]]]
-    for i in range(len(out_bbox)):
-        x0 = out_bbox[i][0]
-        y0 = out_bbox[i][1]
-        x1 = out_bbox[i][2]
-        y1 = out_bbox[i][3]
-        bbox = np.array([x0, y0, x1, y1])
+    bboxes = np.asarray(out_bbox, dtype=np.float64)[:, :4]
 
-        # get center and scale
-        center, scale = bbox_xyxy2cs(bbox, padding=1.25)
+    # get center and scale
+    out_center, out_scale = bbox_xyxy2cs(bboxes, padding=1.25)
 
+    w, h = input_size
+    out_img = np.empty((len(bboxes), int(h), int(w), 3), dtype=np.float32)
+    for i in range(len(bboxes)):
         # do affine transformation
-        resized_img, scale = top_down_affine(input_size, scale, center, img)
-
-        # normalize image
-        mean = np.array([123.675, 116.28, 103.53])
-        std = np.array([58.395, 57.12, 57.375])
-        resized_img = (resized_img - mean) / std
+        out_img[i], out_scale[i] = top_down_affine(
+            input_size, out_scale[i], out_center[i], img
+        )
 
-        out_img.append(resized_img)
-        out_center.append(center)
-        out_scale.append(scale)
+    # normalize all crops at once
+    mean = np.array([123.675, 116.28, 103.53], dtype=np.float32)
+    std = np.array([58.395, 57.12, 57.375], dtype=np.float32)
+    out_img -= mean
+    out_img /= std
 
     return out_img, out_center, out_scale
 
 
-def inference(sess, img):
+# Field numbers of ModelProto.graph and GraphProto.input in onnx.proto
+_MODEL_GRAPH_FIELD = 7
+_GRAPH_INPUT_FIELD = 11
+
+
+def _read_varint(buf, pos: int) -> Tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _find_field(buf, start: int, end: int, field_number: int):
+    """Find the first length-delimited field of a serialized message.
+
+    Returns:
+        tuple: Start and end offsets of the field value, None if absent.
+    """
+    pos = start
+    while pos < end:
+        key, pos = _read_varint(buf, pos)
+        wire_type = key & 0x7
+        if wire_type == 0:
+            _, pos = _read_varint(buf, pos)
+        elif wire_type == 1:
+            pos += 8
+        elif wire_type == 5:
+            pos += 4
+        elif wire_type == 2:
+            length, pos = _read_varint(buf, pos)
+            if key >> 3 == field_number:
+                return pos, pos + length
+            pos += length
+        else:
+            raise ValueError(f"Unsupported protobuf wire type {wire_type}")
+    return None
+
+
+def read_model_input(model_path: str) -> onnx.ValueInfoProto:
+    """Read the first graph input of an ONNX model.
+
+    Only the bytes of that input are parsed; the weights, which make up
+    nearly all of the file, are skipped over instead of being loaded.
+    """
+    with (
+        open(model_path, "rb") as f,
+        mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf,
+    ):
+        graph = _find_field(buf, 0, len(buf), _MODEL_GRAPH_FIELD)
+        value_info = graph and _find_field(buf, *graph, _GRAPH_INPUT_FIELD)
+        if value_info is None:
+            raise ValueError(f"No graph input in {model_path}")
+        start, end = value_info
+        return onnx.ValueInfoProto.FromString(buf[start:end])
+
+
+def get_batch_size(model_path: str, batch_size: int = 16) -> int:
+    """Get the number of crops that can be run in one forward pass.
+
+    Models exported with a fixed batch dimension only accept that many
+    crops; OpenCV DNN does not reject larger inputs for every such model
+    but may return wrong results, so this is checked before inference.
+
+    Args:
+        model_path (str): Path of the ONNX pose model.
+        batch_size (int): Preferred batch size for dynamic-batch models.
+
+    Returns:
+        int: Batch size to use.
+    """
+    model_input = read_model_input(model_path)
+    batch_dim = model_input.type.tensor_type.shape.dim[0]
+    if batch_dim.HasField("dim_value") and batch_dim.dim_value > 0:
+        return min(batch_size, batch_dim.dim_value)
+    return max(1, batch_size)
+
+
+def inference(sess, img, batch_size: int = 1):
     """Inference DWPose model.
 
     Args:
-        sess : ONNXRuntime session.
-        img : Input image in shape.
+        sess : OpenCV DNN network.
+        img : Preprocessed crops in shape (N, h, w, 3).
+        batch_size (int): Number of crops per forward pass, see
+            `get_batch_size`.
 
     Returns:
-        outputs : Output of DWPose model.
+        outputs : SimCC x and y outputs in shape (N, K, Wx) and (N, K, Wy).
     """
-    all_out = []
     # build input
-    for i in range(len(img)):
-        input = img[i].transpose(2, 0, 1)
-        input = input[None, :, :, :]
+    blob = np.ascontiguousarray(img.transpose(0, 3, 1, 2), dtype=np.float32)
+    outNames = sess.getUnconnectedOutLayersNames()
 
-        outNames = sess.getUnconnectedOutLayersNames()
-        sess.setInput(input)
+    simcc_x, simcc_y = [], []
+    for start in range(0, len(blob), max(1, batch_size)):
+        sess.setInput(blob[start : start + batch_size])
         outputs = sess.forward(outNames)
-        all_out.append(outputs)
+        simcc_x.append(outputs[0])
+        simcc_y.append(outputs[1])
 
-    return all_out
+    return np.concatenate(simcc_x), np.concatenate(simcc_y)
 
 
 def postprocess(
-    outputs: List[np.ndarray],
+    outputs: Tuple[np.ndarray, np.ndarray],
     model_input_size: Tuple[int, int],
-    center: Tuple[int, int],
-    scale: Tuple[int, int],
+    center: np.ndarray,
+    scale: np.ndarray,
     simcc_split_ratio: float = 2.0,
 ) -> Tuple[np.ndarray, np.ndarray]:
     """Postprocess for DWPose model output.
 
     Args:
-        outputs (np.ndarray): Output of RTMPose model.
+        outputs (tuple): SimCC x and y outputs of the whole batch.
         model_input_size (tuple): RTMPose model Input image size.
-        center (tuple): Center of bbox in shape (x, y).
-        scale (tuple): Scale of bbox in shape (w, h).
+        center (np.ndarray): Centers of the bboxes in shape (N, 2).
+        scale (np.ndarray): Scales of the bboxes in shape (N, 2).
         simcc_split_ratio (float): Split ratio of simcc.
 
     Returns:
         tuple:
-        - keypoints (np.ndarray): Rescaled keypoints.
-        - scores (np.ndarray): Model predict scores.
+        - keypoints (np.ndarray): Rescaled keypoints in shape (N, K, 2).
+        - scores (np.ndarray): Model predict scores in shape (N, K).
     """
-    all_key = []
-    all_score = []
-    for i in range(len(outputs)):
-        # use simcc to decode
-        simcc_x, simcc_y = outputs[i]
-        keypoints, scores = decode(simcc_x, simcc_y, simcc_split_ratio)
-
-        # rescale keypoints
-        keypoints = (
-            keypoints / model_input_size * scale[i] + center[i] - scale[i] / 2
-        )
-        all_key.append(keypoints[0])
-        all_score.append(scores[0])
+    # use simcc to decode
+    simcc_x, simcc_y = outputs
+    keypoints, scores = decode(simcc_x, simcc_y, simcc_split_ratio)
+
+    # rescale keypoints
+    center = np.asarray(center)[:, None, :]
+    scale = np.asarray(scale)[:, None, :]
+    keypoints = keypoints / model_input_size * scale + center - scale / 2
 
-    return np.array(all_key), np.array(all_score)
+    return keypoints, scores
 
 
 def bbox_xyxy2cs(
@@ -358,9 +434,9 @@ def decode(
     return keypoints, scores
 
 
-def inference_pose(session, out_bbox, oriImg, input_size):
+def inference_pose(session, out_bbox, oriImg, input_size, batch_size=1):
     resized_img, center, scale = preprocess(oriImg, out_bbox, input_size)
-    outputs = inference(session, resized_img)
+    outputs = inference(session, resized_img, batch_size)
     keypoints, scores = postprocess(outputs, input_size, center, scale)
 
     return keypoints, scores
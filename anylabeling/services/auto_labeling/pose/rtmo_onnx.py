@@ -24,7 +24,12 @@ class RTMO:
     ):
         super().__init__()
         self.net = OnnxBaseModel(onnx_model, device_type=device)
-        self.model_input_size = self.net.get_input_shape()[-2:]
+        input_shape = self.net.get_input_shape()
+        # None if the exported model accepts any batch size
+        self.max_batch_size = (
+            input_shape[0] if isinstance(input_shape[0], int) else None
+        )
+        self.model_input_size = input_shape[-2:]
         if not isinstance(self.model_input_size[0], int):
             self.model_input_size = model_input_size
         self.mean = mean
@@ -36,6 +41,39 @@ class RTMO:
         keypoints, scores = self.postprocess(outputs, ratio)
         return keypoints, scores
 
+    def predict_batch(self, images: List[np.ndarray], batch_size: int = 16):
+        """Run the model on several images with batched forward passes.
+
+        Args:
+            images (List[np.ndarray]): Input images, e.g. person crops.
+            batch_size (int): Maximum number of images per forward pass.
+
+        Returns:
+            list: (keypoints, scores) of each image, as returned by
+                `__call__`.
+        """
+        if self.max_batch_size is not None:
+            batch_size = min(batch_size, self.max_batch_size)
+        batch_size = max(1, batch_size)
+
+        results = []
+        for start in range(0, len(images), batch_size):
+            blobs, ratios = zip(
+                *[
+                    self.preprocess(image)
+                    for image in images[start : start + batch_size]
+                ]
+            )
+            det_outputs, pose_outputs = self.inference(np.concatenate(blobs))
+            for i, ratio in enumerate(ratios):
+                results.append(
+                    self.postprocess(
+                        (det_outputs[i : i + 1], pose_outputs[i : i + 1]),
+                        ratio,
+                    )
+                )
+        return results
+
     def inference(self, blob: np.ndarray):
         """Inference model.
 
@@ -1,5 +1,4 @@
 import os
-import cv2
 import numpy as np
 
 from PyQt5 import QtCore
@@ -11,6 +10,7 @@ from anylabeling.views.labeling.logger import logger
 from anylabeling.views.labeling.utils.opencv import qt_img_to_rgb_cv_img
 from .model import Model
 from .types import AutoLabelingResult
+from .utils import make_crop_batch
 from .engines.build_onnx_engine import OnnxBaseModel
 
 
@@ -51,19 +51,11 @@ class PULC_Attribute(Model):
 
     def preprocess(self, input_image):
         """
-        Post-processes the network's output.
+        Pre-processes the input image before feeding it to the network.
         """
-        image = cv2.resize(input_image, self.input_shape, interpolation=1)
         mean = [0.485, 0.456, 0.406]
         std = [0.229, 0.224, 0.225]
-        mean = np.array(mean).reshape((1, 1, 3)).astype("float32")
-        std = np.array(std).reshape((1, 1, 3)).astype("float32")
-        image = (
-            image.astype("float32") * np.float32(1.0 / 255.0) - mean
-        ) / std
-        image = image.transpose(2, 0, 1).astype("float32")
-        image = np.expand_dims(image, axis=0)
-        return image
+        return make_crop_batch([input_image], self.input_shape, mean, std)
 
     def postprocess(self, outs):
         """
@@ -13,6 +13,7 @@ from .model import Model
 from .types import AutoLabelingResult
 from .engines.build_onnx_engine import OnnxBaseModel
 from .utils.points_conversion import cxywh2xyxy
+from .utils.preprocess import pack_blob
 
 
 class RTDETR(Model):
@@ -87,12 +88,8 @@ class RTDETR(Model):
         image = cv2.resize(
             input_image, (0, 0), fx=ratio_w, fy=ratio_h, interpolation=2
         )
-        image = image.transpose((2, 0, 1))  # HWC to CHW
-        image = np.ascontiguousarray(image).astype("float32")
-        image /= 255  # 0 - 255 to 0.0 - 1.0
-        if len(image.shape) == 3:
-            image = image[None]
-        return image
+        # HWC to NCHW, 0 - 255 to 0.0 - 1.0
+        return pack_blob(image)
 
     def postprocess(self, input_image, outputs):
         """
@@ -1,5 +1,4 @@
 import os
-import cv2
 import numpy as np
 
 from PyQt5 import QtCore
@@ -12,6 +11,7 @@ from anylabeling.views.labeling.utils.opencv import qt_img_to_rgb_cv_img
 from .model import Model
 from .types import AutoLabelingResult
 from .engines.build_onnx_engine import OnnxBaseModel
+from .utils.preprocess import resize_blob
 
 
 class RTDETRv2(Model):
@@ -78,12 +78,8 @@ class RTDETRv2(Model):
         image_h, image_w = input_image.shape[:2]
         input_h, input_w = self.input_shape
         # Perform the pre-processing steps
-        image = cv2.resize(input_image, (input_w, input_h))
-        image = image.transpose((2, 0, 1))  # HWC to CHW
-        image = np.ascontiguousarray(image).astype("float32")
-        image /= 255  # 0 - 255 to 0.0 - 1.0
-        if len(image.shape) == 3:
-            image = image[None]
+        # HWC to NCHW, 0 - 255 to 0.0 - 1.0
+        image = resize_blob(input_image, (input_w, input_h))
         orig_size = np.array([image_w, image_h], np.int64)[None, :]
         blob = {"images": image, "orig_target_sizes": orig_size}
         return blob
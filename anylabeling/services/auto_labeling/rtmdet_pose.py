@@ -56,6 +56,7 @@ class RTMDet_Pose(Model):
         self.kpt_thr = self.config.get("kpt_threshold", 0.3)
         self.score_thr = self.config.get("score_threshold", 0.3)
         self.kpt_classes = self.config.get("keypoints", [])
+        self.pose_batch_size = self.config.get("pose_batch_size", 16)
         self.rtmdet = RTMDet(det_model_abs_path, score_thr=self.score_thr)
         if self.config["pose"] == "rtmo":
             self.pose = RTMO(pose_model_abs_path)
@@ -78,11 +79,28 @@ class RTMDet_Pose(Model):
             return []
 
         det_results = self.rtmdet(image)
+        boxes = [list(map(int, bbox)) for bbox in det_results]
 
-        shapes = []
-        for i, bbox in enumerate(det_results):
-            x1, y1, x2, y2 = list(map(int, bbox))
+        # Run all person crops through the pose model in batches
+        pose_results = [([], [])] * len(boxes)
+        crops = {
+            i: image[y1:y2, x1:x2] for i, (x1, y1, x2, y2) in enumerate(boxes)
+        }
+        crops = {i: crop for i, crop in crops.items() if crop.size > 0}
+        if self.pose is not None and crops:
+            try:
+                results = self.pose.predict_batch(
+                    list(crops.values()), self.pose_batch_size
+                )
+                for i, result in zip(crops, results):
+                    pose_results[i] = result
+            except Exception as e:  # noqa
+                logger.warning(f"Could not inference pose model: {e}")
 
+        shapes = []
+        for i, ((x1, y1, x2, y2), (keypoints, scores)) in enumerate(
+            zip(boxes, pose_results)
+        ):
             if self.draw_det_box:
                 rectangle_shape = Shape(
                     label="person", shape_type="rectangle", group_id=int(i)
@@ -93,12 +111,7 @@ class RTMDet_Pose(Model):
                 rectangle_shape.add_point(QtCore.QPointF(x1, y2))
                 shapes.append(rectangle_shape)
 
-            img = image[y1:y2, x1:x2]
-            try:
-                keypoints, scores = self.pose(img)
-            except Exception:
-                keypoints, scores = [], []
-            if not self.pose and len(keypoints) == 0:
+            if len(keypoints) == 0:
                 continue
             for j in range(len(keypoints[0])):
                 kpt_point, score = keypoints[0][j], scores[0][j]
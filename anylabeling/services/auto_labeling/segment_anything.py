@@ -49,6 +49,7 @@ class SegmentAnything(Model):
             "polygon": QCoreApplication.translate("Model", "Polygon"),
             "rectangle": QCoreApplication.translate("Model", "Rectangle"),
             "rotation": QCoreApplication.translate("Model", "Rotation"),
+            "mask": QCoreApplication.translate("Model", "Mask"),
         }
         default_output_mode = "polygon"
 
@@ -139,6 +140,16 @@ class SegmentAnything(Model):
         masks[masks > 0.0] = 255
         masks[masks <= 0.0] = 0
         masks = masks.astype(np.uint8)
+        if self.output_mode == "mask":
+            if not masks.any():
+                return []
+            # Keep the pixels, holes included, instead of contours
+            shape = Shape(flags={}, shape_type="mask")
+            shape.set_mask(masks > 0)
+            shape.label = "AUTOLABEL_OBJECT"
+            shape.selected = False
+            return [shape]
+
         contours, _ = cv2.findContours(
             masks, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE
         )
@@ -1,6 +1,8 @@
 from .box import *
+from .crop_batch import *
 from .general import *
 from .points_conversion import *
+from .preprocess import *
 
 import queue
 import threading
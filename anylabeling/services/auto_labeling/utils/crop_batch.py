@@ -0,0 +1,106 @@
+import numpy as np
+
+from .preprocess import resize_blob
+
+
+def crop_boxes(image, boxes):
+    """
+    Crop boxes out of an image.
+
+    Boxes are clipped to the image; boxes that end up empty are dropped.
+
+    Args:
+        image (numpy.ndarray): Image of shape (H, W, C).
+        boxes (iterable): Boxes as (x1, y1, x2, y2).
+
+    Returns:
+        tuple: Indexes of the kept boxes and their crops.
+    """
+    height, width = image.shape[:2]
+    indexes, crops = [], []
+    for i, box in enumerate(boxes):
+        x1, y1, x2, y2 = map(int, box[:4])
+        x1, x2 = max(0, x1), min(width, x2)
+        y1, y2 = max(0, y1), min(height, y2)
+        if x2 <= x1 or y2 <= y1:
+            continue
+        indexes.append(i)
+        crops.append(image[y1:y2, x1:x2])
+    return indexes, crops
+
+
+def make_crop_batch(crops, size, mean=0.0, std=1.0, scale=1 / 255.0):
+    """
+    Resize and normalize crops into one NCHW float32 batch.
+
+    Every crop is resized and packed straight into its slot of the
+    batch, see `resize_blob`.
+
+    Args:
+        crops (list): Images of shape (h, w, 3), of any size.
+        size (tuple): Network input size as (width, height).
+        mean (float or sequence): Per-channel mean, after scaling.
+        std (float or sequence): Per-channel standard deviation.
+        scale (float): Factor applied to the pixel values first.
+
+    Returns:
+        numpy.ndarray: Contiguous batch of shape (N, 3, height, width).
+    """
+    width, height = map(int, size)
+    batch = np.empty((len(crops), 3, height, width), dtype=np.float32)
+    for i, crop in enumerate(crops):
+        resize_blob(
+            crop,
+            (width, height),
+            mean=mean,
+            std=std,
+            scale=scale,
+            out=batch[i : i + 1],
+        )
+    return batch
+
+
+def limit_batch_size(net, batch_size):
+    """
+    Limit a batch size to what an ONNX model accepts.
+
+    Models exported with a fixed batch dimension only take that many
+    inputs per run.
+
+    Args:
+        net (OnnxBaseModel): The model.
+        batch_size (int): Preferred batch size.
+
+    Returns:
+        int: Batch size to use.
+    """
+    batch_dim = net.get_input_shape()[0]
+    if isinstance(batch_dim, int) and batch_dim > 0:
+        batch_size = min(batch_size, batch_dim)
+    return max(1, int(batch_size))
+
+
+def run_batched(net, blob, batch_size=32):
+    """
+    Run an ONNX model on a batch in chunks.
+
+    Args:
+        net (OnnxBaseModel): The model.
+        blob (numpy.ndarray): Inputs stacked along the first axis.
+        batch_size (int): Maximum number of inputs per run, see
+            `limit_batch_size`.
+
+    Returns:
+        list: Every output of the model, concatenated over the chunks.
+    """
+    batch_size = limit_batch_size(net, batch_size)
+    chunks = []
+    for start in range(0, len(blob), batch_size):
+        chunks.append(
+            net.get_ort_inference(
+                blob[start : start + batch_size], extract=False
+            )
+        )
+    if not chunks:
+        return []
+    return [np.concatenate(outs) for outs in zip(*chunks)]
@@ -0,0 +1,425 @@
+"""Resumable, verified downloads of model files"""
+
+import hashlib
+import json
+import os
+import socket
+import ssl
+import threading
+import time
+import urllib.request
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from http.client import HTTPException
+from urllib.error import HTTPError, URLError
+
+from anylabeling.views.labeling.logger import logger
+
+__all__ = ["DownloadError", "FileLock", "download_file", "sha256sum"]
+
+CHUNK_SIZE = 8 * 1024 * 1024  # bytes per range request
+BLOCK_SIZE = 256 * 1024  # bytes per read
+DEFAULT_WORKERS = 4
+DEFAULT_TIMEOUT = 60  # seconds, per socket operation
+MAX_RETRIES = 5
+RETRY_DELAY = 2  # seconds, grows linearly with the attempt
+LOCK_STALE_TIMEOUT = 120  # seconds without a refresh of the lock file
+
+RETRYABLE_ERRORS = (URLError, HTTPException, socket.timeout, OSError)
+
+
+class DownloadError(Exception):
+    """A download failed or its content does not match the expected hash"""
+
+
+def sha256sum(path, block_size=1024 * 1024):
+    """Compute the SHA-256 hex digest of a file"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def create_ssl_context():
+    """Verified SSL context, unless XANYLABELING_SSL_VERIFY is 0/false.
+
+    Disabling verification is an escape hatch for intercepting proxies,
+    it only applies to model downloads.
+    """
+    if os.getenv("XANYLABELING_SSL_VERIFY", "1").lower() in ("0", "false"):
+        return ssl._create_unverified_context()
+    return ssl.create_default_context()
+
+
+class FileLock:
+    """Inter-process lock held by exclusively creating a lock file.
+
+    The holder refreshes the modification time of the lock file while it
+    works; a lock left unrefreshed for `stale_timeout` seconds, e.g. by a
+    crashed process, is broken by the next process waiting for it.
+    """
+
+    def __init__(
+        self, path, stale_timeout=LOCK_STALE_TIMEOUT, poll_interval=0.5
+    ):
+        self.path = path
+        self.stale_timeout = stale_timeout
+        self.poll_interval = poll_interval
+        self._last_refresh = 0
+
+    def acquire(self, timeout=None, on_wait=None):
+        """Wait for the lock.
+
+        Args:
+            timeout (float, optional): Give up after this many seconds.
+            on_wait (callable, optional): Called once if the lock is held
+                by someone else.
+
+        Raises:
+            TimeoutError: If the lock was not acquired within `timeout`.
+        """
+        start = time.monotonic()
+        waiting = False
+        while True:
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                pass
+            else:
+                with os.fdopen(fd, "w") as f:
+                    f.write(f"{os.getpid()}\n")
+                self._last_refresh = time.monotonic()
+                return
+
+            try:
+                age = time.time() - os.path.getmtime(self.path)
+            except OSError:
+                continue  # Released in the meantime
+            if age > self.stale_timeout:
+                logger.warning(f"Removing stale lock {self.path}")
+                try:
+                    os.remove(self.path)
+                except OSError:
+                    pass
+                continue
+
+            if not waiting and on_wait is not None:
+                on_wait()
+            waiting = True
+            if timeout is not None and time.monotonic() - start > timeout:
+                raise TimeoutError(f"Timed out waiting for {self.path}")
+            time.sleep(self.poll_interval)
+
+    def refresh(self):
+        """Mark the lock as still in use"""
+        now = time.monotonic()
+        if now - self._last_refresh > self.stale_timeout / 10:
+            self._last_refresh = now
+            try:
+                os.utime(self.path)
+            except OSError:
+                pass
+
+    def release(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+class Downloader:
+    """Download one URL into a `.part` file, then move it in place.
+
+    When the server supports range requests, the file is fetched as
+    fixed-size chunks by several workers. Finished chunks are recorded
+    next to the `.part` file, so an interrupted download resumes with the
+    missing chunks only. Otherwise the file is streamed in one request.
+    """
+
+    def __init__(
+        self,
+        url,
+        dest_path,
+        progress_callback=None,
+        num_workers=DEFAULT_WORKERS,
+        chunk_size=CHUNK_SIZE,
+        timeout=DEFAULT_TIMEOUT,
+        max_retries=MAX_RETRIES,
+        retry_delay=RETRY_DELAY,
+        on_retry=None,
+        lock=None,
+    ):
+        self.url = url
+        self.dest_path = dest_path
+        self.part_path = f"{dest_path}.part"
+        self.state_path = f"{self.part_path}.json"
+        self.progress_callback = progress_callback
+        self.num_workers = max(1, num_workers)
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.on_retry = on_retry
+        self.lock = lock
+        self.ssl_context = create_ssl_context()
+
+        self.total_size = None
+        self.downloaded = 0
+        self._progress_lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def open(self, start=None, end=None):
+        headers = {"User-Agent": "X-AnyLabeling"}
+        if start is not None:
+            end = "" if end is None else end
+            headers["Range"] = f"bytes={start}-{end}"
+        request = urllib.request.Request(self.url, headers=headers)
+        return urllib.request.urlopen(
+            request, timeout=self.timeout, context=self.ssl_context
+        )
+
+    def probe(self):
+        """Get the file size and whether range requests are supported"""
+        with self.open(0, 0) as response:
+            if response.status == 206:
+                content_range = response.headers.get("Content-Range", "")
+                total = content_range.rpartition("/")[2]
+                if total.isdigit():
+                    return int(total), True
+            length = response.headers.get("Content-Length")
+            return (int(length) if length else None), False
+
+    def add_progress(self, num_bytes):
+        with self._progress_lock:
+            self.downloaded += num_bytes
+            if self.lock is not None:
+                self.lock.refresh()
+            if self.progress_callback is not None:
+                self.progress_callback(self.downloaded, self.total_size)
+
+    def with_retry(self, func, *args):
+        for attempt in range(self.max_retries + 1):
+            if self._stop_event.is_set():
+                raise DownloadError("Download cancelled")
+            try:
+                return func(*args)
+            except HTTPError as e:
+                # Client errors will not get better
+                if e.code < 500 and e.code != 429:
+                    raise
+                error = e
+            except RETRYABLE_ERRORS as e:
+                error = e
+            if attempt == self.max_retries:
+                raise error
+            delay = self.retry_delay * (attempt + 1)
+            message = (
+                f"Connection failed, retrying in {delay}s... "
+                f"(Attempt {attempt + 1}/{self.max_retries} failed)"
+            )
+            logger.warning(f"{message}: {error}")
+            if self.on_retry is not None:
+                self.on_retry(message)
+            time.sleep(delay)
+
+    def load_state(self, num_chunks):
+        """Get the finished chunks of a previous attempt"""
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            if (
+                state["size"] == self.total_size
+                and state["chunk_size"] == self.chunk_size
+                and os.path.getsize(self.part_path) == self.total_size
+            ):
+                return {i for i in state["done"] if 0 <= i < num_chunks}
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return set()
+
+    def save_state(self, done):
+        temp_path = f"{self.state_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "url": self.url,
+                    "size": self.total_size,
+                    "chunk_size": self.chunk_size,
+                    "done": sorted(done),
+                },
+                f,
+            )
+        os.replace(temp_path, self.state_path)
+
+    def fetch_chunk(self, index):
+        start = index * self.chunk_size
+        end = min(start + self.chunk_size, self.total_size) - 1
+        received = 0
+        try:
+            with (
+                self.open(start, end) as response,
+                open(self.part_path, "r+b") as f,
+            ):
+                if response.status != 206:
+                    raise DownloadError("Server ignored the range request")
+                f.seek(start)
+                while received <= end - start:
+                    if self._stop_event.is_set():
+                        raise DownloadError("Download cancelled")
+                    block = response.read(
+                        min(BLOCK_SIZE, end - start + 1 - received)
+                    )
+                    if not block:
+                        raise HTTPException(
+                            f"Connection closed at byte {start + received}"
+                        )
+                    f.write(block)
+                    received += len(block)
+                    self.add_progress(len(block))
+        except BaseException:
+            # The chunk is downloaded again from its start
+            self.add_progress(-received)
+            raise
+
+    def download_chunks(self):
+        num_chunks = -(-self.total_size // self.chunk_size)
+        done = self.load_state(num_chunks)
+        if not done:
+            with open(self.part_path, "wb") as f:
+                f.truncate(self.total_size)
+        else:
+            logger.info(
+                f"Resuming download of {self.dest_path}: "
+                f"{len(done)}/{num_chunks} chunks done"
+            )
+        self.add_progress(
+            sum(
+                min(self.chunk_size, self.total_size - i * self.chunk_size)
+                for i in done
+            )
+        )
+
+        state_lock = threading.Lock()
+
+        def fetch(index):
+            self.with_retry(self.fetch_chunk, index)
+            with state_lock:
+                done.add(index)
+                self.save_state(done)
+
+        pending = [i for i in range(num_chunks) if i not in done]
+        num_workers = min(self.num_workers, len(pending)) or 1
+        with ThreadPoolExecutor(num_workers) as executor:
+            futures = [executor.submit(fetch, i) for i in pending]
+            finished, _ = wait(futures, return_when=FIRST_EXCEPTION)
+            for future in finished:
+                if future.exception() is not None:
+                    self._stop_event.set()
+                    raise future.exception()
+
+    def stream(self):
+        def fetch():
+            with self.open() as response, open(self.part_path, "wb") as f:
+                self.downloaded = 0
+                while True:
+                    block = response.read(BLOCK_SIZE)
+                    if not block:
+                        break
+                    f.write(block)
+                    self.add_progress(len(block))
+            if self.total_size is not None and self.downloaded != (
+                self.total_size
+            ):
+                raise HTTPException(
+                    f"Received {self.downloaded} of {self.total_size} bytes"
+                )
+
+        self.with_retry(fetch)
+
+    def run(self):
+        self.total_size, ranges = self.with_retry(self.probe)
+        if ranges and self.total_size > 0:
+            self.download_chunks()
+        else:
+            self.stream()
+
+    def cleanup(self):
+        for path in (self.part_path, self.state_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def download_file(
+    url,
+    dest_path,
+    sha256=None,
+    progress_callback=None,
+    on_retry=None,
+    num_workers=DEFAULT_WORKERS,
+    **kwargs,
+):
+    """Download a file, resuming an earlier interrupted download.
+
+    Concurrent calls for the same destination, from this or another
+    process, are serialized with a lock file: the first one downloads,
+    the others wait and then reuse its file.
+
+    Args:
+        url (str): File URL.
+        dest_path (str): Where to save the file.
+        sha256 (str, optional): Expected SHA-256 hex digest.
+        progress_callback (callable, optional): Called with the number of
+            bytes downloaded and the total size (None if unknown).
+        on_retry (callable, optional): Called with a message before a
+            failed request is retried.
+        num_workers (int): Number of parallel range requests.
+
+    Returns:
+        str: `dest_path`.
+
+    Raises:
+        DownloadError: If the content does not match `sha256`.
+    """
+    lock = FileLock(f"{dest_path}.lock")
+    lock.acquire(
+        on_wait=lambda: logger.info(
+            f"Waiting for another download of {dest_path}"
+        )
+    )
+    try:
+        if os.path.exists(dest_path):
+            return dest_path
+
+        downloader = Downloader(
+            url,
+            dest_path,
+            progress_callback=progress_callback,
+            num_workers=num_workers,
+            on_retry=on_retry,
+            lock=lock,
+            **kwargs,
+        )
+        downloader.run()
+
+        if sha256:
+            digest = sha256sum(downloader.part_path)
+            if digest.lower() != sha256.lower():
+                downloader.cleanup()
+                raise DownloadError(
+                    f"SHA-256 mismatch for {url}: "
+                    f"expected {sha256}, got {digest}"
+                )
+        os.replace(downloader.part_path, dest_path)
+        downloader.cleanup()
+        return dest_path
+    finally:
+        lock.release()
@@ -456,6 +456,8 @@ def scale_masks(masks, shape, padding=True):
         (shape[1], shape[0]),
         interpolation=cv2.INTER_LINEAR,
     )
+    if masks.ndim == 2:  # a single mask loses its channel axis
+        masks = masks[..., None]
     masks = masks.transpose((2, 0, 1))
     return masks
 
@@ -0,0 +1,176 @@
+import cv2
+import numpy as np
+
+
+def get_blob_buffer(out, shape):
+    """Reuse `out` as a float32 blob of `shape`, or allocate a new one"""
+    shape = tuple(int(x) for x in shape)
+    if out is None or out.shape != shape or out.dtype != np.float32:
+        out = np.empty(shape, dtype=np.float32)
+    return out
+
+
+def get_normalization(channels, mean=0.0, std=1.0, scale=1 / 255.0):
+    """
+    Fold scaling and normalization into one multiply and one subtract.
+
+    ``(x * scale - mean) / std`` is computed as ``x * alpha - beta``.
+
+    Returns:
+        tuple: `alpha` and `beta`, float32 arrays of shape (C, 1, 1).
+    """
+    std = np.broadcast_to(np.asarray(std, dtype=np.float32), (channels,))
+    mean = np.broadcast_to(np.asarray(mean, dtype=np.float32), (channels,))
+    alpha = (np.float32(scale) / std).reshape(-1, 1, 1)
+    beta = (mean / std).reshape(-1, 1, 1)
+    return alpha, beta
+
+
+def pack_blob(
+    image,
+    size=None,
+    top=0,
+    left=0,
+    color=114,
+    mean=0.0,
+    std=1.0,
+    scale=1 / 255.0,
+    swap_rb=False,
+    out=None,
+):
+    """
+    Pack an HWC image into a normalized NCHW float32 blob.
+
+    Color conversion, HWC to CHW transposition, the cast to float32 and
+    scaling happen in a single pass that writes straight into the blob;
+    the mean is then subtracted in place. When the blob is larger than
+    the image, the image is placed at (`top`, `left`) and the rest is
+    filled with the normalized `color`.
+
+    Args:
+        image (numpy.ndarray): Image of shape (H, W, C) or (H, W).
+        size (tuple): Blob size as (width, height), defaults to the
+            image size.
+        top (int): Row of the image in the blob.
+        left (int): Column of the image in the blob.
+        color (int or sequence): Padding color, in the image channel
+            order.
+        mean (float or sequence): Per-channel mean, after scaling.
+        std (float or sequence): Per-channel standard deviation.
+        scale (float): Factor applied to the pixel values first.
+        swap_rb (bool): Swap the first and last channels, e.g. BGR to
+            RGB.
+        out (numpy.ndarray): Blob to reuse if its shape matches.
+
+    Returns:
+        numpy.ndarray: Contiguous blob of shape (1, C, height, width).
+    """
+    if image.ndim == 2:
+        image = image[:, :, None]
+    height, width, channels = image.shape
+    if size is None:
+        size = (width, height)
+    blob_width, blob_height = map(int, size)
+    out = get_blob_buffer(out, (1, channels, blob_height, blob_width))
+    alpha, beta = get_normalization(channels, mean, std, scale)
+    if swap_rb:
+        image = image[..., ::-1]
+
+    bottom, right = top + height, left + width
+    if (top, left, bottom, right) != (0, 0, blob_height, blob_width):
+        color = np.broadcast_to(np.asarray(color, np.float32), (channels,))
+        if swap_rb:
+            color = color[::-1]
+        fill = color.reshape(-1, 1, 1) * alpha - beta
+        blob = out[0]
+        blob[:, :top] = fill
+        blob[:, bottom:] = fill
+        blob[:, top:bottom, :left] = fill
+        blob[:, top:bottom, right:] = fill
+
+    region = out[0, :, top:bottom, left:right]
+    np.multiply(image.transpose(2, 0, 1), alpha, out=region, casting="unsafe")
+    if beta.any():
+        region -= beta
+    return out
+
+
+def resize_blob(
+    image,
+    size,
+    interpolation=cv2.INTER_LINEAR,
+    mean=0.0,
+    std=1.0,
+    scale=1 / 255.0,
+    swap_rb=False,
+    out=None,
+):
+    """
+    Resize an image and pack it into a normalized NCHW float32 blob.
+
+    Args:
+        image (numpy.ndarray): Image of shape (H, W, C).
+        size (tuple): Network input size as (width, height).
+        interpolation (int): OpenCV interpolation flag.
+        mean, std, scale, swap_rb, out: See `pack_blob`.
+
+    Returns:
+        numpy.ndarray: Blob of shape (1, C, height, width).
+    """
+    size = tuple(map(int, size))
+    if image.shape[1::-1] != size:
+        image = cv2.resize(image, size, interpolation=interpolation)
+    return pack_blob(
+        image, mean=mean, std=std, scale=scale, swap_rb=swap_rb, out=out
+    )
+
+
+def letterbox_blob(
+    image,
+    new_shape,
+    color=(114, 114, 114),
+    mean=0.0,
+    std=1.0,
+    scale=1 / 255.0,
+    swap_rb=False,
+    out=None,
+):
+    """
+    Letterbox an image into a normalized NCHW float32 blob.
+
+    Gives the same result as `letterbox` followed by packing, without
+    the padded full-size temporary.
+
+    Args:
+        image (numpy.ndarray): Image of shape (H, W, C).
+        new_shape (int or tuple): Network input size as (height, width).
+        color (sequence): Padding color, in the image channel order.
+        mean, std, scale, swap_rb, out: See `pack_blob`.
+
+    Returns:
+        tuple: The blob of shape (1, C, height, width), the
+            (w_ratio, h_ratio) scale and the (dw, dh) padding, like
+            `letterbox`.
+    """
+    if isinstance(new_shape, int):
+        new_shape = (new_shape, new_shape)
+    height, width = image.shape[:2]
+    r = min(new_shape[0] / height, new_shape[1] / width)
+    new_unpad = int(round(width * r)), int(round(height * r))
+    dw = (new_shape[1] - new_unpad[0]) / 2
+    dh = (new_shape[0] - new_unpad[1]) / 2
+    if (width, height) != new_unpad:
+        image = cv2.resize(image, new_unpad, interpolation=cv2.INTER_LINEAR)
+    blob = pack_blob(
+        image,
+        size=(new_shape[1], new_shape[0]),
+        top=int(round(dh - 0.1)),
+        left=int(round(dw - 0.1)),
+        color=color,
+        mean=mean,
+        std=std,
+        scale=scale,
+        swap_rb=swap_rb,
+        out=out,
+    )
+    return blob, (r, r), (dw, dh)
@@ -12,7 +12,7 @@ from anylabeling.views.labeling.utils.opencv import qt_img_to_rgb_cv_img
 from .model import Model
 from .types import AutoLabelingResult
 from .engines.build_onnx_engine import OnnxBaseModel
-from .utils import xywh2xyxy
+from .utils import make_crop_batch, pack_blob, run_batched, xywh2xyxy
 
 
 class YOLOv5CarPlateDetRec(Model):
@@ -64,6 +64,7 @@ class YOLOv5CarPlateDetRec(Model):
         self.mean = self.config.get("mean", 0.588)
         self.iou_thres = self.config.get("iou_thres", 0.5)
         self.conf_thres = self.config.get("conf_thres", 0.3)
+        self.rec_batch_size = self.config.get("rec_batch_size", 32)
         self.names = self.config["names"]
         self.classes = self.config["classes"]
 
@@ -74,10 +75,7 @@ class YOLOv5CarPlateDetRec(Model):
 
     def preprocess(self, image):
         img, r, left, top = self._letterbox(image, self.det_input_shape)
-        img = img.transpose(2, 0, 1).astype(np.float32)
-        img /= 255.0
-        img = img.reshape(1, *img.shape)
-        return img, r, left, top
+        return pack_blob(img), r, left, top
 
     def postprocess(self, dets, r, left, top):
         choice = dets[:, :, 4] > self.conf_thres
@@ -93,29 +91,25 @@ class YOLOv5CarPlateDetRec(Model):
         output = self.restore_box(output, r, left, top)
         return output
 
-    def rec_pre_processing(self, img, size=(168, 48)):
-        # Preprocessing before recognition
-        img = cv2.resize(img, size)
-        img = img.astype(np.float32)
-        img = (img / 255 - self.mean) / self.std
-        img = img.transpose(2, 0, 1)
-        img = img.reshape(1, *img.shape)
-        return img
-
-    def get_plate_result(self, img):
-        blob = self.rec_pre_processing(img)
-        y_onnx_plate, y_onnx_color = self.rec_net.get_ort_inference(
-            blob, extract=False
+    def rec_pre_processing(self, imgs, size=(168, 48)):
+        # Preprocessing before recognition, all plates in one batch
+        return make_crop_batch(imgs, size, self.mean, self.std)
+
+    def get_plate_result(self, imgs):
+        blob = self.rec_pre_processing(imgs)
+        y_onnx_plate, y_onnx_color = run_batched(
+            self.rec_net, blob, self.rec_batch_size
         )
         index = np.argmax(y_onnx_plate, axis=-1)
-        index_color = np.argmax(y_onnx_color)
-        plate_color = self.classes[index_color]
-        plate_no = self.decodePlate(index[0])
-        return plate_no, plate_color
+        index_color = np.argmax(y_onnx_color.reshape(len(imgs), -1), axis=-1)
+        plate_colors = [self.classes[i] for i in index_color]
+        plate_nos = [self.decodePlate(preds) for preds in index]
+        return plate_nos, plate_colors
 
     def rec_plate(self, outputs, img0):
         # Recognize license plates
         dict_list = []
+        roi_imgs = []
 
         for output in outputs:
             result_dict = {}
@@ -124,20 +118,30 @@ class YOLOv5CarPlateDetRec(Model):
             roi_img = self.four_point_transform(img0, landmarks)
             label = int(output[-1])
             score = output[4]
+            if roi_img.size == 0:
+                continue
 
             if label == 1:  # Represents a double-layer license plate
                 roi_img = self.get_split_merge(roi_img)
 
-            plate_no, plate_color = self.get_plate_result(roi_img)
-
             result_dict["rect"] = rect
             result_dict["score"] = score
             result_dict["landmarks"] = landmarks.tolist()
-            result_dict["plate_no"] = plate_no
             result_dict["roi_height"] = roi_img.shape[0]
-            result_dict["plate_color"] = plate_color
 
             dict_list.append(result_dict)
+            roi_imgs.append(roi_img)
+
+        if not roi_imgs:
+            return dict_list
+
+        # Recognize all the plates in batched runs
+        plate_nos, plate_colors = self.get_plate_result(roi_imgs)
+        for result_dict, plate_no, plate_color in zip(
+            dict_list, plate_nos, plate_colors
+        ):
+            result_dict["plate_no"] = plate_no
+            result_dict["plate_color"] = plate_color
 
         return dict_list
 
@@ -12,7 +12,7 @@ from anylabeling.views.labeling.logger import logger
 from anylabeling.views.labeling.utils.opencv import qt_img_to_rgb_cv_img
 from .model import Model
 from .types import AutoLabelingResult
-from .utils.general import letterbox
+from .utils.preprocess import letterbox_blob
 from .utils.points_conversion import rbox2poly
 from .engines.build_onnx_engine import OnnxBaseModel
 
@@ -85,15 +85,8 @@ class YOLOv5OBB(Model):
         """
         Pre-process the input RGB image before feeding it to the network.
         """
-        img = letterbox(img, self.input_shape, auto=False, stride=self.stride)[
-            0
-        ]
-        img = img.transpose((2, 0, 1))  # HWC to CHW
-        img = np.ascontiguousarray(img).astype("float32")
-        img /= 255  # 0 - 255 to 0.0 - 1.0
-        if len(img.shape) == 3:
-            img = img[None]  # expand for batch dim
-        return img
+        blob, _, _ = letterbox_blob(img, self.input_shape)
+        return blob
 
     def postprocess(self, outputs, old_shape):
         """
@@ -1,5 +1,4 @@
 import os
-import cv2
 import numpy as np
 
 from PyQt5 import QtCore
@@ -10,7 +9,7 @@ from anylabeling.views.labeling.shape import Shape
 from anylabeling.views.labeling.logger import logger
 from anylabeling.views.labeling.utils.opencv import qt_img_to_rgb_cv_img
 from .types import AutoLabelingResult
-from .utils import softmax
+from .utils import crop_boxes, make_crop_batch, run_batched
 from .__base__.yolo import YOLO
 from .engines.build_onnx_engine import OnnxBaseModel
 
@@ -44,6 +43,7 @@ class YOLOv5_ResNet(YOLO):
         self.cls_net = OnnxBaseModel(model_abs_path, __preferred_device__)
         self.cls_classes = self.config["cls_classes"]
         self.cls_input_shape = self.cls_net.get_input_shape()[-2:]
+        self.cls_batch_size = self.config.get("cls_batch_size", 32)
 
         """Detection"""
         model_abs_path = self.get_model_abs_path(self.config, "model_path")
@@ -93,54 +93,39 @@ class YOLOv5_ResNet(YOLO):
                 if item in self.filter_classes
             ]
 
-    def cls_preprocess(self, input_image, mean=None, std=None):
+    def cls_preprocess(self, images, mean=None, std=None):
         """
-        Pre-processes the input image before feeding it to the network.
+        Pre-processes the crops before feeding them to the network.
 
         Args:
-            input_image (numpy.ndarray): The input image to be processed.
+            images (list): The crops to be processed.
             mean (numpy.ndarray): Mean values for normalization.
                 If not provided, default values are used.
             std (numpy.ndarray): Standard deviation values for normalization.
                 If not provided, default values are used.
 
         Returns:
-            numpy.ndarray: The processed input image.
+            numpy.ndarray: The batch of processed crops.
         """
         h, w = self.cls_input_shape
-        # Resize the input image
-        input_data = cv2.resize(input_image, (w, h))
-        # Transpose the dimensions of the image
-        input_data = input_data.transpose((2, 0, 1))
-        if not mean:
+        if mean is None:
             mean = np.array([0.485, 0.456, 0.406])
-        if not std:
+        if std is None:
             std = np.array([0.229, 0.224, 0.225])
-        norm_img_data = np.zeros(input_data.shape).astype("float32")
-        # Normalize the image data
-        for channel in range(input_data.shape[0]):
-            norm_img_data[channel, :, :] = (
-                input_data[channel, :, :] / 255 - mean[channel]
-            ) / std[channel]
-        blob = norm_img_data.reshape(1, 3, h, w).astype("float32")
-        return blob
-
-    def cls_postprocess(self, outs, topk=1):
+        return make_crop_batch(images, (w, h), mean, std)
+
+    def cls_postprocess(self, outs):
         """
         Classification: Post-processes the output of the network.
 
         Args:
-            outs (list): Output predictions from the network.
-            topk (int): Number of top predictions to consider. Default is 1.
+            outs (numpy.ndarray): Scores of the batch, one row per crop.
 
         Returns:
-            str: Predicted label.
+            list: Predicted label of each crop.
         """
-        res = softmax(np.array(outs)).tolist()
-        index = np.argmax(res)
-        label = str(self.cls_classes[index])
-
-        return label
+        indexes = np.argmax(outs.reshape(len(outs), -1), axis=-1)
+        return [str(self.cls_classes[index]) for index in indexes]
 
     def predict_shapes(self, image, image_path=None):
         """
@@ -161,15 +146,17 @@ class YOLOv5_ResNet(YOLO):
         outputs = self.net.get_ort_inference(blob=blob, extract=False)
         boxes, _, _, _, _ = self.postprocess(outputs)
 
-        shapes = []
-        for box in boxes:
-            x1, y1, x2, y2 = list(map(int, box))
-            img = image[y1:y2, x1:x2]
-
-            blob = self.cls_preprocess(img)
-            predictions = self.cls_net.get_ort_inference(blob, extract=False)
-            label = self.cls_postprocess(predictions)
+        # Classify all the detections in batched runs
+        indexes, crops = crop_boxes(image, boxes)
+        labels = []
+        if crops:
+            blob = self.cls_preprocess(crops)
+            outputs = run_batched(self.cls_net, blob, self.cls_batch_size)
+            labels = self.cls_postprocess(outputs[0])
 
+        shapes = []
+        for i, label in zip(indexes, labels):
+            x1, y1, x2, y2 = list(map(int, boxes[i]))
             shape = Shape(label=label, shape_type="rectangle")
             shape.add_point(QtCore.QPointF(x1, y1))
             shape.add_point(QtCore.QPointF(x2, y1))
@@ -11,6 +11,7 @@ from anylabeling.views.labeling.utils.opencv import qt_img_to_rgb_cv_img
 from .model import Model
 from .types import AutoLabelingResult
 from .engines.build_onnx_engine import OnnxBaseModel
+from .utils.preprocess import pack_blob
 
 
 class YOLOX(Model):
@@ -78,17 +79,6 @@ class YOLOX(Model):
         """
         Pre-process the input RGB image before feeding it to the network.
         """
-        if len(input_image.shape) == 3:
-            padded_img = (
-                np.ones(
-                    (self.input_shape[0], self.input_shape[1], 3),
-                    dtype=np.uint8,
-                )
-                * 114
-            )
-        else:
-            padded_img = np.ones(self.input_shape, dtype=np.uint8) * 114
-
         ratio_hw = min(
             self.input_shape[0] / input_image.shape[0],
             self.input_shape[1] / input_image.shape[1],
@@ -100,15 +90,15 @@ class YOLOX(Model):
                 int(input_image.shape[0] * ratio_hw),
             ),
             interpolation=cv2.INTER_LINEAR,
-        ).astype(np.uint8)
-        padded_img[
-            : int(input_image.shape[0] * ratio_hw),
-            : int(input_image.shape[1] * ratio_hw),
-        ] = resized_img
-
-        padded_img = padded_img.transpose((2, 0, 1))
-        padded_img = np.ascontiguousarray(padded_img, dtype=np.float32)
-        return padded_img[None, :, :, :], ratio_hw
+        )
+        # Padded at the bottom right, pixel values are kept as they are
+        blob = pack_blob(
+            resized_img,
+            size=(self.input_shape[1], self.input_shape[0]),
+            color=114,
+            scale=1.0,
+        )
+        return blob, ratio_hw
 
     def postprocess(self, outputs):
         """
@@ -11,7 +11,7 @@ from anylabeling.views.labeling.logger import logger
 from anylabeling.views.labeling.utils.opencv import qt_img_to_rgb_cv_img
 from .model import Model
 from .types import AutoLabelingResult
-from .pose.dwpose_onnx import inference_pose
+from .pose.dwpose_onnx import get_batch_size, inference_pose
 
 
 class YOLOX_DWPose(Model):
@@ -101,6 +101,9 @@ class YOLOX_DWPose(Model):
             self.config["pose_input_width"],
             self.config["pose_input_height"],
         )
+        self.pose_batch_size = get_batch_size(
+            pose_model_abs_path, self.config.get("pose_batch_size", 16)
+        )
 
     def det_pre_process(self, img, net, swap=(2, 0, 1)):
         """
@@ -203,6 +206,7 @@ class YOLOX_DWPose(Model):
                 final_boxes,
                 cv2.cvtColor(image, cv2.COLOR_RGB2BGR),
                 self.pose_input_size,
+                self.pose_batch_size,
             )
             keypoints, scores = self.pose_rescale(keypoints, scores)
 
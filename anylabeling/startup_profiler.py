@@ -0,0 +1,103 @@
+"""Startup time breakdown, enabled with `--profile-startup`"""
+
+import builtins
+import importlib.util
+import sys
+import time
+
+
+class StartupProfiler:
+    """Record the time spent in each import and each startup phase.
+
+    Imports are timed by wrapping `builtins.__import__` between `start()`
+    and `stop()`; only the first import of a module is recorded, with its
+    cumulative time (including nested imports) and its own time.
+    """
+
+    def __init__(self):
+        self.start_time = None
+        self.phases = []  # (name, seconds)
+        self.imports = {}  # module name -> [cumulative, self] seconds
+        self._last_mark = None
+        self._stack = []
+        self._original_import = None
+
+    def start(self):
+        self.start_time = self._last_mark = time.perf_counter()
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._import
+
+    def stop(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def mark(self, phase):
+        """End a startup phase started at the previous mark"""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last_mark))
+        self._last_mark = now
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.start_time
+
+    def _resolve(self, name, globals, fromlist, level):
+        if level:
+            package = (globals or {}).get("__package__")
+            if not package:
+                return None
+            try:
+                name = importlib.util.resolve_name("." * level + name, package)
+            except (ImportError, ValueError):
+                return None
+            name = name.rstrip(".")
+        if name not in sys.modules:
+            return name
+        for attr in fromlist or ():
+            submodule = f"{name}.{attr}"
+            if attr != "*" and submodule not in sys.modules:
+                return submodule
+        return None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        module = self._resolve(name, globals, fromlist, level)
+        if module is None:
+            return self._original_import(
+                name, globals, locals, fromlist, level
+            )
+
+        self._stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self._original_import(
+                name, globals, locals, fromlist, level
+            )
+        finally:
+            duration = time.perf_counter() - start
+            children = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += duration
+            if module in sys.modules and module not in self.imports:
+                self.imports[module] = [duration, duration - children]
+
+    def report(self, top=25):
+        """Format the recorded phases and the slowest imports"""
+        lines = ["Startup profile:"]
+        for phase, seconds in self.phases:
+            lines.append(f"  {phase:<40} {seconds * 1000:>9.1f} ms")
+        lines.append(f"  {'total':<40} {self.elapsed * 1000:>9.1f} ms")
+
+        slowest = sorted(
+            self.imports.items(), key=lambda item: item[1][0], reverse=True
+        )[:top]
+        lines.append(
+            f"Slowest imports ({len(self.imports)} recorded):"
+            f"\n  {'module':<60} {'cumulative':>12} {'self':>10}"
+        )
+        for module, (cumulative, own) in slowest:
+            lines.append(
+                f"  {module:<60} {cumulative * 1000:>9.1f} ms"
+                f" {own * 1000:>7.1f} ms"
+            )
+        return "\n".join(lines)
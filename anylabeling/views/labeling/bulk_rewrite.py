@@ -0,0 +1,472 @@
+"""Project-wide rewrites of label files.
+
+A rewrite applies one transform, e.g. renaming labels, to every label
+file of a project. Files are processed in chunks on a process pool and
+each file is replaced atomically: the new content is written to a
+temporary file next to it and renamed over the original, so a crash
+never leaves a half-written label file.
+
+Before a file is replaced its original content is saved to a journal
+directory. A rewrite that was interrupted can then be resumed or rolled
+back with `resume_rewrite` and `rollback_rewrite`; a rewrite that ran
+to completion removes its journal.
+
+Transforms first look at the raw bytes of a file and only parse it when
+it may contain what they change, so unaffected files are neither parsed
+nor written.
+"""
+
+import json
+import multiprocessing
+import os
+import pickle
+import re
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from anylabeling.views.labeling.logger import logger
+
+JOURNAL_DIRNAME = ".xanylabeling_rewrite"
+STATE_FILENAME = "state.pkl"
+DONE_FILENAME = "done.log"
+BACKUP_DIRNAME = "backups"
+TEMP_SUFFIX = ".tmp"
+
+CHUNK_SIZE = 64
+MIN_PROCESS_FILES = 512
+
+CHANGED = "changed"
+SKIPPED = "skipped"
+FAILED = "failed"
+
+_GROUP_ID = re.compile(rb'"group_id"\s*:\s*"?(-?\d+)')
+
+
+class RenameLabels:
+    """Rename the shapes of some labels and delete others.
+
+    Args:
+        mapping (dict): The new label of each label to change, None to
+            delete the shapes with that label.
+    """
+
+    def __init__(self, mapping):
+        self.mapping = dict(mapping)
+        needles = set()
+        for label in self.mapping:
+            for ensure_ascii in (False, True):
+                needle = json.dumps(label, ensure_ascii=ensure_ascii)
+                needles.add(needle.encode("utf-8"))
+        self.needles = tuple(needles)
+
+    def may_affect(self, raw):
+        return any(needle in raw for needle in self.needles)
+
+    def apply(self, data):
+        shapes, changed = [], False
+        for shape in data.get("shapes") or []:
+            label = shape.get("label")
+            if label in self.mapping:
+                changed = True
+                if self.mapping[label] is None:
+                    continue
+                shape["label"] = self.mapping[label]
+            shapes.append(shape)
+        if changed:
+            data["shapes"] = shapes
+        return changed
+
+
+class ReassignGroupIds:
+    """Replace group IDs of shapes.
+
+    Args:
+        mapping (dict): The new group ID of each group ID to change.
+    """
+
+    def __init__(self, mapping):
+        self.mapping = {int(k): int(v) for k, v in mapping.items()}
+
+    def may_affect(self, raw):
+        return any(int(m) in self.mapping for m in _GROUP_ID.findall(raw))
+
+    def apply(self, data):
+        changed = False
+        for shape in data.get("shapes") or []:
+            group_id = shape.get("group_id")
+            if group_id is None:
+                continue
+            group_id = int(group_id)
+            if group_id in self.mapping:
+                shape["group_id"] = self.mapping[group_id]
+                changed = True
+        return changed
+
+
+class RewriteResult:
+    """Outcome of a rewrite: the label files changed, skipped and failed"""
+
+    def __init__(self):
+        self.changed = []
+        self.skipped = []
+        self.failed = []
+        self.cancelled = False
+
+    @property
+    def ok(self):
+        return not self.failed and not self.cancelled
+
+    def __repr__(self):
+        return (
+            f"RewriteResult(changed={len(self.changed)}, "
+            f"skipped={len(self.skipped)}, failed={len(self.failed)}, "
+            f"cancelled={self.cancelled})"
+        )
+
+
+def get_journal_dir(label_files, fallback_dir=None):
+    """Get the journal directory of a rewrite of the given label files.
+
+    The journal lives in the deepest directory holding all of them.
+    """
+    try:
+        root = os.path.commonpath(
+            [os.path.dirname(os.path.abspath(f)) for f in label_files]
+        )
+    except ValueError:  # no files, or files on several drives
+        root = fallback_dir or os.getcwd()
+    return os.path.join(root, JOURNAL_DIRNAME)
+
+
+def atomic_write(path, content):
+    """Replace a file with the given bytes, never leaving it partial"""
+    temp_path = path + TEMP_SUFFIX
+    with open(temp_path, "wb") as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def save_backup(path, backup, content):
+    """Keep the original content of a file that is about to be replaced.
+
+    A hard link costs no copy: replacing the file gives it a new inode
+    and the backup keeps the old one. Copies where links are unsupported.
+    """
+    try:
+        os.link(path, backup)
+    except OSError:
+        atomic_write(backup, content)
+
+
+def dump_label_data(data):
+    return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+class RewriteJournal:
+    """On-disk record of a rewrite in progress.
+
+    The journal directory holds the transform and the list of label
+    files, the indexes of the files already rewritten and a backup of
+    the original content of every file that was replaced.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.backup_dir = os.path.join(path, BACKUP_DIRNAME)
+        with open(os.path.join(path, STATE_FILENAME), "rb") as f:
+            state = pickle.load(f)
+        self.label_files = state["label_files"]
+        self.rewrite = state["rewrite"]
+        self.done = set()
+        done_path = os.path.join(path, DONE_FILENAME)
+        if os.path.exists(done_path):
+            with open(done_path, "r", encoding="utf-8") as f:
+                # A trailing partial line is what a crash may leave
+                self.done.update(
+                    int(line) for line in f.read().split("\n")[:-1] if line
+                )
+        self._done_file = None
+
+    @classmethod
+    def create(cls, path, label_files, rewrite):
+        if cls.exists(path):
+            raise FileExistsError(
+                f"An interrupted rewrite needs to be resumed or rolled "
+                f"back first: {path}"
+            )
+        if os.path.exists(path):
+            # Left by a crash before the state was written, or while the
+            # journal was being removed: no file was replaced yet or all
+            # of them were already restored, so there is nothing to keep
+            logger.warning(f"Removing a stale rewrite journal: {path}")
+            shutil.rmtree(path)
+        os.makedirs(os.path.join(path, BACKUP_DIRNAME))
+        state = {"label_files": list(label_files), "rewrite": rewrite}
+        atomic_write(os.path.join(path, STATE_FILENAME), pickle.dumps(state))
+        return cls(path)
+
+    @staticmethod
+    def exists(path):
+        return os.path.exists(os.path.join(path, STATE_FILENAME))
+
+    def pending(self):
+        return [
+            (index, label_file)
+            for index, label_file in enumerate(self.label_files)
+            if index not in self.done
+        ]
+
+    def mark_done(self, indexes):
+        if self._done_file is None:
+            self._done_file = open(
+                os.path.join(self.path, DONE_FILENAME), "a", encoding="utf-8"
+            )
+        self._done_file.write("".join(f"{index}\n" for index in indexes))
+        self._done_file.flush()
+        os.fsync(self._done_file.fileno())
+        self.done.update(indexes)
+
+    def close(self):
+        if self._done_file is not None:
+            self._done_file.close()
+            self._done_file = None
+
+    def rollback(self):
+        """Restore every replaced file, then remove the journal"""
+        self.close()
+        restored = 0
+        for name in os.listdir(self.backup_dir):
+            stem, ext = os.path.splitext(name)
+            if ext != ".json":  # a backup that was never completed
+                continue
+            index = int(stem)
+            os.replace(
+                os.path.join(self.backup_dir, name), self.label_files[index]
+            )
+            restored += 1
+        shutil.rmtree(self.path)
+        return restored
+
+    def commit(self):
+        self.close()
+        shutil.rmtree(self.path)
+
+
+def rewrite_file(rewrite, backup_dir, index, label_file):
+    """Apply a transform to one label file.
+
+    Returns:
+        str: CHANGED, SKIPPED or FAILED.
+    """
+    backup = os.path.join(backup_dir, f"{index}.json")
+    try:
+        if os.path.exists(backup):
+            # Replaced by an interrupted run but not recorded as done,
+            # start over from the original content
+            os.replace(backup, label_file)
+        with open(label_file, "rb") as f:
+            raw = f.read()
+        if not rewrite.may_affect(raw):
+            return SKIPPED
+        data = json.loads(raw)
+        if not rewrite.apply(data):
+            return SKIPPED
+        save_backup(label_file, backup, raw)
+        atomic_write(label_file, dump_label_data(data))
+        return CHANGED
+    except Exception as e:
+        logger.error(f"Failed to rewrite {label_file}: {e}")
+        return FAILED
+
+
+def rewrite_chunk(rewrite, backup_dir, chunk):
+    return [
+        (index, rewrite_file(rewrite, backup_dir, index, label_file))
+        for index, label_file in chunk
+    ]
+
+
+def collect_chunk(key, chunk):
+    values = set()
+    for label_file in chunk:
+        try:
+            with open(label_file, "rb") as f:
+                data = json.loads(f.read())
+        except Exception as e:
+            logger.warning(f"Failed to read {label_file}: {e}")
+            continue
+        for shape in data.get("shapes") or []:
+            value = shape.get(key)
+            if value is not None:
+                values.add(value)
+    return values
+
+
+def get_num_workers(num_items, workers=None):
+    """Number of worker processes to use, 0 to run in this process"""
+    if workers is None:
+        if num_items < MIN_PROCESS_FILES or getattr(sys, "frozen", False):
+            return 0
+        workers = min(8, os.cpu_count() or 1)
+    return workers if workers > 1 else 0
+
+
+def map_chunks(func, args, chunks, workers, is_cancelled=None):
+    """Run `func(*args, chunk)` on every chunk.
+
+    Yields:
+        The result of each chunk, in order of completion.
+    """
+    if not workers:
+        for chunk in chunks:
+            if is_cancelled is not None and is_cancelled():
+                return
+            yield func(*args, chunk)
+        return
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=context
+    ) as executor:
+        futures = [executor.submit(func, *args, chunk) for chunk in chunks]
+        finished = set()
+        for future in as_completed(futures):
+            finished.add(future)
+            yield future.result()
+            if is_cancelled is not None and is_cancelled():
+                break
+        else:
+            return
+        for future in futures:
+            future.cancel()
+        # Chunks already running are completed anyway
+        for future in futures:
+            if future not in finished and not future.cancelled():
+                yield future.result()
+
+
+def split_chunks(items, chunk_size=None):
+    chunk_size = chunk_size or CHUNK_SIZE
+    return [
+        items[i : i + chunk_size] for i in range(0, len(items), chunk_size)
+    ]
+
+
+def run_journal(
+    journal, workers=None, progress_callback=None, is_cancelled=None
+):
+    result = RewriteResult()
+    pending = journal.pending()
+    total, finished = len(journal.label_files), len(journal.done)
+    workers = get_num_workers(len(pending), workers)
+    processed = 0
+    try:
+        for statuses in map_chunks(
+            rewrite_chunk,
+            (journal.rewrite, journal.backup_dir),
+            split_chunks(pending),
+            workers,
+            is_cancelled,
+        ):
+            journal.mark_done(
+                [index for index, status in statuses if status != FAILED]
+            )
+            for index, status in statuses:
+                getattr(result, status).append(journal.label_files[index])
+            processed += len(statuses)
+            if progress_callback is not None:
+                progress_callback(finished + processed, total)
+    finally:
+        journal.close()
+
+    result.cancelled = processed < len(pending)
+    if result.cancelled:
+        restored = journal.rollback()
+        logger.info(f"Rewrite cancelled, restored {restored} label files")
+    elif result.failed:
+        # Keep what succeeded, the failed files were left untouched
+        journal.commit()
+        logger.warning(f"Failed to rewrite {len(result.failed)} label files")
+    else:
+        journal.commit()
+    return result
+
+
+def rewrite_label_files(
+    label_files,
+    rewrite,
+    journal_dir=None,
+    workers=None,
+    progress_callback=None,
+    is_cancelled=None,
+):
+    """Apply a transform to label files, crash-safely.
+
+    Args:
+        label_files (list): Paths of the label files.
+        rewrite: The transform, e.g. `RenameLabels`. It must be
+            picklable to run on worker processes.
+        journal_dir (str, optional): Where to journal the rewrite,
+            `get_journal_dir(label_files)` by default.
+        workers (int, optional): Number of worker processes, by default
+            chosen from the number of files. 0 or 1 to use none.
+        progress_callback (callable, optional): Called with the number of
+            files processed and the total.
+        is_cancelled (callable, optional): Polled between chunks. A
+            cancelled rewrite is rolled back.
+
+    Returns:
+        RewriteResult: The files changed, skipped and failed.
+
+    Raises:
+        FileExistsError: If an interrupted rewrite left its journal.
+    """
+    journal_dir = journal_dir or get_journal_dir(label_files)
+    journal = RewriteJournal.create(journal_dir, label_files, rewrite)
+    return run_journal(
+        journal, workers, progress_callback, is_cancelled=is_cancelled
+    )
+
+
+def resume_rewrite(
+    journal_dir, workers=None, progress_callback=None, is_cancelled=None
+):
+    """Finish a rewrite that was interrupted, see `rewrite_label_files`"""
+    return run_journal(
+        RewriteJournal(journal_dir),
+        workers,
+        progress_callback,
+        is_cancelled=is_cancelled,
+    )
+
+
+def rollback_rewrite(journal_dir):
+    """Undo a rewrite that was interrupted.
+
+    Returns:
+        int: Number of label files restored.
+    """
+    restored = RewriteJournal(journal_dir).rollback()
+    logger.info(f"Rolled back {restored} label files")
+    return restored
+
+
+def has_interrupted_rewrite(journal_dir):
+    return RewriteJournal.exists(journal_dir)
+
+
+def collect_shape_values(label_files, key, workers=None):
+    """Collect the distinct values of a shape field across label files.
+
+    Unreadable files are logged and skipped.
+    """
+    values = set()
+    workers = get_num_workers(len(label_files), workers)
+    for chunk_values in map_chunks(
+        collect_chunk, (key,), split_chunks(list(label_files)), workers
+    ):
+        values.update(chunk_values)
+    return values
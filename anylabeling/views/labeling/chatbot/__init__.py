@@ -1,9 +1,22 @@
+import importlib
+
 from .animation import *
-from .chat import *
 from .config import *
-from .general import *
 from .handler import *
-from .provider import *
-from .render import *
 from .style import *
 from .utils import *
+
+# Imported on first use, as they pull in requests and markdown; the
+# chatbot dialog imports them directly
+_LAZY_MODULES = (".batch", ".chat", ".general", ".provider", ".render")
+
+
+def __getattr__(name):
+    # Private names, e.g. the __all__ looked up by star imports, are never
+    # taken from the lazy modules
+    if not name.startswith("_"):
+        for module_name in _LAZY_MODULES:
+            module = importlib.import_module(module_name, __name__)
+            if hasattr(module, name):
+                return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,319 @@
+import base64
+import io
+import json
+import os
+import os.path as osp
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from PIL import Image
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from anylabeling.app_info import __version__
+from anylabeling.views.labeling.logger import logger
+
+__all__ = [
+    "BatchChatWorker",
+    "dump_label_data",
+    "encode_image",
+    "load_label_data",
+    "request_with_retry",
+    "write_chat_history",
+]
+
+# Status codes worth retrying, the others are caller errors
+RETRYABLE_STATUS_CODES = (408, 409, 429, 500, 502, 503, 504)
+DEFAULT_CONCURRENCY = 4
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF = 1.0  # seconds
+MAX_BACKOFF = 60.0  # seconds
+
+
+def encode_image(image_path, max_size=0, jpeg_quality=0):
+    """Encode an image file as a base64 data URL.
+
+    Args:
+        image_path (str): Path of the image file.
+        max_size (int): Downscale so that the longer side is at most this
+            many pixels. 0 keeps the original size.
+        jpeg_quality (int): Re-encode as JPEG with this quality (1-95).
+            0 keeps the original bytes unless the image is downscaled.
+
+    Returns:
+        str: The data URL.
+    """
+    if not max_size and not jpeg_quality:
+        with open(image_path, "rb") as f:
+            image_data = base64.b64encode(f.read()).decode("utf-8")
+        return f"data:image/jpeg;base64,{image_data}"
+
+    with Image.open(image_path) as image:
+        image = image.convert("RGB")
+        if max_size and max(image.size) > max_size:
+            image.thumbnail((max_size, max_size), Image.BILINEAR)
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=jpeg_quality or 90)
+    image_data = base64.b64encode(buffer.getvalue()).decode("utf-8")
+    return f"data:image/jpeg;base64,{image_data}"
+
+
+def get_retry_delay(error, attempt, backoff=DEFAULT_BACKOFF):
+    """Get the delay before retrying a failed request.
+
+    Uses the Retry-After header when the server sends one, otherwise an
+    exponential backoff with jitter.
+    """
+    response = getattr(error, "response", None)
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        try:
+            return min(float(retry_after), MAX_BACKOFF)
+        except (TypeError, ValueError):
+            pass
+    delay = backoff * 2**attempt
+    return min(delay + random.uniform(0, delay / 2), MAX_BACKOFF)
+
+
+def is_retryable(error):
+    """Whether a failed request of the OpenAI client or of `requests`
+    is worth retrying"""
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(error, requests.HTTPError):
+        response = error.response
+        return (
+            response is not None
+            and response.status_code in RETRYABLE_STATUS_CODES
+        )
+
+    import openai
+
+    if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS_CODES
+    return False
+
+
+def request_with_retry(
+    func,
+    max_retries=DEFAULT_MAX_RETRIES,
+    backoff=DEFAULT_BACKOFF,
+    stop_event=None,
+):
+    """Call `func`, retrying on rate limits, server and connection errors.
+
+    Args:
+        func (callable): The request to make.
+        max_retries (int): Number of retries after the first attempt.
+        backoff (float): Base delay of the exponential backoff, in seconds.
+        stop_event (threading.Event, optional): Abort waiting when set.
+
+    Returns:
+        The return value of `func`.
+    """
+    attempt = 0
+    while True:
+        try:
+            return func()
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable(e):
+                raise
+            delay = get_retry_delay(e, attempt, backoff)
+            logger.warning(
+                f"Request failed ({e}), retrying in {delay:.1f}s "
+                f"[{attempt + 1}/{max_retries}]"
+            )
+            if stop_event is not None:
+                if stop_event.wait(delay):
+                    raise
+            else:
+                time.sleep(delay)
+            attempt += 1
+
+
+def load_label_data(label_file, image_file):
+    """Load a label file, or create the data of an empty one.
+
+    Args:
+        label_file (str): Path of the label file.
+        image_file (str): Path of the image it annotates.
+
+    Returns:
+        dict: The label data.
+    """
+    if osp.exists(label_file):
+        with open(label_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    with Image.open(image_file) as image:
+        image_width, image_height = image.size
+    return {
+        "version": __version__,
+        "flags": {},
+        "shapes": [],
+        "imagePath": osp.basename(image_file),
+        "imageData": None,
+        "imageHeight": image_height,
+        "imageWidth": image_width,
+        "description": "",
+    }
+
+
+def dump_label_data(label_file, data):
+    """Write label data through a temporary file, so readers and
+    interrupted runs never see a partially written file."""
+    temp_file = f"{label_file}.tmp"
+    with open(temp_file, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(temp_file, label_file)
+
+
+def write_chat_history(label_file, image_file, prompt, content):
+    """Store a prompt and its answer as the chat history of a label file.
+
+    The label file is created if it does not exist, other fields of an
+    existing file are kept.
+    """
+    data = load_label_data(label_file, image_file)
+    data["chat_history"] = [
+        {"role": "user", "content": prompt, "image": image_file},
+        {"role": "assistant", "content": content, "image": None},
+    ]
+    dump_label_data(label_file, data)
+
+
+class BatchChatWorker(QThread):
+    """Send the same prompt for a list of images with concurrent requests.
+
+    All requests share one client, and so one HTTP connection pool. Each
+    answer is written to the label file of its image as soon as it
+    arrives, so cancelling keeps the finished results.
+    """
+
+    progress = pyqtSignal(int, int)  # finished images, failed images
+
+    def __init__(
+        self,
+        image_files,
+        prompt,
+        api_address,
+        api_key,
+        model,
+        temperature=None,
+        max_tokens=None,
+        system_prompt=None,
+        output_dir=None,
+        concurrency=DEFAULT_CONCURRENCY,
+        max_image_size=0,
+        jpeg_quality=0,
+        max_retries=DEFAULT_MAX_RETRIES,
+        backoff=DEFAULT_BACKOFF,
+    ):
+        super().__init__()
+        self.image_files = list(image_files)
+        self.api_address = api_address
+        self.api_key = api_key
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.system_prompt = system_prompt
+        self.output_dir = output_dir
+        self.concurrency = max(1, int(concurrency))
+        self.max_image_size = max_image_size
+        self.jpeg_quality = jpeg_quality
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+        self.with_image = "@image" in prompt or "<image>" in prompt
+        if self.with_image:
+            prompt = re.sub(r"@image\s*(?=\S|$)", "<image>", prompt).strip()
+        self.prompt = prompt
+
+        self.num_finished = 0
+        self.failed = {}  # image file -> error message
+        self._stop_event = threading.Event()
+
+    def cancel(self):
+        self._stop_event.set()
+
+    def is_cancelled(self):
+        return self._stop_event.is_set()
+
+    def build_messages(self, image_file):
+        messages = []
+        if self.system_prompt:
+            messages.append({"role": "system", "content": self.system_prompt})
+        if self.with_image:
+            image_url = encode_image(
+                image_file, self.max_image_size, self.jpeg_quality
+            )
+            content = [
+                {"type": "image_url", "image_url": {"url": image_url}},
+                {"type": "text", "text": self.prompt},
+            ]
+            messages.append({"role": "user", "content": content})
+        else:
+            messages.append({"role": "user", "content": self.prompt})
+        return messages
+
+    def process_image(self, client, image_file):
+        # Imported here, vqa.utils imports this module
+        from anylabeling.views.labeling.vqa.utils import get_label_file_path
+
+        if self.is_cancelled():
+            return None
+        messages = self.build_messages(image_file)
+        kwargs = {}
+        if self.temperature is not None:
+            kwargs["temperature"] = self.temperature
+        if self.max_tokens:
+            kwargs["max_tokens"] = self.max_tokens
+        response = request_with_retry(
+            lambda: client.chat.completions.create(
+                model=self.model, messages=messages, stream=False, **kwargs
+            ),
+            max_retries=self.max_retries,
+            backoff=self.backoff,
+            stop_event=self._stop_event,
+        )
+        content = response.choices[0].message.content
+        write_chat_history(
+            get_label_file_path(image_file, self.output_dir),
+            image_file,
+            self.prompt,
+            content,
+        )
+        return content
+
+    def run(self):
+        from openai import OpenAI
+
+        # Retries are handled by request_with_retry
+        client = OpenAI(
+            base_url=self.api_address, api_key=self.api_key, max_retries=0
+        )
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                futures = {
+                    executor.submit(self.process_image, client, image): image
+                    for image in self.image_files
+                }
+                for future in as_completed(futures):
+                    image_file = futures[future]
+                    try:
+                        future.result()
+                    except Exception as e:
+                        logger.error(f"Failed to process {image_file}: {e}")
+                        self.failed[image_file] = str(e)
+                    self.num_finished += 1
+                    self.progress.emit(self.num_finished, len(self.failed))
+                    if self.is_cancelled():
+                        for pending in futures:
+                            pending.cancel()
+        finally:
+            client.close()
@@ -4,13 +4,17 @@ from PyQt5.QtCore import (
 )
 from PyQt5.QtWidgets import (
     QDialog,
+    QFormLayout,
     QHBoxLayout,
     QLabel,
     QPushButton,
+    QSpinBox,
     QVBoxLayout,
     QTextEdit,
 )
 
+from anylabeling.views.labeling.chatbot.batch import DEFAULT_CONCURRENCY
+
 
 class BatchProcessDialog(QDialog):
     """Batch processing dialog class"""
@@ -98,6 +102,39 @@ class BatchProcessDialog(QDialog):
         )
         dialog_layout.addWidget(self.batch_message_input)
 
+        # Request options
+        options_layout = QFormLayout()
+        options_layout.setSpacing(8)
+        self.concurrency_input = QSpinBox()
+        self.concurrency_input.setRange(1, 64)
+        self.concurrency_input.setValue(DEFAULT_CONCURRENCY)
+        self.concurrency_input.setToolTip(
+            self.tr("Number of requests sent at the same time")
+        )
+        options_layout.addRow(
+            self.tr("Concurrent requests:"), self.concurrency_input
+        )
+        self.max_image_size_input = QSpinBox()
+        self.max_image_size_input.setRange(0, 8192)
+        self.max_image_size_input.setSingleStep(128)
+        self.max_image_size_input.setSpecialValueText(self.tr("Original"))
+        self.max_image_size_input.setToolTip(
+            self.tr("Downscale images so the longer side fits before upload")
+        )
+        options_layout.addRow(
+            self.tr("Max image size:"), self.max_image_size_input
+        )
+        self.jpeg_quality_input = QSpinBox()
+        self.jpeg_quality_input.setRange(0, 95)
+        self.jpeg_quality_input.setSpecialValueText(self.tr("Original"))
+        self.jpeg_quality_input.setToolTip(
+            self.tr("Re-encode images as JPEG with this quality before upload")
+        )
+        options_layout.addRow(
+            self.tr("JPEG quality:"), self.jpeg_quality_input
+        )
+        dialog_layout.addLayout(options_layout)
+
         # Button layout
         button_layout = QHBoxLayout()
         button_layout.setContentsMargins(0, 8, 0, 0)
@@ -178,6 +215,14 @@ class BatchProcessDialog(QDialog):
         """Get the user input prompt"""
         return self.batch_message_input.toPlainText().strip()
 
+    def get_options(self):
+        """Get the request options"""
+        return {
+            "concurrency": self.concurrency_input.value(),
+            "max_image_size": self.max_image_size_input.value(),
+            "jpeg_quality": self.jpeg_quality_input.value(),
+        }
+
     def exec_(self):
         """Override exec_ method to adjust position before showing the dialog"""
         self.adjustSize()
@@ -4,8 +4,6 @@ import subprocess
 import threading
 import time
 
-from openai import OpenAI
-
 from anylabeling.views.labeling.chatbot.config import *
 from anylabeling.views.labeling.chatbot.utils import (
     EventTracker,
@@ -114,6 +112,8 @@ def get_models_id_list(base_url: str, api_key: str, timeout: int = 5) -> list:
             logger.debug(f"Response: {response.stdout}")
             return []
     else:
+        from openai import OpenAI
+
         client = OpenAI(base_url=base_url, api_key=api_key, timeout=timeout)
         return [model.id for model in client.models.list()]
 
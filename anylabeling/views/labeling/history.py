@@ -0,0 +1,230 @@
+"""Delta-based undo history for canvas shapes"""
+
+from collections import deque
+
+import numpy as np
+
+
+class ShapeHistoryStep:
+    """A single undoable edit
+
+    Only the shapes touched by the edit are recorded:
+    - removed: (index, snapshot) pairs of the state before the edit
+    - added: (index, snapshot) pairs of the state after the edit
+    A modified shape appears in both lists at its index.
+    """
+
+    __slots__ = ("removed", "added")
+
+    def __init__(self, removed, added):
+        self.removed = removed
+        self.added = added
+
+    def __len__(self):
+        return len(self.removed) + len(self.added)
+
+
+class ShapeHistory:
+    """Undo log storing the before/after state of changed shapes only
+
+    The history keeps one immutable snapshot per committed shape and, for
+    each edit, the snapshots that were replaced or introduced. Committing
+    an edit compares the live shapes with the committed ones by identity,
+    so only new or modified shapes are copied; unchanged shapes share the
+    snapshot already held by the history.
+    """
+
+    def __init__(self, max_steps=10):
+        self.max_steps = max_steps
+        self._steps = deque(maxlen=max(1, max_steps))
+        self._committed = None
+        # id(live shape) -> (live shape, snapshot) and id(snapshot) -> live
+        self._snapshots = {}
+        self._lives = {}
+
+    def reset(self):
+        """Forget all steps and the committed state"""
+        self._steps.clear()
+        self._committed = None
+        self._snapshots = {}
+        self._lives = {}
+
+    @property
+    def can_undo(self):
+        """Check if there is an edit to undo"""
+        return len(self._steps) > 0
+
+    def __len__(self):
+        return len(self._steps)
+
+    def _snapshot_of(self, shape):
+        entry = self._snapshots.get(id(shape))
+        if entry is not None and entry[0] is shape:
+            return entry[1]
+        return None
+
+    def _bind(self, shape, snapshot):
+        self._snapshots[id(shape)] = (shape, snapshot)
+        self._lives[id(snapshot)] = shape
+
+    def _unbind(self, snapshot):
+        shape = self._lives.pop(id(snapshot), None)
+        if shape is not None and self._snapshot_of(shape) is snapshot:
+            del self._snapshots[id(shape)]
+
+    def is_modified(self, shape):
+        """Check if a shape differs from its committed state"""
+        snapshot = self._snapshot_of(shape)
+        return snapshot is None or not same_shape(shape, snapshot)
+
+    def commit(self, shapes, changed=None, record=True):
+        """Record the difference between the committed and current shapes
+
+        Args:
+            shapes (list): Current shapes, in drawing order.
+            changed (list, optional): Shapes that may have been modified
+                in place. When omitted every shape is compared with its
+                committed state. Added/removed shapes are always detected.
+            record (bool): Push an undo step, or only update the
+                committed state.
+
+        Returns:
+            bool: True if an undo step was recorded.
+        """
+        if self._committed is None:
+            self._committed = []
+            for shape in shapes:
+                snapshot = shape.copy()
+                self._bind(shape, snapshot)
+                self._committed.append(snapshot)
+            return False
+
+        changed_ids = None
+        if changed is not None:
+            changed_ids = {id(shape) for shape in changed}
+
+        after = []
+        for shape in shapes:
+            snapshot = self._snapshot_of(shape)
+            if snapshot is None or (
+                (changed_ids is None or id(shape) in changed_ids)
+                and not same_shape(shape, snapshot)
+            ):
+                snapshot = shape.copy()
+                snapshot.selected = False
+            after.append((shape, snapshot))
+
+        before = self._committed
+        before_ids = {id(snapshot) for snapshot in before}
+        after_ids = {id(snapshot) for _, snapshot in after}
+        removed = [
+            (i, snapshot)
+            for i, snapshot in enumerate(before)
+            if id(snapshot) not in after_ids
+        ]
+        added = [
+            (j, snapshot)
+            for j, (_, snapshot) in enumerate(after)
+            if id(snapshot) not in before_ids
+        ]
+        kept_before = [s for s in before if id(s) in after_ids]
+        kept_after = [s for _, s in after if id(s) in before_ids]
+        if any(a is not b for a, b in zip(kept_before, kept_after)):
+            # Shapes were reordered, record the whole order. Snapshots are
+            # shared, so this costs references only, no copies.
+            removed = list(enumerate(before))
+            added = [(j, snapshot) for j, (_, snapshot) in enumerate(after)]
+
+        if not removed and not added:
+            return False
+
+        for _, snapshot in removed:
+            self._unbind(snapshot)
+        for shape, snapshot in after:
+            self._bind(shape, snapshot)
+        self._committed = [snapshot for _, snapshot in after]
+        if record:
+            self._steps.append(ShapeHistoryStep(removed, added))
+        return record
+
+    def refresh(self, shape):
+        """Replace the committed state of a shape with its current state
+
+        The last step is updated as well, so the shape is restored with
+        this state if a later edit is undone.
+        """
+        old = self._snapshot_of(shape)
+        if old is None:
+            return
+        snapshot = shape.copy()
+        snapshot.selected = False
+        self._unbind(old)
+        self._bind(shape, snapshot)
+        self._committed = [
+            snapshot if s is old else s for s in self._committed
+        ]
+        if self._steps:
+            step = self._steps[-1]
+            step.added = [
+                (j, snapshot if s is old else s) for j, s in step.added
+            ]
+
+    def discard_last(self, shapes):
+        """Drop the last step without restoring it
+
+        Used when the current shapes already reflect the state before the
+        last edit, e.g. a newly drawn shape whose label was cancelled.
+        """
+        if self._steps:
+            self._steps.pop()
+        if self._committed is not None:
+            self.commit(shapes, record=False)
+
+    def undo(self, shapes):
+        """Revert the last step
+
+        Args:
+            shapes (list): Current shapes, in drawing order.
+
+        Returns:
+            list: The shapes as they were before the last step. Unchanged
+                shapes are kept as-is, restored ones are fresh copies.
+        """
+        if not self._steps:
+            return shapes
+        step = self._steps.pop()
+        before = list(self._committed)
+        for j, _ in reversed(step.added):
+            del before[j]
+        for i, snapshot in step.removed:
+            before.insert(i, snapshot)
+        for _, snapshot in step.added:
+            self._unbind(snapshot)
+
+        restored = []
+        for snapshot in before:
+            shape = self._lives.get(id(snapshot))
+            if shape is None:
+                shape = snapshot.copy()
+                self._bind(shape, snapshot)
+            restored.append(shape)
+        self._committed = before
+        return restored
+
+
+def same_shape(shape, other):
+    """Check if two shapes hold the same annotation"""
+    return (
+        shape.label == other.label
+        and shape.shape_type == other.shape_type
+        and shape.group_id == other.group_id
+        and shape.description == other.description
+        and shape.difficult == other.difficult
+        and shape.score == other.score
+        and shape.direction == other.direction
+        and shape.flags == other.flags
+        and shape.attributes == other.attributes
+        and shape.kie_linking == other.kie_linking
+        and shape.visible == other.visible
+        and np.array_equal(shape.points_array, other.points_array)
+    )
@@ -21,6 +21,11 @@ from itertools import chain
 from anylabeling.app_info import __version__
 from anylabeling.views.labeling.logger import logger
 from anylabeling.views.labeling.utils.shape import rectangle_from_diagonal
+from anylabeling.views.labeling.utils.rle import (
+    decode_mask,
+    rle_area,
+    rle_to_bbox,
+)
 from anylabeling.views.labeling.utils.general import is_possible_rectangle
 
 
@@ -1465,6 +1470,7 @@ class LabelConverter:
                 pose_data = {}
             elif mode == "polygon":
                 polygon_data = {}
+                mask_data = []
 
             image_name = osp.basename(image_file)
             label_name = osp.splitext(image_name)[0] + ".json"
@@ -1564,12 +1570,23 @@ class LabelConverter:
                     annotation_id += 1
 
                 elif mode == "polygon":
-                    if shape_type != "polygon":
+                    if shape_type not in ["polygon", "mask"]:
                         continue
 
                     if label == "__ignore__" or label not in class_name_to_id:
                         continue
 
+                    if shape_type == "mask":
+                        # Already RLE, written as it is
+                        mask_data.append(
+                            {
+                                "label": label,
+                                "difficult": difficult,
+                                "segmentation": shape["mask"],
+                            }
+                        )
+                        continue
+
                     instance = (label, group_id)
 
                     if instance not in polygon_data:
@@ -1659,6 +1676,25 @@ class LabelConverter:
 
                     annotation_id += 1
 
+                for data in mask_data:
+                    rle = data["segmentation"]
+                    annotation = {
+                        "id": annotation_id,
+                        "image_id": image_id,
+                        "category_id": class_name_to_id[data["label"]],
+                        "segmentation": {
+                            "size": rle["size"],
+                            "counts": rle["counts"],
+                        },
+                        "area": rle_area(rle),
+                        "bbox": rle_to_bbox(rle),
+                        "iscrowd": 0,
+                        "ignore": int(data["difficult"]),
+                    }
+                    coco_data["annotations"].append(annotation)
+
+                    annotation_id += 1
+
             image_id += 1
 
         if mode == "rectangle":
@@ -1712,6 +1748,16 @@ class LabelConverter:
         polygons = []
         for shape in data["shapes"]:
             shape_type = shape["shape_type"]
+            if shape_type == "mask":
+                # Pixels are used as they are, without re-rasterizing
+                polygons.append(
+                    {
+                        "label": shape["label"],
+                        "mask": shape["mask"],
+                        "area": rle_area(shape["mask"]),
+                    }
+                )
+                continue
             if shape_type != "polygon":
                 continue
             points = self.clamp_points(
@@ -1725,9 +1771,18 @@ class LabelConverter:
                 {
                     "label": shape["label"],
                     "polygon": polygon,
+                    "area": cv2.contourArea(np.array(polygon)),
                 }
             )
 
+        def fill(item, image, value):
+            if "mask" in item:
+                image[decode_mask(item["mask"])] = value
+            else:
+                cv2.fillPoly(
+                    image, [np.array(item["polygon"], dtype=np.int32)], value
+                )
+
         output_format = mapping_table["type"]
         if output_format not in ["grayscale", "rgb"]:
             raise ValueError("Invalid output format specified")
@@ -1736,20 +1791,13 @@ class LabelConverter:
             # Initialize binary_mask
             binary_mask = np.zeros(image_shape, dtype=np.uint8)
             # Sort polygons by area to handle overlapping (larger areas first)
-            polygons.sort(
-                key=lambda x: cv2.contourArea(np.array(x["polygon"])),
-                reverse=True,
-            )
+            polygons.sort(key=lambda x: x["area"], reverse=True)
 
             for item in polygons:
-                label, polygon = item["label"], item["polygon"]
+                label = item["label"]
                 if label in mapping_color:
                     mask = np.zeros(image_shape, dtype=np.uint8)
-                    cv2.fillPoly(
-                        mask,
-                        [np.array(polygon, dtype=np.int32)],
-                        mapping_color[label],
-                    )
+                    fill(item, mask, mapping_color[label])
                     # Only update unassigned pixels (where binary_mask is still 0)
                     binary_mask = np.where(binary_mask == 0, mask, binary_mask)
 
@@ -1760,20 +1808,15 @@ class LabelConverter:
             color_mask = np.zeros(
                 (image_height, image_width, 3), dtype=np.uint8
             )
-            polygons.sort(
-                key=lambda x: cv2.contourArea(np.array(x["polygon"])),
-                reverse=True,
-            )
+            polygons.sort(key=lambda x: x["area"], reverse=True)
 
             for item in polygons:
-                label, polygon = item["label"], item["polygon"]
+                label = item["label"]
                 if label in mapping_color:
                     color = mapping_color[label]
                     # Create mask for current polygon
                     curr_mask = np.zeros(image_shape[:2], dtype=np.uint8)
-                    cv2.fillPoly(
-                        curr_mask, [np.array(polygon, dtype=np.int32)], 1
-                    )
+                    fill(item, curr_mask, 1)
                     # Only update pixels that haven't been assigned yet
                     unassigned = np.all(color_mask == 0, axis=2)
                     color_mask[curr_mask.astype(bool) & unassigned] = color
@@ -27,7 +27,6 @@ from PyQt5.QtWidgets import (
 
 from anylabeling.services.auto_labeling.types import AutoLabelingMode
 from anylabeling.services.auto_labeling import _THUMBNAIL_RENDER_MODELS
-from anylabeling.views.training import UltralyticsDialog
 
 from ...app_info import (
     __appname__,
@@ -39,16 +38,16 @@ from ...config import get_config, save_config
 from .label_file import LabelFile, LabelFileError
 from .logger import logger
 from .shape import Shape
+from .utils.opencv import DecodedFrame
 from .widgets import (
     AboutDialog,
     AutoLabelingWidget,
     BrightnessContrastDialog,
     Canvas,
-    ChatbotDialog,
-    VQADialog,
     CrosshairSettingsDialog,
     FileDialogPreview,
     GroupIDFilterComboBox,
+    InferenceStatsDialog,
     LabelDialog,
     LabelFilterComboBox,
     LabelListWidget,
@@ -116,18 +115,22 @@ class LabelingWidget(LabelDialog):
         self.drawing_digit_shortcuts = self._config.get("digit_shortcuts", {})
 
         # set default shape colors
-        Shape.line_color = QtGui.QColor(*self._config["shape"]["line_color"])
-        Shape.fill_color = QtGui.QColor(*self._config["shape"]["fill_color"])
-        Shape.select_line_color = QtGui.QColor(
+        Shape.default_line_color = QtGui.QColor(
+            *self._config["shape"]["line_color"]
+        )
+        Shape.default_fill_color = QtGui.QColor(
+            *self._config["shape"]["fill_color"]
+        )
+        Shape.default_select_line_color = QtGui.QColor(
             *self._config["shape"]["select_line_color"]
         )
-        Shape.select_fill_color = QtGui.QColor(
+        Shape.default_select_fill_color = QtGui.QColor(
             *self._config["shape"]["select_fill_color"]
         )
-        Shape.vertex_fill_color = QtGui.QColor(
+        Shape.default_vertex_fill_color = QtGui.QColor(
             *self._config["shape"]["vertex_fill_color"]
         )
-        Shape.hvertex_fill_color = QtGui.QColor(
+        Shape.default_hvertex_fill_color = QtGui.QColor(
             *self._config["shape"]["hvertex_fill_color"]
         )
 
@@ -368,6 +371,14 @@ class LabelingWidget(LabelDialog):
             checkable=True,
             enabled=False,
         )
+        run_video = action(
+            self.tr("&Auto Run Video"),
+            lambda: utils.run_video_file(self),
+            None,
+            "video",
+            self.tr("Auto label a video file without extracting frames"),
+            enabled=False,
+        )
         delete_file = action(
             self.tr("&Delete File"),
             self.delete_file,
@@ -691,6 +702,12 @@ class LabelingWidget(LabelDialog):
             icon="overview",
             tip=self.tr("Show annotations statistics"),
         )
+        inference_stats = action(
+            self.tr("&Inference Statistics"),
+            self.inference_stats,
+            icon="overview",
+            tip=self.tr("Show time and memory used by each model stage"),
+        )
         save_crop = action(
             self.tr("&Save Cropped Image"),
             lambda: utils.save_crop(self),
@@ -1357,6 +1374,7 @@ class LabelingWidget(LabelDialog):
             use_system_clipboard=use_system_clipboard,
             visibility_shapes_mode=visibility_shapes_mode,
             run_all_images=run_all_images,
+            run_video=run_video,
             union_selection=union_selection,
             delete=delete,
             edit=edit,
@@ -1553,6 +1571,7 @@ class LabelingWidget(LabelDialog):
                 open_prev_unchecked_image,
                 opendir,
                 openvideo,
+                run_video,
                 self.menus.recent_files,
                 save,
                 save_as,
@@ -1570,6 +1589,7 @@ class LabelingWidget(LabelDialog):
             self.menus.tool,
             (
                 overview,
+                inference_stats,
                 None,
                 save_crop,
                 None,
@@ -1907,6 +1927,7 @@ class LabelingWidget(LabelDialog):
 
         # Application state.
         self.image = QtGui.QImage()
+        self.frame = None
         self.image_path = None
         self.recent_files = []
         self.max_recent = 7
@@ -2135,6 +2156,7 @@ class LabelingWidget(LabelDialog):
         self.filename = None
         self.image_path = None
         self.image_data = None
+        self.frame = None
         self.label_file = None
         self.other_data = {}
         self.canvas.reset_state()
@@ -2291,6 +2313,8 @@ class LabelingWidget(LabelDialog):
     # Trainer
     def start_training(self, mode):
         if mode == "ultralytics":
+            from anylabeling.views.training import UltralyticsDialog
+
             dialog = UltralyticsDialog(self)
         else:
             return
@@ -2307,6 +2331,10 @@ class LabelingWidget(LabelDialog):
         if self.filename:
             OverviewDialog(parent=self)
 
+    def inference_stats(self):
+        dialog = InferenceStatsDialog(parent=self)
+        _ = dialog.exec_()
+
     def digit_shortcut_manager(self):
         digit_shortcut_dialog = DigitShortcutDialog(parent=self)
         result = digit_shortcut_dialog.exec_()
@@ -2329,6 +2357,8 @@ class LabelingWidget(LabelDialog):
             self.load_file(self.filename)
 
     def open_chatbot(self):
+        from .widgets.chatbot_dialog import ChatbotDialog
+
         dialog = ChatbotDialog(self)
         _ = dialog.exec_()
 
@@ -2343,6 +2373,8 @@ class LabelingWidget(LabelDialog):
             return
 
         if not hasattr(self, "vqa_window") or self.vqa_window is None:
+            from .widgets.vqa_dialog import VQADialog
+
             self.vqa_window = VQADialog(self)
             self.vqa_window.setAttribute(Qt.WA_DeleteOnClose, False)
         if self.vqa_window.isVisible():
@@ -2884,7 +2916,7 @@ class LabelingWidget(LabelDialog):
             data = s.other_data.copy()
             info = {
                 "label": s.label,
-                "points": [(p.x(), p.y()) for p in s.points],
+                "points": s.points_to_list(),
                 "group_id": s.group_id,
                 "description": s.description,
                 "difficult": s.difficult,
@@ -2895,6 +2927,9 @@ class LabelingWidget(LabelDialog):
             }
             if s.shape_type == "rotation":
                 info["direction"] = s.direction
+            elif s.shape_type == "mask":
+                info["mask"] = s.mask_rle()
+                info["points"] = s.points_to_list()
             data.update(info)
 
             return data
@@ -3082,20 +3117,77 @@ class LabelingWidget(LabelDialog):
         return (0, 255, 0)
 
     def remove_labels(self, shapes):
-        for shape in shapes:
-            item = self.label_list.find_item_by_shape(shape)
-            self.label_list.remove_item(item)
+        items = [self.label_list.find_item_by_shape(s) for s in shapes]
+        self.label_list.remove_items([item for item in items if item])
         self.update_combo_box()
         self.update_gid_box()
 
     def load_shapes(self, shapes, replace=True, update_last_label=True):
+        """Add shapes to the label panels and the canvas.
+
+        Same as calling `add_label` for every shape, but in linear time:
+        each label is looked up once, the list items are appended in one
+        model update and the filter boxes are refreshed once.
+        """
+        shapes = list(shapes)
         self._no_selection_slot = True
-        for shape in shapes:
-            self.add_label(shape, update_last_label=update_last_label)
+        self.label_list.setUpdatesEnabled(False)
+        try:
+            self._add_labels(shapes, update_last_label)
+        finally:
+            self.label_list.setUpdatesEnabled(True)
         self.label_list.clearSelection()
         self._no_selection_slot = False
         self.canvas.load_shapes(shapes, replace=replace)
 
+    def _add_labels(self, shapes, update_last_label=True):
+        if not shapes:
+            return
+        special_labels = [
+            AutoLabelingMode.OBJECT,
+            AutoLabelingMode.ADD,
+            AutoLabelingMode.REMOVE,
+        ]
+        labels = dict.fromkeys(shape.label for shape in shapes)
+        for label in labels:
+            if not self.unique_label_list.find_items_by_label(label):
+                item = self.unique_label_list.create_item_from_label(label)
+                self.unique_label_list.addItem(item)
+                rgb = self._get_rgb_by_label(label)
+                self.unique_label_list.set_item_label(
+                    item, label, rgb, LABEL_OPACITY
+                )
+            if label not in special_labels:
+                self.label_dialog.add_label_history(
+                    label, update_last_label=False
+                )
+        if update_last_label:
+            history = [
+                s.label for s in shapes if s.label not in special_labels
+            ]
+            if history:
+                self.label_dialog.add_label_history(history[-1])
+
+        items = []
+        for shape in shapes:
+            if shape.group_id is None:
+                text = shape.label
+            else:
+                text = f"{shape.label} ({shape.group_id})"
+            self._update_shape_color(shape)
+            color = shape.fill_color.getRgb()[:3]
+            item = LabelListWidgetItem(html.escape(text), shape)
+            item.setBackground(QtGui.QColor(*color, LABEL_OPACITY))
+            items.append(item)
+            shape.visible = True
+            self.canvas.set_shape_visible(shape, True)
+        self.label_list.add_items(items)
+
+        for action in self.actions.on_shapes_present:
+            action.setEnabled(True)
+        self.update_combo_box()
+        self.update_gid_box()
+
     def load_flags(self, flags):
         self.flag_widget.clear()
         for key, flag in flags.items():
@@ -3348,7 +3440,7 @@ class LabelingWidget(LabelDialog):
             self.set_dirty()
         else:
             self.canvas.undo_last_line()
-            self.canvas.shapes_backups.pop()
+            self.canvas.discard_last_backup()
 
     def show_shape(self, shape_height, shape_width, pos):
         """Display annotation width and height while hovering inside.
@@ -3482,9 +3574,7 @@ class LabelingWidget(LabelDialog):
         )
 
     def brightness_contrast(self, _):
-        self.brightness_contrast_dialog.update_image(
-            utils.img_data_to_pil(self.image_data)
-        )
+        self.brightness_contrast_dialog.update_image(self.frame)
 
         brightness, contrast = self.brightness_contrast_values.get(
             self.filename, (None, None)
@@ -3657,6 +3747,9 @@ class LabelingWidget(LabelDialog):
             self.status(self.tr("Error reading %s") % filename)
             return False
         self.image = image
+        # Decoded once, shared by the canvas, the brightness/contrast
+        # dialog and the models
+        self.frame = DecodedFrame(image, filename, self.image_data)
         self.filename = filename
         if self._config["keep_prev"]:
             prev_shapes = self.canvas.shapes
@@ -3706,9 +3799,7 @@ class LabelingWidget(LabelDialog):
                     orientation, self.scroll_values[orientation][self.filename]
                 )
         # set brightness contrast values
-        self.brightness_contrast_dialog.update_image(
-            utils.img_data_to_pil(self.image_data)
-        )
+        self.brightness_contrast_dialog.update_image(self.frame)
 
         brightness, contrast = self.brightness_contrast_values.get(
             self.filename, (None, None)
@@ -4319,9 +4410,11 @@ class LabelingWidget(LabelDialog):
         if self.auto_labeling_widget.isVisible():
             self.auto_labeling_widget.hide()
             self.actions.run_all_images.setEnabled(False)
+            self.actions.run_video.setEnabled(False)
         else:
             self.auto_labeling_widget.show()
             self.actions.run_all_images.setEnabled(True)
+            self.actions.run_video.setEnabled(True)
         self.update_thumbnail_display()
 
     @pyqtSlot()
@@ -1,14 +1,12 @@
 import copy
 import math
 
+import numpy as np
 from PyQt5 import QtCore, QtGui
 
 from . import utils
 from ..labeling.logger import logger
 
-# TODO(unknown):
-# - [opt] Store paths instead of creating new ones at each paint.
-
 
 DEFAULT_LINE_COLOR = QtGui.QColor(0, 255, 0, 128)  # bf hovering
 DEFAULT_FILL_COLOR = QtGui.QColor(100, 100, 100, 100)  # hovering
@@ -19,7 +17,57 @@ DEFAULT_HVERTEX_FILL_COLOR = QtGui.QColor(255, 255, 255, 255)  # hovering
 
 
 class Shape:
-    """Shape data type"""
+    """Shape data type
+
+    Points loaded from label files are kept in a compact (N, 2) float64
+    array. The list of QPointF exposed by `points` is only created when
+    it is accessed, e.g. when a shape is edited on the canvas; painting,
+    hit-testing and serialization work on the array directly.
+
+    A "mask" shape holds its pixels as COCO RLE in `mask`, its points
+    are the corners of the box around them. It is painted as an image
+    overlay, cached until its mask or color changes.
+    """
+
+    __slots__ = (
+        "label",
+        "score",
+        "group_id",
+        "description",
+        "difficult",
+        "kie_linking",
+        "fill",
+        "selected",
+        "flags",
+        "other_data",
+        "attributes",
+        "cache_label",
+        "cache_description",
+        "visible",
+        "direction",
+        "center",
+        "show_degrees",
+        "line_color",
+        "fill_color",
+        "select_line_color",
+        "select_fill_color",
+        "vertex_fill_color",
+        "hvertex_fill_color",
+        "_shape_type",
+        "_points",
+        "_points_array",
+        "_polygon",
+        "_highlight_index",
+        "_highlight_mode",
+        "_highlight_settings",
+        "_vertex_fill_color",
+        "_closed",
+        # Set by model code but never read, painting uses `_closed`
+        "closed",
+        "mask",
+        "_mask_origin",
+        "_mask_cache",
+    )
 
     # Render handles as squares
     P_SQUARE = 0
@@ -43,15 +91,18 @@ class Shape:
         "flags",
         "description",
         "attributes",
+        "mask",
     ]
 
     # The following class variables influence the drawing of all shape objects.
-    line_color = DEFAULT_LINE_COLOR
-    fill_color = DEFAULT_FILL_COLOR
-    select_line_color = DEFAULT_SELECT_LINE_COLOR
-    select_fill_color = DEFAULT_SELECT_FILL_COLOR
-    vertex_fill_color = DEFAULT_VERTEX_FILL_COLOR
-    hvertex_fill_color = DEFAULT_HVERTEX_FILL_COLOR
+    # Colors are copied to each shape on creation and may be overridden
+    # per shape afterwards.
+    default_line_color = DEFAULT_LINE_COLOR
+    default_fill_color = DEFAULT_FILL_COLOR
+    default_select_line_color = DEFAULT_SELECT_LINE_COLOR
+    default_select_fill_color = DEFAULT_SELECT_FILL_COLOR
+    default_vertex_fill_color = DEFAULT_VERTEX_FILL_COLOR
+    default_hvertex_fill_color = DEFAULT_HVERTEX_FILL_COLOR
     point_type = P_ROUND
     point_size = 4
     scale = 1.5
@@ -77,7 +128,9 @@ class Shape:
         self.description = description
         self.difficult = difficult
         self.kie_linking = kie_linking
-        self.points = []
+        self._points = []
+        self._points_array = None
+        self._polygon = None
         self.fill = False
         self.selected = False
         self.shape_type = shape_type
@@ -104,18 +157,101 @@ class Shape:
 
         self._closed = False
 
-        if line_color is not None:
-            # Override the class line_color attribute
-            # with an object attribute. Currently this
-            # is used for drawing the pending line a different color.
-            self.line_color = line_color
+        self.mask = None
+        self._mask_origin = None
+        self._mask_cache = None
+
+        # Line color may be overridden, currently this is used for
+        # drawing the pending line a different color.
+        self.line_color = (
+            line_color if line_color is not None else self.default_line_color
+        )
+        self.fill_color = self.default_fill_color
+        self.select_line_color = self.default_select_line_color
+        self.select_fill_color = self.default_select_fill_color
+        self.vertex_fill_color = self.default_vertex_fill_color
+        self.hvertex_fill_color = self.default_hvertex_fill_color
         self.shape_type = shape_type
 
+    def __deepcopy__(self, memo):
+        shape = Shape.__new__(Shape)
+        memo[id(self)] = shape
+        for name in self.__slots__:
+            if name in ("_polygon", "_mask_cache"):
+                # Qt polygons and images are not copyable, rebuilt on demand
+                setattr(shape, name, None)
+            elif hasattr(self, name):
+                setattr(shape, name, copy.deepcopy(getattr(self, name), memo))
+        return shape
+
+    @property
+    def points(self):
+        """Vertices as a list of QPointF, created on first access"""
+        if self._points is None:
+            self._points = [
+                QtCore.QPointF(x, y) for x, y in self._points_array.tolist()
+            ]
+            self._points_array = None
+            self._polygon = None
+        return self._points
+
+    @points.setter
+    def points(self, value):
+        """Set vertices from a list of QPointF or an (N, 2) array"""
+        self._polygon = None
+        if isinstance(value, np.ndarray):
+            self._points_array = points_from_list(value)
+            self._points = None
+        else:
+            self._points = value
+            self._points_array = None
+
+    @property
+    def points_array(self):
+        """Vertices as a read-only (N, 2) float64 array"""
+        if self._points is None:
+            return self._points_array
+        array = np.array(
+            [(p.x(), p.y()) for p in self._points], dtype=np.float64
+        ).reshape(-1, 2)
+        array.flags.writeable = False
+        return array
+
+    def points_to_list(self):
+        """Vertices as a list of [x, y] pairs, for serialization"""
+        if self._points is None:
+            return self._points_array.tolist()
+        return [[p.x(), p.y()] for p in self._points]
+
+    def _vertex(self, i):
+        """Get a vertex as QPointF without materializing all points"""
+        if self._points is None:
+            x, y = self._points_array[i]
+            return QtCore.QPointF(x, y)
+        return self._points[i]
+
+    def _to_polygon(self):
+        """Build a QPolygonF of the vertices"""
+        if self._points is not None:
+            return QtGui.QPolygonF(self._points)
+        if self._polygon is None:
+            array = self._points_array
+            polygon = QtGui.QPolygonF(len(array))
+            if len(array):
+                # QPointF stores two qreal (double), copy straight into it
+                buffer = polygon.data()
+                buffer.setsize(array.nbytes)
+                np.frombuffer(buffer, dtype=np.float64).reshape(-1, 2)[
+                    :
+                ] = array
+            self._polygon = polygon
+        return self._polygon
+
     def to_dict(self):
         dictData = {
             "label": self.label,
             "score": self.score,
-            "points": [(p.x(), p.y()) for p in self.points],
+            "points": self.points_to_list(),
             "group_id": self.group_id,
             "description": self.description,
             "difficult": self.difficult,
@@ -126,6 +262,9 @@ class Shape:
         }
         if self.shape_type == "rotation":
             dictData["direction"] = self.direction
+        elif self.shape_type == "mask":
+            dictData["mask"] = self.mask_rle()
+            dictData["points"] = self.points_to_list()
         dictData = {
             **self.other_data,
             **dictData,
@@ -135,7 +274,7 @@ class Shape:
     def load_from_dict(self, data: dict, close=True):
         self.label = data["label"]
         self.score = data.get("score")
-        self.points = [QtCore.QPointF(p[0], p[1]) for p in data["points"]]
+        self.points = points_from_list(data["points"])
         self.group_id = data.get("group_id")
         self.description = data.get("description", "")
         self.difficult = data.get("difficult", False)
@@ -145,6 +284,14 @@ class Shape:
         self.kie_linking = data.get("kie_linking", [])
         if self.shape_type == "rotation":
             self.direction = data.get("direction", 0)
+        elif self.shape_type == "mask":
+            self.mask = data["mask"]
+            self._mask_cache = None
+            if len(self) == 4:
+                x, y = self.points_array[0]
+                self._mask_origin = (round(x), round(y))
+            else:
+                self.set_mask_rle(self.mask)
         self.other_data = {k: v for k, v in data.items() if k not in self.KEYS}
         if close:
             self.close()
@@ -174,18 +321,104 @@ class Shape:
             "line",
             "circle",
             "linestrip",
+            "mask",
         ]
 
+    def set_mask(self, mask):
+        """Set the pixels of a mask shape from a boolean (H, W) array"""
+        self.set_mask_rle(utils.encode_mask(mask))
+
+    def set_mask_rle(self, rle):
+        """Set the pixels of a mask shape from COCO RLE"""
+        x, y, w, h = utils.rle_to_bbox(rle)
+        self.mask = rle
+        self._mask_origin = (x, y)
+        self._mask_cache = None
+        self.points = points_from_list(
+            [[x, y], [x + w, y], [x + w, y + h], [x, y + h]]
+        )
+
+    def mask_rle(self):
+        """Get the RLE of a mask shape at its current position.
+
+        Moving a mask shape only moves its box, the pixels are shifted
+        by the rounded offset when they are read.
+        """
+        x, y = self.points_array[0]
+        dx = round(x) - self._mask_origin[0]
+        dy = round(y) - self._mask_origin[1]
+        if dx or dy:
+            self.set_mask_rle(utils.translate_rle(self.mask, dx, dy))
+        return self.mask
+
+    def _mask_pixels(self):
+        """Get the pixels inside the box of a mask shape, cached"""
+        cache = self._mask_cache
+        if cache is None or cache[0] is not self.mask:
+            x, y = self._mask_origin
+            points = self.points_array
+            w = round(points[2][0] - points[0][0])
+            h = round(points[2][1] - points[0][1])
+            pixels = utils.decode_mask(self.mask)[y : y + h, x : x + w]
+            cache = self._mask_cache = [self.mask, pixels, None, None]
+        return cache[1]
+
+    def _mask_image(self, color):
+        """Get the mask overlay filled with a color, cached"""
+        pixels = self._mask_pixels()
+        cache = self._mask_cache
+        rgba = color.rgba()
+        if cache[2] != rgba:
+            a = color.alpha()
+            # Premultiplied ARGB, drawn without conversion
+            value = (
+                (a << 24)
+                | (color.red() * a // 255 << 16)
+                | (color.green() * a // 255 << 8)
+                | color.blue() * a // 255
+            )
+            data = np.where(pixels, np.uint32(value), np.uint32(0))
+            data = np.ascontiguousarray(data, dtype=np.uint32).tobytes()
+            h, w = pixels.shape
+            image = QtGui.QImage(
+                data, w, h, 4 * w, QtGui.QImage.Format_ARGB32_Premultiplied
+            )
+            # The image refers to the bytes, keep them alive with it
+            cache[2], cache[3] = rgba, (image, data)
+        return cache[3][0]
+
+    def paint_mask(self, painter: QtGui.QPainter):
+        """Paint a mask shape as an overlay of its label color"""
+        if len(self) != 4:
+            return
+        highlighted = self.selected or self.fill
+        color = QtGui.QColor(
+            self.select_fill_color if highlighted else self.fill_color
+        )
+        pixels = self._mask_pixels()
+        if pixels.size:
+            painter.drawImage(self._vertex(0), self._mask_image(color))
+        if highlighted:
+            color = (
+                self.select_line_color if self.selected else self.line_color
+            )
+            pen = QtGui.QPen(QtGui.QColor(color))
+            pen.setWidth(max(1, int(round(self.line_width / self.scale))))
+            pen.setStyle(QtCore.Qt.DashLine)
+            painter.setPen(pen)
+            painter.drawPolygon(self._to_polygon())
+
     def close(self):
         """Close the shape"""
-        if self.shape_type == "rotation" and len(self.points) == 4:
-            cx = (self.points[0].x() + self.points[2].x()) / 2
-            cy = (self.points[0].y() + self.points[2].y()) / 2
+        if self.shape_type == "rotation" and len(self) == 4:
+            p0, p2 = self._vertex(0), self._vertex(2)
+            cx = (p0.x() + p2.x()) / 2
+            cy = (p0.y() + p2.y()) / 2
             self.center = QtCore.QPointF(cx, cy)
         self._closed = True
 
     def reach_max_points(self):
-        if len(self.points) >= 4:
+        if len(self) >= 4:
             return True
         return False
 
@@ -206,7 +439,7 @@ class Shape:
 
     def pop_point(self):
         """Remove and return the last point of the shape"""
-        if self.points:
+        if len(self):
             return self.points.pop()
         return None
 
@@ -234,7 +467,11 @@ class Shape:
 
     def paint(self, painter: QtGui.QPainter):  # noqa: max-complexity: 18
         """Paint shape using QPainter"""
-        if self.points:
+        if self.shape_type == "mask":
+            self.paint_mask(painter)
+            return
+        num_points = len(self)
+        if num_points:
             color = (
                 self.select_line_color if self.selected else self.line_color
             )
@@ -246,62 +483,48 @@ class Shape:
             line_path = QtGui.QPainterPath()
             vrtx_path = QtGui.QPainterPath()
 
-            if self.shape_type == "rectangle":
-                assert len(self.points) in [1, 2, 4]
-                if len(self.points) == 2:
-                    rectangle = self.get_rect_from_line(*self.points)
+            if self.shape_type in ["rectangle", "rotation"]:
+                assert num_points in [1, 2, 4]
+                if num_points == 2:
+                    rectangle = self.get_rect_from_line(
+                        self._vertex(0), self._vertex(1)
+                    )
                     line_path.addRect(rectangle)
-                if len(self.points) == 4:
-                    line_path.moveTo(self.points[0])
-                    for i, p in enumerate(self.points):
-                        line_path.lineTo(p)
-                        if self.selected:
-                            self.draw_vertex(vrtx_path, i)
-                    if self.is_closed() or self.label is not None:
-                        line_path.lineTo(self.points[0])
-            elif self.shape_type == "rotation":
-                assert len(self.points) in [1, 2, 4]
-                if len(self.points) == 2:
-                    rectangle = self.get_rect_from_line(*self.points)
-                    line_path.addRect(rectangle)
-                if len(self.points) == 4:
-                    line_path.moveTo(self.points[0])
-                    for i, p in enumerate(self.points):
-                        line_path.lineTo(p)
-                        if self.selected:
+                if num_points == 4:
+                    line_path.addPolygon(self._to_polygon())
+                    if self.selected:
+                        for i in range(num_points):
                             self.draw_vertex(vrtx_path, i)
                     if self.is_closed() or self.label is not None:
-                        line_path.lineTo(self.points[0])
+                        line_path.lineTo(self._vertex(0))
             elif self.shape_type == "circle":
-                assert len(self.points) in [1, 2]
-                if len(self.points) == 2:
+                assert num_points in [1, 2]
+                if num_points == 2:
                     rectangle = self.get_circle_rect_from_line(self.points)
                     line_path.addEllipse(rectangle)
                 if self.selected:
-                    for i in range(len(self.points)):
+                    for i in range(num_points):
                         self.draw_vertex(vrtx_path, i)
             elif self.shape_type == "linestrip":
-                line_path.moveTo(self.points[0])
-                for i, p in enumerate(self.points):
-                    line_path.lineTo(p)
-                    if self.selected:
+                line_path.addPolygon(self._to_polygon())
+                if self.selected:
+                    for i in range(num_points):
                         self.draw_vertex(vrtx_path, i)
             elif self.shape_type == "point":
-                assert len(self.points) == 1
+                assert num_points == 1
                 self.draw_vertex(vrtx_path, 0, True)
             else:
-                line_path.moveTo(self.points[0])
+                line_path.addPolygon(self._to_polygon())
                 # Uncommenting the following line will draw 2 paths
                 # for the 1st vertex, and make it non-filled, which
                 # may be desirable.
                 self.draw_vertex(vrtx_path, 0)
 
-                for i, p in enumerate(self.points):
-                    line_path.lineTo(p)
-                    if self.selected:
+                if self.selected:
+                    for i in range(num_points):
                         self.draw_vertex(vrtx_path, i)
                 if self.is_closed():
-                    line_path.lineTo(self.points[0])
+                    line_path.lineTo(self._vertex(0))
 
             painter.drawPath(line_path)
             painter.drawPath(vrtx_path)
@@ -319,7 +542,7 @@ class Shape:
         """Draw a vertex"""
         d = self.point_size / self.scale
         shape = self.point_type
-        point = self.points[i]
+        point = self._vertex(i)
         if i == self._highlight_index:
             size, shape = self._highlight_settings[self._highlight_mode]
             d *= size
@@ -358,29 +581,62 @@ class Shape:
         """Find the index of the nearest vertex to a point
         Only consider if the distance is smaller than epsilon
         """
-        min_distance = float("inf")
-        min_i = None
-        for i, p in enumerate(self.points):
-            dist = utils.distance(p - point)
-            if dist <= epsilon and dist < min_distance:
-                min_distance = dist
-                min_i = i
-        return min_i
+        if self.shape_type == "mask":
+            return None  # the box of a mask is not editable
+        points = self.points_array
+        if not len(points):
+            return None
+        dists = np.hypot(points[:, 0] - point.x(), points[:, 1] - point.y())
+        min_i = int(np.argmin(dists))
+        if dists[min_i] <= epsilon:
+            return min_i
+        return None
 
     def nearest_edge(self, point, epsilon):
         """Get nearest edge index"""
-        min_distance = float("inf")
-        post_i = None
-        for i in range(len(self.points)):
-            line = [self.points[i - 1], self.points[i]]
-            dist = utils.distance_to_line(point, line)
-            if dist <= epsilon and dist < min_distance:
-                min_distance = dist
-                post_i = i
-        return post_i
+        if self.shape_type == "mask":
+            return None
+        p2 = self.points_array
+        if not len(p2):
+            return None
+        # Edge i goes from vertex i - 1 to vertex i
+        p1 = np.roll(p2, 1, axis=0)
+        p3 = np.array([point.x(), point.y()])
+        edge = p2 - p1
+        edge_length = np.hypot(edge[:, 0], edge[:, 1])
+        cross = np.abs(
+            edge[:, 0] * (p1[:, 1] - p3[1]) - edge[:, 1] * (p1[:, 0] - p3[0])
+        )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            dists = np.select(
+                [
+                    np.einsum("ij,ij->i", p3 - p1, edge) < 0,
+                    np.einsum("ij,ij->i", p3 - p2, -edge) < 0,
+                    edge_length == 0,
+                ],
+                [
+                    np.hypot(p3[0] - p1[:, 0], p3[1] - p1[:, 1]),
+                    np.hypot(p3[0] - p2[:, 0], p3[1] - p2[:, 1]),
+                    0.0,
+                ],
+                default=cross / edge_length,
+            )
+        post_i = int(np.argmin(dists))
+        if dists[post_i] <= epsilon:
+            return post_i
+        return None
 
     def contains_point(self, point):
         """Check if shape contains a point"""
+        if self.shape_type == "mask":
+            if len(self) != 4:
+                return False
+            origin = self._vertex(0)
+            x = math.floor(point.x() - origin.x())
+            y = math.floor(point.y() - origin.y())
+            pixels = self._mask_pixels()
+            h, w = pixels.shape
+            return 0 <= x < w and 0 <= y < h and bool(pixels[y, x])
         return self.make_path().contains(point)
 
     def get_circle_rect_from_line(self, line):
@@ -395,19 +651,14 @@ class Shape:
 
     def make_path(self):
         """Create a path from shape"""
-        if self.shape_type == "rectangle":
-            path = QtGui.QPainterPath(self.points[0])
-            for p in self.points[1:]:
-                path.lineTo(p)
-        elif self.shape_type == "circle":
+        if self.shape_type == "circle":
             path = QtGui.QPainterPath()
-            if len(self.points) == 2:
+            if len(self) == 2:
                 rectangle = self.get_circle_rect_from_line(self.points)
                 path.addEllipse(rectangle)
         else:
-            path = QtGui.QPainterPath(self.points[0])
-            for p in self.points[1:]:
-                path.lineTo(p)
+            path = QtGui.QPainterPath(self._vertex(0))
+            path.addPolygon(self._to_polygon())
         return path
 
     def bounding_rect(self):
@@ -416,7 +667,10 @@ class Shape:
 
     def move_by(self, offset):
         """Move all points by an offset"""
-        self.points = [p + offset for p in self.points]
+        if self._points is None:
+            self.points = self._points_array + (offset.x(), offset.y())
+        else:
+            self.points = [p + offset for p in self.points]
 
     def move_vertex_by(self, i, offset):
         """Move a specific vertex by an offset"""
@@ -442,10 +696,19 @@ class Shape:
         return copy.deepcopy(self)
 
     def __len__(self):
-        return len(self.points)
+        if self._points is None:
+            return len(self._points_array)
+        return len(self._points)
 
     def __getitem__(self, key):
         return self.points[key]
 
     def __setitem__(self, key, value):
         self.points[key] = value
+
+
+def points_from_list(points):
+    """Convert a list of [x, y] pairs to a read-only (N, 2) array"""
+    array = np.array(points, dtype=np.float64).reshape(-1, 2)
+    array.flags.writeable = False
+    return array
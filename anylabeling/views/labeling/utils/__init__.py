@@ -1,6 +1,6 @@
 # flake8: noqa
 
-from .batch import run_all_images
+from .batch import run_all_images, run_video_file
 from .colormap import label_colormap
 from .crop import save_crop
 from .export import (
@@ -53,6 +53,13 @@ from .shape import (
     rectangle_from_diagonal,
     shape_conversion,
 )
+from .rle import (
+    decode_mask,
+    encode_mask,
+    rle_area,
+    rle_to_bbox,
+    translate_rle,
+)
 from .upload import (
     upload_image_flags_file,
     upload_label_flags_file,
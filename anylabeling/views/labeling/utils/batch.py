@@ -1,11 +1,14 @@
 import base64
+import configparser
 import json
+import os
 import os.path as osp
 from PIL import Image
 
 from PyQt5 import QtWidgets
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtCore import Qt, QEventLoop, QThread, QTimer, pyqtSignal
 from PyQt5.QtWidgets import (
+    QFileDialog,
     QVBoxLayout,
     QProgressDialog,
     QDialog,
@@ -15,14 +18,25 @@ from PyQt5.QtWidgets import (
 )
 
 from anylabeling.app_info import __version__
+from anylabeling.services.auto_labeling.instrumentation import (
+    dump_batch_stats,
+    inference_stats,
+)
 from anylabeling.views.labeling.logger import logger
 from anylabeling.views.labeling.utils._io import io_open
 from anylabeling.views.labeling.utils.qt import new_icon_path
-from anylabeling.views.labeling.utils.style import get_msg_box_style
+from anylabeling.views.labeling.utils.style import (
+    get_msg_box_style,
+    get_progress_dialog_style,
+)
+from anylabeling.views.labeling.utils.video import (
+    VideoFrameSource,
+    VideoInferenceDialog,
+)
 from anylabeling.views.labeling.widgets.popup import Popup
 
 
-__all__ = ["run_all_images"]
+__all__ = ["run_all_images", "run_video_file"]
 
 
 INVALID_MODEL_LIST = [
@@ -38,6 +52,7 @@ INVALID_MODEL_LIST = [
 
 TEXT_PROMPT_MODELS = [
     "grounding_dino",
+    "grounding_dino_api",
     "grounding_sam",
     "grounding_sam2",
     "yoloe",
@@ -47,6 +62,19 @@ VIDEO_MODELS = [
     "segment_anything_2_video",
 ]
 
+# Models that can consume frames decoded straight from a video file
+VIDEO_SOURCE_MODELS = VIDEO_MODELS + [
+    "yolov5_det_track",
+    "yolov8_det_track",
+    "yolo11_det_track",
+    "yolov8_seg_track",
+    "yolo11_seg_track",
+    "yolov8_obb_track",
+    "yolo11_obb_track",
+    "yolov8_pose_track",
+    "yolo11_pose_track",
+]
+
 
 class TextInputDialog(QDialog):
     def __init__(self, parent=None):
@@ -177,60 +205,80 @@ def cancel_operation(self):
     self.cancel_processing = True
 
 
+def merge_auto_labeling_result(data, auto_labeling_result):
+    """Merge an auto labeling result into existing label data"""
+    if auto_labeling_result is None:
+        new_shapes = []
+        new_description = ""
+        replace = True
+    else:
+        new_shapes = [shape.to_dict() for shape in auto_labeling_result.shapes]
+        new_description = auto_labeling_result.description
+        replace = auto_labeling_result.replace
+
+    if replace:
+        data["shapes"] = new_shapes
+        data["description"] = new_description
+    else:
+        data["shapes"].extend(new_shapes)
+        if "description" in data:
+            data["description"] += new_description
+        else:
+            data["description"] = new_description
+    return data
+
+
+def write_auto_labeling_result(
+    label_file,
+    auto_labeling_result,
+    image_path,
+    image_height,
+    image_width,
+    image_data=None,
+):
+    """Write an auto labeling result, merging it into an existing file"""
+    if osp.exists(label_file):
+        with io_open(label_file, "r") as f:
+            data = json.load(f)
+    else:
+        data = {
+            "version": __version__,
+            "flags": {},
+            "shapes": [],
+            "imagePath": image_path,
+            "imageData": image_data,
+            "imageHeight": image_height,
+            "imageWidth": image_width,
+        }
+    merge_auto_labeling_result(data, auto_labeling_result)
+
+    with io_open(label_file, "w") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
 def save_auto_labeling_result(self, image_file, auto_labeling_result):
     try:
         label_file = osp.splitext(image_file)[0] + ".json"
         if self.output_dir:
             label_file = osp.join(self.output_dir, osp.basename(label_file))
 
-        if auto_labeling_result is None:
-            new_shapes = []
-            new_description = ""
-            replace = True
-        else:
-            new_shapes = [
-                shape.to_dict() for shape in auto_labeling_result.shapes
-            ]
-            new_description = auto_labeling_result.description
-            replace = auto_labeling_result.replace
-
-        if osp.exists(label_file):
-            with io_open(label_file, "r") as f:
-                data = json.load(f)
-
-            if replace:
-                data["shapes"] = new_shapes
-                data["description"] = new_description
-            else:
-                data["shapes"].extend(new_shapes)
-                if "description" in data:
-                    data["description"] += new_description
-                else:
-                    data["description"] = new_description
-        else:
+        image_data = None
+        image_width = image_height = None
+        if not osp.exists(label_file):
             if self._config["store_data"]:
                 with open(image_file, "rb") as f:
                     image_data = f.read()
                 image_data = base64.b64encode(image_data).decode("utf-8")
-            else:
-                image_data = None
-
-            image_path = osp.basename(image_file)
             image_width, image_height = get_image_size(image_file)
 
-            data = {
-                "version": __version__,
-                "flags": {},
-                "shapes": new_shapes,
-                "imagePath": image_path,
-                "imageData": image_data,
-                "imageHeight": image_height,
-                "imageWidth": image_width,
-                "description": new_description,
-            }
-
-        with io_open(label_file, "w") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        write_auto_labeling_result(
+            label_file,
+            auto_labeling_result,
+            osp.basename(image_file),
+            image_height,
+            image_width,
+            image_data,
+        )
 
     except Exception as e:
         logger.error(
@@ -238,8 +286,83 @@ def save_auto_labeling_result(self, image_file, auto_labeling_result):
         )
 
 
+class PipelinedPredictionThread(QThread):
+    """Run a model that overlaps the requests of consecutive images off
+    the GUI thread, saving each result as soon as it arrives.
+
+    An image that fails is recorded in `failed` and its label file is
+    left untouched; the other images are still processed.
+    """
+
+    progress = pyqtSignal(int)  # number of processed images
+
+    def __init__(self, widget, image_files):
+        super().__init__()
+        self.widget = widget
+        self.image_files = image_files
+        self.num_processed = 0
+        self.failed = {}  # image file -> error message
+        self.error = None
+
+    def run(self):
+        widget = self.widget
+        model_manager = widget.auto_labeling_widget.model_manager
+        try:
+            results = model_manager.predict_shapes_pipelined(
+                self.image_files, text_prompt=widget.text_prompt
+            )
+            try:
+                for image_file, result in zip(self.image_files, results):
+                    if isinstance(result, Exception):
+                        logger.error(
+                            f"Failed to process {image_file}: {result}"
+                        )
+                        self.failed[image_file] = str(result)
+                    else:
+                        save_auto_labeling_result(widget, image_file, result)
+                    self.num_processed += 1
+                    self.progress.emit(self.num_processed)
+                    if widget.cancel_processing:
+                        break
+            finally:
+                results.close()
+        except Exception as e:
+            logger.exception(f"Error during pipelined prediction: {e}")
+            self.error = e
+
+
+def process_images_pipelined(self, progress_dialog):
+    """Run a model that overlaps the requests of consecutive images"""
+    start_index = self.image_index
+    thread = PipelinedPredictionThread(self, self.image_list[start_index:])
+    thread.progress.connect(
+        lambda num_processed: progress_dialog.setValue(
+            start_index + num_processed
+        )
+    )
+    event_loop = QEventLoop()
+    thread.finished.connect(event_loop.quit)
+    thread.start()
+    event_loop.exec_()
+
+    self.image_index = start_index + thread.num_processed
+    if thread.error is not None:
+        raise thread.error
+    if thread.failed:
+        logger.warning(
+            f"Failed to process {len(thread.failed)} of "
+            f"{thread.num_processed} images"
+        )
+
+
 def process_next_image(self, progress_dialog):
     try:
+        model_manager = self.auto_labeling_widget.model_manager
+        if model_manager.supports_pipelined_prediction():
+            process_images_pipelined(self, progress_dialog)
+            finish_processing(self, progress_dialog)
+            return
+
         batch = True
         total_images = len(self.image_list)
 
@@ -288,8 +411,8 @@ def process_next_image(self, progress_dialog):
                     self, image_file, auto_labeling_result
                 )
 
-            progress_dialog.setValue(self.image_index)
             self.image_index += 1
+            progress_dialog.setValue(self.image_index)
 
         finish_processing(self, progress_dialog)
 
@@ -305,6 +428,13 @@ def process_next_image(self, progress_dialog):
         popup.show_popup(self, position="center")
 
 
+def process_images(self, progress_dialog):
+    """Process the remaining images, then write their inference stats"""
+    with inference_stats.recording() as stats:
+        process_next_image(self, progress_dialog)
+    dump_batch_stats(stats)
+
+
 def show_progress_dialog_and_process(self):
     self.cancel_processing = False
 
@@ -391,7 +521,7 @@ def show_progress_dialog_and_process(self):
     progress_dialog.canceled.connect(lambda: cancel_operation(self))
     progress_dialog.show()
 
-    QTimer.singleShot(200, lambda: process_next_image(self, progress_dialog))
+    QTimer.singleShot(200, lambda: process_images(self, progress_dialog))
 
 
 def run_all_images(self):
@@ -463,3 +593,231 @@ def run_all_images(self):
 
     else:
         show_progress_dialog_and_process(self)
+
+
+class MOTWriter:
+    """Write tracking results in the MOT format used by `custom_to_mot`
+
+    Rows of gt.txt are `frame, track_id, x, y, w, h, 1, class_id, 1`;
+    class ids follow classes.txt, in order of first appearance.
+    """
+
+    def __init__(self, save_path, frame_rate, width, height):
+        self.save_path = save_path
+        self.frame_rate = frame_rate
+        self.width = width
+        self.height = height
+        self.classes = {}
+        self.num_frames = 0
+        os.makedirs(save_path, exist_ok=True)
+        self._file = open(osp.join(save_path, "gt.txt"), "w", encoding="utf-8")
+
+    def write(self, frame_id, shapes):
+        self.num_frames += 1
+        for shape in shapes:
+            if shape.shape_type == "point" or len(shape) < 2:
+                continue
+            points = shape.points_array
+            xmin, ymin = points.min(axis=0)
+            xmax, ymax = points.max(axis=0)
+            class_id = self.classes.setdefault(shape.label, len(self.classes))
+            track_id = -1 if shape.group_id is None else int(shape.group_id)
+            row = [
+                frame_id,
+                track_id,
+                int(xmin),
+                int(ymin),
+                int(xmax - xmin),
+                int(ymax - ymin),
+                1,
+                class_id,
+                1,
+            ]
+            self._file.write(",".join(map(str, row)) + "\n")
+
+    def close(self):
+        self._file.close()
+        with io_open(osp.join(self.save_path, "classes.txt"), "w") as f:
+            f.write("\n".join(self.classes) + "\n")
+        config = configparser.ConfigParser()
+        config["Sequence"] = dict(
+            name="MOT",
+            imDir=osp.basename(self.save_path),
+            frameRate=str(self.frame_rate),
+            seqLength=str(self.num_frames),
+            imWidth=str(self.width),
+            imHeight=str(self.height),
+            imExt=".jpg",
+        )
+        with io_open(osp.join(self.save_path, "seqinfo.ini"), "w") as f:
+            config.write(f)
+
+
+def process_video_frames(self, source, out_dir, prefix, seq_len, out_format):
+    """Run the loaded model on every frame yielded by a video source
+
+    Frames go from the decoder's ring buffer to the model as arrays, so no
+    image is written or read back; only the results are saved.
+
+    Returns:
+        int: Number of processed frames.
+    """
+    model_manager = self.auto_labeling_widget.model_manager
+    run_tracker = model_manager.loaded_model_config["type"] in VIDEO_MODELS
+
+    progress_dialog = QProgressDialog(
+        self.tr("Processing video frames..."),
+        self.tr("Cancel"),
+        0,
+        source.num_output_frames,
+        self,
+    )
+    progress_dialog.setWindowModality(Qt.WindowModal)
+    progress_dialog.setWindowTitle(self.tr("Batch Processing"))
+    progress_dialog.setMinimumWidth(400)
+    progress_dialog.setMinimumHeight(150)
+    progress_dialog.setStyleSheet(
+        get_progress_dialog_style(color="#1d1d1f", height=20)
+    )
+    progress_dialog.show()
+
+    mot_writer = None
+    if out_format == "mot":
+        mot_writer = MOTWriter(
+            out_dir, round(source.fps), source.width, source.height
+        )
+
+    num_frames = 0
+    try:
+        for _, frame in source:
+            if progress_dialog.wasCanceled():
+                logger.info("Video auto labeling cancelled by user.")
+                break
+
+            frame_name = f"{prefix}{str(num_frames).zfill(seq_len)}.jpg"
+            frame_file = osp.join(out_dir, frame_name)
+            if run_tracker:
+                auto_labeling_result = model_manager.predict_shapes(
+                    frame, frame_file, run_tracker=True, batch=True
+                )
+            else:
+                auto_labeling_result = model_manager.predict_shapes(
+                    frame, frame_file, batch=True
+                )
+
+            if mot_writer is not None:
+                shapes = []
+                if auto_labeling_result is not None:
+                    shapes = auto_labeling_result.shapes
+                mot_writer.write(num_frames, shapes)
+            else:
+                write_auto_labeling_result(
+                    osp.splitext(frame_file)[0] + ".json",
+                    auto_labeling_result,
+                    frame_name,
+                    frame.shape[0],
+                    frame.shape[1],
+                )
+
+            num_frames += 1
+            progress_dialog.setValue(num_frames)
+    finally:
+        if mot_writer is not None:
+            mot_writer.close()
+        progress_dialog.close()
+
+    if source.error is not None:
+        raise source.error
+    return num_frames
+
+
+def run_video_file(self):
+    """Auto label a video file without extracting its frames to disk"""
+    model_manager = self.auto_labeling_widget.model_manager
+    if model_manager.loaded_model_config is None:
+        model_manager.new_model_status.emit(
+            self.tr("Model is not loaded. Choose a mode to continue.")
+        )
+        return
+
+    model_type = model_manager.loaded_model_config["type"]
+    if model_type not in VIDEO_SOURCE_MODELS:
+        logger.warning(
+            f"The model `{model_type}` is not supported for this action."
+            f" Please choose a tracking model to execute."
+        )
+        model_manager.new_model_status.emit(
+            self.tr(
+                "Invalid model type, please choose a tracking model to run."
+            )
+        )
+        return
+
+    filter = "Video Files (*.asf *.avi *.m4v *.mkv *.mov *.mp4 *.mpeg *.mpg *.ts *.wmv);;All Files (*)"
+    input_file, _ = QFileDialog.getOpenFileName(
+        self,
+        self.tr("Open Video file"),
+        "",
+        filter,
+    )
+    if not input_file or not osp.exists(input_file):
+        return
+
+    try:
+        source = VideoFrameSource(input_file)
+    except IOError as e:
+        logger.error(e)
+        popup = Popup(
+            f"Failed to open video file: {osp.basename(input_file)}",
+            self,
+            icon=new_icon_path("warning", "svg"),
+        )
+        popup.show_popup(self, position="center")
+        return
+
+    try:
+        dialog = VideoInferenceDialog(self, source.total_frames, source.fps)
+        if not dialog.exec_():
+            return
+        interval, prefix, seq_len, out_format = dialog.get_values()
+        source.interval = interval
+
+        out_dir = osp.join(
+            osp.dirname(input_file),
+            osp.splitext(osp.basename(input_file))[0],
+        )
+        if self.output_dir and out_format == "json":
+            out_dir = self.output_dir
+        os.makedirs(out_dir, exist_ok=True)
+
+        # Track ids start from scratch for a new video; the SAM2 video
+        # tracker keeps its prompts and starts from the first frame.
+        if model_type not in VIDEO_MODELS:
+            model_manager.set_auto_labeling_reset_tracker()
+
+        logger.info(f"Start auto labeling video: {input_file} -> {out_dir}")
+        with inference_stats.recording() as stats:
+            num_frames = process_video_frames(
+                self, source, out_dir, prefix, seq_len, out_format
+            )
+        dump_batch_stats(stats)
+        logger.info(f"Processed {num_frames} video frames.")
+
+    except Exception as e:
+        logger.error(f"Error occurred while processing video: {e}")
+        popup = Popup(
+            self.tr("Error occurred while processing images!"),
+            self,
+            icon=new_icon_path("error", "svg"),
+        )
+        popup.show_popup(self, position="center")
+        return
+    finally:
+        source.close()
+
+    popup = Popup(
+        self.tr("Processing completed successfully!"),
+        self,
+        icon=new_icon_path("copy-green", "svg"),
+    )
+    popup.show_popup(self, position="center")
@@ -1,34 +1,169 @@
+import io
 import os.path
 
 import cv2
 import numpy as np
+import PIL.Image
 import qimage2ndarray
 from PyQt5 import QtGui
 from PyQt5.QtGui import QImage
 
+from anylabeling.services.auto_labeling.instrumentation import DECODE, timed
 
+EXIF_ORIENTATION = 0x0112
+
+_RGB_VIEW_FORMATS = (
+    QImage.Format_RGB32,
+    QImage.Format_ARGB32,
+    QImage.Format_ARGB32_Premultiplied,
+    QImage.Format_RGBX8888,
+    QImage.Format_RGBA8888,
+)
+_RGB64_FORMATS = (
+    QImage.Format_RGBX64,
+    QImage.Format_RGBA64,
+    QImage.Format_RGBA64_Premultiplied,
+)
+_GRAY_FORMATS = (QImage.Format_Grayscale8, QImage.Format_Grayscale16)
+
+
+class DecodedFrame:
+    """
+    The decoded pixels of the image open in the canvas.
+
+    Created once per image by `LabelingWidget.load_file` and handed to
+    the models instead of the bare QImage, so that a prediction reads
+    the pixels Qt already decoded rather than decoding the file again.
+    `rgb` is a zero-copy view of the QImage memory whenever its format
+    allows, and is built once per image otherwise. It is shared by the
+    canvas and every prediction on the image, so it is read-only: a
+    model writing into its input raises instead of corrupting them.
+
+    Qt does not apply the EXIF orientation when decoding, so the pixels,
+    like the canvas, are in the orientation stored in the file and the
+    shapes predicted on them line up with what is displayed. The tag is
+    kept in `orientation` for code that needs to know about it.
+
+    Attributes:
+        qimage (QImage): The image shown in the canvas.
+        path (str): The file the image was loaded for.
+    """
+
+    def __init__(self, qimage, path=None, image_data=None):
+        self.qimage = qimage
+        self.path = path
+        self._image_data = image_data
+        self._orientation = None
+        self._rgb = None
+
+    @property
+    def rgb(self):
+        """numpy.ndarray: The read-only 8bit RGB pixels, shape (H, W, 3)"""
+        if self._rgb is None:
+            rgb = qimage_to_rgb(self.qimage)
+            rgb.setflags(write=False)
+            self._rgb = rgb
+        return self._rgb
+
+    @property
+    def orientation(self):
+        """int: The EXIF orientation tag of the file, 1 if it has none"""
+        if self._orientation is None:
+            self._orientation = read_exif_orientation(self._image_data)
+        return self._orientation
+
+    def width(self):
+        return self.qimage.width()
+
+    def height(self):
+        return self.qimage.height()
+
+    def isNull(self):
+        return self.qimage.isNull()
+
+    def to_pil(self):
+        """Copy the displayed pixels into a PIL image, RGBA if translucent"""
+        qimage = self.qimage.convertToFormat(QImage.Format_RGBA8888)
+        pixels = qimage2ndarray.byte_view(qimage)
+        if self.qimage.hasAlphaChannel():
+            return PIL.Image.fromarray(np.ascontiguousarray(pixels), "RGBA")
+        return PIL.Image.fromarray(
+            np.ascontiguousarray(pixels[..., :3]), "RGB"
+        )
+
+
+def read_exif_orientation(image_data):
+    """Read the EXIF orientation tag from encoded image bytes.
+
+    Only the file header is parsed, the pixels are not decoded.
+
+    Returns:
+        int: The orientation, from 1 to 8, 1 if it is unknown.
+    """
+    if not image_data:
+        return 1
+    try:
+        with PIL.Image.open(io.BytesIO(image_data)) as image:
+            orientation = image.getexif().get(EXIF_ORIENTATION, 1)
+    except Exception:  # noqa
+        return 1
+    return orientation if orientation in range(1, 9) else 1
+
+
+def qimage_to_rgb(qt_img):
+    """
+    Convert a QImage to an 8bit RGB image, as a view of its memory when
+    the format allows
+    """
+    pixel_format = qt_img.format()
+    if pixel_format in _RGB_VIEW_FORMATS:
+        cv_image = qimage2ndarray.rgb_view(qt_img)
+    elif pixel_format in _GRAY_FORMATS:
+        cv_image = qimage2ndarray.raw_view(qt_img)
+    elif pixel_format in _RGB64_FORMATS:
+        cv_image = qimage2ndarray.raw_view(qt_img).view(np.uint16)
+        cv_image = cv_image.reshape(qt_img.height(), qt_img.width(), 4)
+        cv_image = np.array(cv_image[..., :3])
+    else:
+        # Indexed, mono and packed formats
+        qt_img = qt_img.convertToFormat(QImage.Format_RGB32)
+        cv_image = qimage2ndarray.rgb_view(qt_img)
+    return to_rgb_uint8(cv_image)
+
+
+@timed(DECODE)
 def qt_img_to_rgb_cv_img(qt_img, img_path=None):
     """
     Convert 8bit/16bit RGB image or 8bit/16bit Gray image to 8bit RGB image
+
+    `qt_img` may also be an RGB/Gray numpy array, e.g. a frame decoded
+    from a video, in which case `img_path` is not read, or a
+    `DecodedFrame`, whose pixels are used when `img_path` is the file
+    it was loaded for.
     """
-    if img_path is not None and os.path.exists(img_path):
+    if isinstance(qt_img, DecodedFrame):
+        if img_path is None or img_path == qt_img.path:
+            return qt_img.rgb
+        qt_img = qt_img.qimage
+    if isinstance(qt_img, np.ndarray):
+        cv_image = qt_img
+    elif img_path is not None and os.path.exists(img_path):
         # Load Image From Path Directly
         # NOTE: Potential issue - unable to handle the flipped image.
         # Temporary workaround: cv_image = cv2.imread(img_path)
         cv_image = cv2.imdecode(np.fromfile(img_path, dtype=np.uint8), -1)
         cv_image = cv2.cvtColor(cv_image, cv2.COLOR_BGR2RGB)
     else:
-        if (
-            qt_img.format() == QImage.Format_RGB32
-            or qt_img.format() == QImage.Format_ARGB32
-            or qt_img.format() == QImage.Format_ARGB32_Premultiplied
-        ):
-            cv_image = qimage2ndarray.rgb_view(qt_img)
-        else:
-            cv_image = qimage2ndarray.raw_view(qt_img)
+        return qimage_to_rgb(qt_img)
+    return to_rgb_uint8(cv_image)
+
+
+def to_rgb_uint8(cv_image):
+    """Scale a 16bit image to 8bit and expand a gray image to RGB"""
     # To uint8
     if cv_image.dtype != np.uint8:
-        cv2.normalize(cv_image, cv_image, 0, 255, cv2.NORM_MINMAX)
+        # Not in place, `cv_image` may be a view of a QImage
+        cv_image = cv2.normalize(cv_image, None, 0, 255, cv2.NORM_MINMAX)
         cv_image = np.array(cv_image, dtype=np.uint8)
     # To RGB
     if len(cv_image.shape) == 2 or cv_image.shape[2] == 1:
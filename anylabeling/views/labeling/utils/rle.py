@@ -0,0 +1,140 @@
+"""COCO run-length encoding of binary masks.
+
+Masks are flattened in column-major order and stored as alternating
+runs of background and foreground pixels, starting with background.
+The counts are compressed to a string the same way pycocotools does,
+so encoded masks can be written to COCO files as they are.
+"""
+
+import numpy as np
+
+
+def counts_to_string(counts):
+    """Compress run lengths to a COCO RLE string"""
+    chars = []
+    for i, x in enumerate(counts):
+        x = int(x)
+        if i > 2:
+            x -= int(counts[i - 2])
+        more = True
+        while more:
+            c = x & 0x1F
+            x >>= 5
+            more = x != -1 if c & 0x10 else x != 0
+            if more:
+                c |= 0x20
+            chars.append(chr(c + 48))
+    return "".join(chars)
+
+
+def counts_from_string(string):
+    """Decompress a COCO RLE string to run lengths"""
+    counts = []
+    p, n = 0, len(string)
+    while p < n:
+        x, k, more = 0, 0, True
+        while more:
+            c = ord(string[p]) - 48
+            x |= (c & 0x1F) << (5 * k)
+            more = c & 0x20
+            p += 1
+            k += 1
+            if not more and c & 0x10:
+                x |= -1 << (5 * k)
+        if len(counts) > 2:
+            x += counts[-2]
+        counts.append(x)
+    return counts
+
+
+def get_counts(rle):
+    """Get the run lengths of compressed or uncompressed RLE"""
+    counts = rle["counts"]
+    if isinstance(counts, bytes):
+        counts = counts.decode("ascii")
+    if isinstance(counts, str):
+        counts = counts_from_string(counts)
+    return np.asarray(counts, dtype=np.int64)
+
+
+def encode_mask(mask):
+    """Encode a binary (H, W) mask.
+
+    Returns:
+        dict: `size` as [height, width] and compressed `counts`.
+    """
+    mask = np.asarray(mask, dtype=bool)
+    height, width = mask.shape
+    flat = mask.ravel(order="F")
+    changes = np.flatnonzero(flat[1:] != flat[:-1]) + 1
+    bounds = np.concatenate(([0], changes, [flat.size]))
+    counts = np.diff(bounds)
+    if flat.size and flat[0]:
+        counts = np.concatenate(([0], counts))
+    return {
+        "size": [int(height), int(width)],
+        "counts": counts_to_string(counts.tolist()),
+    }
+
+
+def decode_mask(rle):
+    """Decode RLE to a boolean (H, W) mask"""
+    height, width = rle["size"]
+    counts = get_counts(rle)
+    values = np.zeros(len(counts), dtype=bool)
+    values[1::2] = True
+    flat = np.repeat(values, counts)
+    if flat.size != height * width:
+        raise ValueError(
+            f"Invalid RLE: {flat.size} pixels for size {height}x{width}"
+        )
+    return flat.reshape(width, height).T
+
+
+def rle_area(rle):
+    """Number of foreground pixels"""
+    return int(get_counts(rle)[1::2].sum())
+
+
+def rle_to_bbox(rle):
+    """Get the COCO [x, y, width, height] box of the foreground.
+
+    Computed from the runs, without decoding the mask.
+    """
+    height = rle["size"][0]
+    counts = get_counts(rle)
+    ends = np.cumsum(counts)
+    starts = ends - counts
+    fg = slice(1, None, 2)
+    starts, ends = starts[fg], ends[fg]
+    keep = counts[fg] > 0
+    if not keep.any():
+        return [0, 0, 0, 0]
+    first, last = starts[keep], ends[keep] - 1
+    x0, x1 = first // height, last // height
+    y0, y1 = first % height, last % height
+    # A run spanning several columns covers every row
+    spans = x1 > x0
+    y_min = 0 if spans.any() else int(y0.min())
+    y_max = height - 1 if spans.any() else int(y1.max())
+    return [
+        int(x0.min()),
+        y_min,
+        int(x1.max() - x0.min() + 1),
+        y_max - y_min + 1,
+    ]
+
+
+def translate_rle(rle, dx, dy):
+    """Shift a mask by whole pixels, cropping what leaves the image"""
+    mask = decode_mask(rle)
+    height, width = mask.shape
+    shifted = np.zeros_like(mask)
+    src = mask[
+        max(0, -dy) : max(0, height - dy), max(0, -dx) : max(0, width - dx)
+    ]
+    shifted[
+        max(0, dy) : max(0, dy) + src.shape[0],
+        max(0, dx) : max(0, dx) + src.shape[1],
+    ] = src
+    return encode_mask(shifted)
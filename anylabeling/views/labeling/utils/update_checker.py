@@ -1,4 +1,3 @@
-import requests
 import threading
 from packaging import version
 
@@ -16,6 +15,8 @@ def check_for_updates_async(callback=None, timeout=10):
     """
 
     def update_check_thread():
+        import requests
+
         try:
             headers = {"Accept": "application/vnd.github.v3+json"}
             response = requests.get(
@@ -78,6 +79,8 @@ def check_for_updates_sync(timeout=10):
     Returns:
         dict: Update info with has_update field, None if error
     """
+    import requests
+
     try:
         headers = {"Accept": "application/vnd.github.v3+json"}
         response = requests.get(
@@ -1,11 +1,21 @@
 import cv2
 import os
 import os.path as osp
+import queue
 import shutil
+import sys
 import tempfile
+import threading
 import subprocess
+import multiprocessing
+from collections import deque
+from concurrent.futures import (
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+)
 
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QEventLoop, QThread, pyqtSignal
 from PyQt5.QtWidgets import (
     QFileDialog,
     QMessageBox,
@@ -17,6 +27,7 @@ from PyQt5.QtWidgets import (
     QLineEdit,
     QPushButton,
     QSpinBox,
+    QComboBox,
     QApplication,
 )
 
@@ -131,52 +142,424 @@ class FrameExtractionDialog(QDialog):
         )
 
 
-def extract_frames_from_video(self, input_file, out_dir):
+class VideoInferenceDialog(FrameExtractionDialog):
+    """Frame settings plus the output format of a video auto-labeling run"""
+
+    OUTPUT_FORMATS = ("json", "mot")
+
+    def setup_ui(self):
+        super().setup_ui()
+        format_layout = QHBoxLayout()
+        format_label = QLabel(self.tr("Output format:"))
+        self.format_combo = QComboBox()
+        self.format_combo.addItem(self.tr("Label file per frame (JSON)"))
+        self.format_combo.addItem(self.tr("MOT tracking file (gt.txt)"))
+        self.format_combo.setMinimumWidth(100)
+        format_layout.addWidget(format_label)
+        format_layout.addWidget(self.format_combo)
+        # Insert above the example label and buttons
+        self.layout().insertLayout(3, format_layout)
+        self.setWindowTitle(self.tr("Video Auto Labeling Settings"))
+
+    def get_values(self):
+        return (
+            *super().get_values(),
+            self.OUTPUT_FORMATS[self.format_combo.currentIndex()],
+        )
+
+
+class VideoFrameSource:
+    """Decode video frames on a background thread.
+
+    Decoded frames are handed over through a bounded queue that acts as a
+    ring buffer: the decoder runs at most `buffer_size` frames ahead of the
+    consumer, so memory stays bounded and decoding overlaps inference.
+    Frames are yielded as RGB arrays, no image is written to disk.
+
+    Usage:
+        with VideoFrameSource(path, interval=5) as source:
+            for frame_index, frame in source:
+                ...
+    """
+
+    _END = object()
+
+    def __init__(self, video_path, interval=1, buffer_size=8):
+        self.video_path = video_path
+        self.interval = max(1, int(interval))
+        self.buffer_size = max(1, int(buffer_size))
+        self.error = None
+
+        self._capture, self._temp_video_path = open_video_capture(video_path)
+        if self._capture is None:
+            remove_temp_video(self._temp_video_path)
+            raise IOError(f"Failed to open video file: {video_path}")
+
+        self.total_frames = int(self._capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.fps = self._capture.get(cv2.CAP_PROP_FPS) or 30.0
+        self.width = int(self._capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self._capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+        self._buffer = queue.Queue(maxsize=self.buffer_size)
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def num_output_frames(self):
+        """Estimated number of frames yielded for the interval"""
+        if self.total_frames <= 0:
+            return 0
+        return (self.total_frames + self.interval - 1) // self.interval
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._decode, name="VideoFrameSource", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def _put(self, item):
+        # Block while the buffer is full, but give up once stopped
+        while not self._stop_event.is_set():
+            try:
+                self._buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _decode(self):
+        frame_index = 0
+        try:
+            while not self._stop_event.is_set():
+                # grab() only demuxes; skipped frames are never converted
+                if not self._capture.grab():
+                    break
+                if frame_index % self.interval == 0:
+                    ret, frame = self._capture.retrieve()
+                    if not ret:
+                        break
+                    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                    if not self._put((frame_index, frame)):
+                        return
+                frame_index += 1
+        except Exception as e:  # noqa
+            logger.error(f"Error decoding video {self.video_path}: {e}")
+            self.error = e
+        self._put(self._END)
+
+    def __iter__(self):
+        self.start()
+        while True:
+            item = self._buffer.get()
+            if item is self._END:
+                return
+            yield item
+
+    def close(self):
+        """Stop decoding and release the video"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._capture is not None:
+            self._capture.release()
+            self._capture = None
+        remove_temp_video(self._temp_video_path)
+        self._temp_video_path = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def open_video_capture(input_file):
+    """Open a video with OpenCV.
+
+    Some backends cannot open paths with non-ASCII characters, so the
+    video is copied to a temporary file if opening it directly fails.
+
+    Args:
+        input_file (str): Path of the video file.
+
+    Returns:
+        tuple: (video_capture, temp_video_path). video_capture is None if
+            the video could not be opened; temp_video_path is None unless
+            the workaround was used, and must be removed by the caller.
+    """
+    input_file_str = str(input_file)
     temp_video_path = None
-    video_capture = None
-    opened_successfully = False
-    ffmpeg_path = None
+
+    # Load video directly
+    video_capture = cv2.VideoCapture(input_file_str)
+    if video_capture.isOpened():
+        return video_capture, None
+
+    video_capture.release()
+    logger.warning("Loading video failed. Trying temporary file workaround.")
 
     try:
-        input_file_str = str(input_file)
+        with open(input_file, "rb") as f:
+            video_data = f.read()
+        _, ext = osp.splitext(input_file)
+        suffix = ext if ext else ".mp4"
+        temp_file = tempfile.NamedTemporaryFile(suffix=suffix, delete=False)
+        temp_video_path = temp_file.name
+        temp_file.write(video_data)
+        temp_file.close()
+        logger.debug(
+            f"Writing video data to temporary file: {temp_video_path}"
+        )
 
-        # Load video directly
-        video_capture = cv2.VideoCapture(input_file_str)
+        video_capture = cv2.VideoCapture(temp_video_path)
         if video_capture.isOpened():
-            opened_successfully = True
-        else:
+            return video_capture, temp_video_path
+        video_capture.release()
+        logger.error(
+            f"Failed to open video via temporary file: {temp_video_path}"
+        )
+    except Exception as e:
+        logger.error(f"Error during temporary file workaround: {e}")
+        if video_capture:
             video_capture.release()
-            logger.warning(
-                f"Loading video failed. Trying temporary file workaround."
+
+    return None, temp_video_path
+
+
+def remove_temp_video(temp_video_path):
+    """Remove the temporary copy created by `open_video_capture`."""
+    if temp_video_path and osp.exists(temp_video_path):
+        try:
+            logger.debug(f"Removing temporary video file: {temp_video_path}")
+            os.remove(temp_video_path)
+        except OSError as e:
+            logger.error(
+                f"Error removing temporary file {temp_video_path}: {e}"
             )
 
-            try:
-                with open(input_file, "rb") as f:
-                    video_data = f.read()
-                _, ext = osp.splitext(input_file)
-                suffix = ext if ext else ".mp4"
-                temp_file = tempfile.NamedTemporaryFile(
-                    suffix=suffix, delete=False
+
+# Intervals at least this long are reached by seeking instead of decoding
+# the frames in between; shorter ones are cheaper to skip with grab().
+SEEK_MIN_INTERVAL = 250
+# Shorter videos are split across threads, which avoids the start-up cost
+# of worker processes; decoding and encoding release the GIL.
+MIN_PROCESS_FRAMES = 10000
+SEGMENTS_PER_WORKER = 4
+MAX_PENDING_WRITES = 16
+
+
+# Set in worker processes by `init_segment_worker`
+_segment_stop_event = None
+
+
+def init_segment_worker(stop_event):
+    """Share the cancellation event with a worker process"""
+    global _segment_stop_event
+    _segment_stop_event = stop_event
+
+
+def write_frame(filename, frame):
+    """Encode a frame as JPEG, logging instead of raising on failure"""
+    try:
+        if not cv2.imwrite(filename, frame):
+            logger.error(f"Failed to write frame: {filename}")
+            return False
+    except Exception as e:
+        logger.error(f"Error writing frame {filename}: {e}")
+        return False
+    return True
+
+
+def extract_frame_segment(
+    video_path,
+    start,
+    stop,
+    interval,
+    out_dir,
+    prefix,
+    seq_len,
+    stop_event=None,
+    num_writers=2,
+):
+    """Extract every `interval`-th frame of the source frames [start, stop).
+
+    Frame `i` is saved as `{prefix}{i // interval}.jpg`, so segments can be
+    extracted independently and in any order. `start` must be a multiple
+    of `interval`; `stop` may be None to read until the end of the video.
+    JPEG encoding runs on a small thread pool while decoding continues.
+
+    Returns:
+        int: Number of saved frames.
+    """
+    video_capture = cv2.VideoCapture(video_path)
+    if not video_capture.isOpened():
+        logger.error(f"Failed to open video segment: {video_path}")
+        return 0
+
+    if stop_event is None:
+        stop_event = _segment_stop_event
+    seek = interval >= SEEK_MIN_INTERVAL
+    saved_frame_count = 0
+    position = 0
+    pending = deque()
+    try:
+        with ThreadPoolExecutor(max_workers=num_writers) as writers:
+            frame_index = start
+            while stop is None or frame_index < stop:
+                if stop_event is not None and stop_event.is_set():
+                    break
+                if frame_index > position and (seek or position == 0):
+                    video_capture.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+                else:
+                    while position < frame_index:
+                        if not video_capture.grab():
+                            break
+                        position += 1
+                ret, frame = video_capture.read()
+                if not ret:
+                    break
+                position = frame_index + 1
+
+                frame_filename = osp.join(
+                    out_dir,
+                    f"{prefix}{str(frame_index // interval).zfill(seq_len)}"
+                    ".jpg",
+                )
+                pending.append(
+                    writers.submit(write_frame, frame_filename, frame)
                 )
-                temp_video_path = temp_file.name
-                temp_file.write(video_data)
-                temp_file.close()
-                logger.debug(
-                    f"Writing video data to temporary file: {temp_video_path}"
+                # Bound the number of decoded frames waiting for encoding
+                while len(pending) > MAX_PENDING_WRITES:
+                    pending.popleft().result()
+                saved_frame_count += 1
+                frame_index += interval
+    finally:
+        video_capture.release()
+    return saved_frame_count
+
+
+class FrameExtractionThread(QThread):
+    """Extract frames off the GUI thread.
+
+    The video is split into segments that are decoded in parallel, each
+    with its own capture and JPEG writer pool. Long videos use worker
+    processes, short ones and frozen builds use threads.
+    """
+
+    progress = pyqtSignal(int)  # number of saved frames
+
+    def __init__(
+        self,
+        video_path,
+        out_dir,
+        interval,
+        prefix,
+        seq_len,
+        total_frames,
+        num_workers=None,
+    ):
+        super().__init__()
+        self.video_path = video_path
+        self.out_dir = out_dir
+        self.interval = max(1, interval)
+        self.prefix = prefix
+        self.seq_len = seq_len
+        self.total_frames = total_frames
+        if num_workers is None:
+            num_workers = min(8, max(1, (os.cpu_count() or 1) // 2))
+        self.num_workers = num_workers
+        self.saved_frame_count = 0
+        self.error = None
+        self._stop_event = None
+        self._is_cancelled = False
+
+    def get_segments(self):
+        """Split the video into (start, stop) ranges aligned to the interval"""
+        num_outputs = (self.total_frames + self.interval - 1) // self.interval
+        if self.num_workers <= 1 or num_outputs <= 1:
+            return [(0, None)]
+        num_segments = min(num_outputs, self.num_workers * SEGMENTS_PER_WORKER)
+        outputs_per_segment = (num_outputs + num_segments - 1) // num_segments
+        step = outputs_per_segment * self.interval
+        segments = [
+            (start, start + step)
+            for start in range(0, self.total_frames, step)
+        ]
+        # The frame count is an estimate, read the last segment to the end
+        segments[-1] = (segments[-1][0], None)
+        return segments
+
+    def cancel(self):
+        self._is_cancelled = True
+        if self._stop_event is not None:
+            self._stop_event.set()
+
+    def run(self):
+        segments = self.get_segments()
+        use_processes = (
+            len(segments) > 1
+            and self.total_frames >= MIN_PROCESS_FRAMES
+            and not getattr(sys, "frozen", False)
+        )
+        try:
+            if not use_processes:
+                self._stop_event = threading.Event()
+                if self._is_cancelled:
+                    self._stop_event.set()
+                executor = ThreadPoolExecutor(max_workers=self.num_workers)
+                self._run_segments(executor, segments, share_event=True)
+            else:
+                context = multiprocessing.get_context("spawn")
+                self._stop_event = context.Event()
+                if self._is_cancelled:
+                    self._stop_event.set()
+                executor = ProcessPoolExecutor(
+                    max_workers=self.num_workers,
+                    mp_context=context,
+                    initializer=init_segment_worker,
+                    initargs=(self._stop_event,),
+                )
+                self._run_segments(executor, segments, share_event=False)
+        except Exception as e:
+            logger.exception(f"Error during frame extraction: {e}")
+            self.error = e
+
+    def _run_segments(self, executor, segments, share_event):
+        with executor:
+            futures = [
+                executor.submit(
+                    extract_frame_segment,
+                    self.video_path,
+                    start,
+                    stop,
+                    self.interval,
+                    self.out_dir,
+                    self.prefix,
+                    self.seq_len,
+                    self._stop_event if share_event else None,
                 )
+                for start, stop in segments
+            ]
+            for future in as_completed(futures):
+                self.saved_frame_count += future.result()
+                self.progress.emit(self.saved_frame_count)
+                if self._is_cancelled:
+                    for pending in futures:
+                        pending.cancel()
 
-                video_capture = cv2.VideoCapture(temp_video_path)
-                if video_capture.isOpened():
-                    opened_successfully = True
-                else:
-                    video_capture.release()
-                    logger.error(
-                        f"Failed to open video via temporary file: {temp_video_path}"
-                    )
-            except Exception as e:
-                logger.error(f"Error during temporary file workaround: {e}")
-                if video_capture:
-                    video_capture.release()
+
+def extract_frames_from_video(self, input_file, out_dir):
+    temp_video_path = None
+    video_capture = None
+    ffmpeg_path = None
+
+    try:
+        input_file_str = str(input_file)
+        video_capture, temp_video_path = open_video_capture(input_file)
+        opened_successfully = video_capture is not None
 
         if not opened_successfully:
             popup = Popup(
@@ -366,6 +749,8 @@ def extract_frames_from_video(self, input_file, out_dir):
             else:  # if not ffmpeg_path
                 logger.info("ffmpeg not found. Using OpenCV for extraction.")
                 # --- OpenCV Path ---
+                # Workers open their own captures
+                video_capture.release()
                 estimated_frames = (
                     (total_frames + interval - 1) // interval
                     if total_frames > 0 and interval > 0
@@ -388,50 +773,26 @@ def extract_frames_from_video(self, input_file, out_dir):
                 progress_dialog.setValue(0)
                 progress_dialog.show()
 
-                frame_count = 0
-                saved_frame_count = 0
-                extraction_cancelled = False
-                while True:
-                    if progress_dialog.wasCanceled():
-                        logger.info(
-                            "Frame extraction cancelled by user (OpenCV)."
-                        )
-                        extraction_cancelled = True
-                        break
-
-                    if not video_capture.isOpened():
-                        logger.warning(
-                            "Video capture became unopened during OpenCV processing."
-                        )
-                        break
-
-                    ret, frame = video_capture.read()
-                    if not ret:
-                        break
-
-                    if frame_count % interval == 0:
-                        frame_filename = osp.join(
-                            out_dir,
-                            f"{prefix}{str(saved_frame_count).zfill(seq_len)}.jpg",
-                        )
-                        try:
-                            write_success = cv2.imwrite(frame_filename, frame)
-                            if not write_success:
-                                logger.error(
-                                    f"Failed to write frame: {frame_filename}"
-                                )
-                        except Exception as e:
-                            logger.error(
-                                f"Error writing frame {frame_filename}: {e}"
-                            )
-
-                        saved_frame_count += 1
-                        progress_dialog.setValue(saved_frame_count)
-
-                    frame_count += 1
-                    QApplication.processEvents()  # Keep UI responsive
-
+                extraction_thread = FrameExtractionThread(
+                    temp_video_path if temp_video_path else input_file_str,
+                    out_dir,
+                    interval,
+                    prefix,
+                    seq_len,
+                    total_frames,
+                )
+                extraction_thread.progress.connect(progress_dialog.setValue)
+                progress_dialog.canceled.connect(extraction_thread.cancel)
+                event_loop = QEventLoop()
+                extraction_thread.finished.connect(event_loop.quit)
+                extraction_thread.start()
+                event_loop.exec_()
+
+                extraction_cancelled = progress_dialog.wasCanceled()
                 progress_dialog.close()
+                saved_frame_count = extraction_thread.saved_frame_count
+                if extraction_thread.error is not None:
+                    raise extraction_thread.error
 
                 if extraction_cancelled:
                     logger.warning(
@@ -480,16 +841,7 @@ def extract_frames_from_video(self, input_file, out_dir):
             logger.info("Releasing video capture resource.")
             video_capture.release()
         # Clean up the temporary file if created
-        if temp_video_path and osp.exists(temp_video_path):
-            try:
-                logger.debug(
-                    f"Removing temporary video file: {temp_video_path}"
-                )
-                os.remove(temp_video_path)
-            except OSError as e:
-                logger.error(
-                    f"Error removing temporary file {temp_video_path}: {e}"
-                )
+        remove_temp_video(temp_video_path)
 
 
 def open_video_file(self):
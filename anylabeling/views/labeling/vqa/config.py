@@ -74,6 +74,9 @@ SUPPORTED_WIDGETS = [
 
 # AI Assistant
 REQUEST_TIMEOUT = 120
+REQUEST_MAX_RETRIES = 5
+DEFAULT_BATCH_CONCURRENCY = 4
+BATCH_CHECKPOINT_FILENAME = ".vqa_batch_checkpoint.jsonl"
 DEFAULT_TEMPLATES = {
     # @text
     "Condense text": "Please make this text more concise while keeping the key points. Output the condensed version only:\n@text",
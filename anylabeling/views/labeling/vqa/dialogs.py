@@ -14,6 +14,7 @@ from PyQt5.QtWidgets import (
     QLineEdit,
     QMessageBox,
     QPushButton,
+    QSpinBox,
     QGraphicsDropShadowEffect,
     QTableWidget,
     QTableWidgetItem,
@@ -23,6 +24,7 @@ from PyQt5.QtWidgets import (
 )
 
 from anylabeling.views.labeling.vqa.config import (
+    DEFAULT_BATCH_CONCURRENCY,
     DEFAULT_COMPONENT_WINDOW_SIZE,
     DEFAULT_TEMPLATES,
     PROMPTS_CONFIG_PATH,
@@ -531,6 +533,7 @@ class AIPromptDialog(QDialog):
         super().__init__(parent)
         self.parent = parent
         self.current_text = current_text
+        self.batch_mode = False
         self.setWindowTitle(self.tr("AI Assistance"))
         self.setMinimumWidth(600)
         self.setup_ui()
@@ -569,8 +572,17 @@ class AIPromptDialog(QDialog):
         template_btn.setCursor(Qt.PointingHandCursor)
         template_btn.clicked.connect(self.open_template_library)
 
+        self.concurrency_input = QSpinBox()
+        self.concurrency_input.setRange(1, 64)
+        self.concurrency_input.setValue(DEFAULT_BATCH_CONCURRENCY)
+        self.concurrency_input.setToolTip(
+            self.tr("Concurrent requests when generating for all images")
+        )
+
         button_layout.addWidget(template_btn)
         button_layout.addStretch()
+        button_layout.addWidget(QLabel(self.tr("Concurrency")))
+        button_layout.addWidget(self.concurrency_input)
 
         cancel_btn = QPushButton(self.tr("Cancel"))
         cancel_btn.setStyleSheet(
@@ -579,12 +591,21 @@ class AIPromptDialog(QDialog):
         cancel_btn.setCursor(Qt.PointingHandCursor)
         cancel_btn.clicked.connect(self.reject)
 
+        batch_btn = QPushButton(self.tr("Generate All"))
+        batch_btn.setStyleSheet(get_dialog_button_style("secondary", "medium"))
+        batch_btn.setCursor(Qt.PointingHandCursor)
+        batch_btn.setToolTip(
+            self.tr("Answer the prompt for every image in the folder")
+        )
+        batch_btn.clicked.connect(self.accept_batch)
+
         confirm_btn = QPushButton(self.tr("Generate"))
         confirm_btn.setStyleSheet(get_dialog_button_style("primary", "medium"))
         confirm_btn.setCursor(Qt.PointingHandCursor)
         confirm_btn.clicked.connect(self.accept)
 
         button_layout.addWidget(cancel_btn)
+        button_layout.addWidget(batch_btn)
         button_layout.addWidget(confirm_btn)
         dialog_layout.addLayout(button_layout)
 
@@ -613,6 +634,15 @@ class AIPromptDialog(QDialog):
         """Get the user input prompt"""
         return self.prompt_input.toPlainText().strip()
 
+    def get_concurrency(self):
+        """Get the number of concurrent requests for batch mode"""
+        return self.concurrency_input.value()
+
+    def accept_batch(self):
+        """Accept the prompt to be answered for all images"""
+        self.batch_mode = True
+        self.accept()
+
     def exec_(self):
         """Override exec_ method to adjust position before showing the dialog"""
         self.adjustSize()
@@ -2,16 +2,224 @@ import base64
 import json
 import os
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+
 import requests
+from requests.adapters import HTTPAdapter
 
 from PyQt5.QtCore import QThread, pyqtSignal
 
+from anylabeling.views.labeling.chatbot.batch import (
+    dump_label_data,
+    load_label_data,
+    request_with_retry,
+)
 from anylabeling.views.labeling.chatbot.config import (
     MODELS_CONFIG_PATH,
     PROVIDERS_CONFIG_PATH,
 )
 from anylabeling.views.labeling.logger import logger
-from anylabeling.views.labeling.vqa.config import REQUEST_TIMEOUT
+from anylabeling.views.labeling.vqa.config import (
+    BATCH_CHECKPOINT_FILENAME,
+    DEFAULT_BATCH_CONCURRENCY,
+    REQUEST_MAX_RETRIES,
+    REQUEST_TIMEOUT,
+)
+
+_config_cache = {}
+_session = None
+_session_pool_size = 0
+_session_lock = threading.Lock()
+
+
+def load_json_config(path):
+    """Load a JSON config file, reusing the parsed content until the file
+    changes on disk.
+
+    Returns:
+        dict or None: The config, None if it is missing or invalid.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _config_cache.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    except Exception as e:
+        logger.error(f"Failed to load config {path}: {e}")
+        return None
+    _config_cache[path] = (key, config)
+    return config
+
+
+def get_session(pool_size=DEFAULT_BATCH_CONCURRENCY):
+    """Get the HTTP session shared by all AI assistant requests.
+
+    Connections are kept alive and reused across requests. Retries are
+    left to `request_with_retry`, as for the Chatbot batch requests.
+    """
+    global _session, _session_pool_size
+    with _session_lock:
+        if _session is None or _session_pool_size < pool_size:
+            if _session is not None:
+                _session.close()
+            adapter = HTTPAdapter(
+                pool_connections=4, pool_maxsize=max(pool_size, 10)
+            )
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session, _session_pool_size = session, pool_size
+        return _session
+
+
+def encode_image(image_path):
+    """Encode an image file as base64, cached until the file changes"""
+    stat = os.stat(image_path)
+    return _encode_image(image_path, stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=8)
+def _encode_image(image_path, mtime_ns, size):
+    with open(image_path, "rb") as f:
+        return base64.b64encode(f.read()).decode("utf-8")
+
+
+def load_api_settings():
+    """Get the model and provider configured in the Chatbot.
+
+    Returns:
+        dict: api_address, api_key, model_id, temperature, max_tokens and
+            system_prompt.
+
+    Raises:
+        ValueError: If the configuration is missing or incomplete.
+    """
+    models_config = load_json_config(MODELS_CONFIG_PATH)
+    providers_config = load_json_config(PROVIDERS_CONFIG_PATH)
+    if not models_config or not providers_config:
+        raise ValueError("Configuration files not found")
+
+    settings = models_config.get("settings", {})
+    provider = settings.get("provider")
+    model_id = settings.get("model_id")
+    if not provider or not model_id:
+        raise ValueError(
+            "Please configure model and provider in Chatbot (Ctrl+B)"
+        )
+
+    provider_info = providers_config.get(provider, {})
+    api_address = provider_info.get("api_address")
+    api_key = provider_info.get("api_key")
+    if not api_address or not api_key:
+        raise ValueError(
+            f"Please configure API key for {provider} in Chatbot (Ctrl+B)"
+        )
+
+    return dict(
+        api_address=api_address,
+        api_key=api_key,
+        model_id=model_id,
+        temperature=settings.get("temperature", 0.7),
+        max_tokens=settings.get("max_length", 2048),
+        system_prompt=settings.get("system_prompt", None),
+    )
+
+
+def process_special_references(prompt, current_text="", image_path=None):
+    """Process @image and @text references in the prompt
+
+    Returns:
+        tuple: The processed prompt and whether it references the image.
+    """
+    if "@text" in prompt and current_text:
+        prompt = prompt.replace("@text", current_text)
+
+    if "@image" not in prompt:
+        return prompt, False
+
+    if not image_path or not os.path.exists(image_path):
+        raise Exception("No image available for @image reference")
+
+    # Replace @image with <image> for API compatibility
+    return re.sub(r"@image\s*", "<image> ", prompt).strip(), True
+
+
+def call_openai_api(
+    settings, prompt, image_path=None, session=None, stop_event=None
+):
+    """Call OpenAI-compatible API with optional image support.
+
+    Retries are abandoned as soon as `stop_event` is set.
+    """
+    headers = {
+        "Authorization": f"Bearer {settings['api_key']}",
+        "Content-Type": "application/json",
+    }
+    messages = []
+    if settings["system_prompt"]:
+        messages.append(
+            {"role": "system", "content": settings["system_prompt"]}
+        )
+
+    if image_path:
+        image_data = encode_image(image_path)
+        messages.append(
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": f"data:image/jpeg;base64,{image_data}"
+                        },
+                    },
+                    {"type": "text", "text": prompt},
+                ],
+            }
+        )
+    else:
+        messages.append({"role": "user", "content": prompt})
+
+    temperature = settings["temperature"]
+    data = {
+        "model": settings["model_id"],
+        "messages": messages,
+        "temperature": (
+            temperature / 100.0 if temperature > 2 else temperature
+        ),
+        "max_tokens": settings["max_tokens"],
+    }
+
+    # Ensure API address ends with correct path
+    api_address = settings["api_address"]
+    if not api_address.endswith("/"):
+        api_address += "/"
+    if not api_address.endswith("chat/completions"):
+        api_address += "chat/completions"
+
+    session = session or get_session()
+
+    def post():
+        response = session.post(
+            api_address, headers=headers, json=data, timeout=REQUEST_TIMEOUT
+        )
+        # Rate limits and server errors are raised to be retried
+        response.raise_for_status()
+        return response
+
+    response = request_with_retry(
+        post, max_retries=REQUEST_MAX_RETRIES, stop_event=stop_event
+    )
+    result = response.json()
+    return result["choices"][0]["message"]["content"].strip()
 
 
 class AIWorkerThread(QThread):
@@ -32,54 +240,23 @@ class AIWorkerThread(QThread):
             if self._is_cancelled:
                 return
 
-            models_config = self.load_models_config()
-            providers_config = self.load_providers_config()
-
-            if not models_config or not providers_config:
-                self.finished.emit("", False, "Configuration files not found")
-                return
-
-            settings = models_config.get("settings", {})
-            provider = settings.get("provider")
-            model_id = settings.get("model_id")
-            max_tokens = settings.get("max_length", 2048)
-            temperature = settings.get("temperature", 0.7)
-            system_prompt = settings.get("system_prompt", None)
-
-            if not provider or not model_id:
-                self.finished.emit(
-                    "",
-                    False,
-                    "Please configure model and provider in Chatbot (Ctrl+B)",
-                )
-                return
-
-            provider_info = providers_config.get(provider, {})
-            api_address = provider_info.get("api_address")
-            api_key = provider_info.get("api_key")
-
-            if not api_address or not api_key:
-                self.finished.emit(
-                    "",
-                    False,
-                    f"Please configure API key for {provider} in Chatbot (Ctrl+B)",
-                )
+            try:
+                settings = load_api_settings()
+            except ValueError as e:
+                self.finished.emit("", False, str(e))
                 return
 
             if self._is_cancelled:
                 return
 
             # Process special character references
-            processed_prompt = self.process_special_references(self.prompt)
-
-            result = self.call_openai_api(
-                api_address,
-                api_key,
-                model_id,
-                processed_prompt,
-                temperature,
-                max_tokens,
-                system_prompt,
+            prompt, has_image_reference = process_special_references(
+                self.prompt, self.current_text, self.image_path
+            )
+            result = call_openai_api(
+                settings,
+                prompt,
+                self.image_path if has_image_reference else None,
             )
 
             if not self._is_cancelled:
@@ -89,110 +266,192 @@ class AIWorkerThread(QThread):
             if not self._is_cancelled:
                 self.finished.emit("", False, f"API call failed: {str(e)}")
 
-    def process_special_references(self, prompt):
-        """Process @image and @text references in the prompt"""
-        if "@text" in prompt and self.current_text:
-            prompt = prompt.replace("@text", self.current_text)
-
-        if "@image" in prompt:
-            if not self.image_path or not os.path.exists(self.image_path):
-                raise Exception("No image available for @image reference")
-
-            # Replace @image with <image> for API compatibility
-            prompt = re.sub(r"@image\s*", "<image> ", prompt).strip()
-
-            self.has_image_reference = True
-        else:
-            self.has_image_reference = False
-
-        return prompt
-
     def cancel(self):
         """Cancel the operation"""
         self._is_cancelled = True
 
-    def load_models_config(self):
-        """Load models configuration"""
-        try:
-            if os.path.exists(MODELS_CONFIG_PATH):
-                with open(MODELS_CONFIG_PATH, "r", encoding="utf-8") as f:
-                    return json.load(f)
-        except Exception as e:
-            logger.error(f"Failed to load models config: {e}")
-        return None
 
-    def load_providers_config(self):
-        """Load providers configuration"""
+class BatchCheckpoint:
+    """Append-only record of the images a batch run has answered.
+
+    The first line identifies the run (component and prompt), each
+    following line names a finished image. A run with the same component
+    and prompt resumes from the recorded images, any other run starts
+    over.
+    """
+
+    def __init__(self, path, component, prompt):
+        self.path = path
+        self.header = {"component": component, "prompt": prompt}
+        self.done = set()
+        self._lock = threading.Lock()
+        self._file = None
+
+    def load(self):
+        """Read the finished images of a previous run, if it matches"""
+        if not os.path.exists(self.path):
+            return self.done
         try:
-            if os.path.exists(PROVIDERS_CONFIG_PATH):
-                with open(PROVIDERS_CONFIG_PATH, "r", encoding="utf-8") as f:
-                    return json.load(f)
-        except Exception as e:
-            logger.error(f"Failed to load providers config: {e}")
-        return None
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+            if lines and json.loads(lines[0]) == self.header:
+                for line in lines[1:]:
+                    try:
+                        self.done.add(json.loads(line)["image"])
+                    except (ValueError, KeyError):
+                        # Last line of an interrupted write
+                        break
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring invalid checkpoint {self.path}: {e}")
+        return self.done
+
+    def open(self):
+        resume = bool(self.done)
+        self._file = open(self.path, "a" if resume else "w", encoding="utf-8")
+        if not resume:
+            self._write(self.header)
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def add(self, image_name):
+        with self._lock:
+            self.done.add(image_name)
+            self._write({"image": image_name})
+
+    def close(self, remove=False):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if remove and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def write_vqa_answer(label_file, image_file, component, answer):
+    """Store an answer in a component field of a label file"""
+    data = load_label_data(label_file, image_file)
+    data.setdefault("vqaData", {})[component] = answer
+    dump_label_data(label_file, data)
+
+
+class VQABatchWorker(QThread):
+    """Answer a prompt template for every image with concurrent requests.
+
+    Requests share one pooled session. Each answer is written to the
+    component field of the image's label file as soon as it arrives, and
+    recorded in a checkpoint so an interrupted run resumes where it
+    stopped. `@text` refers to the current value of the component.
+    """
+
+    progress = pyqtSignal(int, int)  # finished images, total images
 
-    def call_openai_api(
+    def __init__(
         self,
-        api_address,
-        api_key,
-        model_id,
+        image_files,
+        component,
         prompt,
-        temperature,
-        max_tokens,
-        system_prompt,
+        output_dir=None,
+        concurrency=DEFAULT_BATCH_CONCURRENCY,
     ):
-        """Call OpenAI-compatible API with optional image support"""
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json",
-        }
-        messages = []
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-
-        if hasattr(self, "has_image_reference") and self.has_image_reference:
-            with open(self.image_path, "rb") as f:
-                image_data = base64.b64encode(f.read()).decode("utf-8")
-
-            messages.append(
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{image_data}"
-                            },
-                        },
-                        {"type": "text", "text": prompt},
-                    ],
-                }
-            )
-        else:
-            messages.append({"role": "user", "content": prompt})
-
-        data = {
-            "model": model_id,
-            "messages": messages,
-            "temperature": (
-                temperature / 100.0 if temperature > 2 else temperature
-            ),
-            "max_tokens": max_tokens,
-        }
-
-        # Ensure API address ends with correct path
-        if not api_address.endswith("/"):
-            api_address += "/"
-        if not api_address.endswith("chat/completions"):
-            api_address += "chat/completions"
-
-        response = requests.post(
-            api_address, headers=headers, json=data, timeout=REQUEST_TIMEOUT
+        super().__init__()
+        self.image_files = list(image_files)
+        self.component = component
+        self.prompt = prompt
+        self.output_dir = output_dir
+        self.concurrency = max(1, int(concurrency))
+
+        label_dir = output_dir
+        if not label_dir and self.image_files:
+            label_dir = os.path.dirname(self.image_files[0])
+        self.checkpoint = BatchCheckpoint(
+            os.path.join(label_dir or ".", BATCH_CHECKPOINT_FILENAME),
+            component,
+            prompt,
         )
-        response.raise_for_status()
+        self.num_finished = 0
+        self.num_skipped = 0
+        self.failed = {}  # image file -> error message
+        self.error = None
+        self._stop_event = threading.Event()
+
+    def cancel(self):
+        """Stop after the requests in flight"""
+        self._stop_event.set()
+
+    def is_cancelled(self):
+        return self._stop_event.is_set()
+
+    def process_image(self, settings, session, image_file):
+        if self.is_cancelled():
+            return
+        label_file = get_label_file_path(image_file, self.output_dir)
+        current_text = ""
+        if "@text" in self.prompt and os.path.exists(label_file):
+            with open(label_file, "r", encoding="utf-8") as f:
+                vqa_data = json.load(f).get("vqaData", {})
+            current_text = vqa_data.get(self.component) or ""
+
+        prompt, has_image_reference = process_special_references(
+            self.prompt, current_text, image_file
+        )
+        answer = call_openai_api(
+            settings,
+            prompt,
+            image_file if has_image_reference else None,
+            session,
+            self._stop_event,
+        )
+        if self.is_cancelled():
+            return
+        write_vqa_answer(label_file, image_file, self.component, answer)
+        self.checkpoint.add(os.path.basename(image_file))
 
-        result = response.json()
-        return result["choices"][0]["message"]["content"].strip()
+    def run(self):
+        try:
+            settings = load_api_settings()
+        except ValueError as e:
+            self.error = str(e)
+            return
+
+        done = self.checkpoint.load()
+        pending = [
+            image_file
+            for image_file in self.image_files
+            if os.path.basename(image_file) not in done
+        ]
+        self.num_skipped = self.num_finished = len(self.image_files) - len(
+            pending
+        )
+        self.progress.emit(self.num_finished, len(self.image_files))
+
+        session = get_session(self.concurrency)
+        self.checkpoint.open()
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                futures = {
+                    executor.submit(
+                        self.process_image, settings, session, image_file
+                    ): image_file
+                    for image_file in pending
+                }
+                for future in as_completed(futures):
+                    image_file = futures[future]
+                    try:
+                        future.result()
+                    except Exception as e:
+                        logger.error(f"Failed to answer {image_file}: {e}")
+                        self.failed[image_file] = str(e)
+                    self.num_finished += 1
+                    self.progress.emit(
+                        self.num_finished, len(self.image_files)
+                    )
+                    if self.is_cancelled():
+                        for queued in futures:
+                            queued.cancel()
+        finally:
+            completed = not self.is_cancelled() and not self.failed
+            self.checkpoint.close(remove=completed)
 
 
 def apply_option_mapping(value, mapping):
@@ -1,15 +1,16 @@
 # flake8: noqa
 
+import importlib
+
 from .about_dialog import AboutDialog
 from .auto_labeling import AutoLabelingWidget
 from .brightness_contrast_dialog import BrightnessContrastDialog
 from .canvas import Canvas
-from .chatbot_dialog import ChatbotDialog
-from .vqa_dialog import VQADialog
 from .color_dialog import ColorDialog
 from .file_dialog_preview import FileDialogPreview
 from .filter_label_widget import GroupIDFilterComboBox, LabelFilterComboBox
 from .crosshair_settings_dialog import CrosshairSettingsDialog
+from .inference_stats_dialog import InferenceStatsDialog
 from .label_dialog import (
     LabelDialog,
     LabelQLineEdit,
@@ -24,3 +25,16 @@ from .popup import Popup
 from .toolbar import ToolBar
 from .unique_label_qlist_widget import UniqueLabelQListWidget
 from .zoom_widget import ZoomWidget
+
+# Imported on first use, as they pull in heavy dependencies (e.g. openai)
+_LAZY_WIDGETS = {
+    "ChatbotDialog": ".chatbot_dialog",
+    "VQADialog": ".vqa_dialog",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_WIDGETS:
+        module = importlib.import_module(_LAZY_WIDGETS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
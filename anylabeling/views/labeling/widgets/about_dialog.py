@@ -30,7 +30,6 @@ from anylabeling.views.labeling.utils.update_checker import (
     check_for_updates_sync,
 )
 from anylabeling.views.labeling.widgets.popup import Popup
-from anylabeling.views.labeling.chatbot.render import convert_markdown_to_html
 
 
 class AboutDialog(QDialog):
@@ -315,6 +314,10 @@ class AboutDialog(QDialog):
         )
         layout.addWidget(title_label)
 
+        from anylabeling.views.labeling.chatbot.render import (
+            convert_markdown_to_html,
+        )
+
         web_view = QWebEngineView()
         web_view.setMinimumHeight(350)
         web_view.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
@@ -60,6 +60,9 @@ class AutoLabelingWidget(QWidget):
         )
         self.model_manager.model_loaded.connect(self.update_visible_widgets)
         self.model_manager.model_loaded.connect(self.on_new_model_loaded)
+        self.model_manager.resident_models_changed.connect(
+            self.on_resident_models_changed
+        )
         self.model_manager.new_auto_labeling_result.connect(
             lambda auto_labeling_result: self.parent.new_shapes_from_auto_labeling(
                 auto_labeling_result
@@ -526,14 +529,14 @@ class AutoLabelingWidget(QWidget):
         """Run prediction"""
         if self.parent.filename is not None:
             self.model_manager.predict_shapes_threading(
-                self.parent.image, self.parent.filename
+                self.parent.frame, self.parent.filename
             )
 
     def run_vl_prediction(self):
         """Run visual-language prediction"""
         if self.parent.filename is not None and self.edit_text:
             self.model_manager.predict_shapes_threading(
-                self.parent.image,
+                self.parent.frame,
                 self.parent.filename,
                 text_prompt=self.edit_text.text(),
             )
@@ -597,6 +600,24 @@ class AutoLabelingWidget(QWidget):
         elif model_config.get("type") == "groundingdino":
             self.update_groundingdino_mode_ui()
 
+    def on_resident_models_changed(self, config_files):
+        """Show which models are kept loaded in the model dropdown"""
+
+        def normalize(config_file):
+            if not config_file or config_file.startswith(":/"):
+                return config_file
+            return os.path.normpath(os.path.abspath(config_file))
+
+        config_files = {normalize(config_file) for config_file in config_files}
+        self.model_dropdown.set_resident_models(
+            [
+                model_name
+                for model_name, info in self.model_info.items()
+                if info["config_path"]
+                and normalize(info["config_path"]) in config_files
+            ]
+        )
+
     def update_upn_mode_ui(self):
         """Update UPN mode combobox to reflect current backend state"""
         current_mode = self.model_manager.loaded_model_config[
@@ -6,6 +6,7 @@ from PyQt5 import QtWidgets
 from PyQt5.QtCore import Qt
 
 from ..utils.image import pil_to_qimage
+from ..utils.opencv import DecodedFrame
 
 
 class BrightnessContrastDialog(QtWidgets.QDialog):
@@ -171,8 +172,8 @@ class BrightnessContrastDialog(QtWidgets.QDialog):
         self.move(qr.topLeft())
 
     def update_image(self, image):
-        """Update image instance"""
-        assert isinstance(image, PIL.Image.Image)
+        """Update image instance, a PIL image or the decoded frame"""
+        assert isinstance(image, (PIL.Image.Image, DecodedFrame))
         self.img = image
 
     def update_brightness_label(self, value):
@@ -190,6 +191,9 @@ class BrightnessContrastDialog(QtWidgets.QDialog):
         brightness = self.slider_brightness.value() / 50.0
         contrast = self.slider_contrast.value() / 50.0
 
+        if isinstance(self.img, DecodedFrame):
+            # Copied out of the frame on first use, not decoded again
+            self.img = self.img.to_pil()
         img = self.img
         if brightness != 1:
             img = PIL.ImageEnhance.Brightness(img).enhance(brightness)
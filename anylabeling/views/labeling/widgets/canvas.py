@@ -1,15 +1,19 @@
 """This module defines Canvas widget - the core component for drawing image labels"""
 
 import math
+import time
+from collections import deque
 from copy import deepcopy
 from PyQt5 import QtCore, QtGui, QtWidgets
 from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QWheelEvent
 
 from anylabeling.services.auto_labeling.types import AutoLabelingMode
+from anylabeling.views.labeling.logger import logger
 from anylabeling.views.labeling.utils.colormap import label_colormap
 
 from .. import utils
+from ..history import ShapeHistory
 from ..shape import Shape
 
 CURSOR_DEFAULT = QtCore.Qt.ArrowCursor
@@ -24,6 +28,9 @@ AUTO_DECODE_MOVE_THRESHOLD = 5.0
 MOVE_SPEED = 5.0
 LARGE_ROTATION_INCREMENT = 0.1
 SMALL_ROTATION_INCREMENT = 0.01
+PAINT_TIME_WARNING_MS = 50.0
+PAINT_TIME_HISTORY = 120
+TEXT_CULL_MARGIN = 200
 
 LABEL_COLORMAP = label_colormap()
 
@@ -84,7 +91,7 @@ class Canvas(
         self.is_move_editing = False
         self.auto_labeling_mode: AutoLabelingMode = None
         self.shapes = []
-        self.shapes_backups = []
+        self.shapes_history = ShapeHistory(self.num_backups)
         self.current = None
         self.selected_shapes = []  # save the selected shapes here
         self.selected_shapes_copy = []
@@ -150,6 +157,17 @@ class Canvas(
         self.auto_decode_tracklet = []
         self.last_mouse_pos = None
 
+        # Rendering caches
+        # - static layer: non-interactive shapes rendered once into a
+        #   viewport-sized pixmap, rebuilt only when its key changes
+        # - bounding rects: per-shape rects reused for culling and texts
+        self._shapes_version = 0
+        self._shapes_layer = None
+        self._shapes_layer_key = None
+        self._bounding_rects = {}
+        self._dynamic_shape_ids = frozenset()
+        self.paint_times = deque(maxlen=PAINT_TIME_HISTORY)
+
     def set_loading(self, is_loading: bool, loading_text: str = None):
         """Set loading state"""
         self.is_loading = is_loading
@@ -211,14 +229,25 @@ class Canvas(
             raise ValueError(f"Unsupported create_mode: {value}")
         self._create_mode = value
 
-    def store_shapes(self):
-        """Store shapes for restoring later (Undo feature)"""
-        shapes_backup = []
-        for shape in self.shapes:
-            shapes_backup.append(shape.copy())
-        if len(self.shapes_backups) > self.num_backups:
-            self.shapes_backups = self.shapes_backups[-self.num_backups - 1 :]
-        self.shapes_backups.append(shapes_backup)
+    def invalidate_shapes_layer(self):
+        """Drop cached rendering of shapes, call after editing shapes"""
+        self._shapes_version += 1
+        self._shapes_layer = None
+        self._shapes_layer_key = None
+        self._bounding_rects = {}
+
+    def store_shapes(self, changed=None):
+        """Store shapes for restoring later (Undo feature)
+
+        Only the shapes that were added, removed or modified since the
+        last call are recorded. Pass the shapes edited in place as
+        `changed` to avoid comparing every shape.
+
+        Returns:
+            bool: True if an undoable edit was recorded.
+        """
+        self.invalidate_shapes_layer()
+        return self.shapes_history.commit(self.shapes, changed)
 
     def store_moving_shape(self):
         """Store a moving shape"""
@@ -228,30 +257,15 @@ class Canvas(
                 if self.h_hape and self.h_hape not in self.selected_shapes
                 else self.selected_shapes.copy()
             )
-            for shape in moving_shapes:
-                if shape in self.shapes:
-                    index = self.shapes.index(shape)
-                    if (
-                        len(self.shapes_backups) > 0
-                        and index < len(self.shapes_backups[-1])
-                        and self.shapes_backups[-1][index].points
-                        != self.shapes[index].points
-                    ):
-                        self.store_shapes()
-                        self.shape_moved.emit()
-                        break
+            if self.store_shapes(changed=moving_shapes):
+                self.shape_moved.emit()
 
             self.moving_shape = False
 
     @property
     def is_shape_restorable(self):
         """Check if shape can be restored from backup"""
-        # We save the state AFTER each edit (not before) so for an
-        # edit to be undoable, we expect the CURRENT and the PREVIOUS state
-        # to be in the undo stack.
-        if len(self.shapes_backups) < 2:
-            return False
-        return True
+        return self.shapes_history.can_undo
 
     def restore_shape(self):
         """Restore/Undo a shape"""
@@ -260,17 +274,17 @@ class Canvas(
         # and app.py::load_shapes and our own Canvas::load_shapes function.
         if not self.is_shape_restorable:
             return
-        self.shapes_backups.pop()  # latest
-
-        # The application will eventually call Canvas.load_shapes which will
-        # push this right back onto the stack.
-        shapes_backup = self.shapes_backups.pop()
-        self.shapes = shapes_backup
+        self.shapes = self.shapes_history.undo(self.shapes)
         self.selected_shapes = []
         for shape in self.shapes:
             shape.selected = False
+        self.invalidate_shapes_layer()
         self.update()
 
+    def discard_last_backup(self):
+        """Forget the last stored edit, keeping the current shapes"""
+        self.shapes_history.discard_last(self.shapes)
+
     def enterEvent(self, _):
         """Mouse enter event"""
         self.override_cursor(self._cursor)
@@ -367,8 +381,9 @@ class Canvas(
         except AttributeError:
             return
 
+        prev_move_point = self.prev_move_point
         self.prev_move_point = pos
-        self.repaint()
+        self._update_cross_line(prev_move_point, pos)
 
         # Handle auto decode mode
         if (
@@ -444,7 +459,7 @@ class Canvas(
             elif self.create_mode == "point":
                 self.line.points = [self.current[0]]
                 self.line.close()
-            self.repaint()
+            self.update()
             self.current.highlight_clear()
             return
 
@@ -453,12 +468,12 @@ class Canvas(
             if self.selected_shapes_copy and self.prev_point:
                 self.override_cursor(CURSOR_MOVE)
                 self.bounded_move_shapes(self.selected_shapes_copy, pos)
-                self.repaint()
+                self.update()
             elif self.selected_shapes:
                 self.selected_shapes_copy = [
                     s.copy() for s in self.selected_shapes
                 ]
-                self.repaint()
+                self.update()
             return
 
         # Polygon/Vertex moving.
@@ -467,7 +482,7 @@ class Canvas(
                 self.is_move_editing = False
                 try:
                     self.bounded_move_vertex(pos)
-                    self.repaint()
+                    self.update()
                     self.moving_shape = True
                 except IndexError:
                     return
@@ -480,7 +495,7 @@ class Canvas(
             elif self.selected_shapes and self.prev_point:
                 self.override_cursor(CURSOR_MOVE)
                 self.bounded_move_shapes(self.selected_shapes, pos)
-                self.repaint()
+                self.update()
                 self.moving_shape = True
                 if self.selected_shapes[-1].shape_type == "rectangle":
                     p1 = self.selected_shapes[-1][0]
@@ -506,7 +521,7 @@ class Canvas(
                         Qt.Vertical,
                         1,
                     )
-                    self.repaint()
+                    self.update()
             return
 
         if self.editing() and self.is_move_editing:
@@ -514,7 +529,7 @@ class Canvas(
             if self.selected_vertex():
                 try:
                     self.bounded_move_vertex(pos)
-                    self.repaint()
+                    self.update()
                     self.moving_shape = True
                 except IndexError:
                     return
@@ -572,7 +587,7 @@ class Canvas(
                 self.setStatusTip(self.toolTip())
                 self.update()
                 break
-            if len(shape.points) > 1 and shape.contains_point(pos):
+            if len(shape) > 1 and shape.contains_point(pos):
                 if self.selected_vertex():
                     self.h_hape.highlight_clear()
                 self.prev_h_vertex = self.h_vertex
@@ -794,7 +809,7 @@ class Canvas(
                 )
                 self.prev_point = pos
                 self.prev_pan_point = ev.localPos()
-                self.repaint()
+                self.update()
         elif ev.button() == QtCore.Qt.RightButton and self.editing():
             group_mode = int(ev.modifiers()) == QtCore.Qt.ControlModifier
             if not self.selected_shapes or (
@@ -804,7 +819,7 @@ class Canvas(
                 self.select_shape_point(
                     pos, multiple_selection_mode=group_mode
                 )
-                self.repaint()
+                self.update()
             self.prev_point = pos
 
     # QT Overload
@@ -821,7 +836,7 @@ class Canvas(
             ):
                 # Cancel the move by deleting the shadow copy.
                 self.selected_shapes_copy = []
-                self.repaint()
+                self.update()
         elif ev.button() == QtCore.Qt.LeftButton:
             if self.editing():
                 if (
@@ -847,9 +862,10 @@ class Canvas(
         else:
             for i, shape in enumerate(self.selected_shapes_copy):
                 self.selected_shapes[i].points = shape.points
+        changed = self.selected_shapes
         self.selected_shapes_copy = []
-        self.repaint()
-        self.store_shapes()
+        self.update()
+        self.store_shapes(changed=changed)
         return True
 
     def hide_background_shapes(self, value):
@@ -1136,7 +1152,7 @@ class Canvas(
             for shape in self.selected_shapes:
                 self.shapes.remove(shape)
                 deleted_shapes.append(shape)
-            self.store_shapes()
+            self.store_shapes(changed=[])
             self.selected_shapes = []
             self.update()
         return deleted_shapes
@@ -1147,7 +1163,7 @@ class Canvas(
             self.selected_shapes.remove(shape)
         if shape in self.shapes:
             self.shapes.remove(shape)
-        self.store_shapes()
+        self.store_shapes(changed=[])
         self.update()
 
     def duplicate_selected_shapes(self):
@@ -1174,6 +1190,187 @@ class Canvas(
         if not self.bounded_move_shapes(shapes, point - offset):
             self.bounded_move_shapes(shapes, point + offset)
 
+    def _visible_widget_rect(self):
+        """Return the part of the canvas visible in the scroll area"""
+        rect = self.visibleRegion().boundingRect()
+        if rect.isEmpty():
+            rect = self.rect()
+        return rect
+
+    def _widget_to_image_rect(self, rect):
+        """Map a widget rect to image coordinates, padded for pens/vertices"""
+        offset = self.offset_to_center()
+        margin = (Shape.point_size * 2 + Shape.line_width) / self.scale
+        return QtCore.QRectF(
+            rect.x() / self.scale - offset.x() - margin,
+            rect.y() / self.scale - offset.y() - margin,
+            rect.width() / self.scale + 2 * margin,
+            rect.height() / self.scale + 2 * margin,
+        )
+
+    def _shape_rect(self, shape):
+        """Bounding rect of a shape, cached while the shape is static"""
+        if id(shape) in self._dynamic_shape_ids:
+            return shape.bounding_rect()
+        cached = self._bounding_rects.get(id(shape))
+        if cached is not None and cached[0] is shape:
+            return cached[1]
+        rect = shape.bounding_rect()
+        self._bounding_rects[id(shape)] = (shape, rect)
+        return rect
+
+    def _in_view(self, shape, view_rect):
+        """Check if a shape may intersect the visible image rect"""
+        try:
+            rect = self._shape_rect(shape)
+        except IndexError:
+            return True
+        # Points and axis-aligned lines have degenerate bounding rects
+        return view_rect.intersects(rect.adjusted(-1, -1, 1, 1))
+
+    def _update_dynamic_shapes(self):
+        """Track selected/hovered shapes, which bypass the render caches"""
+        dynamic_ids = frozenset(
+            id(shape)
+            for shape in self.shapes
+            if shape.selected or shape is self.h_hape
+        )
+        # Shapes that were edited interactively become static again
+        for shape_id in self._dynamic_shape_ids - dynamic_ids:
+            self._bounding_rects.pop(shape_id, None)
+        self._dynamic_shape_ids = dynamic_ids
+
+    def _paint_shapes_layer(self, p, shapes, viewport):
+        """Draw static shapes from a pixmap rebuilt only when they change"""
+        dpr = self.devicePixelRatioF()
+        key = (
+            self._shapes_version,
+            self._dynamic_shape_ids,
+            self.scale,
+            dpr,
+            (viewport.x(), viewport.y(), viewport.width(), viewport.height()),
+            self._hide_backround,
+            self.show_degrees,
+            Shape.point_size,
+            Shape.line_width,
+            tuple(
+                (id(s), s.label, s.line_color.rgba(), len(s))
+                for s in shapes
+            ),
+        )
+        if key != self._shapes_layer_key or self._shapes_layer is None:
+            layer = QtGui.QPixmap(
+                max(1, int(math.ceil(viewport.width() * dpr))),
+                max(1, int(math.ceil(viewport.height() * dpr))),
+            )
+            layer.setDevicePixelRatio(dpr)
+            layer.fill(Qt.transparent)
+            painter = QtGui.QPainter(layer)
+            painter.setRenderHint(QtGui.QPainter.Antialiasing)
+            painter.setRenderHint(QtGui.QPainter.HighQualityAntialiasing)
+            painter.translate(-QtCore.QPointF(viewport.topLeft()))
+            painter.scale(self.scale, self.scale)
+            painter.translate(self.offset_to_center())
+            for shape in shapes:
+                if not self._hide_backround:
+                    shape.fill = False
+                    shape.paint(painter)
+                self._paint_rotation_marker(painter, shape)
+            painter.end()
+            self._shapes_layer = layer
+            self._shapes_layer_key = key
+
+        p.save()
+        p.resetTransform()
+        p.drawPixmap(viewport.topLeft(), self._shapes_layer)
+        p.restore()
+
+    def _update_cross_line(self, old_pos, new_pos):
+        """Invalidate only the strips covered by the old and new cross line"""
+        if not self.cross_line_show:
+            return
+        offset = self.offset_to_center()
+        pen_width = max(1, int(round(self.cross_line_width / self.scale)))
+        margin = int(math.ceil(pen_width * self.scale / 2)) + 2
+        width, height = self.width(), self.height()
+        for pos in (old_pos, new_pos):
+            x = int((pos.x() + offset.x()) * self.scale)
+            y = int((pos.y() + offset.y()) * self.scale)
+            self.update(x - margin, 0, 2 * margin, height)
+            self.update(0, y - margin, width, 2 * margin)
+
+    def _record_paint_time(self, start):
+        """Keep a short history of paint durations and flag slow frames"""
+        elapsed = (time.perf_counter() - start) * 1000.0
+        self.paint_times.append(elapsed)
+        if elapsed > PAINT_TIME_WARNING_MS:
+            logger.debug(
+                f"Slow canvas repaint: {elapsed:.1f} ms "
+                f"({len(self.shapes)} shapes)"
+            )
+
+    def paint_time_stats(self):
+        """Return last/mean/max paint time (ms) over the recent history"""
+        if not self.paint_times:
+            return {"count": 0, "last": 0.0, "mean": 0.0, "max": 0.0}
+        times = list(self.paint_times)
+        return {
+            "count": len(times),
+            "last": times[-1],
+            "mean": sum(times) / len(times),
+            "max": max(times),
+        }
+
+    def _paint_rotation_marker(self, p, shape):
+        """Draw the center marker (or the angle) of a rotation shape"""
+        if shape.shape_type != "rotation" or len(shape.points) != 4:
+            return
+        d = shape.point_size / shape.scale
+        center = QtCore.QPointF(
+            (shape.points[0].x() + shape.points[2].x()) / 2,
+            (shape.points[0].y() + shape.points[2].y()) / 2,
+        )
+        if self.show_degrees:
+            degrees = str(int(math.degrees(shape.direction))) + "°"
+            p.setFont(
+                QtGui.QFont(
+                    "Arial",
+                    int(max(6.0, int(round(8.0 / Shape.scale)))),
+                )
+            )
+            pen = QtGui.QPen(
+                QtGui.QColor("#FF9900"), 8, QtCore.Qt.SolidLine
+            )
+            p.setPen(pen)
+            fm = QtGui.QFontMetrics(p.font())
+            rect = fm.boundingRect(degrees)
+            p.fillRect(
+                int(rect.x() + center.x() - d),
+                int(rect.y() + center.y() + d),
+                int(rect.width()),
+                int(rect.height()),
+                QtGui.QColor("#FF9900"),
+            )
+            pen = QtGui.QPen(
+                QtGui.QColor("#FFFFFF"), 7, QtCore.Qt.SolidLine
+            )
+            p.setPen(pen)
+            p.drawText(
+                int(center.x() - d),
+                int(center.y() + d),
+                degrees,
+            )
+        else:
+            cp = QtGui.QPainterPath()
+            cp.addRect(
+                int(center.x() - d / 2),
+                int(center.y() - d / 2),
+                int(d),
+                int(d),
+            )
+            p.drawPath(cp)
+            p.fillPath(cp, QtGui.QColor(255, 153, 0, 255))
+
     # QT Overload
     def paintEvent(self, event):  # noqa: C901
         """Paint event for canvas"""
@@ -1185,6 +1382,7 @@ class Canvas(
             super().paintEvent(event)
             return
 
+        start = time.perf_counter()
         p = self._painter
         p.begin(self)
         p.setRenderHint(QtGui.QPainter.Antialiasing)
@@ -1229,6 +1427,20 @@ class Canvas(
             self.update()
             return
 
+        viewport = self._visible_widget_rect()
+        view_rect = self._widget_to_image_rect(viewport)
+        # Texts may overflow the shape they belong to
+        text_margin = TEXT_CULL_MARGIN / self.scale
+        text_view_rect = view_rect.adjusted(
+            -text_margin, -text_margin, text_margin, text_margin
+        )
+        self._update_dynamic_shapes()
+        text_shapes = [
+            shape
+            for shape in self.shapes
+            if shape.visible and self._in_view(shape, text_view_rect)
+        ]
+
         # Draw groups
         if self.show_groups:
             pen = QtGui.QPen(QtGui.QColor("#AAAAAA"), 2, Qt.SolidLine)
@@ -1250,7 +1462,7 @@ class Canvas(
                 max_x = 0
                 max_y = 0
                 for shape in shapes:
-                    rect = shape.bounding_rect()
+                    rect = self._shape_rect(shape)
                     if shape.shape_type == "point":
                         points = shape.points[0]
                         min_x = min(min_x, points.x())
@@ -1320,7 +1532,7 @@ class Canvas(
                     "rotation",
                 ]:
                     continue
-                rect = shape.bounding_rect()
+                rect = self._shape_rect(shape)
                 cx = rect.x() + (rect.width() / 2.0)
                 cy = rect.y() + (rect.height() / 2.0)
                 gid2point[shape.group_id] = (cx, cy)
@@ -1357,68 +1569,27 @@ class Canvas(
                 ]
                 p.drawPolygon(arrow_points)
 
-        # Draw degrees
+        # Draw shapes: static ones come from the cached layer, the
+        # selected/hovered ones are repainted live on top of it
+        static_shapes, dynamic_shapes = [], []
         for shape in self.shapes:
-            if (
-                shape.selected or not self._hide_backround
-            ) and self.is_visible(shape):
+            if not self.is_visible(shape):
+                continue
+            if id(shape) in self._dynamic_shape_ids:
+                dynamic_shapes.append(shape)
+            elif self._in_view(shape, view_rect):
+                static_shapes.append(shape)
+        self._paint_shapes_layer(p, static_shapes, viewport)
+
+        for shape in dynamic_shapes:
+            if shape.selected or not self._hide_backround:
                 shape.fill = self._fill_drawing and (
                     shape.selected or shape == self.h_hape
                 ) and not (
                     self.selected_vertex() and self.moving_shape
                 )
                 shape.paint(p)
-
-            if (
-                shape.shape_type == "rotation"
-                and len(shape.points) == 4
-                and self.is_visible(shape)
-            ):
-                d = shape.point_size / shape.scale
-                center = QtCore.QPointF(
-                    (shape.points[0].x() + shape.points[2].x()) / 2,
-                    (shape.points[0].y() + shape.points[2].y()) / 2,
-                )
-                if self.show_degrees:
-                    degrees = str(int(math.degrees(shape.direction))) + "°"
-                    p.setFont(
-                        QtGui.QFont(
-                            "Arial",
-                            int(max(6.0, int(round(8.0 / Shape.scale)))),
-                        )
-                    )
-                    pen = QtGui.QPen(
-                        QtGui.QColor("#FF9900"), 8, QtCore.Qt.SolidLine
-                    )
-                    p.setPen(pen)
-                    fm = QtGui.QFontMetrics(p.font())
-                    rect = fm.boundingRect(degrees)
-                    p.fillRect(
-                        int(rect.x() + center.x() - d),
-                        int(rect.y() + center.y() + d),
-                        int(rect.width()),
-                        int(rect.height()),
-                        QtGui.QColor("#FF9900"),
-                    )
-                    pen = QtGui.QPen(
-                        QtGui.QColor("#FFFFFF"), 7, QtCore.Qt.SolidLine
-                    )
-                    p.setPen(pen)
-                    p.drawText(
-                        int(center.x() - d),
-                        int(center.y() + d),
-                        degrees,
-                    )
-                else:
-                    cp = QtGui.QPainterPath()
-                    cp.addRect(
-                        int(center.x() - d / 2),
-                        int(center.y() - d / 2),
-                        int(d),
-                        int(d),
-                    )
-                    p.drawPath(cp)
-                    p.fillPath(cp, QtGui.QColor(255, 153, 0, 255))
+            self._paint_rotation_marker(p, shape)
 
         if self.current:
             self.current.paint(p)
@@ -1449,12 +1620,10 @@ class Canvas(
             )
             pen = QtGui.QPen(QtGui.QColor(background_color), 8, Qt.SolidLine)
             p.setPen(pen)
-            for shape in self.shapes:
-                if not shape.visible:
-                    continue
+            for shape in text_shapes:
                 description = shape.description
                 if description:
-                    bbox = shape.bounding_rect()
+                    bbox = self._shape_rect(shape)
                     fm = QtGui.QFontMetrics(p.font())
                     rect = fm.boundingRect(description)
                     p.fillRect(
@@ -1471,12 +1640,10 @@ class Canvas(
                     )
             pen = QtGui.QPen(QtGui.QColor(text_color), 8, Qt.SolidLine)
             p.setPen(pen)
-            for shape in self.shapes:
-                if not shape.visible:
-                    continue
+            for shape in text_shapes:
                 description = shape.description
                 if description:
-                    bbox = shape.bounding_rect()
+                    bbox = self._shape_rect(shape)
                     p.drawText(
                         int(bbox.x()),
                         int(bbox.y()),
@@ -1491,9 +1658,7 @@ class Canvas(
                 )
             )
             labels = []
-            for shape in self.shapes:
-                if not shape.visible:
-                    continue
+            for shape in text_shapes:
                 d_react = shape.point_size / shape.scale
                 d_text = 1.5
                 if not shape.visible:
@@ -1521,9 +1686,14 @@ class Canvas(
                     continue
                 fm = QtGui.QFontMetrics(p.font())
                 bound_rect = fm.boundingRect(label_text)
-                if shape.shape_type in ["rectangle", "polygon", "rotation"]:
+                if shape.shape_type in [
+                    "rectangle",
+                    "polygon",
+                    "rotation",
+                    "mask",
+                ]:
                     try:
-                        bbox = shape.bounding_rect()
+                        bbox = self._shape_rect(shape)
                     except IndexError:
                         continue
                     rect = QtCore.QRect(
@@ -1599,9 +1769,7 @@ class Canvas(
             p.setFont(font)
             attributes_list = []
 
-            for shape in self.shapes:
-                if not shape.visible:
-                    continue
+            for shape in text_shapes:
                 if not hasattr(shape, "attributes") or not shape.attributes:
                     continue
                 if shape.label in [
@@ -1638,9 +1806,14 @@ class Canvas(
                 rect_height = total_height + 2 * padding_y
                 d_react = shape.point_size / shape.scale
 
-                if shape.shape_type in ["rectangle", "polygon", "rotation"]:
+                if shape.shape_type in [
+                    "rectangle",
+                    "polygon",
+                    "rotation",
+                    "mask",
+                ]:
                     try:
-                        bbox = shape.bounding_rect()
+                        bbox = self._shape_rect(shape)
                     except IndexError:
                         continue
 
@@ -1734,6 +1907,7 @@ class Canvas(
                     p.drawText(text_pos, line_text)
 
         p.end()
+        self._record_paint_time(start)
 
     def transform_pos(self, point):
         """Convert from widget-logical coordinates to painter-logical ones."""
@@ -1771,7 +1945,7 @@ class Canvas(
             self.current.label = ""
         self.current.close()
         self.shapes.append(self.current)
-        self.store_shapes()
+        self.store_shapes(changed=[])
         self.current = None
         self.set_hiding(False)
         self.new_shape.emit()
@@ -1944,7 +2118,7 @@ class Canvas(
             else:
                 self._adjust_rectangle_edge(shape, pos, wheel_up)
 
-            self.store_shapes()
+            self.store_shapes(changed=[shape])
             self.shape_moved.emit()
             self.update()
             ev.accept()
@@ -2091,7 +2265,7 @@ class Canvas(
             self.bounded_move_shapes(
                 self.selected_shapes, self.prev_point + offset
             )
-            self.repaint()
+            self.update()
             self.moving_shape = True
 
     def rotate_by_keyboard(self, theta):
@@ -2100,7 +2274,7 @@ class Canvas(
             for i, shape in enumerate(self.selected_shapes):
                 if shape._shape_type == "rotation":
                     self.bounded_rotate_shapes(i, shape, theta)
-                    self.repaint()
+                    self.update()
                     self.rotating_shape = True
 
     # QT Overload
@@ -2143,19 +2317,10 @@ class Canvas(
             if int(modifiers) == 0:
                 self.snapping = True
         elif self.editing():
-            # NOTE: Temporary fix to avoid ValueError
-            # when the selected shape is not in the shapes list
             if (
-                (self.moving_shape or self.rotating_shape)
-                and self.selected_shapes
-                and self.selected_shapes[0] in self.shapes
-            ):
-                index = self.shapes.index(self.selected_shapes[0])
-                if (
-                    self.shapes_backups[-1][index].points
-                    != self.shapes[index].points
-                ):
-                    self.store_shapes()
+                self.moving_shape or self.rotating_shape
+            ) and self.selected_shapes:
+                if self.store_shapes(changed=self.selected_shapes):
                     if self.moving_shape:
                         self.shape_moved.emit()
                     if self.rotating_shape:
@@ -2174,8 +2339,8 @@ class Canvas(
         else:
             self.shapes[-1].label = text
         self.shapes[-1].flags = flags
-        self.shapes_backups.pop()
-        self.store_shapes()
+        self.shapes_history.refresh(self.shapes[-1])
+        self.invalidate_shapes_layer()
         return self.shapes[-1]
 
     def undo_last_line(self):
@@ -2208,6 +2373,7 @@ class Canvas(
         self.pixmap = pixmap
         if clear_shapes:
             self.shapes = []
+        self.invalidate_shapes_layer()
         self.update()
 
     def load_shapes(self, shapes, replace=True):
@@ -2226,6 +2392,7 @@ class Canvas(
     def set_shape_visible(self, shape, value):
         """Set visibility for a shape"""
         self.visible[shape] = value
+        self.invalidate_shapes_layer()
         self.update()
 
     def current_cursor(self):
@@ -2253,8 +2420,9 @@ class Canvas(
         """Clear shapes and pixmap"""
         self.restore_cursor()
         self.pixmap = None
-        self.shapes_backups = []
+        self.shapes_history.reset()
         self.is_move_editing = False
+        self.invalidate_shapes_layer()
         self.update()
 
     def set_cross_line(self, show, width, color, opacity):
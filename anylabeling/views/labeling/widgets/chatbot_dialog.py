@@ -42,6 +42,11 @@ from PyQt5.QtGui import (
 
 from anylabeling.app_info import __version__
 from anylabeling.views.labeling.chatbot import *
+from anylabeling.views.labeling.chatbot.batch import *
+from anylabeling.views.labeling.chatbot.chat import *
+from anylabeling.views.labeling.chatbot.general import *
+from anylabeling.views.labeling.chatbot.provider import *
+from anylabeling.views.labeling.chatbot.render import *
 from anylabeling.views.labeling.logger import logger
 from anylabeling.views.labeling.utils.general import open_url
 from anylabeling.views.labeling.utils.qt import new_icon, new_icon_path
@@ -1352,6 +1357,8 @@ class ChatbotDialog(QDialog):
         """Run all images with the same prompt for batch processing"""
         if len(self.parent().image_list) <= 0:
             return
+        if not self.parent().may_continue():
+            return
 
         batch_dialog = BatchProcessDialog(self)
         prompt = batch_dialog.exec_()
@@ -1359,16 +1366,30 @@ class ChatbotDialog(QDialog):
             self.current_index = self.parent().fn_to_index[
                 str(self.parent().filename)
             ]
-            self.image_index = self.current_index
-            self.show_progress_dialog_and_process(prompt)
+            self.show_progress_dialog_and_process(
+                prompt, batch_dialog.get_options()
+            )
+
+    def show_progress_dialog_and_process(self, prompt, options=None):
+        image_files = self.parent().image_list[self.current_index :]
+        self.batch_worker = BatchChatWorker(
+            image_files,
+            prompt,
+            self.current_api_address,
+            self.current_api_key,
+            self.selected_model,
+            temperature=self.temp_slider.value() / 10.0,
+            max_tokens=self.max_length_input.value(),
+            system_prompt=self.system_prompt_input.text().strip(),
+            output_dir=self.parent().output_dir,
+            **(options or {}),
+        )
 
-    def show_progress_dialog_and_process(self, prompt):
-        self.cancel_processing = False
         progress_dialog = QProgressDialog(
             self.tr("Inferencing..."),
             self.tr("Cancel"),
-            self.image_index,
-            len(self.parent().image_list),
+            0,
+            len(image_files),
             self,
         )
         progress_dialog.setWindowModality(Qt.WindowModal)
@@ -1389,98 +1410,42 @@ class ChatbotDialog(QDialog):
             center_point.y() - dialog_rect.height() // 2,
         )
 
-        progress_dialog.canceled.connect(self.cancel_operation)
-        progress_dialog.show()
-        QApplication.processEvents()
-        self.process_next_image(progress_dialog, prompt)
-
-    def process_next_image(self, progress_dialog, prompt):
-        total_images = len(self.parent().image_list)
-
-        if (self.image_index < total_images) and (not self.cancel_processing):
+        def update_progress(num_finished, num_failed):
             template = self.tr("Processing image %d/%d...")
-            display_text = template % (self.image_index + 1, total_images)
-            progress_dialog.setLabelText(display_text)
-
-            filename = self.parent().image_list[self.image_index]
-            self.parent().filename = filename
-
-            temperature = self.temp_slider.value() / 10.0
-            system_prompt = self.system_prompt_input.text().strip()
-            max_tokens = int(self.max_length_input.text().strip())
-
-            messages = []
-            if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
-
-            if "@image" in prompt or "<image>" in prompt:
-                pattern = r"@image\s*(?=\S|$)"
-                prompt = re.sub(pattern, "<image>", prompt).strip()
-                with open(self.parent().filename, "rb") as f:
-                    image_data = base64.b64encode(f.read()).decode("utf-8")
-                messages.append(
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{image_data}"
-                                },
-                            },
-                            {"type": "text", "text": prompt},
-                        ],
-                    }
-                )
-            else:
-                messages.append({"role": "user", "content": prompt})
-
-            client = OpenAI(
-                base_url=self.current_api_address, api_key=self.current_api_key
+            progress_dialog.setLabelText(
+                template % (num_finished, len(image_files))
             )
-            response = client.chat.completions.create(
-                model=self.selected_model,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens,
-                stream=False,
-            )
-            content = response.choices[0].message.content
-
-            self.parent().other_data["chat_history"] = [
-                {
-                    "role": "user",
-                    "content": prompt,
-                    "image": self.parent().filename,
-                },
-                {"role": "assistant", "content": content, "image": None},
-            ]
-            self.parent().set_dirty()
+            progress_dialog.setValue(num_finished)
 
-            progress_dialog.setValue(self.image_index + 1)
-            self.image_index += 1
-            self.navigate_image()
-
-            if not self.cancel_processing:
-                delay_ms = 0
-                QTimer.singleShot(
-                    delay_ms,
-                    lambda: self.process_next_image(progress_dialog, prompt),
-                )
-            else:
-                self.finish_processing(progress_dialog)
-        else:
-            self.finish_processing(progress_dialog)
+        self.batch_worker.progress.connect(update_progress)
+        self.batch_worker.finished.connect(
+            lambda: self.finish_processing(progress_dialog)
+        )
+        progress_dialog.canceled.connect(self.cancel_operation)
+        progress_dialog.show()
+        self.batch_worker.start()
 
     def cancel_operation(self):
-        self.cancel_processing = True
+        if getattr(self, "batch_worker", None) is not None:
+            self.batch_worker.cancel()
 
     def finish_processing(self, progress_dialog):
+        worker = self.batch_worker
+        self.batch_worker = None
+        progress_dialog.close()
+
+        # Results were written to the label files, reload the current one
         self.parent().filename = self.parent().image_list[self.current_index]
         self.navigate_image(index=self.current_index)
-        del self.image_index
         del self.current_index
-        progress_dialog.close()
+
+        if worker.failed:
+            QMessageBox.warning(
+                self,
+                self.tr("Batch Process"),
+                self.tr("%d of %d images failed, see the log for details.")
+                % (len(worker.failed), len(worker.image_files)),
+            )
 
     def import_export_dataset(self):
         """Import/Export the dataset"""
@@ -0,0 +1,113 @@
+import os
+
+from PyQt5 import QtWidgets
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import (
+    QFileDialog,
+    QHBoxLayout,
+    QLabel,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+)
+
+from anylabeling.services.auto_labeling.instrumentation import (
+    DEFAULT_DUMP_DIR,
+    PERCENTILES,
+    inference_stats,
+)
+from anylabeling.views.labeling.logger import logger
+from anylabeling.views.labeling.utils.style import (
+    get_cancel_btn_style,
+    get_ok_btn_style,
+)
+
+
+class InferenceStatsDialog(QtWidgets.QDialog):
+    """Per-stage timing and peak memory of the models run so far"""
+
+    COLUMNS = ["mean", *(f"p{q}" for q in PERCENTILES), "max"]
+
+    def __init__(self, parent=None, stats=None):
+        super().__init__(parent)
+        self.stats = stats or inference_stats
+        self.setWindowTitle(self.tr("Inference Statistics"))
+        self.setWindowFlags(self.windowFlags() | Qt.WindowMaximizeButtonHint)
+        self.resize(760, 420)
+
+        layout = QVBoxLayout(self)
+        self.table = QTableWidget(self)
+        self.table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        layout.addWidget(self.table)
+
+        self.info_label = QLabel(
+            self.tr("Times in milliseconds, peak memory in MB.")
+        )
+        self.info_label.setStyleSheet("color: #86868b;")
+        layout.addWidget(self.info_label)
+
+        button_layout = QHBoxLayout()
+        self.reset_button = QPushButton(self.tr("Reset"))
+        self.reset_button.setStyleSheet(get_cancel_btn_style())
+        self.reset_button.clicked.connect(self.reset_stats)
+        self.refresh_button = QPushButton(self.tr("Refresh"))
+        self.refresh_button.setStyleSheet(get_cancel_btn_style())
+        self.refresh_button.clicked.connect(self.populate_table)
+        self.export_button = QPushButton(self.tr("Export"))
+        self.export_button.setStyleSheet(get_ok_btn_style())
+        self.export_button.clicked.connect(self.export_stats)
+        button_layout.addWidget(self.reset_button)
+        button_layout.addStretch(1)
+        button_layout.addWidget(self.refresh_button)
+        button_layout.addWidget(self.export_button)
+        layout.addLayout(button_layout)
+
+        self.populate_table()
+
+    def populate_table(self):
+        headers = [self.tr("Model"), self.tr("Stage"), self.tr("Calls")]
+        headers += self.COLUMNS + [self.tr("Peak RSS")]
+        self.table.clear()
+        self.table.setColumnCount(len(headers))
+        self.table.setHorizontalHeaderLabels(headers)
+
+        rows = []
+        for name, entry in self.stats.summary().items():
+            peak = entry["peak_rss"]
+            peak = "-" if peak is None else f"{peak / 2**20:.0f}"
+            for stage, values in entry["stages"].items():
+                rows.append(
+                    [name, stage, str(entry["calls"])]
+                    + [f"{values[column]:.1f}" for column in self.COLUMNS]
+                    + [peak]
+                )
+        self.table.setRowCount(len(rows))
+        for row, values in enumerate(rows):
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column >= 2:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(row, column, item)
+        self.table.resizeColumnsToContents()
+        self.export_button.setEnabled(bool(rows))
+
+    def reset_stats(self):
+        self.stats.reset()
+        self.populate_table()
+
+    def export_stats(self):
+        os.makedirs(DEFAULT_DUMP_DIR, exist_ok=True)
+        path, _ = QFileDialog.getSaveFileName(
+            self,
+            self.tr("Export Inference Statistics"),
+            os.path.join(DEFAULT_DUMP_DIR, "inference_stats.csv"),
+            "CSV (*.csv);;JSON (*.json)",
+        )
+        if not path:
+            return
+        try:
+            self.stats.dump(path)
+        except OSError as e:
+            logger.error(f"Failed to export inference stats: {e}")
@@ -1,6 +1,5 @@
 import os
 import re
-import json
 
 from PyQt5 import QtCore, QtGui, QtWidgets
 from PyQt5.QtGui import QFont, QColor, QIntValidator
@@ -13,11 +12,22 @@ from PyQt5.QtWidgets import (
 )
 
 from anylabeling.views.labeling import utils
+from anylabeling.views.labeling.bulk_rewrite import (
+    ReassignGroupIds,
+    RenameLabels,
+    collect_shape_values,
+    get_journal_dir,
+    has_interrupted_rewrite,
+    resume_rewrite,
+    rewrite_label_files,
+    rollback_rewrite,
+)
 from anylabeling.views.labeling.logger import logger
 from anylabeling.views.labeling.widgets.popup import Popup
 from anylabeling.views.labeling.utils.qt import new_icon_path
 from anylabeling.views.labeling.utils.style import (
     get_ok_btn_style,
+    get_progress_dialog_style,
     get_spinbox_style,
 )
 
@@ -25,6 +35,98 @@ from anylabeling.views.labeling.utils.style import (
 # - Calculate optimal position so as not to go out of screen area.
 
 
+def get_label_file_list(parent, image_file_list):
+    """Get the existing label files of the given images, in order."""
+    label_file_list = []
+    for image_file in image_file_list:
+        label_dir, filename = os.path.split(image_file)
+        if parent.output_dir:
+            label_dir = parent.output_dir
+        label_file = os.path.join(
+            label_dir, os.path.splitext(filename)[0] + ".json"
+        )
+        if os.path.exists(label_file):
+            label_file_list.append(label_file)
+    return label_file_list
+
+
+def run_label_rewrite(parent, label_files, rewrite, journal_dir):
+    """Rewrite label files with a progress dialog.
+
+    Returns:
+        RewriteResult: The outcome, see `rewrite_label_files`.
+    """
+    progress_dialog = QtWidgets.QProgressDialog(
+        QCoreApplication.translate("LabelDialog", "Updating label files..."),
+        QCoreApplication.translate("LabelDialog", "Cancel"),
+        0,
+        len(label_files or []),
+        parent,
+    )
+    progress_dialog.setWindowModality(Qt.WindowModal)
+    progress_dialog.setMinimumDuration(500)
+    progress_dialog.setMinimumWidth(400)
+    progress_dialog.setStyleSheet(
+        get_progress_dialog_style(color="#1d1d1f", height=20)
+    )
+
+    def update_progress(value, total):
+        progress_dialog.setMaximum(total)
+        progress_dialog.setValue(value)
+        QtWidgets.QApplication.processEvents()
+
+    try:
+        if label_files is None:
+            return resume_rewrite(
+                journal_dir,
+                progress_callback=update_progress,
+                is_cancelled=progress_dialog.wasCanceled,
+            )
+        return rewrite_label_files(
+            label_files,
+            rewrite,
+            journal_dir,
+            progress_callback=update_progress,
+            is_cancelled=progress_dialog.wasCanceled,
+        )
+    finally:
+        progress_dialog.close()
+
+
+def recover_label_rewrite(parent, journal_dir):
+    """Offer to resume or roll back a rewrite that was interrupted."""
+    if not has_interrupted_rewrite(journal_dir):
+        return
+    message_box = QtWidgets.QMessageBox(parent)
+    message_box.setIcon(QtWidgets.QMessageBox.Warning)
+    message_box.setWindowTitle(
+        QCoreApplication.translate("LabelDialog", "Interrupted Update")
+    )
+    message_box.setText(
+        QCoreApplication.translate(
+            "LabelDialog",
+            "A previous update of the label files was interrupted. "
+            "Resume it or roll back the files it already changed?",
+        )
+    )
+    resume_button = message_box.addButton(
+        QCoreApplication.translate("LabelDialog", "Resume"),
+        QtWidgets.QMessageBox.AcceptRole,
+    )
+    message_box.addButton(
+        QCoreApplication.translate("LabelDialog", "Roll Back"),
+        QtWidgets.QMessageBox.RejectRole,
+    )
+    message_box.exec_()
+    try:
+        if message_box.clickedButton() is resume_button:
+            run_label_rewrite(parent, None, None, journal_dir)
+        else:
+            rollback_rewrite(journal_dir)
+    except Exception as e:
+        logger.error(f"Error occurred while recovering label files: {e}")
+
+
 def natural_sort_key(s):
     return [
         int(c) if c.isdigit() else c.lower() for c in re.split(r"(\d+)", s)
@@ -443,6 +545,10 @@ class GroupIDModifyDialog(QtWidgets.QDialog):
         self.parent = parent
         self.image_file_list = self.get_image_file_list()
         self.shape_list = self.get_shape_file_list()
+        self.journal_dir = get_journal_dir(
+            self.shape_list, self.parent.output_dir
+        )
+        recover_label_rewrite(self.parent, self.journal_dir)
         self.gid_info = self.get_gid_info()
         self.start_index = 1
         self.end_index = len(self.image_file_list)
@@ -458,17 +564,7 @@ class GroupIDModifyDialog(QtWidgets.QDialog):
         return image_file_list
 
     def get_shape_file_list(self):
-        shape_file_list = []
-        for image_file in self.image_file_list:
-            label_dir, filename = os.path.split(image_file)
-            if self.parent.output_dir:
-                label_dir = self.parent.output_dir
-            label_file = os.path.join(
-                label_dir, os.path.splitext(filename)[0] + ".json"
-            )
-            if os.path.exists(label_file):
-                shape_file_list.append(label_file)
-        return shape_file_list
+        return get_label_file_list(self.parent, self.image_file_list)
 
     def get_gid_info(self):
         """Get the group IDs from the shape files.
@@ -477,17 +573,7 @@ class GroupIDModifyDialog(QtWidgets.QDialog):
             list: A list of group IDs.
         """
 
-        gid_info = set()
-
-        for shape_file in self.shape_list:
-            with open(shape_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-
-            shapes = data.get("shapes", [])
-            for shape in shapes:
-                group_id = shape.get("group_id", None)
-                if group_id is not None:
-                    gid_info.add(group_id)
+        gid_info = collect_shape_values(self.shape_list, "group_id")
 
         return sorted(list(gid_info))
 
@@ -746,42 +832,31 @@ class GroupIDModifyDialog(QtWidgets.QDialog):
     def modify_group_id(
         self, updated_gid_info, start_index: int = -1, end_index: int = -1
     ):
-        """Modify the group IDs."""
+        """Modify the group IDs.
+
+        Only the label files holding one of the group IDs are rewritten,
+        see `rewrite_label_files`.
+        """
         try:
             if start_index == -1:
                 start_index = self.start_index
             if end_index == -1:
                 end_index = self.end_index
-            for i, image_file in enumerate(self.image_file_list):
-                if i < start_index - 1 or i > end_index - 1:
-                    continue
-                label_dir, filename = os.path.split(image_file)
-                if self.parent.output_dir:
-                    label_dir = self.parent.output_dir
-                label_file = os.path.join(
-                    label_dir, os.path.splitext(filename)[0] + ".json"
-                )
-                if not os.path.exists(label_file):
-                    continue
-                with open(label_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-
-                src_shapes, dst_shapes = data["shapes"], []
-                for shape in src_shapes:
-                    group_id = shape.get("group_id")
-                    if group_id is not None:
-                        group_id = int(group_id)
-                        if group_id in updated_gid_info:
-                            shape["group_id"] = updated_gid_info[group_id][
-                                "new_gid"
-                            ]
-                    dst_shapes.append(shape)
-                data["shapes"] = dst_shapes
-
-                with open(label_file, "w", encoding="utf-8") as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False)
-
-            return True
+            if not updated_gid_info:
+                return True
+            label_files = get_label_file_list(
+                self.parent, self.image_file_list[start_index - 1 : end_index]
+            )
+            rewrite = ReassignGroupIds(
+                {
+                    gid: info["new_gid"]
+                    for gid, info in updated_gid_info.items()
+                }
+            )
+            result = run_label_rewrite(
+                self, label_files, rewrite, self.journal_dir
+            )
+            return result.ok
 
         except Exception as e:
             logger.error(f"Error occurred while updating Group IDs: {e}")
@@ -838,8 +913,15 @@ class LabelModifyDialog(QtWidgets.QDialog):
         self.parent = parent
         self.opacity = opacity
         self.image_file_list = self.get_image_file_list()
+        self.label_file_list = get_label_file_list(
+            self.parent, self.image_file_list
+        )
+        self.journal_dir = get_journal_dir(
+            self.label_file_list, self.parent.output_dir
+        )
         self.start_index = 1
         self.end_index = len(self.image_file_list)
+        recover_label_rewrite(self.parent, self.journal_dir)
         self.init_label_info()
         self.init_ui()
 
@@ -1056,53 +1138,27 @@ class LabelModifyDialog(QtWidgets.QDialog):
                 start_index = self.start_index
             if end_index == -1:
                 end_index = self.end_index
-            for i, image_file in enumerate(self.image_file_list):
-                if i < start_index - 1 or i > end_index - 1:
-                    continue
-                label_dir, filename = os.path.split(image_file)
-                if self.parent.output_dir:
-                    label_dir = self.parent.output_dir
-                label_file = os.path.join(
-                    label_dir, os.path.splitext(filename)[0] + ".json"
-                )
-                if not os.path.exists(label_file):
-                    continue
-                with open(label_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                src_shapes, dst_shapes = data["shapes"], []
-                for shape in src_shapes:
-                    label = shape["label"]
-                    if self.parent.label_info[label]["delete"]:
-                        continue
-                    if self.parent.label_info[label]["value"]:
-                        shape["label"] = self.parent.label_info[label]["value"]
-                    dst_shapes.append(shape)
-                data["shapes"] = dst_shapes
-                with open(label_file, "w", encoding="utf-8") as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False)
-            return True
+            mapping = {}
+            for label, info in self.parent.label_info.items():
+                if info["delete"]:
+                    mapping[label] = None
+                elif info["value"] and info["value"] != label:
+                    mapping[label] = info["value"]
+            if not mapping:
+                return True
+            label_files = get_label_file_list(
+                self.parent, self.image_file_list[start_index - 1 : end_index]
+            )
+            result = run_label_rewrite(
+                self, label_files, RenameLabels(mapping), self.journal_dir
+            )
+            return result.ok
         except Exception as e:
             logger.error(f"Error occurred while updating labels: {e}")
             return False
 
     def init_label_info(self):
-        classes = set()
-
-        for image_file in self.image_file_list:
-            label_dir, filename = os.path.split(image_file)
-            if self.parent.output_dir:
-                label_dir = self.parent.output_dir
-            label_file = os.path.join(
-                label_dir, os.path.splitext(filename)[0] + ".json"
-            )
-            if not os.path.exists(label_file):
-                continue
-            with open(label_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            shapes = data.get("shapes", [])
-            for shape in shapes:
-                label = shape["label"]
-                classes.add(label)
+        classes = collect_shape_values(self.label_file_list, "label")
 
         for c in sorted(classes):
             # Update unique label list
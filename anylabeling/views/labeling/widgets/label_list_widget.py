@@ -111,10 +111,19 @@ class LabelListWidget(QtWidgets.QListView):
     def __init__(self):
         super().__init__()
         self._selected_items = []
+        # id(shape) -> item, rebuilt on first lookup after rows change
+        self._items_by_shape = None
 
         self.setWindowFlags(Qt.Window)
         self.setModel(StandardItemModel())
         self.model().setItemPrototype(LabelListWidgetItem())
+        for signal in (
+            self.model().rowsInserted,
+            self.model().rowsRemoved,
+            self.model().rowsMoved,
+            self.model().modelReset,
+        ):
+            signal.connect(self._invalidate_index)
         self.setItemDelegate(HTMLDelegate())
         self.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
         self.setDragDropMode(QtWidgets.QAbstractItemView.InternalMove)
@@ -159,25 +168,67 @@ class LabelListWidget(QtWidgets.QListView):
     def scroll_to_item(self, item):
         self.scrollTo(self.model().indexFromItem(item))
 
+    def _invalidate_index(self, *args):
+        self._items_by_shape = None
+
     def add_iem(self, item):
         if not isinstance(item, LabelListWidgetItem):
             raise TypeError("item must be LabelListWidgetItem")
-        self.model().setItem(self.model().rowCount(), 0, item)
-        item.setSizeHint(self.itemDelegate().sizeHint(None, None))
+        self.add_items([item])
+
+    def add_items(self, items):
+        """Append items in one model update"""
+        if not items:
+            return
+        for item in items:
+            if not isinstance(item, LabelListWidgetItem):
+                raise TypeError("item must be LabelListWidgetItem")
+        index = self._items_by_shape
+        self.model().invisibleRootItem().appendRows(items)
+        size_hint = self.itemDelegate().sizeHint(None, None)
+        for item in items:
+            item.setSizeHint(size_hint)
+        if index is not None:
+            for item in items:
+                index[id(item.shape())] = item
+            self._items_by_shape = index
 
     def remove_item(self, item):
         index = self.model().indexFromItem(item)
         self.model().removeRows(index.row(), 1)
 
+    def remove_items(self, items):
+        """Remove items, emitting `item_dropped` once instead of per item"""
+        model = self.model()
+        rows = sorted(
+            {model.indexFromItem(item).row() for item in items}, reverse=True
+        )
+        rows = [row for row in rows if row >= 0]
+        if not rows:
+            return
+        # Remove runs of consecutive rows, last run first
+        end = start = rows[0]
+        for row in rows[1:] + [None]:
+            if row is not None and row == start - 1:
+                start = row
+                continue
+            QtGui.QStandardItemModel.removeRows(model, start, end - start + 1)
+            end = start = row
+        model.itemDropped.emit()
+
     def select_item(self, item):
         index = self.model().indexFromItem(item)
         self.selectionModel().select(index, QtCore.QItemSelectionModel.Select)
 
     def find_item_by_shape(self, shape):
-        for row in range(self.model().rowCount()):
-            item = self.model().item(row, 0)
-            if item.shape() == shape:
-                return item
+        if self._items_by_shape is None:
+            self._items_by_shape = {}
+            for row in range(self.model().rowCount()):
+                item = self.model().item(row, 0)
+                self._items_by_shape.setdefault(id(item.shape()), item)
+        item = self._items_by_shape.get(id(shape))
+        if item is not None and item.shape() is shape:
+            return item
         # NOTE: Handle the case when the shape is not found
         # This is a temporary solution to prevent a crash.
         # Further investigation and a more robust fix are recommended.
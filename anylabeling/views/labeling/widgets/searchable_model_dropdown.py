@@ -1,3 +1,4 @@
+import functools
 from difflib import SequenceMatcher
 
 from PyQt5.QtWidgets import (
@@ -11,7 +12,6 @@ from PyQt5.QtWidgets import (
     QWidget,
 )
 from PyQt5.QtCore import Qt, QSize, pyqtSignal
-from PyQt5.QtGui import QIcon
 
 from anylabeling.views.labeling.chatbot.config import *
 from anylabeling.views.labeling.chatbot.utils import load_json, save_json
@@ -23,6 +23,13 @@ _MODELS_CONFIG_PATH = os.path.join(
 )
 
 
+@functools.lru_cache(maxsize=None)
+def cached_icon(icon, ext="png"):
+    """QIcons are implicitly shared, one instance per icon serves all the
+    model items instead of loading the SVG again for each of them"""
+    return new_icon(icon, ext)
+
+
 class SearchBar(QLineEdit):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -44,7 +51,7 @@ class SearchBar(QLineEdit):
 
         self.search_icon = QLabel(self)
         self.search_icon.setPixmap(
-            QIcon(new_icon("search", "svg")).pixmap(QSize(*ICON_SIZE_SMALL))
+            cached_icon("search", "svg").pixmap(QSize(*ICON_SIZE_SMALL))
         )
         self.search_icon.setFixedSize(self.search_icon.pixmap().size())
         self.search_icon.setStyleSheet("background-color: transparent;")
@@ -78,7 +85,7 @@ class ProviderSection(QFrame):
         else:
             icon_name, ext = provider_name.lower(), "png"
         icon.setPixmap(
-            QIcon(new_icon(icon_name, ext)).pixmap(QSize(*ICON_SIZE_SMALL))
+            cached_icon(icon_name, ext).pixmap(QSize(*ICON_SIZE_SMALL))
         )
         header.addWidget(icon)
 
@@ -112,6 +119,7 @@ class ModelItem(QFrame):
         model_name,
         model_data,
         in_favorites_section=False,
+        is_resident=False,
         parent=None,
     ):
         super().__init__(parent)
@@ -133,11 +141,20 @@ class ModelItem(QFrame):
         layout.addWidget(self.name_label)
         layout.addStretch()
 
+        # Marker for models kept loaded by the model pool
+        self.resident_label = QLabel(self.tr("Loaded"))
+        self.resident_label.setToolTip(
+            self.tr("Kept in memory, switching is instant")
+        )
+        self.resident_label.setStyleSheet("font-size: 11px; color: #71717a;")
+        self.resident_label.setVisible(is_resident)
+        layout.addWidget(self.resident_label)
+
         # Checkmark for selected item
         self.check_icon = QLabel()
         if self.is_selected:
             self.check_icon.setPixmap(
-                QIcon(new_icon("check", "svg")).pixmap(QSize(*ICON_SIZE_SMALL))
+                cached_icon("check", "svg").pixmap(QSize(*ICON_SIZE_SMALL))
             )
         layout.addWidget(self.check_icon)
 
@@ -153,11 +170,11 @@ class ModelItem(QFrame):
         """
         )
         if self.is_favorite:
-            self.star_icon.setIcon(QIcon(new_icon("starred", "svg")))
+            self.star_icon.setIcon(cached_icon("starred", "svg"))
             if self.in_favorites_section:
                 self.star_icon.setVisible(False)
         else:
-            self.star_icon.setIcon(QIcon(new_icon("star", "svg")))
+            self.star_icon.setIcon(cached_icon("star", "svg"))
             self.star_icon.setVisible(False)
 
         self.star_icon.clicked.connect(self.toggle_favorite)
@@ -191,16 +208,16 @@ class ModelItem(QFrame):
     def toggle_favorite(self):
         self.is_favorite = not self.is_favorite
         if self.is_favorite:
-            self.star_icon.setIcon(QIcon(new_icon("starred", "svg")))
+            self.star_icon.setIcon(cached_icon("starred", "svg"))
         else:
-            self.star_icon.setIcon(QIcon(new_icon("star", "svg")))
+            self.star_icon.setIcon(cached_icon("star", "svg"))
         self.favoriteToggled.emit(self.model_name, self.is_favorite)
 
     def update_selection(self, is_selected):
         self.is_selected = is_selected
         if is_selected:
             self.check_icon.setPixmap(
-                QIcon(new_icon("check", "svg")).pixmap(QSize(*ICON_SIZE_SMALL))
+                cached_icon("check", "svg").pixmap(QSize(*ICON_SIZE_SMALL))
             )
             self.setStyleSheet(
                 """
@@ -217,12 +234,15 @@ class ModelItem(QFrame):
             """
             )
 
+    def update_resident(self, is_resident):
+        self.resident_label.setVisible(is_resident)
+
     def update_favorite(self, is_favorite):
         self.is_favorite = is_favorite
         if is_favorite:
-            self.star_icon.setIcon(QIcon(new_icon("starred", "svg")))
+            self.star_icon.setIcon(cached_icon("starred", "svg"))
         else:
-            self.star_icon.setIcon(QIcon(new_icon("star", "svg")))
+            self.star_icon.setIcon(cached_icon("star", "svg"))
         self.star_icon.setVisible(is_favorite or self.underMouse())
 
 
@@ -298,6 +318,7 @@ class SearchableModelDropdownPopup(QWidget):
 
         self.model_items = {}
         self.models_data = models_data
+        self.resident_models = set()
         self.setup_model_list()
 
     def setup_model_list(self):
@@ -327,7 +348,10 @@ class SearchableModelDropdownPopup(QWidget):
 
             for provider, model_name, model_data in favorites:
                 model_item = ModelItem(
-                    model_name, model_data, in_favorites_section=True
+                    model_name,
+                    model_data,
+                    in_favorites_section=True,
+                    is_resident=model_name in self.resident_models,
                 )
                 model_item.clicked.connect(self.select_model)
                 model_item.favoriteToggled.connect(self.toggle_favorite)
@@ -348,7 +372,11 @@ class SearchableModelDropdownPopup(QWidget):
             self.container_layout.addWidget(provider_section)
 
             for model_name, model_data in models.items():
-                model_item = ModelItem(model_name, model_data)
+                model_item = ModelItem(
+                    model_name,
+                    model_data,
+                    is_resident=model_name in self.resident_models,
+                )
                 model_item.clicked.connect(self.select_model)
                 model_item.favoriteToggled.connect(self.toggle_favorite)
                 provider_section.add_model_item(model_item)
@@ -394,6 +422,15 @@ class SearchableModelDropdownPopup(QWidget):
         self.models_data = models_data
         self.setup_model_list()
 
+    def set_resident_models(self, model_names):
+        """Mark the models kept loaded by the model pool"""
+        self.resident_models = set(model_names)
+        # Favorites appear twice, so update all items
+        for model_item in self.findChildren(ModelItem):
+            model_item.update_resident(
+                model_item.model_name in self.resident_models
+            )
+
     def toggle_favorite(self, model_name, is_favorite):
         for provider, models in self.models_data.items():
             if model_name in models:
@@ -9,6 +9,23 @@ from .escapable_qlist_widget import EscapableQListWidget
 
 
 class UniqueLabelQListWidget(EscapableQListWidget):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # label -> items, rebuilt on first lookup after the list changes
+        self._items_by_label = None
+        for signal in (
+            self.model().rowsInserted,
+            self.model().rowsRemoved,
+            self.model().rowsMoved,
+            self.model().modelReset,
+            self.model().layoutChanged,
+            self.model().dataChanged,
+        ):
+            signal.connect(self._invalidate_index)
+
+    def _invalidate_index(self, *args):
+        self._items_by_label = None
+
     # QT Overload
     def mousePressEvent(self, event):
         super().mousePressEvent(event)
@@ -16,12 +33,14 @@ class UniqueLabelQListWidget(EscapableQListWidget):
             self.clearSelection()
 
     def find_items_by_label(self, label):
-        items = []
-        for row in range(self.count()):
-            item = self.item(row)
-            if item.data(Qt.UserRole) == label:
-                items.append(item)
-        return items
+        if self._items_by_label is None:
+            self._items_by_label = {}
+            for row in range(self.count()):
+                item = self.item(row)
+                self._items_by_label.setdefault(
+                    item.data(Qt.UserRole), []
+                ).append(item)
+        return list(self._items_by_label.get(label, ()))
 
     def create_item_from_label(self, label):
         item = QtWidgets.QListWidgetItem()
@@ -12,6 +12,7 @@ from PyQt5.QtWidgets import (
     QHBoxLayout,
     QLabel,
     QMessageBox,
+    QProgressDialog,
     QPushButton,
     QRadioButton,
     QScrollArea,
@@ -967,7 +968,11 @@ class VQADialog(QDialog):
         dialog = AIPromptDialog(self, current_text)
         if dialog.exec_() == QDialog.Accepted:
             prompt = dialog.get_prompt()
-            if prompt:
+            if prompt and dialog.batch_mode:
+                self.run_ai_batch(
+                    component_obj["title"], prompt, dialog.get_concurrency()
+                )
+            elif prompt:
                 self.loading_msg = AILoadingDialog(self)
 
                 current_image_path = None
@@ -993,6 +998,85 @@ class VQADialog(QDialog):
                 if self.loading_msg.exec_() == QDialog.Rejected:
                     self.cancel_ai_processing()
 
+    def run_ai_batch(self, component_title, prompt, concurrency):
+        """
+        Answer the prompt for all images and store the answers in the
+        component field of each label file.
+
+        Args:
+            component_title (str): Title of the target component
+            prompt (str): Prompt template, may reference @image and @text
+            concurrency (int): Number of concurrent requests
+        """
+        if not self.parent().image_list:
+            return
+        self.save_current_image_data()
+        if self.parent().dirty and self.parent().filename:
+            self.parent()._save_file(
+                get_label_file_path(
+                    self.parent().filename, self.parent().output_dir
+                )
+            )
+
+        worker = VQABatchWorker(
+            self.parent().image_list,
+            component_title,
+            prompt,
+            self.parent().output_dir,
+            concurrency,
+        )
+        progress_dialog = QProgressDialog(
+            self.tr("Generating content..."),
+            self.tr("Cancel"),
+            0,
+            len(worker.image_files),
+            self,
+        )
+        progress_dialog.setWindowModality(Qt.WindowModal)
+        progress_dialog.setWindowTitle(self.tr("AI Processing"))
+        progress_dialog.setMinimumDuration(0)
+        progress_dialog.canceled.connect(worker.cancel)
+
+        def update_progress(num_finished, total):
+            template = self.tr("Generating content %d/%d...")
+            progress_dialog.setLabelText(template % (num_finished, total))
+            progress_dialog.setValue(num_finished)
+
+        def finish():
+            progress_dialog.close()
+            self.batch_worker = None
+
+            # Answers were written to the label files, reload the current one
+            if self.parent().filename:
+                self.switching_image = True
+                self.parent().load_file(self.parent().filename)
+                self.clear_all_components_silent()
+                self.load_current_image_data()
+                self.switching_image = False
+
+            if worker.error:
+                QMessageBox.warning(
+                    self,
+                    self.tr("Error"),
+                    self.tr("Failed to generate content:\n") + worker.error,
+                )
+            elif worker.failed:
+                QMessageBox.warning(
+                    self,
+                    self.tr("Error"),
+                    self.tr(
+                        "%d of %d images failed, see the log for details. "
+                        "Run again to retry them."
+                    )
+                    % (len(worker.failed), len(worker.image_files)),
+                )
+
+        worker.progress.connect(update_progress)
+        worker.finished.connect(finish)
+        self.batch_worker = worker
+        progress_dialog.show()
+        worker.start()
+
     def cancel_ai_processing(self):
         """Cancel the AI processing"""
         if hasattr(self, "ai_worker") and self.ai_worker.isRunning():
@@ -0,0 +1,658 @@
+"""Micro-benchmarks of the numeric hot paths, compared against a baseline
+
+Inputs are synthetic and sized like real workloads (1080p images, YOLO
+heads with 8400/25200 anchors, a few hundred shapes per label file). The
+ONNX case uses a tiny generated model, so everything runs offline on CPU.
+
+Run it from the repository root with `python -m`, or as a plain script
+with the package installed.
+
+Usage:
+    python -m tests.benchmarks.bench_hot_paths [-k nms] [--repeat 7]
+    python -m tests.benchmarks.bench_hot_paths --save baseline.json
+    python -m tests.benchmarks.bench_hot_paths --compare baseline.json
+
+To compare branches, save a baseline on one and compare on the other;
+timings are only comparable on the same machine. --compare exits with
+status 1 when a case is slower than the baseline by more than
+--threshold, and skips the comparison when the baseline was recorded on
+another host or with another CPU count.
+
+Timings drift between runs, on shared and single-CPU machines most: three
+back-to-back runs of the same tree on a 1-CPU VM differed by 1.13x for
+the typical case and by up to 2.2x for the worst. A case that looks
+slower is therefore timed again, up to --retries times, and its fastest
+run is compared; a real regression stays slow, a noisy run does not. The
+default threshold of 0.5 then only reports slowdowns of 1.5x or more,
+and a lower one is meaningful on a quiet machine.
+"""
+
+import argparse
+import glob
+import json
+import os
+import os.path as osp
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from argparse import Namespace
+
+import cv2
+import numpy as np
+import onnx
+from onnx import TensorProto, helper, numpy_helper
+
+# Labeling utils first, as the app does, resolves the shape/utils import
+# cycle without depending on the tests package
+import anylabeling.views.labeling.utils  # noqa: F401
+from anylabeling.services.auto_labeling.engines import OnnxBaseModel
+from anylabeling.services.auto_labeling.trackers import BOTSORT, BYTETracker
+from anylabeling.services.auto_labeling.utils import (
+    batch_probiou,
+    letterbox,
+    letterbox_blob,
+    masks2segments,
+    non_max_suppression_v5,
+    non_max_suppression_v8,
+    numpy_nms,
+    numpy_nms_rotated,
+    resize_blob,
+    scale_boxes,
+)
+from anylabeling.services.auto_labeling.utils.sahi.postprocess.combine import (
+    greedy_nmm,
+)
+from anylabeling.views.labeling.label_converter import LabelConverter
+from anylabeling.views.labeling.label_file import LabelFile
+
+DEFAULT_BASELINE = osp.join(osp.dirname(__file__), "baseline.json")
+IMAGE_SHAPE = (1080, 1920)
+IMAGE_SHAPE_4K = (2160, 3840)
+NUM_CLASSES = 80
+
+CASES = {}
+
+
+def case(name):
+    """Register a benchmark case.
+
+    The decorated function gets a scratch directory, prepares the inputs
+    and returns the function to time, which takes no arguments.
+    """
+
+    def decorator(setup):
+        CASES[name] = setup
+        return setup
+
+    return decorator
+
+
+def make_objects(num_objects: int, seed: int = 0):
+    """Random xywh boxes (pixels) and classes of objects in an image"""
+    rng = np.random.default_rng(seed)
+    height, width = IMAGE_SHAPE
+    wh = rng.uniform(20, 300, (num_objects, 2))
+    xy = rng.uniform(wh / 2, (width, height) - wh / 2)
+    classes = rng.integers(0, NUM_CLASSES, num_objects)
+    return np.concatenate([xy, wh], axis=1), classes
+
+
+def make_candidates(num_anchors: int, num_objects: int = 50, seed: int = 0):
+    """Detector output: a few anchors per object, noise everywhere else.
+
+    Returns:
+        tuple: (xywh boxes (num_anchors, 4), class scores
+            (num_anchors, NUM_CLASSES)), in the input space of 640x640.
+    """
+    rng = np.random.default_rng(seed)
+    boxes = rng.uniform(0, 640, (num_anchors, 4)).astype(np.float32)
+    boxes[:, 2:] = rng.uniform(4, 64, (num_anchors, 2))
+    scores = rng.uniform(0, 0.05, (num_anchors, NUM_CLASSES))
+    objects, classes = make_objects(num_objects, seed)
+    objects *= 640 / max(IMAGE_SHAPE)
+    for obj, cls in zip(objects, classes):
+        idx = rng.choice(num_anchors, 20, replace=False)
+        boxes[idx] = obj + rng.normal(0, 3, (20, 4))
+        scores[idx, cls] = rng.uniform(0.3, 0.95, 20)
+    return boxes, scores.astype(np.float32)
+
+
+def make_label_data(num_shapes: int, seed: int = 0):
+    """Label file content with rectangles and polygons"""
+    rng = np.random.default_rng(seed)
+    objects, classes = make_objects(num_shapes, seed)
+    angles = np.linspace(0, 2 * np.pi, 32, endpoint=False)
+    shapes = []
+    for i, ((x, y, w, h), cls) in enumerate(zip(objects, classes)):
+        if i % 2:
+            x1, y1, x2, y2 = x - w / 2, y - h / 2, x + w / 2, y + h / 2
+            points = [[x1, y1], [x2, y1], [x2, y2], [x1, y2]]
+            shape_type = "rectangle"
+        else:
+            radius = rng.uniform(0.3, 0.5, 32)[:, None] * (w, h)
+            points = (
+                (x, y) + radius * np.stack([np.cos(angles), np.sin(angles)], 1)
+            ).tolist()
+            shape_type = "polygon"
+        shapes.append(
+            {
+                "label": f"class_{cls % 20}",
+                "score": None,
+                "points": [[float(v) for v in p] for p in points],
+                "group_id": None,
+                "description": "",
+                "difficult": False,
+                "shape_type": shape_type,
+                "flags": {},
+                "attributes": {},
+                "kie_linking": [],
+            }
+        )
+    return {
+        "version": "3.0.0",
+        "flags": {},
+        "shapes": shapes,
+        "imagePath": "image.jpg",
+        "imageData": None,
+        "imageHeight": IMAGE_SHAPE[0],
+        "imageWidth": IMAGE_SHAPE[1],
+    }
+
+
+def make_detection_head(filename: str, num_outputs: int = 84):
+    """Write a tiny YOLOv8-like model: 640x640 image -> (1, 84, 8400).
+
+    Three strided convolutions stand in for the P3-P5 heads, so the
+    output has the layout and size of a real detector.
+    """
+    rng = np.random.default_rng(0)
+    initializers, nodes, heads = [], [], []
+    for stride in (8, 16, 32):
+        weight = rng.normal(0, 0.01, (num_outputs, 3, stride, stride))
+        initializers.append(
+            numpy_helper.from_array(weight.astype(np.float32), f"w{stride}")
+        )
+        nodes += [
+            helper.make_node(
+                "Conv",
+                ["images", f"w{stride}"],
+                [f"conv{stride}"],
+                kernel_shape=[stride, stride],
+                strides=[stride, stride],
+            ),
+            helper.make_node(
+                "Reshape", [f"conv{stride}", "shape"], [f"head{stride}"]
+            ),
+        ]
+        heads.append(f"head{stride}")
+    initializers.append(
+        numpy_helper.from_array(np.array([1, num_outputs, -1]), "shape")
+    )
+    nodes.append(helper.make_node("Concat", heads, ["concat"], axis=2))
+    nodes.append(helper.make_node("Sigmoid", ["concat"], ["output0"]))
+    graph = helper.make_graph(
+        nodes,
+        "detection_head",
+        [
+            helper.make_tensor_value_info(
+                "images", TensorProto.FLOAT, [1, 3, 640, 640]
+            )
+        ],
+        [
+            helper.make_tensor_value_info(
+                "output0", TensorProto.FLOAT, [1, num_outputs, 8400]
+            )
+        ],
+        initializers,
+    )
+    model = helper.make_model(
+        graph, opset_imports=[helper.make_opsetid("", 13)]
+    )
+    model.ir_version = 7
+    onnx.save(model, filename)
+
+
+@case("letterbox")
+def bench_letterbox(directory):
+    image = np.random.default_rng(0).integers(
+        0, 255, IMAGE_SHAPE + (3,), dtype=np.uint8
+    )
+    return lambda: letterbox(image, (640, 640))
+
+
+def make_image_4k():
+    return np.random.default_rng(0).integers(
+        0, 255, IMAGE_SHAPE_4K + (3,), dtype=np.uint8
+    )
+
+
+@case("preprocess_4k_letterbox_unfused")
+def bench_preprocess_letterbox_unfused(directory):
+    image = make_image_4k()
+
+    def run():
+        # Letterbox, transpose, cast and scale as separate passes
+        blob = letterbox(image, (640, 640))[0].transpose(2, 0, 1)
+        blob = np.ascontiguousarray(blob[np.newaxis].astype(np.float32))
+        return blob / 255.0
+
+    return run
+
+
+@case("preprocess_4k_letterbox_blob")
+def bench_preprocess_letterbox_blob(directory):
+    image = make_image_4k()
+    out = np.empty((1, 3, 640, 640), dtype=np.float32)
+    return lambda: letterbox_blob(image, (640, 640), out=out)
+
+
+@case("preprocess_4k_normalize_unfused")
+def bench_preprocess_normalize_unfused(directory):
+    image = make_image_4k()
+    mean = np.array([0.485, 0.456, 0.406])
+    std = np.array([0.229, 0.224, 0.225])
+
+    def run():
+        # Resize, then normalize with float64 mean and std
+        blob = cv2.resize(image, (1200, 800)).astype(np.float32) / 255.0
+        blob = ((blob - mean) / std).transpose(2, 0, 1)
+        return np.expand_dims(blob, 0).astype(np.float32)
+
+    return run
+
+
+@case("preprocess_4k_resize_blob")
+def bench_preprocess_resize_blob(directory):
+    image = make_image_4k()
+    return lambda: resize_blob(
+        image,
+        (1200, 800),
+        mean=(0.485, 0.456, 0.406),
+        std=(0.229, 0.224, 0.225),
+    )
+
+
+@case("onnx_detection_head")
+def bench_onnx_detection_head(directory):
+    model_path = osp.join(directory, "head.onnx")
+    make_detection_head(model_path)
+    net = OnnxBaseModel(model_path)
+    blob = np.random.default_rng(0).random((1, 3, 640, 640), np.float32)
+    return lambda: net.get_ort_inference(blob)
+
+
+@case("onnx_detection_head_bound")
+def bench_onnx_detection_head_bound(directory):
+    model_path = osp.join(directory, "head.onnx")
+    make_detection_head(model_path)
+    net = OnnxBaseModel(model_path)
+    # Bound on CPU too, where run_bound would otherwise run plainly
+    net.use_binding = True
+    blob = np.random.default_rng(0).random((1, 3, 640, 640), np.float32)
+    return lambda: net.run_bound(blob)
+
+
+@case("non_max_suppression_v5")
+def bench_non_max_suppression_v5(directory):
+    boxes, scores = make_candidates(25200)
+    objectness = scores.max(axis=1, keepdims=True)
+    prediction = np.concatenate(
+        [boxes, objectness, scores / np.maximum(objectness, 1e-6)], axis=1
+    )[None]
+    # The input is converted in place, hence the copy
+    return lambda: non_max_suppression_v5(prediction.copy())
+
+
+@case("non_max_suppression_v8")
+def bench_non_max_suppression_v8(directory):
+    boxes, scores = make_candidates(8400)
+    prediction = np.concatenate([boxes, scores], axis=1).T[None]
+    return lambda: non_max_suppression_v8(prediction.copy())
+
+
+@case("numpy_nms")
+def bench_numpy_nms(directory):
+    objects, _ = make_objects(100)
+    rng = np.random.default_rng(0)
+    boxes = np.repeat(objects, 20, axis=0) + rng.normal(0, 5, (2000, 4))
+    boxes[:, 2:] += boxes[:, :2]
+    scores = rng.random(2000)
+    return lambda: numpy_nms(boxes, scores, 0.45)
+
+
+@case("numpy_nms_rotated")
+def bench_numpy_nms_rotated(directory):
+    objects, _ = make_objects(50)
+    rng = np.random.default_rng(0)
+    boxes = np.repeat(objects, 20, axis=0) + rng.normal(0, 5, (1000, 4))
+    boxes = np.concatenate([boxes, rng.uniform(0, np.pi, (1000, 1))], 1)
+    scores = rng.random(1000)
+    return lambda: numpy_nms_rotated(boxes, scores, 0.45)
+
+
+@case("batch_probiou")
+def bench_batch_probiou(directory):
+    rng = np.random.default_rng(0)
+    obb = np.concatenate(
+        [make_objects(1000)[0], rng.uniform(0, np.pi, (1000, 1))], 1
+    )
+    return lambda: batch_probiou(obb, obb)
+
+
+@case("masks2segments")
+def bench_masks2segments(directory):
+    objects, _ = make_objects(30)
+    masks = np.zeros((len(objects),) + IMAGE_SHAPE, dtype=np.uint8)
+    for mask, (x, y, w, h) in zip(masks, objects.astype(int)):
+        cv2.ellipse(mask, (x, y), (w // 2, h // 2), 30, 0, 360, 1, -1)
+    return lambda: masks2segments(masks)
+
+
+@case("scale_boxes")
+def bench_scale_boxes(directory):
+    objects, _ = make_objects(300)
+    boxes = objects * 640 / max(IMAGE_SHAPE)
+    boxes[:, 2:] += boxes[:, :2]
+    return lambda: scale_boxes((640, 640), boxes.copy(), IMAGE_SHAPE)
+
+
+@case("sahi_greedy_nmm")
+def bench_sahi_greedy_nmm(directory):
+    # Predictions of overlapping slices: each object is found 5 times
+    objects, classes = make_objects(400)
+    rng = np.random.default_rng(0)
+    boxes = np.repeat(objects, 5, axis=0) + rng.normal(0, 4, (2000, 4))
+    boxes[:, 2:] += boxes[:, :2]
+    predictions = np.concatenate(
+        [boxes, rng.random((2000, 1)), np.repeat(classes, 5)[:, None]], 1
+    )
+    return lambda: greedy_nmm(predictions, "IOS", 0.5)
+
+
+def make_tracker_sequence(num_frames: int = 30, num_objects: int = 50):
+    """Detections of objects moving across a sequence of frames"""
+    objects, classes = make_objects(num_objects)
+    rng = np.random.default_rng(0)
+    velocity = rng.normal(0, 5, (num_objects, 2))
+    frames = []
+    for i in range(num_frames):
+        xywh = objects.copy()
+        xywh[:, :2] += velocity * i
+        visible = rng.random(num_objects) > 0.1
+        scores = rng.uniform(0.2, 0.95, num_objects)
+        frames.append((scores[visible], xywh[visible], classes[visible]))
+    return frames
+
+
+def tracker_args(tracker_type):
+    return Namespace(
+        tracker_type=tracker_type,
+        track_high_thresh=0.5,
+        track_low_thresh=0.1,
+        new_track_thresh=0.6,
+        track_buffer=30,
+        match_thresh=0.8,
+        fuse_score=True,
+        gmc_method="sparseOptFlow",
+        proximity_thresh=0.5,
+        appearance_thresh=0.25,
+        with_reid=False,
+    )
+
+
+@case("tracker_bytetrack_30_frames")
+def bench_tracker_bytetrack(directory):
+    frames = make_tracker_sequence()
+
+    def run():
+        tracker = BYTETracker(tracker_args("bytetrack"))
+        for scores, xywh, classes in frames:
+            tracker.update(scores, xywh, classes)
+
+    return run
+
+
+@case("tracker_botsort_30_frames")
+def bench_tracker_botsort(directory):
+    frames = make_tracker_sequence()
+    noise = np.random.default_rng(0).integers(
+        0, 255, IMAGE_SHAPE + (3,), dtype=np.uint8
+    )
+    # A textured scene and the same scene after a small camera motion
+    scene = cv2.GaussianBlur(noise, (0, 0), 8)
+    images = [scene, np.roll(scene, (4, 6), axis=(0, 1))]
+
+    def run():
+        tracker = BOTSORT(tracker_args("botsort"))
+        for i, (scores, xywh, classes) in enumerate(frames):
+            tracker.update(scores, xywh, classes, images[i % 2])
+
+    return run
+
+
+def write_label_files(directory, num_files: int, num_shapes: int):
+    """Write label files next to their (black) images"""
+    image = np.zeros(IMAGE_SHAPE + (3,), dtype=np.uint8)
+    for i in range(num_files):
+        data = make_label_data(num_shapes, seed=i)
+        data["imagePath"] = f"image_{i}.jpg"
+        cv2.imwrite(osp.join(directory, data["imagePath"]), image)
+        with open(
+            osp.join(directory, f"image_{i}.json"), "w", encoding="utf-8"
+        ) as f:
+            json.dump(data, f)
+    return sorted(glob.glob(osp.join(directory, "*.json")))
+
+
+@case("label_file_load")
+def bench_label_file_load(directory):
+    (filename,) = write_label_files(directory, 1, 500)
+    return lambda: LabelFile(filename)
+
+
+@case("label_file_save")
+def bench_label_file_save(directory):
+    data = make_label_data(500)
+    filename = osp.join(directory, "saved.json")
+    return lambda: LabelFile().save(
+        filename=filename,
+        shapes=data["shapes"],
+        image_path=data["imagePath"],
+        image_height=data["imageHeight"],
+        image_width=data["imageWidth"],
+    )
+
+
+def make_converter(directory):
+    classes_file = osp.join(directory, "classes.txt")
+    with open(classes_file, "w", encoding="utf-8") as f:
+        f.write("\n".join(f"class_{i}" for i in range(20)))
+    return LabelConverter(classes_file=classes_file)
+
+
+@case("label_converter_custom_to_yolo")
+def bench_custom_to_yolo(directory):
+    converter = make_converter(directory)
+    label_files = write_label_files(directory, 20, 200)
+    output_file = osp.join(directory, "labels.txt")
+
+    def run():
+        for label_file in label_files:
+            converter.custom_to_yolo(label_file, output_file, "hbb")
+
+    return run
+
+
+@case("label_converter_custom_to_coco")
+def bench_custom_to_coco(directory):
+    converter = make_converter(directory)
+    label_files = write_label_files(directory, 20, 200)
+    image_list = [f[: -len(".json")] + ".jpg" for f in label_files]
+    return lambda: converter.custom_to_coco(
+        image_list, directory, directory, "rectangle"
+    )
+
+
+def time_case(func, repeat: int, min_time: float):
+    """Time a function, in seconds per call.
+
+    Calls are grouped in rounds lasting at least `min_time` each, and
+    the median and interquartile range over the rounds are returned.
+    """
+    func()  # warm up
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2 if elapsed == 0 else max(2, int(min_time / elapsed))
+    rounds = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        rounds.append((time.perf_counter() - start) / number)
+    q1, median, q3 = statistics.quantiles(rounds, n=4, method="inclusive")
+    return {"median": median, "iqr": q3 - q1, "number": number}
+
+
+# Timings recorded with different values of these are not compared
+COMPARABLE_KEYS = ("host", "cpu_count")
+
+
+def machine_info():
+    return {
+        "host": platform.node(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run_case(name, repeat, min_time):
+    with tempfile.TemporaryDirectory() as directory:
+        return time_case(CASES[name](directory), repeat, min_time)
+
+
+def is_slower(result, base, threshold):
+    return result["median"] / base["median"] > 1 + threshold
+
+
+def compare(results, baseline, threshold):
+    """Print the change of every case, return the names of regressions"""
+    regressions = []
+    print(f"{'case':<34} {'baseline':>11} {'current':>11} {'ratio':>7}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<34} {'-':>11} {result['median'] * 1e3:>8.3f} ms")
+            continue
+        ratio = result["median"] / base["median"]
+        flag = ""
+        if is_slower(result, base, threshold):
+            flag = "  slower"
+            regressions.append(name)
+        elif ratio < 1 / (1 + threshold):
+            flag = "  faster"
+        print(
+            f"{name:<34} {base['median'] * 1e3:>8.3f} ms "
+            f"{result['median'] * 1e3:>8.3f} ms {ratio:>7.2f}{flag}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-k", default="", help="only cases containing this")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.1)
+    parser.add_argument("--save", metavar="PATH", help="save a baseline")
+    parser.add_argument(
+        "--compare",
+        metavar="PATH",
+        nargs="?",
+        const=DEFAULT_BASELINE,
+        help=f"compare with a baseline, {DEFAULT_BASELINE} by default",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.5,
+        help="relative slowdown reported as a regression",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=2,
+        help="times a case that looks slower is timed again",
+    )
+    args = parser.parse_args()
+
+    results = {}
+    for name in CASES:
+        if args.k not in name:
+            continue
+        result = run_case(name, args.repeat, args.min_time)
+        results[name] = result
+        if not args.compare:
+            print(
+                f"{name:<34} {result['median'] * 1e3:>10.3f} ms "
+                f"± {result['iqr'] * 1e3:.3f}"
+            )
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(
+                {"machine": machine_info(), "results": results}, f, indent=2
+            )
+        print(f"Baseline saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        machine = machine_info()
+        recorded = baseline["machine"]
+        if any(recorded.get(key) != machine[key] for key in COMPARABLE_KEYS):
+            print(
+                f"Not comparing: the baseline was recorded on "
+                f"{recorded.get('host', 'an unknown host')} with "
+                f"{recorded.get('cpu_count')} CPU(s), this is "
+                f"{machine['host']} with {machine['cpu_count']} CPU(s). "
+                f"Record one here with --save."
+            )
+            for name, result in results.items():
+                print(f"{name:<34} {result['median'] * 1e3:>10.3f} ms")
+            return
+        if recorded != machine:
+            print("Warning: the baseline was recorded with other versions")
+        for _ in range(args.retries):
+            slower = [
+                name
+                for name, result in results.items()
+                if name in baseline["results"]
+                and is_slower(
+                    result, baseline["results"][name], args.threshold
+                )
+            ]
+            for name in slower:
+                result = run_case(name, args.repeat, args.min_time)
+                if result["median"] < results[name]["median"]:
+                    results[name] = result
+        regressions = compare(results, baseline["results"], args.threshold)
+        if regressions:
+            print(
+                f"{len(regressions)} regression(s): {', '.join(regressions)}"
+            )
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Per-image latency of top-down pose estimation against person count
+
+Compares one forward pass per person crop with batched passes. Without
+--model, a small synthetic SimCC model with a dynamic batch dimension is
+used; pass a DWPose/RTMPose ONNX file exported with a dynamic batch to
+measure a real network.
+
+Usage:
+    python -m tests.benchmarks.bench_pose_batching [--model dwpose.onnx]
+"""
+
+import argparse
+import os.path as osp
+import tempfile
+import time
+
+import cv2
+import numpy as np
+import onnx
+from onnx import TensorProto, helper, numpy_helper
+
+from anylabeling.services.auto_labeling.pose.dwpose_onnx import (
+    get_batch_size,
+    inference_pose,
+)
+
+
+def make_simcc_model(
+    filename: str,
+    input_size=(288, 384),
+    num_keypoints: int = 17,
+    simcc_split_ratio: float = 2.0,
+):
+    """Write a small SimCC-style model with a dynamic batch dimension.
+
+    Args:
+        filename (str): Output ONNX file.
+        input_size (tuple): Model input size (w, h).
+        num_keypoints (int): Number of keypoints K.
+        simcc_split_ratio (float): Ratio between SimCC bins and pixels.
+    """
+    w, h = input_size
+    rng = np.random.default_rng(0)
+    stride = 8
+    features = (w // stride) * (h // stride)
+    wx, wy = int(w * simcc_split_ratio), int(h * simcc_split_ratio)
+
+    def tensor(name, array):
+        return numpy_helper.from_array(array.astype(np.float32), name)
+
+    initializers = [
+        tensor("conv_w", rng.normal(size=(num_keypoints, 3, stride, stride))),
+        tensor("head_x", rng.normal(size=(features, wx)) / features),
+        tensor("head_y", rng.normal(size=(features, wy)) / features),
+        numpy_helper.from_array(np.array([0, 0, -1], np.int64), "shape"),
+    ]
+    nodes = [
+        helper.make_node(
+            "Conv",
+            ["input", "conv_w"],
+            ["features"],
+            kernel_shape=[stride, stride],
+            strides=[stride, stride],
+        ),
+        helper.make_node("Reshape", ["features", "shape"], ["flat"]),
+        helper.make_node("MatMul", ["flat", "head_x"], ["simcc_x"]),
+        helper.make_node("MatMul", ["flat", "head_y"], ["simcc_y"]),
+    ]
+    graph = helper.make_graph(
+        nodes,
+        "simcc",
+        [
+            helper.make_tensor_value_info(
+                "input", TensorProto.FLOAT, ["batch", 3, h, w]
+            )
+        ],
+        [
+            helper.make_tensor_value_info(
+                "simcc_x", TensorProto.FLOAT, ["batch", num_keypoints, wx]
+            ),
+            helper.make_tensor_value_info(
+                "simcc_y", TensorProto.FLOAT, ["batch", num_keypoints, wy]
+            ),
+        ],
+        initializers,
+    )
+    model = helper.make_model(
+        graph, opset_imports=[helper.make_opsetid("", 13)]
+    )
+    model.ir_version = 7
+    onnx.save(model, filename)
+
+
+def make_boxes(num_persons: int, width: int, height: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    w = rng.uniform(40, 200, num_persons)
+    h = rng.uniform(100, 400, num_persons)
+    x = rng.uniform(0, width - w)
+    y = rng.uniform(0, height - h)
+    return np.stack([x, y, x + w, y + h], axis=1)
+
+
+def time_per_image(func, repeat: int) -> float:
+    func()  # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--input-width", type=int, default=288)
+    parser.add_argument("--input-height", type=int, default=384)
+    parser.add_argument("--persons", default="1,4,8,16,32,64")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    input_size = (args.input_width, args.input_height)
+    image = np.random.default_rng(0).integers(
+        0, 255, (1080, 1920, 3), dtype=np.uint8
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+        model_path = args.model
+        if model_path is None:
+            model_path = osp.join(directory, "simcc.onnx")
+            make_simcc_model(model_path, input_size)
+        net = cv2.dnn.readNetFromONNX(model_path)
+        batch_size = get_batch_size(model_path, args.batch_size)
+        print(f"{osp.basename(model_path)}, batch size {batch_size}")
+        print(f"{'persons':>8} {'1 crop/pass':>14} {'batched':>14} {'x':>6}")
+
+        for num_persons in map(int, args.persons.split(",")):
+            boxes = make_boxes(num_persons, image.shape[1], image.shape[0])
+            single = time_per_image(
+                lambda: inference_pose(net, boxes, image, input_size, 1),
+                args.repeat,
+            )
+            batched = time_per_image(
+                lambda: inference_pose(
+                    net, boxes, image, input_size, batch_size
+                ),
+                args.repeat,
+            )
+            print(
+                f"{num_persons:>8} {single:>11.1f} ms {batched:>11.1f} ms "
+                f"{single / batched:>6.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Time and memory needed to load/save a label file with many shapes
+
+Usage:
+    python -m tests.benchmarks.bench_shape_loading [--shapes 10000]
+"""
+
+import argparse
+import json
+import os
+import os.path as osp
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import PIL.Image
+
+from anylabeling.views.labeling.label_file import LabelFile
+
+
+def make_label_file(
+    directory: str, num_shapes: int, num_vertices: int, seed: int = 0
+) -> str:
+    """Write a synthetic label file with dense polygons.
+
+    Args:
+        directory (str): Output directory.
+        num_shapes (int): Number of polygons.
+        num_vertices (int): Number of vertices per polygon.
+        seed (int): Random seed.
+
+    Returns:
+        str: Path of the label file.
+    """
+    rng = np.random.default_rng(seed)
+    width, height = 4096, 3072
+    image_name = "image.png"
+    PIL.Image.new("RGB", (width, height)).save(osp.join(directory, image_name))
+
+    angles = np.linspace(0, 2 * np.pi, num_vertices, endpoint=False)
+    shapes = []
+    for i in range(num_shapes):
+        cx, cy = rng.uniform(100, width - 100), rng.uniform(100, height - 100)
+        radius = rng.uniform(10, 90, size=num_vertices)
+        points = np.stack(
+            [cx + radius * np.cos(angles), cy + radius * np.sin(angles)], 1
+        )
+        shapes.append(
+            {
+                "label": f"class_{i % 20}",
+                "score": None,
+                "points": points.tolist(),
+                "group_id": None,
+                "description": "",
+                "difficult": False,
+                "shape_type": "polygon",
+                "flags": {},
+                "attributes": {},
+                "kie_linking": [],
+            }
+        )
+    data = {
+        "version": "3.0.0",
+        "flags": {},
+        "shapes": shapes,
+        "imagePath": image_name,
+        "imageData": None,
+        "imageHeight": height,
+        "imageWidth": width,
+    }
+    filename = osp.join(directory, "image.json")
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    return filename
+
+
+def measure(func):
+    """Run a function, return (result, seconds, retained MiB, peak MiB)
+
+    Timing and memory tracing are done in separate runs, tracing
+    allocations slows Python code down considerably.
+    """
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    result = func()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, retained / 2**20, peak / 2**20
+
+
+def report(name, elapsed, retained, peak):
+    print(
+        f"{name:<16} {elapsed:8.3f} s  "
+        f"retained {retained:8.1f} MiB  peak {peak:8.1f} MiB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shapes", type=int, default=10000)
+    parser.add_argument("--vertices", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = make_label_file(directory, args.shapes, args.vertices)
+        size = os.path.getsize(filename) / 2**20
+        print(
+            f"{args.shapes} shapes x {args.vertices} vertices "
+            f"({size:.1f} MiB JSON)"
+        )
+
+        label_file, *stats = measure(lambda: LabelFile(filename))
+        report("LabelFile.load", *stats)
+
+        shapes, *stats = measure(
+            lambda: [s.to_dict() for s in label_file.shapes]
+        )
+        report("Shape.to_dict", *stats)
+
+        _, *stats = measure(
+            lambda: LabelFile().save(
+                filename=filename,
+                shapes=shapes,
+                image_path="image.png",
+                image_height=3072,
+                image_width=4096,
+            )
+        )
+        report("LabelFile.save", *stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+"""Shared pytest setup.
+
+`anylabeling.views.labeling.shape` and `anylabeling.views.labeling.utils`
+import each other through the widgets package, and the cycle only
+resolves when `utils` is imported first, as the app does on start. Do
+it once here, before any test module imports a model or a widget.
+"""
+
+import anylabeling.views.labeling.utils  # noqa: F401
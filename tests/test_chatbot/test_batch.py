@@ -0,0 +1,138 @@
+import base64
+import io
+import json
+import os.path as osp
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from PIL import Image
+
+from anylabeling.views.labeling.chatbot.batch import (
+    BatchChatWorker,
+    encode_image,
+)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """OpenAI compatible chat endpoint that rate limits the first request"""
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        server = self.server
+        with server.lock:
+            server.requests.append(json.loads(body))
+            rate_limited = len(server.requests) <= server.num_rate_limited
+
+        if rate_limited:
+            payload = {"error": {"message": "Too many requests"}}
+            self.send_response(429)
+            self.send_header("Retry-After", "0")
+        else:
+            payload = {
+                "id": "chatcmpl-0",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "stub",
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": "a cat"},
+                        "finish_reason": "stop",
+                    }
+                ],
+            }
+            self.send_response(200)
+        data = json.dumps(payload).encode()
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestBatchChatWorker(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.server.num_rate_limited = 1
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.api_address = f"http://127.0.0.1:{self.server.server_port}/v1"
+
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.image_files = []
+        for i in range(3):
+            image_file = osp.join(self.temp_dir.name, f"{i}.png")
+            Image.new("RGB", (800, 400), (i, i, i)).save(image_file)
+            self.image_files.append(image_file)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.temp_dir.cleanup()
+
+    def test_results_written_to_label_files(self):
+        worker = BatchChatWorker(
+            self.image_files,
+            "Describe @image",
+            self.api_address,
+            "sk-test",
+            "stub",
+            concurrency=2,
+            max_image_size=200,
+            backoff=0,
+        )
+        worker.run()
+
+        self.assertEqual(worker.failed, {})
+        self.assertEqual(worker.num_finished, len(self.image_files))
+        # One rate limited request is retried
+        self.assertEqual(len(self.server.requests), len(self.image_files) + 1)
+        for image_file in self.image_files:
+            label_file = osp.splitext(image_file)[0] + ".json"
+            with open(label_file, encoding="utf-8") as f:
+                data = json.load(f)
+            self.assertEqual(data["imageWidth"], 800)
+            self.assertEqual(data["imageHeight"], 400)
+            self.assertEqual(
+                data["chat_history"][0]["content"], "Describe <image>"
+            )
+            self.assertEqual(data["chat_history"][1]["content"], "a cat")
+
+        content = self.server.requests[-1]["messages"][0]["content"]
+        url = content[0]["image_url"]["url"]
+        image_data = base64.b64decode(url.split(",", 1)[1])
+        self.assertEqual(Image.open(io.BytesIO(image_data)).size, (200, 100))
+
+    def test_existing_label_file_is_kept(self):
+        label_file = osp.splitext(self.image_files[0])[0] + ".json"
+        with open(label_file, "w", encoding="utf-8") as f:
+            json.dump({"shapes": [{"label": "cat"}], "flags": {}}, f)
+        self.server.num_rate_limited = 0
+
+        worker = BatchChatWorker(
+            self.image_files[:1], "Hi", self.api_address, "sk-test", "stub"
+        )
+        worker.run()
+
+        with open(label_file, encoding="utf-8") as f:
+            data = json.load(f)
+        self.assertEqual(data["shapes"], [{"label": "cat"}])
+        self.assertEqual(data["chat_history"][1]["content"], "a cat")
+        self.assertEqual(
+            self.server.requests[0]["messages"][0]["content"], "Hi"
+        )
+
+    def test_encode_image_keeps_original_bytes(self):
+        url = encode_image(self.image_files[0])
+        with open(self.image_files[0], "rb") as f:
+            self.assertEqual(base64.b64decode(url.split(",", 1)[1]), f.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
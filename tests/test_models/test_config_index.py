@@ -0,0 +1,95 @@
+import os
+import os.path as osp
+import tempfile
+import unittest
+from unittest import mock
+
+from anylabeling.services.auto_labeling import config_index, model_manager
+from anylabeling.services.auto_labeling.config_index import ModelConfigIndex
+
+
+class TestModelConfigIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.index_path = osp.join(self.temp_dir.name, "cache", "index.pkl")
+        self.config_file = osp.join(self.temp_dir.name, "model.yaml")
+        self.write_config("name: model\nclasses:\n  0: person\n  1: car\n")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write_config(self, content):
+        with open(self.config_file, "w", encoding="utf-8") as f:
+            f.write(content)
+
+    def load(self):
+        index = ModelConfigIndex(self.index_path)
+        config = index.load(self.config_file)
+        index.save()
+        return config
+
+    def test_configs_are_parsed_once(self):
+        config = self.load()
+        self.assertEqual(config["classes"], {0: "person", 1: "car"})
+        mtime = os.stat(self.index_path).st_mtime_ns
+
+        with mock.patch.object(config_index.yaml, "load") as load:
+            self.assertEqual(self.load(), config)
+        load.assert_not_called()
+        # Unchanged index is not written again
+        self.assertEqual(os.stat(self.index_path).st_mtime_ns, mtime)
+
+    def test_changed_configs_are_parsed_again(self):
+        self.load()
+        self.write_config("name: other\n")
+        self.assertEqual(self.load(), {"name": "other"})
+
+    def test_loaded_configs_are_copies(self):
+        index = ModelConfigIndex(self.index_path)
+        index.load(self.config_file)["name"] = "changed"
+        self.assertEqual(index.load(self.config_file)["name"], "model")
+
+    def test_invalid_index_is_rebuilt(self):
+        os.makedirs(osp.dirname(self.index_path))
+        with open(self.index_path, "wb") as f:
+            f.write(b"not a pickle")
+        self.assertEqual(self.load()["name"], "model")
+        self.assertEqual(
+            ModelConfigIndex(self.index_path).load(self.config_file)["name"],
+            "model",
+        )
+
+
+class TestModelManagerStartup(unittest.TestCase):
+
+    def test_user_config_not_rewritten(self):
+        with (
+            tempfile.TemporaryDirectory() as temp_dir,
+            mock.patch.object(
+                config_index,
+                "DEFAULT_INDEX_PATH",
+                osp.join(temp_dir, "index.pkl"),
+            ),
+            mock.patch.object(
+                model_manager, "get_config", return_value={"custom_models": []}
+            ),
+            mock.patch.object(
+                model_manager,
+                "get_default_config",
+                return_value={
+                    "model_pool": {"max_models": 1, "memory_budget_mb": 0}
+                },
+            ),
+            mock.patch.object(model_manager, "save_config") as save_config,
+        ):
+            manager = model_manager.ModelManager()
+            self.assertGreater(len(manager.get_model_configs()), 100)
+            self.assertTrue(osp.exists(osp.join(temp_dir, "index.pkl")))
+
+            manager.load_model_configs()
+        save_config.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
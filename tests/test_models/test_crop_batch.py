@@ -0,0 +1,114 @@
+import os.path as osp
+import tempfile
+import unittest
+
+import cv2
+import numpy as np
+import onnx
+from onnx import TensorProto, helper
+
+from anylabeling.services.auto_labeling.engines.build_onnx_engine import (
+    OnnxBaseModel,
+)
+from anylabeling.services.auto_labeling.utils import (
+    crop_boxes,
+    limit_batch_size,
+    make_crop_batch,
+    run_batched,
+)
+
+
+def make_model(filename, batch):
+    """Write a model returning the channel means and their maximum"""
+    graph = helper.make_graph(
+        [
+            helper.make_node(
+                "ReduceMean", ["x"], ["means"], axes=[2, 3], keepdims=0
+            ),
+            helper.make_node(
+                "ReduceMax", ["means"], ["total"], axes=[1], keepdims=0
+            ),
+        ],
+        "test",
+        [
+            helper.make_tensor_value_info(
+                "x", TensorProto.FLOAT, [batch, 3, 4, 6]
+            )
+        ],
+        [
+            helper.make_tensor_value_info(
+                "means", TensorProto.FLOAT, [batch, 3]
+            ),
+            helper.make_tensor_value_info("total", TensorProto.FLOAT, [batch]),
+        ],
+    )
+    model = helper.make_model(
+        graph, opset_imports=[helper.make_opsetid("", 13)]
+    )
+    model.ir_version = 7
+    onnx.save(model, filename)
+    return OnnxBaseModel(filename)
+
+
+class TestCropBatch(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.image = rng.integers(0, 256, (50, 80, 3), dtype=np.uint8)
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = temp_dir.name
+
+    def test_crop_boxes(self):
+        boxes = [
+            [10, 5, 30, 25],
+            [-5, -5, 10, 10],
+            [60, 40, 90, 70],
+            [5, 5, 5, 9],
+        ]
+        indexes, crops = crop_boxes(self.image, boxes)
+        self.assertEqual(indexes, [0, 1, 2])
+        self.assertEqual(
+            [c.shape[:2] for c in crops], [(20, 20), (10, 10), (10, 20)]
+        )
+        np.testing.assert_array_equal(crops[1], self.image[:10, :10])
+
+    def test_make_crop_batch(self):
+        _, crops = crop_boxes(self.image, [[10, 5, 30, 25], [0, 0, 80, 50]])
+        mean = np.array([0.485, 0.456, 0.406])
+        std = np.array([0.229, 0.224, 0.225])
+        batch = make_crop_batch(crops, (6, 4), mean, std)
+        self.assertEqual(batch.shape, (2, 3, 4, 6))
+        self.assertEqual(batch.dtype, np.float32)
+        self.assertTrue(batch.flags["C_CONTIGUOUS"])
+        for crop, blob in zip(crops, batch):
+            expected = cv2.resize(crop, (6, 4)).transpose(2, 0, 1) / 255.0
+            expected = (expected - mean[:, None, None]) / std[:, None, None]
+            np.testing.assert_allclose(blob, expected, rtol=1e-5, atol=1e-5)
+
+        # A scalar mean and std, as for plate recognition
+        batch = make_crop_batch(crops[:1], (6, 4), 0.588, 0.193)
+        expected = (cv2.resize(crops[0], (6, 4)) / 255.0 - 0.588) / 0.193
+        np.testing.assert_allclose(
+            batch[0], expected.transpose(2, 0, 1), rtol=1e-5, atol=1e-5
+        )
+
+    def test_run_batched(self):
+        _, crops = crop_boxes(
+            self.image, [[i, i, i + 20, i + 15] for i in range(7)]
+        )
+        blob = make_crop_batch(crops, (6, 4))
+        expected = blob.mean(axis=(2, 3))
+        for batch in ["N", 1]:
+            net = make_model(osp.join(self.temp_dir, f"{batch}.onnx"), batch)
+            self.assertEqual(
+                limit_batch_size(net, 3), 3 if batch == "N" else 1
+            )
+            means, total = run_batched(net, blob, batch_size=3)
+            np.testing.assert_allclose(means, expected, rtol=1e-5)
+            np.testing.assert_allclose(total, expected.max(axis=1), rtol=1e-5)
+        self.assertEqual(run_batched(net, blob[:0]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
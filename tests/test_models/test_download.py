@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+import os.path as osp
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from anylabeling.services.auto_labeling.utils.download import (
+    DownloadError,
+    FileLock,
+    download_file,
+)
+
+CHUNK_SIZE = 1000
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """Static file server with optional range support and dropped
+    connections"""
+
+    def do_GET(self):
+        server = self.server
+        data = server.data
+        start, end = 0, len(data) - 1
+        range_header = self.headers.get("Range")
+        with server.lock:
+            server.requests.append(range_header)
+            drop = server.num_drops > 0 and range_header != "bytes=0-0"
+            if drop:
+                server.num_drops -= 1
+
+        if range_header and server.ranges:
+            first, last = range_header.split("=")[1].split("-")
+            start = int(first)
+            end = min(int(last), end) if last else end
+            self.send_response(206)
+            self.send_header(
+                "Content-Range", f"bytes {start}-{end}/{len(data)}"
+            )
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+
+        body = data[start : end + 1]
+        if drop:
+            body = body[: len(body) // 2]
+        time.sleep(server.delay)
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestDownloadFile(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+        self.server.lock = threading.Lock()
+        self.server.data = os.urandom(10 * CHUNK_SIZE + 123)
+        self.server.requests = []
+        self.server.ranges = True
+        self.server.num_drops = 0
+        self.server.delay = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/model.onnx"
+        self.sha256 = hashlib.sha256(self.server.data).hexdigest()
+
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dest_path = osp.join(self.temp_dir.name, "model.onnx")
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.temp_dir.cleanup()
+
+    def download(self, **kwargs):
+        kwargs.setdefault("sha256", self.sha256)
+        return download_file(
+            self.url,
+            self.dest_path,
+            chunk_size=CHUNK_SIZE,
+            retry_delay=0,
+            **kwargs,
+        )
+
+    def read_dest(self):
+        with open(self.dest_path, "rb") as f:
+            return f.read()
+
+    def test_parallel_chunks(self):
+        progress = []
+        self.download(progress_callback=lambda *args: progress.append(args))
+
+        self.assertEqual(self.read_dest(), self.server.data)
+        # One probe, then one request per chunk
+        self.assertEqual(len(self.server.requests), 1 + 11)
+        self.assertEqual(progress[-1], (len(self.server.data),) * 2)
+        self.assertEqual(os.listdir(self.temp_dir.name), ["model.onnx"])
+
+    def test_dropped_connections_are_retried(self):
+        self.server.num_drops = 3
+        self.download()
+        self.assertEqual(self.read_dest(), self.server.data)
+        self.assertEqual(len(self.server.requests), 1 + 11 + 3)
+
+    def test_resume_downloads_missing_chunks_only(self):
+        part_path = f"{self.dest_path}.part"
+        with open(part_path, "wb") as f:
+            f.write(self.server.data[: 4 * CHUNK_SIZE])
+            f.write(bytes(len(self.server.data) - 4 * CHUNK_SIZE))
+        with open(f"{part_path}.json", "w") as f:
+            json.dump(
+                {
+                    "size": len(self.server.data),
+                    "chunk_size": CHUNK_SIZE,
+                    "done": [0, 1, 2, 3],
+                },
+                f,
+            )
+
+        self.download()
+        self.assertEqual(self.read_dest(), self.server.data)
+        self.assertEqual(len(self.server.requests), 1 + 7)
+        self.assertNotIn("bytes=0-999", self.server.requests)
+
+    def test_server_without_ranges(self):
+        self.server.ranges = False
+        self.download()
+        self.assertEqual(self.read_dest(), self.server.data)
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_checksum_mismatch(self):
+        with self.assertRaises(DownloadError):
+            self.download(sha256="0" * 64)
+        self.assertEqual(os.listdir(self.temp_dir.name), [])
+
+    def test_concurrent_downloads_share_the_file(self):
+        self.server.delay = 0.05
+        errors = []
+
+        def download():
+            try:
+                self.download()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=download) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(self.read_dest(), self.server.data)
+        self.assertEqual(len(self.server.requests), 1 + 11)
+
+    def test_stale_lock_is_broken(self):
+        lock_path = f"{self.dest_path}.lock"
+        open(lock_path, "w").close()
+        os.utime(lock_path, (0, 0))
+        with FileLock(lock_path, poll_interval=0.01):
+            self.assertTrue(osp.exists(lock_path))
+        self.assertFalse(osp.exists(lock_path))
+
+        open(lock_path, "w").close()
+        with self.assertRaises(TimeoutError):
+            FileLock(lock_path, poll_interval=0.01).acquire(timeout=0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,226 @@
+import json
+import os
+import os.path as osp
+import tempfile
+import threading
+import time
+import unittest
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+from PIL import Image
+
+from anylabeling.services.auto_labeling.grounding_dino_api import (
+    Grounding_DINO_API,
+    ResponseCache,
+)
+from anylabeling.views.labeling.utils.batch import PipelinedPredictionThread
+
+
+class TaskHandler(BaseHTTPRequestHandler):
+    """Task API where tasks succeed after a delay, out of order"""
+
+    def do_POST(self):
+        payload = json.loads(
+            self.rfile.read(int(self.headers["Content-Length"]))
+        )
+        server = self.server
+        task_uuid = str(uuid.uuid4())
+        with server.lock:
+            server.num_submitted += 1
+            delay = server.delays[len(server.tasks) % len(server.delays)]
+            server.tasks[task_uuid] = (time.monotonic() + delay, payload)
+            running = sum(
+                1 for t, _ in server.tasks.values() if t > time.monotonic()
+            )
+            server.max_running = max(server.max_running, running)
+        self.reply({"code": 0, "data": {"task_uuid": task_uuid}})
+
+    def do_GET(self):
+        task_uuid = self.path.rsplit("/", 1)[-1]
+        with self.server.lock:
+            self.server.num_polls += 1
+            ready_at, payload = self.server.tasks[task_uuid]
+        if time.monotonic() < ready_at:
+            self.reply({"code": 0, "data": {"status": "running"}})
+            return
+        if payload["prompt"]["text"] == "fail":
+            self.reply({"code": 0, "data": {"status": "failed"}})
+            return
+        # Encode the payload size in the box so results can be matched
+        size = len(payload["image"])
+        objects = [{"bbox": [0, 0, size, 1], "category": "cat", "score": 0.9}]
+        self.reply(
+            {
+                "code": 0,
+                "data": {"status": "success", "result": {"objects": objects}},
+            }
+        )
+
+    def reply(self, data):
+        body = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestGroundingDinoAPI(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), TaskHandler)
+        self.server.lock = threading.Lock()
+        self.server.tasks = {}
+        self.server.delays = [0.6, 0.1, 0.3]
+        self.server.num_submitted = 0
+        self.server.num_polls = 0
+        self.server.max_running = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.cache_dir = tempfile.TemporaryDirectory()
+        config = {
+            "type": "grounding_dino_api",
+            "name": "grounding_dino_api",
+            "display_name": "GroundingDINO (API)",
+            "conf_threshold": 0.25,
+            "iou_threshold": 0.8,
+            "api_base_url": f"http://127.0.0.1:{self.server.server_port}",
+            "max_in_flight": 3,
+            "cache_dir": self.cache_dir.name,
+        }
+        with mock.patch(
+            "anylabeling.services.auto_labeling.model.get_config",
+            return_value={},
+        ):
+            self.model = Grounding_DINO_API(config, on_message=None)
+        self.model.set_auto_labeling_api_token("token")
+
+        # Images of different sizes give payloads of different lengths
+        rng = np.random.default_rng(0)
+        self.images = [
+            rng.integers(0, 255, (8 + i, 8, 3), dtype=np.uint8)
+            for i in range(7)
+        ]
+
+    def tearDown(self):
+        self.model.unload()
+        self.server.shutdown()
+        self.server.server_close()
+        self.cache_dir.cleanup()
+
+    def predict(self, text_prompt="cat.dog"):
+        results = self.model.predict_shapes_pipelined(
+            [(image, None) for image in self.images], text_prompt
+        )
+        return [
+            (
+                result
+                if isinstance(result, Exception)
+                else [shape.points[2].x() for shape in result.shapes]
+            )
+            for result in results
+        ]
+
+    def test_results_in_order_with_tasks_in_flight(self):
+        expected = [
+            [float(len(self.model.build_payload(image, "cat.dog")["image"]))]
+            for image in self.images
+        ]
+        self.assertEqual(self.predict(), expected)
+
+        self.assertEqual(self.server.num_submitted, len(self.images))
+        self.assertGreater(self.server.max_running, 1)
+        self.assertLessEqual(self.server.max_running, 3)
+
+    def test_rerun_uses_cached_responses(self):
+        first = self.predict()
+        num_submitted = self.server.num_submitted
+        self.assertEqual(self.predict(), first)
+        self.assertEqual(self.server.num_submitted, num_submitted)
+
+        # Other thresholds are other requests
+        self.model.set_auto_labeling_conf(0.5)
+        self.predict()
+        self.assertEqual(self.server.num_submitted, 2 * num_submitted)
+
+    def test_failed_tasks_give_errors(self):
+        results = self.predict("fail")
+        self.assertEqual(len(results), len(self.images))
+        for result in results:
+            self.assertIsInstance(result, ValueError)
+        # Failures are not cached
+        self.predict("fail")
+        self.assertEqual(self.server.num_submitted, 2 * len(self.images))
+        # A single prediction gives no shapes, as before
+        result = self.model.predict_shapes(self.images[0], None, "fail")
+        self.assertEqual(result.shapes, [])
+
+    def test_unreadable_image_fails_alone(self):
+        image_files = []
+        for i, image in enumerate(self.images[:3]):
+            image_file = osp.join(self.cache_dir.name, f"{i}.png")
+            Image.fromarray(image).save(image_file)
+            image_files.append(image_file)
+        with open(image_files[1], "wb") as f:
+            f.write(b"not an image")
+
+        def predict_shapes_pipelined(image_files, text_prompt):
+            # As ModelManager does
+            return self.model.predict_shapes_pipelined(
+                ((None, image_file) for image_file in image_files),
+                text_prompt,
+            )
+
+        model_manager = SimpleNamespace(
+            predict_shapes_pipelined=predict_shapes_pipelined
+        )
+        widget = SimpleNamespace(
+            auto_labeling_widget=SimpleNamespace(model_manager=model_manager),
+            text_prompt="cat",
+            cancel_processing=False,
+            output_dir=None,
+            _config={"store_data": False},
+        )
+        thread = PipelinedPredictionThread(widget, image_files)
+        thread.run()
+
+        self.assertIsNone(thread.error)
+        self.assertEqual(thread.num_processed, 3)
+        self.assertEqual(list(thread.failed), [image_files[1]])
+        self.assertEqual(self.server.num_submitted, 2)
+        for image_file in image_files:
+            label_file = osp.splitext(image_file)[0] + ".json"
+            self.assertEqual(
+                osp.exists(label_file), image_file != image_files[1]
+            )
+
+    def test_cache_evicts_least_recently_used(self):
+        cache = ResponseCache(self.cache_dir.name, max_entries=10)
+        for i in range(10):
+            cache.put(str(i), [i])
+            path = cache._path(str(i))
+            os.utime(path, ns=(i, i))
+        # Reading an entry makes it the most recently used
+        self.assertEqual(cache.get("0"), [0])
+        cache.put("10", [10])
+        self.assertEqual(len(os.listdir(self.cache_dir.name)), 9)
+        for key in ("1", "2"):
+            self.assertIsNone(cache.get(key))
+        for key in ("0", "3", "10"):
+            self.assertIsNotNone(cache.get(key))
+
+    def test_predict_shapes_single_image(self):
+        result = self.model.predict_shapes(self.images[0], None, "cat")
+        self.assertEqual(len(result.shapes), 1)
+        self.assertEqual(result.shapes[0].label, "cat")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import csv
+import json
+import os.path as osp
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from anylabeling.services.auto_labeling import instrumentation, model
+from anylabeling.services.auto_labeling.instrumentation import (
+    InferenceStats,
+    measure_call,
+    stage,
+)
+from anylabeling.views.labeling.utils.opencv import qt_img_to_rgb_cv_img
+
+
+class FakeSession:
+
+    def get_ort_inference(self, blob):
+        time.sleep(0.02)
+        return blob
+
+
+class FakeModel(model.Model):
+
+    def __init__(self, model_config):
+        with mock.patch.object(model, "get_config", return_value={}):
+            super().__init__(model_config, None)
+        self.net = FakeSession()
+
+    def preprocess(self, image):
+        time.sleep(0.01)
+        return image
+
+    def inference(self, blob):
+        return self.net.get_ort_inference(blob)
+
+    def postprocess(self, outputs):
+        time.sleep(0.01)
+        # e.g. the second stage of a cascade
+        return self.inference(outputs)
+
+    def predict_shapes(self, image, image_path=None):
+        image = qt_img_to_rgb_cv_img(image, image_path)
+        outputs = self.postprocess(self.inference(self.preprocess(image)))
+        time.sleep(0.01)
+        return outputs
+
+    def unload(self):
+        pass
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        recording = instrumentation.inference_stats.recording()
+        self.stats = recording.__enter__()
+        self.addCleanup(recording.__exit__, None, None, None)
+
+    def test_stages_of_a_prediction(self):
+        fake = FakeModel({"name": "fake"})
+        image = np.zeros((4, 4, 3), dtype=np.uint8)
+        for _ in range(3):
+            fake.predict_shapes(image)
+
+        records = self.stats.records("fake")
+        self.assertEqual(len(records), 3)
+        for record in records:
+            self.assertGreaterEqual(record["decode"], 0)
+            self.assertGreaterEqual(record["preprocess"], 0.01)
+            self.assertGreaterEqual(record["inference"], 0.04)
+            # The nested session run is not counted as postprocessing
+            self.assertLess(record["postprocess"], 0.02)
+            self.assertGreaterEqual(record["shapes"], 0.01)
+            stages = sum(record[name] for name in instrumentation.STAGES)
+            self.assertAlmostEqual(stages, record["total"], places=6)
+            self.assertGreater(record["peak_rss"], 0)
+
+        summary = self.stats.summary()["fake"]
+        self.assertEqual(summary["calls"], 3)
+        total = summary["stages"]["total"]
+        self.assertLessEqual(total["p50"], total["p90"])
+        self.assertLessEqual(total["p99"], total["max"])
+        self.assertGreaterEqual(total["mean"], 60)
+
+    def test_stages_outside_of_a_call_are_ignored(self):
+        with stage("preprocess"):
+            pass
+        with measure_call("outer", self.stats):
+            with measure_call("inner", self.stats):
+                with stage("preprocess"):
+                    pass
+        self.assertEqual(self.stats.models(), ["outer"])
+
+    def test_dump(self):
+        for _ in range(2):
+            with measure_call("model", self.stats):
+                with stage("inference"):
+                    pass
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paths = instrumentation.dump_batch_stats(self.stats, temp_dir)
+            self.assertEqual(
+                sorted(osp.splitext(path)[1] for path in paths),
+                [".csv", ".json"],
+            )
+            for path in paths:
+                if path.endswith(".json"):
+                    with open(path, encoding="utf-8") as f:
+                        summary = json.load(f)
+                    self.assertEqual(summary["model"]["calls"], 2)
+                else:
+                    with open(path, newline="", encoding="utf-8") as f:
+                        rows = list(csv.DictReader(f))
+                    self.assertEqual(
+                        [row["stage"] for row in rows],
+                        list(instrumentation.STAGES) + ["total"],
+                    )
+                    self.assertEqual(rows[0]["calls"], "2")
+
+        self.assertEqual(
+            instrumentation.dump_batch_stats(InferenceStats()), []
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
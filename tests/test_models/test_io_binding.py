@@ -0,0 +1,102 @@
+import os.path as osp
+import tempfile
+import unittest
+
+import numpy as np
+import onnx
+from onnx import TensorProto, helper
+
+from anylabeling.services.auto_labeling.engines.build_onnx_engine import (
+    OnnxBaseModel,
+)
+
+
+def make_model(filename, nonzero=False):
+    """Write a Relu model, with a data-dependent NonZero output if asked"""
+    nodes = [helper.make_node("Relu", ["x"], ["relu"])]
+    outputs = [
+        helper.make_tensor_value_info("relu", TensorProto.FLOAT, ["N", 16])
+    ]
+    if nonzero:
+        nodes.append(helper.make_node("NonZero", ["relu"], ["nonzero"]))
+        outputs.append(
+            helper.make_tensor_value_info(
+                "nonzero", TensorProto.INT64, [2, "K"]
+            )
+        )
+    graph = helper.make_graph(
+        nodes,
+        "test",
+        [helper.make_tensor_value_info("x", TensorProto.FLOAT, ["N", 16])],
+        outputs,
+    )
+    model = helper.make_model(
+        graph, opset_imports=[helper.make_opsetid("", 13)]
+    )
+    model.ir_version = 7
+    onnx.save(model, filename)
+    net = OnnxBaseModel(filename)
+    # Bind on the CPU provider too, to test the binding path
+    net.use_binding = True
+    return net
+
+
+class TestRunBound(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = temp_dir.name
+
+    def test_reuses_output_buffers(self):
+        net = make_model(osp.join(self.temp_dir, "relu.onnx"))
+        self.assertEqual(net.get_input_name(), "x")
+        self.assertEqual(net.get_output_name(), ["relu"])
+        first = None
+        for _ in range(3):
+            x = self.rng.normal(size=(2, 16)).astype(np.float32)
+            out = net.run_bound(x)
+            np.testing.assert_array_equal(out, net.get_ort_inference(x))
+            first = out if first is None else first
+            # The same buffer is written by every run
+            self.assertIs(out, first)
+
+        # Another input shape gets its own buffers
+        x = self.rng.normal(size=(5, 16)).astype(np.float32)
+        out = net.run_bound(inputs={"x": x}, extract=False)
+        self.assertEqual(len(out), 1)
+        np.testing.assert_array_equal(out[0], np.maximum(x, 0))
+        self.assertEqual(len(net.bindings), 2)
+        np.testing.assert_array_equal(
+            net.run_bound(x[:1], squeeze=True), np.maximum(x[0], 0)
+        )
+
+    def test_binding_limit(self):
+        net = make_model(osp.join(self.temp_dir, "relu.onnx"))
+        for n in range(1, net.MAX_BINDINGS + 3):
+            net.run_bound(np.ones((n, 16), dtype=np.float32))
+        self.assertEqual(len(net.bindings), net.MAX_BINDINGS)
+
+    def test_data_dependent_outputs(self):
+        net = make_model(osp.join(self.temp_dir, "nonzero.onnx"), True)
+        for _ in range(4):
+            x = self.rng.normal(size=(3, 16)).astype(np.float32)
+            relu, nonzero = net.run_bound(x, extract=False)
+            expected = net.get_ort_inference(x, extract=False)
+            np.testing.assert_array_equal(relu, expected[0])
+            np.testing.assert_array_equal(nonzero, expected[1])
+        self.assertTrue(next(iter(net.bindings.values()))["dynamic"])
+
+    def test_plain_run_on_cpu(self):
+        filename = osp.join(self.temp_dir, "relu.onnx")
+        make_model(filename)
+        net = OnnxBaseModel(filename)
+        self.assertFalse(net.use_binding)
+        x = self.rng.normal(size=(2, 16)).astype(np.float32)
+        np.testing.assert_array_equal(net.run_bound(x), np.maximum(x, 0))
+        self.assertEqual(len(net.bindings), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,169 @@
+import unittest
+from unittest import mock
+
+from anylabeling.services.auto_labeling import model_manager
+from anylabeling.services.auto_labeling.model_pool import ModelPool
+
+MB = 1024 * 1024
+
+
+class FakeModel:
+    instances = []
+
+    def __init__(self, model_config, on_message=None):
+        self.name = model_config["name"]
+        self.unloaded = False
+        FakeModel.instances.append(self)
+
+    def unload(self):
+        self.unloaded = True
+
+
+def model_config(name):
+    return {"name": name, "model": FakeModel({"name": name})}
+
+
+class TestModelPool(unittest.TestCase):
+
+    def setUp(self):
+        FakeModel.instances = []
+
+    def test_least_recently_used_is_evicted(self):
+        pool = ModelPool(max_models=2)
+        configs = {key: model_config(key) for key in "abc"}
+        pool.add("a", configs["a"])
+        pool.add("b", configs["b"])
+        pool.get("a")
+
+        pool.make_room()
+        self.assertEqual(pool.keys(), ["a"])
+        self.assertTrue(configs["b"]["model"].unloaded)
+        self.assertFalse(configs["a"]["model"].unloaded)
+
+        pool.add("c", configs["c"])
+        self.assertEqual(pool.keys(), ["a", "c"])
+        self.assertIs(pool.find("c"), configs["c"])
+
+    def test_memory_budget(self):
+        pool = ModelPool(max_models=5, memory_budget_mb=100)
+        pool.add("a", model_config("a"), 60 * MB)
+        pool.add("b", model_config("b"), 30 * MB)
+        pool.trim(keep="b")
+        self.assertEqual(pool.keys(), ["a", "b"])
+
+        pool.add("c", model_config("c"), 30 * MB)
+        pool.trim(keep="c")
+        self.assertEqual(pool.keys(), ["b", "c"])
+
+        # The model just loaded is kept even if it alone is over budget
+        pool.add("d", model_config("d"), 200 * MB)
+        pool.trim(keep="d")
+        self.assertEqual(pool.keys(), ["d"])
+
+    def test_clear(self):
+        pool = ModelPool(max_models=3)
+        pool.add("a", model_config("a"))
+        pool.add("b", model_config("b"))
+        pool.clear()
+        self.assertEqual(len(pool), 0)
+        self.assertTrue(all(model.unloaded for model in FakeModel.instances))
+
+
+class TestModelManagerPool(unittest.TestCase):
+
+    def setUp(self):
+        FakeModel.instances = []
+        patches = [
+            mock.patch.object(
+                model_manager,
+                "get_config",
+                return_value={
+                    "custom_models": [],
+                    "model_pool": {"max_models": 2},
+                },
+            ),
+            mock.patch.object(
+                model_manager,
+                "get_default_config",
+                return_value={
+                    "model_pool": {"max_models": 1, "memory_budget_mb": 4096}
+                },
+            ),
+            mock.patch(
+                "anylabeling.services.auto_labeling.yolov5.YOLOv5", FakeModel
+            ),
+            mock.patch(
+                "anylabeling.services.auto_labeling.efficientvit_sam."
+                "EfficientViT_SAM",
+                FakeModel,
+            ),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        self.manager = model_manager.ModelManager()
+        self.manager.model_configs = [
+            {"name": "det", "type": "yolov5", "config_file": ":/det.yaml"},
+            {"name": "sam", "type": "efficientvit_sam", "config_file": ":/s"},
+            {"name": "det2", "type": "yolov5", "config_file": ":/det2.yaml"},
+        ]
+        self.segmentation = []
+        self.manager.auto_segmentation_model_selected.connect(
+            lambda: self.segmentation.append(True)
+        )
+        self.manager.auto_segmentation_model_unselected.connect(
+            lambda: self.segmentation.append(False)
+        )
+
+    def test_limits_default_to_shipped_config(self):
+        pool = self.manager.model_pool
+        self.assertEqual(pool.max_models, 2)
+        self.assertEqual(pool.memory_budget, 4096 * MB)
+
+    def test_max_models_defaults_to_device(self):
+        config = {"custom_models": [], "model_pool": {"max_models": None}}
+        for device, max_models in (("CPU", 2), ("GPU", 1)):
+            with mock.patch.object(
+                model_manager, "__preferred_device__", device
+            ):
+                with mock.patch.object(
+                    model_manager, "get_config", return_value=config
+                ):
+                    manager = model_manager.ModelManager()
+            self.assertEqual(manager.model_pool.max_models, max_models)
+
+    def test_switching_back_reuses_resident_model(self):
+        det = self.manager._load_model(0)["model"]
+        sam = self.manager._load_model(1)["model"]
+        self.assertEqual(len(FakeModel.instances), 2)
+        self.assertTrue(self.segmentation[-1])
+
+        self.assertIs(self.manager._load_model(0)["model"], det)
+        self.assertEqual(len(FakeModel.instances), 2)
+        self.assertFalse(self.segmentation[-1])
+        self.assertIs(self.manager._load_model(1)["model"], sam)
+        self.assertTrue(self.segmentation[-1])
+        self.assertIs(self.manager.get_resident_model("det"), det)
+
+        # A third model evicts the least recently used one
+        self.manager._load_model(2)
+        self.assertTrue(det.unloaded)
+        self.assertFalse(sam.unloaded)
+        self.assertIsNone(self.manager.get_resident_model("det"))
+
+    def test_changed_config_is_loaded_again(self):
+        det = self.manager._load_model(0)["model"]
+        self.manager.model_configs[0]["conf_threshold"] = 0.5
+        self.assertIsNot(self.manager._load_model(0)["model"], det)
+        self.assertTrue(det.unloaded)
+
+    def test_unload_model(self):
+        det = self.manager._load_model(0)["model"]
+        self.manager.unload_model()
+        self.assertTrue(det.unloaded)
+        self.assertEqual(self.manager.model_pool.keys(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import os.path as osp
+import tempfile
+import unittest
+
+import numpy as np
+import onnx
+from onnx import TensorProto, helper, numpy_helper
+
+from anylabeling.services.auto_labeling.pose.dwpose_onnx import (
+    get_batch_size,
+    read_model_input,
+)
+
+
+def make_model(filename, batch):
+    """Write a model with a large weight stored before its input"""
+    weight = numpy_helper.from_array(
+        np.ones((256, 1024), dtype=np.float32), "weight"
+    )
+    graph = helper.make_graph(
+        [helper.make_node("MatMul", ["x", "weight"], ["y"])],
+        "test",
+        [helper.make_tensor_value_info("x", TensorProto.FLOAT, [batch, 256])],
+        [helper.make_tensor_value_info("y", TensorProto.FLOAT, [batch, 1024])],
+        [weight],
+    )
+    onnx.save(helper.make_model(graph), filename)
+
+
+class TestPoseBatchSize(unittest.TestCase):
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = temp_dir.name
+
+    def test_batch_size(self):
+        for batch, expected in ((None, 16), ("N", 16), (1, 1), (4, 4)):
+            path = osp.join(self.temp_dir, f"{batch}.onnx")
+            make_model(path, batch)
+            self.assertEqual(
+                read_model_input(path), onnx.load(path).graph.input[0]
+            )
+            self.assertEqual(get_batch_size(path), expected)
+        self.assertEqual(get_batch_size(path, 2), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+
+import cv2
+import numpy as np
+
+from anylabeling.services.auto_labeling.utils import (
+    letterbox,
+    letterbox_blob,
+    pack_blob,
+    resize_blob,
+)
+
+MEAN = np.array([0.485, 0.456, 0.406])
+STD = np.array([0.229, 0.224, 0.225])
+
+
+def to_blob(image, mean=0.0, std=1.0):
+    """The unfused reference: transpose, cast, scale and normalize"""
+    image = image.astype(np.float64) / 255.0
+    image = (image - mean) / std
+    return image.transpose(2, 0, 1)[None].astype(np.float32)
+
+
+class TestPreprocess(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.image = rng.integers(0, 256, (37, 61, 3), dtype=np.uint8)
+
+    def test_letterbox_blob(self):
+        for shape in [(64, 64), (32, 96), 48, (37, 61)]:
+            expected, ratio, pad = letterbox(self.image, shape)
+            blob, blob_ratio, blob_pad = letterbox_blob(self.image, shape)
+            self.assertEqual((blob_ratio, blob_pad), (ratio, pad))
+            np.testing.assert_allclose(blob, to_blob(expected), atol=1e-6)
+            self.assertTrue(blob.flags["C_CONTIGUOUS"])
+
+        expected = letterbox(self.image, (64, 64))[0]
+        blob, _, _ = letterbox_blob(self.image, (64, 64), mean=MEAN, std=STD)
+        np.testing.assert_allclose(
+            blob, to_blob(expected, MEAN, STD), atol=1e-5
+        )
+
+    def test_buffer_reuse(self):
+        out = np.zeros((1, 3, 64, 64), dtype=np.float32)
+        blob, _, _ = letterbox_blob(self.image, (64, 64), out=out)
+        self.assertIs(blob, out)
+        expected = letterbox(self.image, (64, 64))[0]
+        np.testing.assert_allclose(out, to_blob(expected), atol=1e-6)
+        # A buffer of another shape is replaced
+        blob, _, _ = letterbox_blob(self.image, (32, 32), out=out)
+        self.assertIsNot(blob, out)
+        self.assertEqual(blob.shape, (1, 3, 32, 32))
+
+    def test_pack_blob(self):
+        blob = pack_blob(
+            self.image, size=(70, 40), top=1, left=2, color=(10, 20, 30)
+        )
+        expected = np.empty((40, 70, 3), dtype=np.uint8)
+        expected[:] = (10, 20, 30)
+        expected[1:38, 2:63] = self.image
+        np.testing.assert_allclose(blob, to_blob(expected), atol=1e-6)
+
+        # Pixel values kept as they are, e.g. for YOLOX
+        blob = pack_blob(self.image, size=(64, 64), scale=1.0)
+        self.assertEqual(blob[0, :, 37:, :].min(), 114)
+        np.testing.assert_array_equal(
+            blob[0, :, :37, :61], self.image.transpose(2, 0, 1)
+        )
+
+        # Channel swap, with the normalization in the new order
+        blob = pack_blob(self.image, mean=MEAN, std=STD, swap_rb=True)
+        np.testing.assert_allclose(
+            blob, to_blob(self.image[..., ::-1], MEAN, STD), atol=1e-5
+        )
+
+        gray = self.image[..., 0]
+        self.assertEqual(pack_blob(gray).shape, (1, 1, 37, 61))
+
+    def test_resize_blob(self):
+        blob = resize_blob(self.image, (50, 30), mean=MEAN, std=STD)
+        expected = cv2.resize(self.image, (50, 30))
+        np.testing.assert_allclose(
+            blob, to_blob(expected, MEAN, STD), atol=1e-5
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,226 @@
+import json
+import os
+import os.path as osp
+import tempfile
+import unittest
+from unittest import mock
+
+from anylabeling.views.labeling import bulk_rewrite
+from anylabeling.views.labeling.bulk_rewrite import (
+    ReassignGroupIds,
+    RenameLabels,
+    collect_shape_values,
+    has_interrupted_rewrite,
+    resume_rewrite,
+    rewrite_label_files,
+    rollback_rewrite,
+)
+
+
+def make_label_data(labels, group_ids=None):
+    group_ids = group_ids or [None] * len(labels)
+    return {
+        "version": "3.0.0",
+        "flags": {},
+        "shapes": [
+            {
+                "label": label,
+                "points": [[0, 0], [1, 1]],
+                "group_id": group_id,
+                "shape_type": "rectangle",
+            }
+            for label, group_id in zip(labels, group_ids)
+        ],
+        "imagePath": "image.jpg",
+    }
+
+
+class TestBulkRewrite(unittest.TestCase):
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = temp_dir.name
+        self.journal_dir = osp.join(self.temp_dir, ".journal")
+        self.label_files = []
+        contents = [
+            (["cat", "dog"], [1, 2]),
+            (["dog"], [2]),
+            (["bird"], [3]),
+            (["猫", "cat"], [None, 1]),
+        ]
+        for i, (labels, group_ids) in enumerate(contents):
+            path = osp.join(self.temp_dir, f"{i}.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(
+                    make_label_data(labels, group_ids),
+                    f,
+                    indent=2,
+                    ensure_ascii=False,
+                )
+            self.label_files.append(path)
+        self.originals = [self.read_bytes(p) for p in self.label_files]
+
+    def read_bytes(self, path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    def read_labels(self, path):
+        with open(path, encoding="utf-8") as f:
+            return [shape["label"] for shape in json.load(f)["shapes"]]
+
+    def test_rename_and_delete(self):
+        rewrite = RenameLabels({"cat": "kitten", "猫": None})
+        result = rewrite_label_files(
+            self.label_files, rewrite, self.journal_dir
+        )
+        self.assertTrue(result.ok)
+        self.assertEqual(
+            result.changed, [self.label_files[0], self.label_files[3]]
+        )
+        self.assertEqual(
+            self.read_labels(self.label_files[0]), ["kitten", "dog"]
+        )
+        self.assertEqual(self.read_labels(self.label_files[3]), ["kitten"])
+        # Files without the labels are left as they are
+        self.assertEqual(
+            self.read_bytes(self.label_files[1]), self.originals[1]
+        )
+        self.assertFalse(osp.exists(self.journal_dir))
+        self.assertEqual(
+            sorted(os.listdir(self.temp_dir)),
+            [osp.basename(p) for p in self.label_files],
+        )
+
+    def test_prescan(self):
+        rewrite = RenameLabels({"猫": "cat"})
+        self.assertTrue(rewrite.may_affect(self.originals[3]))
+        self.assertTrue(rewrite.may_affect(b'{"label": "\\u732b"}'))
+        self.assertFalse(rewrite.may_affect(self.originals[0]))
+
+        rewrite = ReassignGroupIds({2: 5})
+        self.assertTrue(rewrite.may_affect(self.originals[1]))
+        self.assertTrue(rewrite.may_affect(b'{"group_id": "2"}'))
+        self.assertFalse(rewrite.may_affect(self.originals[2]))
+        self.assertFalse(rewrite.may_affect(b'{"group_id": 22}'))
+
+    def test_reassign_group_ids(self):
+        result = rewrite_label_files(
+            self.label_files, ReassignGroupIds({2: 5}), self.journal_dir
+        )
+        self.assertEqual(result.changed, self.label_files[:2])
+        with open(self.label_files[0], encoding="utf-8") as f:
+            shapes = json.load(f)["shapes"]
+        self.assertEqual([s["group_id"] for s in shapes], [1, 5])
+
+    def test_resume_after_crash(self):
+        rewrite = RenameLabels({"dog": "puppy"})
+        original_write = bulk_rewrite.atomic_write
+
+        def crash_on_second_file(path, content):
+            if path == self.label_files[1]:
+                raise SystemExit("crash")
+            original_write(path, content)
+
+        with mock.patch.object(
+            bulk_rewrite, "atomic_write", crash_on_second_file
+        ):
+            with self.assertRaises(SystemExit):
+                rewrite_label_files(
+                    self.label_files, rewrite, self.journal_dir, workers=0
+                )
+        self.assertTrue(has_interrupted_rewrite(self.journal_dir))
+        with self.assertRaises(FileExistsError):
+            rewrite_label_files(self.label_files, rewrite, self.journal_dir)
+
+        # The chunk was not journaled as done, its files are redone
+        # from their backups
+        result = resume_rewrite(self.journal_dir)
+        self.assertEqual(result.changed, self.label_files[:2])
+        self.assertEqual(
+            self.read_labels(self.label_files[0]), ["cat", "puppy"]
+        )
+        self.assertEqual(self.read_labels(self.label_files[1]), ["puppy"])
+        self.assertFalse(has_interrupted_rewrite(self.journal_dir))
+
+    def test_rollback(self):
+        rewrite = RenameLabels({"dog": None, "bird": "owl"})
+        calls = []
+
+        def is_cancelled():
+            calls.append(True)
+            return len(calls) > 1
+
+        with mock.patch.object(bulk_rewrite, "CHUNK_SIZE", 1):
+            result = rewrite_label_files(
+                self.label_files,
+                rewrite,
+                self.journal_dir,
+                is_cancelled=is_cancelled,
+            )
+        self.assertTrue(result.cancelled)
+        self.assertEqual(result.changed, [self.label_files[0]])
+        # Cancelling rolls back what was already changed
+        for path, original in zip(self.label_files, self.originals):
+            self.assertEqual(self.read_bytes(path), original)
+        self.assertFalse(osp.exists(self.journal_dir))
+
+        bulk_rewrite.RewriteJournal.create(
+            self.journal_dir, self.label_files, rewrite
+        )
+        bulk_rewrite.rewrite_file(
+            rewrite,
+            osp.join(self.journal_dir, bulk_rewrite.BACKUP_DIRNAME),
+            2,
+            self.label_files[2],
+        )
+        self.assertEqual(self.read_labels(self.label_files[2]), ["owl"])
+        self.assertEqual(rollback_rewrite(self.journal_dir), 1)
+        self.assertEqual(
+            self.read_bytes(self.label_files[2]), self.originals[2]
+        )
+
+    def test_stale_journal(self):
+        # A crash between creating the journal and writing its state
+        os.makedirs(osp.join(self.journal_dir, bulk_rewrite.BACKUP_DIRNAME))
+        self.assertFalse(has_interrupted_rewrite(self.journal_dir))
+        result = rewrite_label_files(
+            self.label_files, RenameLabels({"dog": "puppy"}), self.journal_dir
+        )
+        self.assertTrue(result.ok)
+        self.assertEqual(self.read_labels(self.label_files[1]), ["puppy"])
+        self.assertFalse(osp.exists(self.journal_dir))
+
+    def test_invalid_file(self):
+        with open(self.label_files[1], "w", encoding="utf-8") as f:
+            f.write('{"shapes": [{"label": "dog"')
+        result = rewrite_label_files(
+            self.label_files, RenameLabels({"dog": "puppy"}), self.journal_dir
+        )
+        self.assertFalse(result.ok)
+        self.assertEqual(result.failed, [self.label_files[1]])
+        self.assertEqual(
+            self.read_labels(self.label_files[0]), ["cat", "puppy"]
+        )
+
+    def test_process_pool(self):
+        self.assertEqual(
+            collect_shape_values(self.label_files, "label", workers=2),
+            {"cat", "dog", "bird", "猫"},
+        )
+        result = rewrite_label_files(
+            self.label_files,
+            RenameLabels({"cat": "kitten"}),
+            self.journal_dir,
+            workers=2,
+        )
+        self.assertEqual(
+            sorted(result.changed), [self.label_files[0], self.label_files[3]]
+        )
+        self.assertEqual(
+            self.read_labels(self.label_files[3]), ["猫", "kitten"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import io
+import os.path as osp
+import tempfile
+import unittest
+
+import numpy as np
+import PIL.Image
+import qimage2ndarray
+from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtWidgets import QApplication
+
+from anylabeling.views.labeling.utils.opencv import (
+    EXIF_ORIENTATION,
+    DecodedFrame,
+    qt_img_to_rgb_cv_img,
+)
+
+
+def encode(image, fmt="PNG", orientation=None):
+    """Encode a PIL image, optionally tagged with an EXIF orientation"""
+    exif = PIL.Image.Exif()
+    if orientation is not None:
+        exif[EXIF_ORIENTATION] = orientation
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, exif=exif)
+    return buffer.getvalue()
+
+
+class TestDecodedFrame(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.pixels = rng.integers(0, 256, (30, 50, 3), dtype=np.uint8)
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = temp_dir.name
+
+    def load(self, image_data, path=None):
+        """Load the way `LabelingWidget.load_file` does"""
+        image = QImage.fromData(image_data)
+        self.assertFalse(image.isNull())
+        return DecodedFrame(image, path, image_data)
+
+    def test_orientation_matches_canvas(self):
+        # Rotate 90 degrees clockwise to display, i.e. a portrait photo
+        image_data = encode(
+            PIL.Image.fromarray(self.pixels), "JPEG", orientation=6
+        )
+        path = osp.join(self.temp_dir, "portrait.jpg")
+        with open(path, "wb") as f:
+            f.write(image_data)
+        frame = self.load(image_data, path)
+        self.assertEqual(frame.orientation, 6)
+
+        # What the canvas paints
+        pixmap = QPixmap.fromImage(frame.qimage)
+        displayed = qimage2ndarray.rgb_view(pixmap.toImage())
+        self.assertEqual(frame.rgb.shape, displayed.shape)
+        np.testing.assert_array_equal(frame.rgb, displayed)
+        # The model reads the same pixels, from memory
+        rgb = qt_img_to_rgb_cv_img(frame, path)
+        self.assertIs(rgb, frame.rgb)
+        self.assertIs(qt_img_to_rgb_cv_img(frame), rgb)
+        self.assertEqual(frame.to_pil().size, (frame.width(), frame.height()))
+
+    def test_zero_copy(self):
+        frame = self.load(encode(PIL.Image.fromarray(self.pixels)))
+        self.assertEqual(frame.orientation, 1)
+        np.testing.assert_array_equal(frame.rgb, self.pixels)
+        # A view of the QImage memory, not a copy
+        self.assertFalse(frame.rgb.flags["OWNDATA"])
+        # Shared with the canvas, so models cannot write into it
+        self.assertIs(frame.rgb.flags.writeable, False)
+        with self.assertRaises(ValueError):
+            frame.rgb[0, 0] = 0
+        np.testing.assert_array_equal(frame.to_pil(), self.pixels)
+
+    def test_other_formats(self):
+        gray = self.pixels[..., 0]
+        frame = self.load(encode(PIL.Image.fromarray(gray)))
+        self.assertEqual(frame.qimage.format(), QImage.Format_Grayscale8)
+        np.testing.assert_array_equal(frame.rgb, np.dstack([gray] * 3))
+        self.assertIs(frame.rgb.flags.writeable, False)
+
+        palette = PIL.Image.fromarray(self.pixels).quantize(16)
+        frame = self.load(encode(palette))
+        expected = np.asarray(palette.convert("RGB"))
+        np.testing.assert_array_equal(frame.rgb, expected)
+
+        translucent = PIL.Image.fromarray(self.pixels).convert("RGBA")
+        frame = self.load(encode(translucent))
+        self.assertEqual(frame.to_pil().mode, "RGBA")
+        np.testing.assert_array_equal(frame.rgb, self.pixels)
+
+    def test_other_path_is_decoded(self):
+        other = self.pixels[::-1].copy()
+        path = osp.join(self.temp_dir, "other.png")
+        PIL.Image.fromarray(other).save(path)
+        frame = self.load(encode(PIL.Image.fromarray(self.pixels)), "a.png")
+        np.testing.assert_array_equal(qt_img_to_rgb_cv_img(frame, path), other)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,199 @@
+import importlib.util
+import json
+import os.path as osp
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+from anylabeling.views.labeling.label_converter import LabelConverter
+from anylabeling.views.labeling.shape import Shape
+from anylabeling.views.labeling.utils.rle import (
+    counts_from_string,
+    counts_to_string,
+    decode_mask,
+    encode_mask,
+    rle_area,
+    rle_to_bbox,
+    translate_rle,
+)
+
+app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+def make_ring(height=40, width=60):
+    """A square ring, i.e. a mask with a hole"""
+    mask = np.zeros((height, width), dtype=bool)
+    mask[10:30, 20:40] = True
+    mask[15:25, 25:35] = False
+    return mask
+
+
+class TestRLE(unittest.TestCase):
+
+    def test_coco_string(self):
+        mask = np.zeros((4, 4), dtype=bool)
+        mask[1:3, 1:3] = True
+        rle = encode_mask(mask)
+        # Same as pycocotools.mask.encode
+        self.assertEqual(rle, {"size": [4, 4], "counts": "52203"})
+
+        counts = [0, 100000, 3, 1, 70000, 2]
+        self.assertEqual(counts_from_string(counts_to_string(counts)), counts)
+
+    def test_round_trip(self):
+        rng = np.random.default_rng(0)
+        for _ in range(50):
+            height, width = rng.integers(1, 30, size=2)
+            mask = rng.random((height, width)) < rng.random()
+            rle = encode_mask(mask)
+            np.testing.assert_array_equal(decode_mask(rle), mask)
+            self.assertEqual(rle_area(rle), mask.sum())
+            ys, xs = np.nonzero(mask)
+            bbox = [0, 0, 0, 0]
+            if len(xs):
+                bbox = [
+                    xs.min(),
+                    ys.min(),
+                    xs.max() - xs.min() + 1,
+                    ys.max() - ys.min() + 1,
+                ]
+            self.assertEqual(rle_to_bbox(rle), [int(v) for v in bbox])
+        uncompressed = {"size": [2, 2], "counts": [1, 2, 1]}
+        np.testing.assert_array_equal(
+            decode_mask(uncompressed), [[False, True], [True, False]]
+        )
+
+    def test_translate(self):
+        mask = make_ring()
+        shifted = decode_mask(translate_rle(encode_mask(mask), 25, -12))
+        expected = np.zeros_like(mask)
+        expected[:18, 45:] = mask[12:30, 20:35]
+        np.testing.assert_array_equal(shifted, expected)
+
+
+class TestMaskShape(unittest.TestCase):
+
+    def setUp(self):
+        self.shape = Shape(label="ring", shape_type="mask")
+        self.shape.set_mask(make_ring())
+
+    def test_box_and_hit_test(self):
+        self.assertEqual(
+            self.shape.points_to_list(),
+            [[20, 10], [40, 10], [40, 30], [20, 30]],
+        )
+        self.assertTrue(self.shape.contains_point(QtCore.QPointF(21.5, 11)))
+        # The hole is not part of the shape
+        self.assertFalse(self.shape.contains_point(QtCore.QPointF(30, 20)))
+        self.assertFalse(self.shape.contains_point(QtCore.QPointF(45, 20)))
+        self.assertIsNone(self.shape.nearest_vertex(QtCore.QPointF(20, 10), 5))
+
+    def test_serialization(self):
+        data = json.loads(json.dumps(self.shape.to_dict()))
+        shape = Shape().load_from_dict(data)
+        self.assertEqual(shape.shape_type, "mask")
+        np.testing.assert_array_equal(decode_mask(shape.mask), make_ring())
+        self.assertTrue(shape.contains_point(QtCore.QPointF(21, 11)))
+
+    def test_move(self):
+        self.shape.move_by(QtCore.QPointF(4.6, -2.2))
+        # Hit-testing follows the box while it is dragged
+        self.assertTrue(self.shape.contains_point(QtCore.QPointF(25.5, 9)))
+        copy = self.shape.copy()
+        np.testing.assert_array_equal(
+            decode_mask(copy.mask_rle()), np.roll(make_ring(), (-2, 5), (0, 1))
+        )
+        self.assertEqual(copy.points_to_list()[0], [25, 8])
+
+    def test_paint(self):
+        self.shape.fill_color = QtGui.QColor(255, 0, 0, 255)
+        image = QtGui.QImage(60, 40, QtGui.QImage.Format_ARGB32)
+        image.fill(QtCore.Qt.black)
+        painter = QtGui.QPainter(image)
+        self.shape.paint(painter)
+        painter.end()
+        self.assertEqual(image.pixelColor(21, 11), QtGui.QColor(255, 0, 0))
+        self.assertEqual(image.pixelColor(30, 20), QtGui.QColor(0, 0, 0))
+
+
+class TestMaskExport(unittest.TestCase):
+
+    def test_coco_and_mask(self):
+        mask = make_ring()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            shape = Shape(label="ring", shape_type="mask")
+            shape.set_mask(mask)
+            label_file = osp.join(temp_dir, "image.json")
+            with open(label_file, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "shapes": [shape.to_dict()],
+                        "imagePath": "image.jpg",
+                        "imageHeight": 40,
+                        "imageWidth": 60,
+                    },
+                    f,
+                )
+
+            converter = LabelConverter()
+            converter.classes = ["ring"]
+            converter.custom_to_coco(
+                [osp.join(temp_dir, "image.jpg")],
+                temp_dir,
+                temp_dir,
+                "polygon",
+            )
+            with open(
+                osp.join(temp_dir, "coco_instance_segmentation.json")
+            ) as f:
+                annotation = json.load(f)["annotations"][0]
+            self.assertEqual(annotation["segmentation"], shape.mask)
+            self.assertEqual(annotation["area"], int(mask.sum()))
+            self.assertEqual(annotation["bbox"], [20, 10, 20, 20])
+
+            output_file = osp.join(temp_dir, "image.png")
+            converter.custom_to_mask(
+                label_file,
+                output_file,
+                {"type": "grayscale", "colors": {"ring": 7}},
+            )
+            exported = QtGui.QImage(output_file)
+            self.assertEqual(exported.pixelColor(21, 11).red(), 7)
+            self.assertEqual(exported.pixelColor(30, 20).red(), 0)
+
+
+class TestMaskOutputMode(unittest.TestCase):
+
+    MODELS = [
+        ("segment_anything", "SegmentAnything"),
+        ("segment_anything_2", "SegmentAnything2"),
+        ("grounding_sam", "GroundingSAM"),
+    ]
+
+    def test_empty_mask_gives_no_shape(self):
+        model = SimpleNamespace(output_mode="mask")
+        for module_name, class_name in self.MODELS:
+            with self.subTest(class_name):
+                if module_name == "grounding_sam" and not (
+                    importlib.util.find_spec("tokenizers")
+                ):
+                    self.skipTest("tokenizers is not installed")
+                module = importlib.import_module(
+                    f"anylabeling.services.auto_labeling.{module_name}"
+                )
+                post_process = getattr(module, class_name).post_process
+                empty = np.zeros((40, 60), dtype=np.float32)
+                self.assertEqual(post_process(model, empty.copy()), [])
+                if module_name == "grounding_sam":
+                    self.assertIsNone(post_process(model, empty, label="a"))
+
+                ring = make_ring().astype(np.float32)
+                (shape,) = post_process(model, ring)
+                self.assertEqual(shape.shape_type, "mask")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,180 @@
+import json
+import os
+import os.path as osp
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from PIL import Image
+
+from anylabeling.views.labeling.vqa import utils
+from anylabeling.views.labeling.vqa.config import BATCH_CHECKPOINT_FILENAME
+
+
+class EchoHandler(BaseHTTPRequestHandler):
+    """Chat endpoint answering with the text of the prompt, the first
+    request is rate limited"""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        server = self.server
+        with server.lock:
+            server.requests.append(body)
+            rate_limited = len(server.requests) <= server.num_rate_limited
+
+        if rate_limited:
+            payload = {"error": {"message": "Too many requests"}}
+            self.send_response(429)
+            self.send_header("Retry-After", server.retry_after)
+        else:
+            content = body["messages"][-1]["content"]
+            if isinstance(content, list):
+                content = content[-1]["text"]
+            payload = {"choices": [{"message": {"content": content}}]}
+            self.send_response(200)
+        data = json.dumps(payload).encode()
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestVQABatchWorker(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), EchoHandler)
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.server.num_rate_limited = 1
+        self.server.retry_after = "0"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.image_files = []
+        for i in range(4):
+            image_file = osp.join(self.temp_dir.name, f"{i}.jpg")
+            Image.new("RGB", (64, 32)).save(image_file)
+            self.image_files.append(image_file)
+
+        models_config = osp.join(self.temp_dir.name, "models.json")
+        providers_config = osp.join(self.temp_dir.name, "providers.json")
+        with open(models_config, "w") as f:
+            json.dump(
+                {"settings": {"provider": "stub", "model_id": "stub"}}, f
+            )
+        with open(providers_config, "w") as f:
+            api_address = f"http://127.0.0.1:{self.server.server_port}/v1"
+            json.dump(
+                {"stub": {"api_address": api_address, "api_key": "sk"}}, f
+            )
+        self.patches = [
+            mock.patch.object(utils, "MODELS_CONFIG_PATH", models_config),
+            mock.patch.object(
+                utils, "PROVIDERS_CONFIG_PATH", providers_config
+            ),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        self.server.shutdown()
+        self.server.server_close()
+        self.temp_dir.cleanup()
+
+    def read_answer(self, image_file):
+        with open(osp.splitext(image_file)[0] + ".json") as f:
+            return json.load(f)["vqaData"]["caption"]
+
+    def test_answers_written_to_component(self):
+        label_file = osp.splitext(self.image_files[0])[0] + ".json"
+        with open(label_file, "w") as f:
+            json.dump({"shapes": [], "vqaData": {"caption": "a dog"}}, f)
+
+        worker = utils.VQABatchWorker(
+            self.image_files, "caption", "@image Fix: @text", concurrency=3
+        )
+        worker.run()
+
+        self.assertEqual(worker.failed, {})
+        self.assertEqual(len(self.server.requests), len(self.image_files) + 1)
+        self.assertEqual(
+            self.read_answer(self.image_files[0]), "<image> Fix: a dog"
+        )
+        self.assertEqual(
+            self.read_answer(self.image_files[1]), "<image> Fix: @text"
+        )
+        checkpoint = osp.join(self.temp_dir.name, BATCH_CHECKPOINT_FILENAME)
+        self.assertFalse(osp.exists(checkpoint))
+
+    def test_resume_from_checkpoint(self):
+        self.server.num_rate_limited = 0
+        checkpoint = osp.join(self.temp_dir.name, BATCH_CHECKPOINT_FILENAME)
+        with open(checkpoint, "w") as f:
+            f.write(json.dumps({"component": "caption", "prompt": "Hi"}))
+            f.write("\n" + json.dumps({"image": "0.jpg"}))
+            f.write("\n" + json.dumps({"image": "1.jpg"}))
+            f.write('\n{"ima')  # interrupted write
+
+        worker = utils.VQABatchWorker(self.image_files, "caption", "Hi")
+        worker.run()
+
+        self.assertEqual(worker.num_skipped, 2)
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertFalse(osp.exists(self.image_files[0][:-4] + ".json"))
+        self.assertEqual(self.read_answer(self.image_files[3]), "Hi")
+        self.assertFalse(osp.exists(checkpoint))
+
+    def test_checkpoint_of_other_prompt_is_ignored(self):
+        self.server.num_rate_limited = 0
+        checkpoint = osp.join(self.temp_dir.name, BATCH_CHECKPOINT_FILENAME)
+        with open(checkpoint, "w") as f:
+            f.write(json.dumps({"component": "caption", "prompt": "Old"}))
+            f.write("\n" + json.dumps({"image": "0.jpg"}))
+
+        worker = utils.VQABatchWorker(self.image_files, "caption", "New")
+        worker.run()
+
+        self.assertEqual(worker.num_skipped, 0)
+        self.assertEqual(len(self.server.requests), len(self.image_files))
+
+    def test_cancel_during_backoff(self):
+        self.server.num_rate_limited = len(self.image_files)
+        self.server.retry_after = "30"
+        worker = utils.VQABatchWorker(
+            self.image_files, "caption", "Hi", concurrency=4
+        )
+        thread = threading.Thread(target=worker.run)
+        thread.start()
+        while len(self.server.requests) < len(self.image_files):
+            thread.join(0.01)
+        worker.cancel()
+        # Waiting for the retry ends with the cancel, not after 30 s
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(len(worker.failed), len(self.image_files))
+        self.assertEqual(len(self.server.requests), len(self.image_files))
+
+    def test_config_is_cached_until_modified(self):
+        first = utils.load_json_config(utils.MODELS_CONFIG_PATH)
+        self.assertIs(utils.load_json_config(utils.MODELS_CONFIG_PATH), first)
+
+        with open(utils.MODELS_CONFIG_PATH, "w") as f:
+            json.dump({"settings": {"provider": "other"}}, f)
+        stat = os.stat(utils.MODELS_CONFIG_PATH)
+        os.utime(
+            utils.MODELS_CONFIG_PATH,
+            ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000),
+        )
+        config = utils.load_json_config(utils.MODELS_CONFIG_PATH)
+        self.assertEqual(config["settings"]["provider"], "other")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+
+from PyQt5 import QtWidgets
+
+from anylabeling.views.labeling.shape import Shape
+from anylabeling.views.labeling.widgets.label_list_widget import (
+    LabelListWidget,
+    LabelListWidgetItem,
+)
+from anylabeling.views.labeling.widgets.unique_label_qlist_widget import (
+    UniqueLabelQListWidget,
+)
+
+app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+class TestLabelListWidget(unittest.TestCase):
+
+    def setUp(self):
+        self.widget = LabelListWidget()
+        self.shapes = [Shape(label=f"label_{i % 3}") for i in range(10)]
+        self.widget.add_items(
+            [LabelListWidgetItem(s.label, s) for s in self.shapes]
+        )
+        self.dropped = []
+        self.widget.item_dropped.connect(lambda: self.dropped.append(True))
+
+    def test_find_item_by_shape(self):
+        for shape in self.shapes:
+            self.assertIs(self.widget.find_item_by_shape(shape).shape(), shape)
+        self.assertIsNone(self.widget.find_item_by_shape(Shape()))
+
+        shape = Shape(label="new")
+        self.widget.add_iem(LabelListWidgetItem("new", shape))
+        self.assertIs(self.widget.find_item_by_shape(shape).shape(), shape)
+
+    def test_remove_items(self):
+        removed = self.shapes[:2] + self.shapes[5:7] + self.shapes[9:]
+        self.widget.remove_items(
+            [self.widget.find_item_by_shape(s) for s in removed]
+        )
+        self.assertEqual(self.dropped, [True])
+        remaining = [item.shape() for item in self.widget]
+        self.assertEqual(
+            remaining, [s for s in self.shapes if s not in removed]
+        )
+        for shape in removed:
+            self.assertIsNone(self.widget.find_item_by_shape(shape))
+
+        self.widget.clear()
+        self.assertIsNone(self.widget.find_item_by_shape(self.shapes[3]))
+
+
+class TestUniqueLabelQListWidget(unittest.TestCase):
+
+    def test_find_items_by_label(self):
+        widget = UniqueLabelQListWidget()
+        for label in ["cat", "dog"]:
+            widget.addItem(widget.create_item_from_label(label))
+        self.assertEqual(len(widget.find_items_by_label("cat")), 1)
+        self.assertEqual(widget.find_items_by_label("bird"), [])
+
+        widget.addItem(widget.create_item_from_label("bird"))
+        self.assertEqual(len(widget.find_items_by_label("bird")), 1)
+        widget.remove_items_by_label("cat")
+        self.assertEqual(widget.find_items_by_label("cat"), [])
+        self.assertEqual(len(widget.find_items_by_label("dog")), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
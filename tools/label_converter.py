@@ -2,13 +2,18 @@ import argparse
 import json
 import os
 import os.path as osp
+import re
+import shutil
+import tempfile
 import cv2
 import time
 import math
 
 from PIL import Image, ImageDraw
 from tqdm import tqdm
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date
+from itertools import groupby, repeat
 
 import numpy as np
 import xml.dom.minidom as minidom
@@ -22,6 +27,11 @@ from anylabeling.app_info import __version__  # noqa: E402
 VERSION = __version__
 
 
+CHUNK_SIZE = 64
+_WHITESPACE = re.compile(r"\s*")
+_DELIMITERS = (",", ":", "]", "}", " ", "\t", "\r", "\n")
+
+
 class JsonEncoder(json.JSONEncoder):
     def default(self, obj):
         if isinstance(obj, (np.integer, np.floating, np.bool_)):
@@ -32,6 +42,212 @@ class JsonEncoder(json.JSONEncoder):
             return super(JsonEncoder, self).default(obj)
 
 
+class ConversionSummary:
+    """Counts the converted and failed files of a run."""
+
+    def __init__(self):
+        self.start_time = time.time()
+        self.converted = 0
+        self.failed = []
+
+    def record(self, file_name, error=None):
+        if error is None:
+            self.converted += 1
+        else:
+            self.failed.append((file_name, error))
+
+    def report(self, max_failures=20):
+        elapsed = time.time() - self.start_time
+        rate = self.converted / elapsed if elapsed > 0 else 0.0
+        print(
+            f"Converted {self.converted} files, {len(self.failed)} failed, "
+            f"in {elapsed:.2f} seconds ({rate:.1f} files/s)"
+        )
+        for file_name, error in self.failed[:max_failures]:
+            print(f"  Failed: {file_name}: {error}")
+        if len(self.failed) > max_failures:
+            print(f"  ... and {len(self.failed) - max_failures} more")
+
+
+def convert_chunk(converter, method, jobs):
+    """Call a converter method for each job, catching per-job errors."""
+    results = []
+    for job in jobs:
+        try:
+            result = getattr(converter, method)(*job)
+            results.append((job, result, None))
+        except Exception as e:
+            results.append((job, None, f"{type(e).__name__}: {e}"))
+    return results
+
+
+def map_jobs(converter, method, jobs, workers=None, chunk_size=None):
+    """
+    Run a converter method over many files, in worker processes.
+
+    Jobs are sent to the workers in chunks of `chunk_size`; the results
+    are yielded in the order of the jobs as (job, result, error), where
+    error is None or the message of the exception the job raised.
+    """
+    chunk_size = max(1, chunk_size or CHUNK_SIZE)
+    chunks = [
+        jobs[i : i + chunk_size] for i in range(0, len(jobs), chunk_size)
+    ]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(chunks))
+    if workers <= 1:
+        for chunk in chunks:
+            yield from convert_chunk(converter, method, chunk)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for results in executor.map(
+            convert_chunk, repeat(converter), repeat(method), chunks
+        ):
+            yield from results
+
+
+def iter_json_array(input_file, key, buffer_size=1 << 20):
+    """
+    Yield the items of a top-level array of a JSON file one by one.
+
+    Only one item of the array is held in memory at a time; the other
+    top-level values are parsed and skipped.
+    """
+    decoder = json.JSONDecoder()
+    with open(input_file, "r", encoding="utf-8") as f:
+        buf, pos = "", 0
+
+        def read_more():
+            # Read at least as much as is pending, so that a large value
+            # is parsed a bounded number of times
+            nonlocal buf, pos
+            chunk = f.read(max(buffer_size, len(buf) - pos))
+            buf, pos = buf[pos:] + chunk, 0
+            return bool(chunk)
+
+        def peek():
+            nonlocal pos
+            while True:
+                pos = _WHITESPACE.match(buf, pos).end()
+                if pos < len(buf):
+                    return buf[pos]
+                if not read_more():
+                    raise ValueError(f"Unexpected end of {input_file}")
+
+        def decode():
+            nonlocal pos
+            peek()
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if read_more():
+                        continue
+                    raise
+                # A number may continue in the next chunk
+                if buf[end : end + 1] not in _DELIMITERS and read_more():
+                    continue
+                pos = end
+                return value
+
+        def expect(chars):
+            nonlocal pos
+            char = peek()
+            if char not in chars:
+                raise ValueError(f"Invalid JSON in {input_file} at {char!r}")
+            pos += 1
+            return char
+
+        expect("{")
+        while peek() != "}":
+            name = decode()
+            expect(":")
+            if name == key and peek() == "[":
+                expect("[")
+                if peek() == "]":
+                    expect("]")
+                else:
+                    while True:
+                        yield decode()
+                        if expect(",]") == "]":
+                            break
+            else:
+                decode()
+            if peek() == ",":
+                expect(",")
+
+
+def load_coco_arrays(input_file, keys, stream=False):
+    """
+    Get the top-level arrays of a COCO file.
+
+    Args:
+        input_file (str): The COCO file.
+        keys (list): Names of the arrays.
+        stream (bool): If True, the arrays are iterators that read the
+            file item by item, instead of the whole file being loaded.
+
+    Returns:
+        dict: Array or iterator of each key.
+    """
+    if stream:
+        return {key: iter_json_array(input_file, key) for key in keys}
+    with open(input_file, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return {key: data[key] for key in keys}
+
+
+class CocoStreamWriter:
+    """
+    Write a COCO file image by image.
+
+    Images are written as they come; annotations are spooled to a
+    temporary file and appended when the writer is closed.
+    """
+
+    def __init__(self, output_file, coco_data):
+        self.file = open(output_file, "w", encoding="utf-8")
+        self.spool = tempfile.TemporaryFile("w+", encoding="utf-8")
+        self.num_images = 0
+        self.num_annotations = 0
+        self.file.write("{\n")
+        for key, value in coco_data.items():
+            if key in ("images", "annotations"):
+                continue
+            self.file.write(f"    {json.dumps(key)}: {self.dumps(value)},\n")
+        self.file.write('    "images": [')
+
+    @staticmethod
+    def dumps(value):
+        return json.dumps(value, ensure_ascii=False, cls=JsonEncoder)
+
+    def add_image(self, image):
+        separator = "," if self.num_images else ""
+        self.file.write(f"{separator}\n        {self.dumps(image)}")
+        self.num_images += 1
+
+    def add_annotation(self, annotation):
+        separator = "," if self.num_annotations else ""
+        self.spool.write(f"{separator}\n        {self.dumps(annotation)}")
+        self.num_annotations += 1
+
+    def close(self):
+        self.file.write('\n    ],\n    "annotations": [')
+        self.spool.seek(0)
+        shutil.copyfileobj(self.spool, self.file)
+        self.file.write("\n    ]\n}\n")
+        self.spool.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+
 class BaseLabelConverter:
     def __init__(self, classes_file=None):
         if classes_file:
@@ -602,70 +818,105 @@ class PolyLabelConvert(BaseLabelConverter):
         with open(output_file, "w", encoding="utf-8") as f:
             json.dump(self.custom_data, f, indent=2, ensure_ascii=False)
 
-    def coco_to_custom(self, input_file, image_path, output_path):
+    def save_custom_file(self, image_info, shapes, output_path, append=False):
+        output_file = osp.join(
+            output_path, osp.splitext(image_info["imagePath"])[0] + ".json"
+        )
+        self.reset()
+        if append:
+            with open(output_file, "r", encoding="utf-8") as f:
+                self.custom_data = json.load(f)
+        self.custom_data["shapes"].extend(shapes)
+        self.custom_data["imagePath"] = image_info["imagePath"]
+        self.custom_data["imageHeight"] = image_info["imageHeight"]
+        self.custom_data["imageWidth"] = image_info["imageWidth"]
+
+        with open(output_file, "w", encoding="utf-8") as f:
+            json.dump(self.custom_data, f, indent=2, ensure_ascii=False)
+        return output_file
+
+    def coco_to_custom(
+        self, input_file, image_path, output_path, stream=False, summary=None
+    ):
         img_dic = {}
         for file in os.listdir(image_path):
             img_dic[file] = file
 
-        with open(input_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = load_coco_arrays(
+            input_file, ["categories", "images", "annotations"], stream
+        )
 
         if not self.classes:
             for cat in data["categories"]:
                 self.classes.append(cat["name"])
 
-        total_info, label_info = {}, {}
-
-        # map category_id to name
-        for dic_info in data["categories"]:
-            label_info[dic_info["id"]] = dic_info["name"]
-
         # map image_id to info
+        total_info = {}
         for dic_info in data["images"]:
             total_info[dic_info["id"]] = {
                 "imageWidth": dic_info["width"],
                 "imageHeight": dic_info["height"],
                 "imagePath": img_dic[dic_info["file_name"]],
-                "shapes": [],
             }
 
-        for dic_info in data["annotations"]:
-            points = []
-            segmentation = dic_info["segmentation"][0]
-            for i in range(0, len(segmentation), 2):
-                x, y = segmentation[i : i + 2]
-                point = [float(x), float(y)]
-                points.append(point)
-            difficult = str(dic_info.get("ignore", "0"))
-            shape_info = {
-                "label": self.classes[dic_info["category_id"] - 1],
-                "description": None,
-                "points": points,
-                "group_id": None,
-                "difficult": bool(int(difficult)),
-                "shape_type": "polygon",
-                "flags": {},
-            }
-
-            total_info[dic_info["image_id"]]["shapes"].append(shape_info)
+        if stream:
+            # Annotations of an image are usually consecutive, so each file
+            # is written once; annotations that come later are added to it
+            groups = groupby(
+                data["annotations"], key=lambda x: x["image_id"]
+            )
+        else:
+            # All annotations are in memory, group them by image so that
+            # each file is written once whatever their order
+            image_annotations = {}
+            for dic_info in data["annotations"]:
+                image_annotations.setdefault(dic_info["image_id"], []).append(
+                    dic_info
+                )
+            groups = image_annotations.items()
 
-        for dic_info in tqdm(
-            total_info.values(),
+        written = set()
+        for image_id, annotations in tqdm(
+            groups,
             desc="Converting files",
             unit="file",
             colour="green",
         ):
-            self.reset()
-            self.custom_data["shapes"] = dic_info["shapes"]
-            self.custom_data["imagePath"] = dic_info["imagePath"]
-            self.custom_data["imageHeight"] = dic_info["imageHeight"]
-            self.custom_data["imageWidth"] = dic_info["imageWidth"]
+            shapes = []
+            for dic_info in annotations:
+                points = []
+                segmentation = dic_info["segmentation"][0]
+                for i in range(0, len(segmentation), 2):
+                    x, y = segmentation[i : i + 2]
+                    point = [float(x), float(y)]
+                    points.append(point)
+                difficult = str(dic_info.get("ignore", "0"))
+                shape_info = {
+                    "label": self.classes[dic_info["category_id"] - 1],
+                    "description": None,
+                    "points": points,
+                    "group_id": None,
+                    "difficult": bool(int(difficult)),
+                    "shape_type": "polygon",
+                    "flags": {},
+                }
+                shapes.append(shape_info)
 
-            output_file = osp.join(
-                output_path, osp.splitext(dic_info["imagePath"])[0] + ".json"
+            output_file = self.save_custom_file(
+                total_info[image_id], shapes, output_path, image_id in written
             )
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump(self.custom_data, f, indent=2, ensure_ascii=False)
+            if image_id not in written:
+                written.add(image_id)
+                if summary is not None:
+                    summary.record(output_file)
+
+        # Images without annotations get a file without shapes
+        for image_id, image_info in total_info.items():
+            if image_id in written:
+                continue
+            output_file = self.save_custom_file(image_info, [], output_path)
+            if summary is not None:
+                summary.record(output_file)
 
 
 class RotateLabelConverter(BaseLabelConverter):
@@ -721,7 +972,57 @@ class RotateLabelConverter(BaseLabelConverter):
         with open(output_file, "w", encoding="utf-8") as f:
             json.dump(self.custom_data, f, indent=2, ensure_ascii=False)
 
-    def dota_to_dcoco(self, input_path, output_path, image_path):
+    def read_dota_image(self, input_path, image_path, image_file):
+        """Read the size and the labels of an image for `dota_to_dcoco`."""
+        label_file = osp.join(input_path, osp.splitext(image_file)[0] + ".txt")
+
+        image_width, image_height = self.get_image_size(
+            osp.join(image_path, image_file)
+        )
+        image_info = {
+            "file_name": image_file,
+            "width": image_width,
+            "height": image_height,
+            "license": 0,
+            "flickr_url": "",
+            "coco_url": "",
+            "date_captured": "",
+        }
+
+        with open(label_file, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+
+        annotations = []
+        for line in lines:
+            line = line.strip().split(" ")
+            *poly, label, difficult = line
+            poly = list(map(float, poly))
+            area = self.get_poly_area(poly)
+            rect = self.get_minimal_enclosing_rectangle(poly)
+            class_id = self.classes.index(label)
+            annotations.append(
+                {
+                    "category_id": class_id + 1,
+                    "bbox": rect,
+                    "segmentation": [poly],
+                    "area": area,
+                    "iscrowd": 0,
+                    "ignore": difficult,
+                }
+            )
+
+        return image_info, annotations
+
+    def dota_to_dcoco(
+        self,
+        input_path,
+        output_path,
+        image_path,
+        workers=1,
+        chunk_size=None,
+        stream=False,
+        summary=None,
+    ):
         self.ensure_output_path(output_path, "json")
         coco_data = self.get_coco_data()
 
@@ -730,70 +1031,66 @@ class RotateLabelConverter(BaseLabelConverter):
                 {"id": i + 1, "name": class_name, "supercategory": ""}
             )
 
+        if osp.isdir(output_path):
+            output_path = osp.join(output_path, "x_anylabeling_coco.json")
+
+        writer = CocoStreamWriter(output_path, coco_data) if stream else None
         image_id = 0
         annotation_id = 0
 
-        file_list = os.listdir(image_path)
-        for image_file in tqdm(
-            file_list, desc="Converting files", unit="file", colour="green"
+        # Read the images and their labels in worker processes
+        jobs = [(input_path, image_path, f) for f in os.listdir(image_path)]
+        results = map_jobs(self, "read_dota_image", jobs, workers, chunk_size)
+        for job, result, error in tqdm(
+            results,
+            total=len(jobs),
+            desc="Converting files",
+            unit="file",
+            colour="green",
         ):
-            label_file = osp.join(
-                input_path, osp.splitext(image_file)[0] + ".txt"
-            )
-
-            image_width, image_height = self.get_image_size(
-                osp.join(image_path, image_file)
-            )
+            image_file = osp.join(image_path, job[2])
+            if error is not None:
+                if summary is None:
+                    raise RuntimeError(f"{image_file}: {error}")
+                summary.record(image_file, error)
+                continue
+            if summary is not None:
+                summary.record(image_file)
 
+            image_info, annotations = result
             image_id += 1
+            image_info = {"id": image_id, **image_info}
+            if writer is not None:
+                writer.add_image(image_info)
+            else:
+                coco_data["images"].append(image_info)
 
-            coco_data["images"].append(
-                {
-                    "id": image_id,
-                    "file_name": image_file,
-                    "width": image_width,
-                    "height": image_height,
-                    "license": 0,
-                    "flickr_url": "",
-                    "coco_url": "",
-                    "date_captured": "",
-                }
-            )
-
-            with open(label_file, "r", encoding="utf-8") as f:
-                lines = f.readlines()
-
-            for line in lines:
-                line = line.strip().split(" ")
-                *poly, label, difficult = line
-                poly = list(map(float, poly))
-                area = self.get_poly_area(poly)
-                rect = self.get_minimal_enclosing_rectangle(poly)
+            for annotation in annotations:
                 annotation_id += 1
-                class_id = self.classes.index(label)
                 annotation = {
                     "id": annotation_id,
                     "image_id": image_id,
-                    "category_id": class_id + 1,
-                    "bbox": rect,
-                    "segmentation": [poly],
-                    "area": area,
-                    "iscrowd": 0,
-                    "ignore": difficult,
+                    **annotation,
                 }
+                if writer is not None:
+                    writer.add_annotation(annotation)
+                else:
+                    coco_data["annotations"].append(annotation)
 
-                coco_data["annotations"].append(annotation)
-
-        if osp.isdir(output_path):
-            output_path = osp.join(output_path, "x_anylabeling_coco.json")
+        if writer is not None:
+            writer.close()
+            return
 
         with open(output_path, "w", encoding="utf-8") as f:
             json.dump(coco_data, f, indent=4, ensure_ascii=False)
 
-    def dcoco_to_dota(self, input_file, output_path):
+    def dcoco_to_dota(
+        self, input_file, output_path, stream=False, summary=None
+    ):
         self.ensure_output_path(output_path)
-        with open(input_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = load_coco_arrays(
+            input_file, ["categories", "images", "annotations"], stream
+        )
 
         label_info = {}
         # map category_id to label
@@ -805,27 +1102,28 @@ class RotateLabelConverter(BaseLabelConverter):
         for dic_info in data["images"]:
             name_info[dic_info["id"]] = dic_info["file_name"]
 
-        total_info = {}
-        for dic_info in data["annotations"]:
-            poly = dic_info["segmentation"][0]
-            image_id = dic_info["image_id"]
-            category_id = dic_info["category_id"]
-            label = label_info[category_id]
-            difficult = dic_info.get("ignore", 0)
-            if image_id not in total_info:
-                total_info[image_id] = [[*poly, label, difficult]]
-            else:
-                total_info[image_id].append([*poly, label, difficult])
-
-        for image_id, label_info in total_info.items():
+        # Annotations of an image are usually consecutive, so each file is
+        # written once; annotations that come later are appended to it
+        written = set()
+        for image_id, annotations in groupby(
+            data["annotations"], key=lambda x: x["image_id"]
+        ):
             label_file = osp.basename(name_info[image_id]) + ".txt"
             output_file = osp.join(output_path, label_file)
-            with open(output_file, "w", encoding="utf-8") as f:
-                for info in label_info:
-                    x0, y0, x1, y1, x2, y2, x3, y3, label, difficult = info
+            mode = "a" if image_id in written else "w"
+            with open(output_file, mode, encoding="utf-8") as f:
+                for dic_info in annotations:
+                    poly = dic_info["segmentation"][0]
+                    x0, y0, x1, y1, x2, y2, x3, y3 = poly
+                    label = label_info[dic_info["category_id"]]
+                    difficult = dic_info.get("ignore", 0)
                     f.write(
                         f"{x0} {y0} {x1} {y1} {x2} {y2} {x3} {y3} {label} {int(difficult)}\n"
                     )
+            if image_id not in written:
+                written.add(image_id)
+                if summary is not None:
+                    summary.record(output_file)
 
     def dxml_to_dota(self, input_file, output_file):
         tree = ET.parse(input_file)
@@ -987,10 +1285,31 @@ def main():  # noqa: C901
             "custom_to_gt",
         ],
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of conversion processes, all CPUs by default; \
+                            0 or 1 converts in this process",
+    )
+    parser.add_argument(
+        "--chunk_size",
+        type=int,
+        default=CHUNK_SIZE,
+        help="Number of files handed to a process at a time",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Read or write COCO files item by item to bound memory use \
+                            (polygon coco2custom, dota2dcoco and dcoco2dota; \
+                            custom2coco and rectangle coco2custom are \
+                            deprecated in favor of the GUI and do not stream)",
+    )
     args = parser.parse_args()
 
     print(f"Starting conversion to {args.mode} format of {args.task}...")
-    start_time = time.time()
+    summary = ConversionSummary()
 
     if args.task == "rectangle":
         converter = RectLabelConverter(args.classes)
@@ -1037,117 +1356,101 @@ def main():  # noqa: C901
             args.mode in valid_modes
         ), f"MOTS tasks are only supported in {valid_modes} now!"
 
-    if args.mode == "custom2voc":
-        file_list = os.listdir(args.src_path)
-        os.makedirs(args.dst_path, exist_ok=True)
-        for file_name in tqdm(
-            file_list, desc="Converting files", unit="file", colour="green"
-        ):
-            if not file_name.endswith(".json"):
-                continue
-            src_file = osp.join(args.src_path, file_name)
-            dst_file = osp.join(
-                args.dst_path, osp.splitext(file_name)[0] + ".xml"
-            )
-            converter.custom_to_voc2017(src_file, dst_file)
-    elif args.mode == "voc2custom":
-        file_list = os.listdir(args.src_path)
-        os.makedirs(args.dst_path, exist_ok=True)
-        for file_name in tqdm(
-            file_list, desc="Converting files", unit="file", colour="green"
-        ):
-            src_file = osp.join(args.src_path, file_name)
-            dst_file = osp.join(
-                args.dst_path, osp.splitext(file_name)[0] + ".json"
-            )
-            converter.voc2017_to_custom(src_file, dst_file)
-    elif args.mode == "custom2yolo":
-        file_list = os.listdir(args.src_path)
+    # Modes converting each file on its own:
+    # (converter method, input extension, output extension, needs image)
+    file_modes = {
+        "custom2voc": ("custom_to_voc2017", ".json", ".xml", False),
+        "voc2custom": ("voc2017_to_custom", None, ".json", False),
+        "custom2yolo": ("custom_to_yolov5", ".json", ".txt", False),
+        "yolo2custom": ("yolov5_to_custom", None, ".json", True),
+        "custom2dota": ("custom_to_dota", ".json", ".txt", False),
+        "dota2custom": ("dota_to_custom", None, ".json", True),
+        "dxml2dota": ("dxml_to_dota", None, ".txt", False),
+    }
+
+    # Modes whose converters record each file in the summary; the others
+    # convert the dataset as a whole and only report completion
+    reports_files = (
+        args.mode in file_modes
+        or args.mode in ("dota2dcoco", "dcoco2dota")
+        or (args.mode == "coco2custom" and args.task == "polygon")
+    )
+
+    if args.mode in file_modes:
+        method, src_ext, dst_ext, needs_image = file_modes[args.mode]
         os.makedirs(args.dst_path, exist_ok=True)
-        for file_name in tqdm(
-            file_list, desc="Converting files", unit="file", colour="green"
-        ):
-            if not file_name.endswith(".json"):
+        img_dic = {}
+        if needs_image:
+            for file in os.listdir(args.img_path):
+                prefix = file.rsplit(".", 1)[0]
+                img_dic[prefix] = file
+
+        jobs = []
+        for file_name in os.listdir(args.src_path):
+            if src_ext and not file_name.endswith(src_ext):
                 continue
+            name = osp.splitext(file_name)[0]
             src_file = osp.join(args.src_path, file_name)
-            dst_file = osp.join(
-                args.dst_path, osp.splitext(file_name)[0] + ".txt"
-            )
-            converter.custom_to_yolov5(src_file, dst_file)
-    elif args.mode == "yolo2custom":
-        img_dic = {}
-        os.makedirs(args.dst_path, exist_ok=True)
-        for file in os.listdir(args.img_path):
-            prefix = file.rsplit(".", 1)[0]
-            img_dic[prefix] = file
-        file_list = os.listdir(args.src_path)
-        for file_name in tqdm(
-            file_list, desc="Converting files", unit="file", colour="green"
+            dst_file = osp.join(args.dst_path, name + dst_ext)
+            if not needs_image:
+                jobs.append((src_file, dst_file))
+            elif name in img_dic:
+                img_file = osp.join(args.img_path, img_dic[name])
+                jobs.append((src_file, dst_file, img_file))
+            else:
+                summary.record(src_file, "No matching image file")
+
+        results = map_jobs(
+            converter, method, jobs, args.workers, args.chunk_size
+        )
+        for job, _, error in tqdm(
+            results,
+            total=len(jobs),
+            desc="Converting files",
+            unit="file",
+            colour="green",
         ):
-            src_file = osp.join(args.src_path, file_name)
-            dst_file = osp.join(
-                args.dst_path, osp.splitext(file_name)[0] + ".json"
-            )
-            img_file = osp.join(
-                args.img_path, img_dic[osp.splitext(file_name)[0]]
-            )
-            converter.yolov5_to_custom(src_file, dst_file, img_file)
+            summary.record(job[0], error)
     elif args.mode == "custom2coco":
         os.makedirs(args.dst_path, exist_ok=True)
         converter.custom_to_coco(args.src_path, args.dst_path)
     elif args.mode == "coco2custom":
         os.makedirs(args.dst_path, exist_ok=True)
-        converter.coco_to_custom(args.src_path, args.img_path, args.dst_path)
-    elif args.mode == "custom2dota":
-        file_list = os.listdir(args.src_path)
-        os.makedirs(args.dst_path, exist_ok=True)
-        for file_name in tqdm(
-            file_list, desc="Converting files", unit="file", colour="green"
-        ):
-            if not file_name.endswith(".json"):
-                continue
-            src_file = osp.join(args.src_path, file_name)
-            dst_file = osp.join(
-                args.dst_path, osp.splitext(file_name)[0] + ".txt"
+        if args.task == "polygon":
+            converter.coco_to_custom(
+                args.src_path,
+                args.img_path,
+                args.dst_path,
+                stream=args.stream,
+                summary=summary,
             )
-            converter.custom_to_dota(src_file, dst_file)
-    elif args.mode == "dota2custom":
-        img_dic = {}
-        for file in os.listdir(args.img_path):
-            prefix = file.rsplit(".", 1)[0]
-            img_dic[prefix] = file
-        file_list = os.listdir(args.src_path)
-        for file_name in tqdm(
-            file_list, desc="Converting files", unit="file", colour="green"
-        ):
-            src_file = osp.join(args.src_path, file_name)
-            dst_file = osp.join(
-                args.dst_path, osp.splitext(file_name)[0] + ".json"
-            )
-            img_file = osp.join(
-                args.img_path, img_dic[osp.splitext(file_name)[0]]
+        else:
+            converter.coco_to_custom(
+                args.src_path, args.img_path, args.dst_path
             )
-            converter.dota_to_custom(src_file, dst_file, img_file)
     elif args.mode == "dota2dcoco":
-        converter.dota_to_dcoco(args.src_path, args.dst_path, args.img_path)
+        converter.dota_to_dcoco(
+            args.src_path,
+            args.dst_path,
+            args.img_path,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            stream=args.stream,
+            summary=summary,
+        )
     elif args.mode == "dcoco2dota":
-        converter.dcoco_to_dota(args.src_path, args.dst_path)
-    elif args.mode == "dxml2dota":
-        file_list = os.listdir(args.src_path)
-        os.makedirs(args.dst_path, exist_ok=True)
-        for file_name in tqdm(
-            file_list, desc="Converting files", unit="file", colour="green"
-        ):
-            src_file = osp.join(args.src_path, file_name)
-            dst_file = osp.join(
-                args.dst_path, osp.splitext(file_name)[0] + ".txt"
-            )
-            converter.dxml_to_dota(src_file, dst_file)
+        converter.dcoco_to_dota(
+            args.src_path, args.dst_path, stream=args.stream, summary=summary
+        )
     elif args.mode == "custom_to_gt":
         converter.custom_to_gt(args.src_path, args.dst_path)
-    end_time = time.time()
+
+    if reports_files:
+        summary.report()
+        if summary.failed:
+            print(f"Conversion finished with errors: {args.dst_path}")
+            sys.exit(1)
     print(f"Conversion completed successfully: {args.dst_path}")
-    print(f"Conversion time: {end_time - start_time:.2f} seconds")
 
 
 if __name__ == "__main__":
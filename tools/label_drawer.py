@@ -4,6 +4,8 @@ import json
 import argparse
 import sys
 import subprocess
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 import cv2
 import natsort
@@ -26,7 +28,51 @@ except ImportError:
         sys.exit(1)
 
 
-def create_video_from_images(image_folder, output_video_path, frame_rate=25):
+VALID_EXTENSIONS = [".jpg", ".jpeg", ".JPG", ".JPEG", ".png", ".PNG"]
+
+
+class VideoSink:
+    """
+    Write frames to a video file in the order they are given.
+
+    The writer is opened with the size of the first frame; frames of
+    another size are resized to it.
+    """
+
+    def __init__(self, output_video_path, frame_rate=25):
+        self.output_video_path = output_video_path
+        self.frame_rate = frame_rate
+        self.video_writer = None
+        self.size = None
+
+    def write(self, frame):
+        if self.video_writer is None:
+            height, width = frame.shape[:2]
+            self.size = (width, height)
+            fourcc = cv2.VideoWriter_fourcc(*"mp4v")  # codec for saving
+            self.video_writer = cv2.VideoWriter(
+                self.output_video_path, fourcc, self.frame_rate, self.size
+            )
+        if (frame.shape[1], frame.shape[0]) != self.size:
+            frame = cv2.resize(frame, self.size)
+        self.video_writer.write(frame)
+
+    def release(self):
+        if self.video_writer is not None:
+            self.video_writer.release()
+            self.video_writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+        return False
+
+
+def create_video_from_images(
+    image_folder, output_video_path, frame_rate=25, frame_range=None
+):
     """
     Create a video from a sequence of images.
 
@@ -41,6 +87,8 @@ def create_video_from_images(image_folder, output_video_path, frame_rate=25):
             The path where the output video file will be saved.
         frame_rate: int, optional
             The frame rate of the output video. Default is 25 frames per second.
+        frame_range: tuple, optional
+            (start, end) indexes of the images to use, end excluded.
 
     Raises:
         ValueError: If no valid image files are found in the specified folder.
@@ -49,107 +97,59 @@ def create_video_from_images(image_folder, output_video_path, frame_rate=25):
         None: The function prints the path where the video is saved and does not
         return anything.
     """
-    # define valid extension
-    valid_extensions = [".jpg", ".jpeg", ".JPG", ".JPEG", ".png", ".PNG"]
-
     # get all image files in the folder
     image_files = [
         f
         for f in os.listdir(image_folder)
-        if os.path.splitext(f)[1] in valid_extensions
+        if os.path.splitext(f)[1] in VALID_EXTENSIONS
     ]
-    image_files = natsort.natsorted(image_files)
+    image_files = select_frames(natsort.natsorted(image_files), frame_range)
     if not image_files:
         raise ValueError("No valid image files found in the specified folder.")
 
-    # load the first image to get the dimensions of the video
-    first_image_path = os.path.join(image_folder, image_files[0])
-    first_image = cv2.imread(first_image_path)
-    height, width, _ = first_image.shape
-
-    # create a video writer
-    fourcc = cv2.VideoWriter_fourcc(*"mp4v")  # codec for saving the video
-    video_writer = cv2.VideoWriter(
-        output_video_path, fourcc, frame_rate, (width, height)
-    )
-
     # write each image to the video
-    for image_file in tqdm(image_files):
-        image_path = os.path.join(image_folder, image_file)
-        image = cv2.imread(image_path)
-        video_writer.write(image)
+    with VideoSink(output_video_path, frame_rate) as video_sink:
+        for image_file in tqdm(image_files):
+            image_path = os.path.join(image_folder, image_file)
+            video_sink.write(cv2.imread(image_path))
 
-    # source release
-    video_writer.release()
     print(f"Video saved at {output_video_path}")
 
 
-def draw_polygon_from_custom(
-    save_dir,
-    image_path,
-    label_path=None,
-    classes=[],
-    save_box=True,
-    save_label=True,
-    keep_ori_fn=False,
-    color_level="category",
-):
-    """
-    Draws masks on images from custom dataset annotations and saves the annotated images.
+def select_frames(frames, frame_range=None):
+    """Keep the frames in a (start, end) range, end excluded or None."""
+    if frame_range is None:
+        return frames
+    start, end = frame_range
+    return frames[start or 0 : end]
 
-    Args:
-        save_dir (str): Directory path to save annotated images.
-        image_path (str): Path to the directory containing input images.
-        label_path (str, optional): Path to the directory containing label JSON files.
-                                    If None, labels are expected alongside images.
-        classes (list[str]): List of class names to consider for annotation.
-        save_box (bool): Whether to draw bounding boxes around masks.
-        save_label (bool): Whether to annotate masks with class labels.
-        keep_ori_fn (bool): If True, keeps the original filename; otherwise, uses a frame index-based naming.
-        color_level (str): "category" or "instance", whether to color the boxes by category or by instance.
 
-    Raises:
-        FileNotFoundError: If the specified image or label file does not exist.
-        ValueError: If an invalid image format is encountered.
+def list_frames(image_path, label_path=None, keep_ori_fn=False):
+    """
+    List the images to draw, in natural sort order.
+
+    Returns:
+        list: (image_file, label_file, save_name) of each image.
     """
     # Correct label_path if it incorrectly points to the image_path
     if label_path == image_path:
         label_path = None
 
-    # Create save directory
-    os.makedirs(save_dir, exist_ok=True)
-
-    # Sort and process image files
-    image_list = os.listdir(image_path)
-    sorted_image_list = natsort.natsorted(image_list)
-    valid_extensions = [".jpg", ".jpeg", ".JPG", ".JPEG", ".png", ".PNG"]
-
-    # Initialize class ID mapping
-    id_to_classes = {i: c for i, c in enumerate(classes)}
-
-    for frame_idx, image_name in enumerate(
-        tqdm(sorted_image_list, colour="green")
-    ):
+    frames = []
+    sorted_image_list = natsort.natsorted(os.listdir(image_path))
+    for frame_idx, image_name in enumerate(sorted_image_list):
         # Skip non-image files
         if image_name.endswith(".json"):
             continue
 
         image_file = osp.join(image_path, image_name)
-        if osp.splitext(image_name)[-1] not in valid_extensions:
+        if osp.splitext(image_name)[-1] not in VALID_EXTENSIONS:
             print(f"Invalid image format or JSON file: {image_file}")
             continue
 
         # Determine label file path
         label_name = osp.splitext(image_name)[0] + ".json"
-        label_file = (
-            osp.join(label_path, label_name)
-            if label_path
-            else osp.join(image_path, label_name)
-        )
-
-        # Read image and get its dimensions
-        image = cv2.imread(image_file)
-        image_height, image_width = image.shape[:2]
+        label_file = osp.join(label_path or image_path, label_name)
 
         # Prepare output filename
         save_name = (
@@ -157,342 +157,404 @@ def draw_polygon_from_custom(
             if keep_ori_fn
             else f"annotated_frame_{frame_idx:05d}.jpg"
         )
+        frames.append((image_file, label_file, save_name))
 
-        # If no label file exists, just save the original image and move to next
-        if not osp.exists(label_file):
-            cv2.imwrite(osp.join(save_dir, save_name), image)
-            continue
+    return frames
 
-        # Load and process annotations
-        with open(label_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
 
-        # Collect polygons, XYXY coordinates, and class indices
-        xyxy_list, mask_list, cind_list = [], [], []
-        for i, shape in enumerate(data["shapes"]):
-            if (
-                shape["shape_type"] != "polygon"
-                or shape["label"] not in classes
-            ):
-                continue
-            if color_level == "category":
-                label_id = classes.index(shape["label"])
-            else:
-                label_id = i
-            cind_list.append(label_id)
-            points = np.array(shape["points"], dtype=np.int32)
-            xyxy_list.append(sv.polygon_to_xyxy(polygon=points))
-            mask_list.append(
-                sv.polygon_to_mask(
-                    polygon=points, resolution_wh=(image_width, image_height)
-                )
-            )
+def get_label_id(shape, index, classes, color_level):
+    if color_level == "category":
+        return classes.index(shape["label"])
+    return index
 
-        # If there are no shapes to draw, save the original image and continue
-        if not xyxy_list:
-            cv2.imwrite(os.path.join(save_dir, save_name), image)
-            continue
 
-        # Stack coordinates, masks, and IDs for processing
-        xyxy = np.stack(xyxy_list, axis=0)
-        masks = np.stack(mask_list, axis=0)
-        masks = masks > 0.5  # Convert to binary masks
-        object_ids = np.array(cind_list, dtype=np.int32)
-
-        # Create Detections object for annotation
-        detections = sv.Detections(xyxy=xyxy, mask=masks, class_id=object_ids)
-
-        # Annotate the image based on flags
-        annotated_frame = image.copy()
-        if save_box:
-            box_annotator = sv.BoxAnnotator()
-            annotated_frame = box_annotator.annotate(
-                scene=annotated_frame, detections=detections
-            )
-        if save_label:
-            label_annotator = sv.LabelAnnotator()
-            labels = [id_to_classes[i] for i in object_ids]
-            annotated_frame = label_annotator.annotate(
-                annotated_frame, detections=detections, labels=labels
-            )
-        mask_annotator = sv.MaskAnnotator()
-        annotated_frame = mask_annotator.annotate(
-            scene=annotated_frame, detections=detections
-        )
+def fill_polygons(image, polygons, object_ids, opacity=0.5):
+    """
+    Blend filled polygons into an image in place.
 
-        # Save the annotated image
-        cv2.imwrite(osp.join(save_dir, save_name), annotated_frame)
+    All polygons are painted into one overlay, largest first so that
+    small objects stay visible, which is then blended in a single pass
+    over the region they cover.
+    """
+    points = np.concatenate(polygons)
+    height, width = image.shape[:2]
+    x1, y1 = np.maximum(points.min(axis=0), 0)
+    x2, y2 = np.minimum(points.max(axis=0) + 1, (width, height))
+    if x2 <= x1 or y2 <= y1:
+        return image
+
+    scene_roi = image[y1:y2, x1:x2]
+    overlay = scene_roi.copy()
+    areas = [cv2.contourArea(polygon) for polygon in polygons]
+    for i in np.argsort(areas)[::-1]:
+        color = sv.ColorPalette.DEFAULT.by_idx(int(object_ids[i]))
+        cv2.fillPoly(overlay, [polygons[i]], color.as_bgr(), offset=(-x1, -y1))
+    cv2.addWeighted(overlay, opacity, scene_roi, 1 - opacity, 0, dst=scene_roi)
+    return image
+
+
+def annotate_labels(image, detections, object_ids, classes):
+    id_to_classes = {i: c for i, c in enumerate(classes)}
+    label_annotator = sv.LabelAnnotator()
+    labels = [id_to_classes[i] for i in object_ids]
+    return label_annotator.annotate(
+        image, detections=detections, labels=labels
+    )
 
 
-def draw_rectangle_from_custom(
-    save_dir,
-    image_path,
-    label_path=None,
-    classes=[],
-    save_label=True,
-    keep_ori_fn=False,
-    color_level="category",
-):
-    """
-    Draws horizontal bounding boxes on images from custom rectangle annotations and saves the annotated images.
+def draw_polygon(image, data, options):
+    """Draw the polygons of a label file on an image."""
+    classes = options["classes"]
 
-    Args:
-        save_dir (str): Directory path to save annotated images.
-        image_path (str): Path to the directory containing input images.
-        label_path (str, optional): Path to the directory containing label JSON files.
-                                    If None, labels are expected alongside images.
-        classes (list[str]): List of class names to consider for annotation.
-        save_label (bool): Whether to annotate boxes with class labels.
-        keep_ori_fn (bool): If True, keeps the original filename; otherwise, uses a frame index-based naming.
-        color_level (str): "category" or "instance", whether to color the boxes by category or by instance.
+    # Collect polygons, XYXY coordinates, and class indices
+    xyxy_list, polygon_list, cind_list = [], [], []
+    for i, shape in enumerate(data["shapes"]):
+        if shape["shape_type"] != "polygon" or shape["label"] not in classes:
+            continue
+        cind_list.append(
+            get_label_id(shape, i, classes, options["color_level"])
+        )
+        points = np.array(shape["points"], dtype=np.int32)
+        xyxy_list.append(sv.polygon_to_xyxy(polygon=points))
+        polygon_list.append(points)
 
-    Raises:
-        FileNotFoundError: If the specified image or label file does not exist.
-        ValueError: If an invalid image format is encountered.
-    """
-    # Adjust label_path if incorrectly set to image_path
-    if label_path == image_path:
-        label_path = None
+    # If there are no shapes to draw, keep the original image
+    if not xyxy_list:
+        return image
 
-    # Create save directory
-    os.makedirs(save_dir, exist_ok=True)
+    xyxy = np.stack(xyxy_list, axis=0)
+    object_ids = np.array(cind_list, dtype=np.int32)
+    detections = sv.Detections(xyxy=xyxy, class_id=object_ids)
 
-    # Retrieve and sort image files
-    image_list = os.listdir(image_path)
-    sorted_image_list = natsort.natsorted(image_list)
-    valid_extensions = [".jpg", ".jpeg", ".JPG", ".JPEG", ".png", ".PNG"]
+    # Annotate the image based on flags
+    annotated_frame = fill_polygons(image, polygon_list, object_ids)
+    if options["save_box"]:
+        box_annotator = sv.BoxAnnotator()
+        annotated_frame = box_annotator.annotate(
+            scene=annotated_frame, detections=detections
+        )
+    if options["save_label"]:
+        annotated_frame = annotate_labels(
+            annotated_frame, detections, object_ids, classes
+        )
+    return annotated_frame
 
-    # Map class indices to class names
-    id_to_classes = {i: c for i, c in enumerate(classes)}
 
-    for frame_idx, image_name in enumerate(
-        tqdm(sorted_image_list, colour="green")
-    ):
-        # Skip non-image files
-        if image_name.endswith(".json"):
-            continue
+def draw_rectangle(image, data, options):
+    """Draw the rectangles of a label file on an image."""
+    classes = options["classes"]
 
-        image_file = osp.join(image_path, image_name)
-        if osp.splitext(image_name)[-1] not in valid_extensions:
-            print(f"Invalid image format or JSON file: {image_file}")
+    # Collect bounding box coordinates and class indices
+    xyxy_list, cind_list = [], []
+    for i, shape in enumerate(data["shapes"]):
+        if shape["shape_type"] != "rectangle" or shape["label"] not in classes:
+            continue
+        points = shape["points"]
+        if len(points) == 2:
+            # If there are only two points, assume they are diagonal points
+            x1, y1 = points[0]
+            x2, y2 = points[1]
+            xyxy = np.array([x1, y1, x2, y2], dtype=np.float32)
+        elif len(points) == 4:
+            # If there are four points, take the top-left and bottom-right points
+            xyxy = np.array(
+                [
+                    min(p[0] for p in points),
+                    min(p[1] for p in points),
+                    max(p[0] for p in points),
+                    max(p[1] for p in points),
+                ],
+                dtype=np.float32,
+            )
+        else:
+            print(f"Warning: Skipping invalid rectangle: {points}")
             continue
+        cind_list.append(
+            get_label_id(shape, i, classes, options["color_level"])
+        )
+        xyxy_list.append(xyxy)
+
+    # If no rectangles found, keep the original image
+    if not xyxy_list:
+        print(f"No rectangles found for image: {data.get('imagePath')}")
+        return image
+
+    # Prepare bounding boxes and Detection object
+    xyxy = np.stack(xyxy_list, axis=0)
+    object_ids = np.array(cind_list, dtype=np.int32)
+    detections = sv.Detections(xyxy=xyxy, mask=None, class_id=object_ids)
+
+    # Annotate the image with boxes and optionally labels
+    box_annotator = sv.BoxAnnotator()
+    annotated_frame = box_annotator.annotate(
+        scene=image, detections=detections
+    )
+    if options["save_label"]:
+        annotated_frame = annotate_labels(
+            annotated_frame, detections, object_ids, classes
+        )
+    return annotated_frame
 
-        # Determine label file path
-        label_name = osp.splitext(image_name)[0] + ".json"
-        label_file = (
-            osp.join(label_path, label_name)
-            if label_path
-            else osp.join(image_path, label_name)
+
+def draw_rotation(image, data, options):
+    """Draw the rotated boxes of a label file on an image."""
+    classes = options["classes"]
+
+    # Collect bounding box coordinates and class indices
+    xyxyxyxy_list, xyxy_list, cind_list = [], [], []
+    for i, shape in enumerate(data["shapes"]):
+        if shape["shape_type"] != "rotation" or shape["label"] not in classes:
+            continue
+        cind_list.append(
+            get_label_id(shape, i, classes, options["color_level"])
         )
+        points = shape["points"]
+        xyxy_list.append(sv.polygon_to_xyxy(polygon=points))
+        xyxyxyxy_list.append(np.array(points, dtype=np.int32))
+
+    # If no boxes found, keep the original image
+    if not xyxyxyxy_list:
+        return image
+
+    # Prepare bounding boxes and Detection object
+    xyxy = np.stack(xyxy_list, axis=0)
+    xyxyxyxy = np.stack(xyxyxyxy_list, axis=0)
+    object_ids = np.array(cind_list, dtype=np.int32)
+    detections = sv.Detections(
+        xyxy=xyxy,
+        mask=None,
+        class_id=object_ids,
+        data={"xyxyxyxy": xyxyxyxy},
+    )
 
-        # Read the image
-        image = cv2.imread(image_file)
-        save_name = (
-            image_name
-            if keep_ori_fn
-            else f"annotated_frame_{frame_idx:05d}.jpg"
+    # Annotate the image with boxes and optionally labels
+    oriented_box_annotator = sv.OrientedBoxAnnotator()
+    annotated_frame = oriented_box_annotator.annotate(
+        scene=image, detections=detections
+    )
+    if options["save_label"]:
+        annotated_frame = annotate_labels(
+            annotated_frame, detections, object_ids, classes
         )
+    return annotated_frame
 
-        # If no label file exists, save the original image and proceed
-        if not osp.exists(label_file):
-            cv2.imwrite(osp.join(save_dir, save_name), image)
-            continue
 
-        # Load and parse annotation data
+DRAWERS = {
+    "polygon": draw_polygon,
+    "rectangle": draw_rectangle,
+    "rotation": draw_rotation,
+}
+
+
+def draw_frame(task, frame, options, save_dir=None):
+    """
+    Draw the labels of one image.
+
+    Args:
+        task (str): "polygon", "rectangle" or "rotation".
+        frame (tuple): (image_file, label_file, save_name).
+        options (dict): classes, save_box, save_label and color_level.
+        save_dir (str, optional): If given, the annotated image is saved
+            there instead of being returned.
+
+    Returns:
+        numpy.ndarray: The annotated image, or None if it was saved.
+    """
+    image_file, label_file, save_name = frame
+    image = cv2.imread(image_file)
+    if image is None:
+        raise ValueError(f"Could not read image: {image_file}")
+
+    # Images without a label file are kept as they are
+    if osp.exists(label_file):
         with open(label_file, "r", encoding="utf-8") as f:
             data = json.load(f)
+        image = DRAWERS[task](image, data, options)
 
-        # Collect bounding box coordinates and class indices
-        xyxy_list, cind_list = [], []
-        for i, shape in enumerate(data["shapes"]):
-            if (
-                shape["shape_type"] != "rectangle"
-                or shape["label"] not in classes
-            ):
-                continue
-            if color_level == "category":
-                label_id = classes.index(shape["label"])
-            else:
-                label_id = i
-            cind_list.append(label_id)
-            points = shape["points"]
-            if len(points) == 2:
-                # If there are only two points, assume they are diagonal points
-                x1, y1 = points[0]
-                x2, y2 = points[1]
-                xyxy = np.array([x1, y1, x2, y2], dtype=np.float32)
-            elif len(points) == 4:
-                # If there are four points, take the top-left and bottom-right points
-                xyxy = np.array(
-                    [
-                        min(p[0] for p in points),
-                        min(p[1] for p in points),
-                        max(p[0] for p in points),
-                        max(p[1] for p in points),
-                    ],
-                    dtype=np.float32,
-                )
-            else:
-                print(f"Warning: Skipping invalid rectangle: {points}")
-                continue
-            xyxy_list.append(xyxy)
-
-        # If no rectangles found, save the original image and continue
-        if not xyxy_list:
-            print(f"No rectangles found for image: {image_file}")
-            cv2.imwrite(os.path.join(save_dir, save_name), image)
-            continue
+    if save_dir is None:
+        return image
+    cv2.imwrite(osp.join(save_dir, save_name), image)
+    return None
 
-        # Prepare bounding boxes and Detection object
-        xyxy = np.stack(xyxy_list, axis=0)
-        object_ids = np.array(cind_list, dtype=np.int32)
-        detections = sv.Detections(xyxy=xyxy, mask=None, class_id=object_ids)
 
-        # Annotate the image with boxes and optionally labels
-        annotated_frame = image.copy()
-        box_annotator = sv.BoxAnnotator()
-        annotated_frame = box_annotator.annotate(
-            scene=annotated_frame, detections=detections
-        )
-        if save_label:
-            label_annotator = sv.LabelAnnotator()
-            labels = [id_to_classes[i] for i in object_ids]
-            annotated_frame = label_annotator.annotate(
-                annotated_frame, detections=detections, labels=labels
-            )
+def imap_ordered(executor, fn, items, window):
+    """Like executor.map, with at most `window` results pending."""
+    pending = deque()
+    for item in items:
+        if len(pending) >= window:
+            yield pending.popleft().result()
+        pending.append(executor.submit(fn, *item))
+    while pending:
+        yield pending.popleft().result()
 
-        # Save the annotated image
-        cv2.imwrite(osp.join(save_dir, save_name), annotated_frame)
 
-
-def draw_rotation_from_custom(
+def draw_from_custom(
+    task,
     save_dir,
     image_path,
     label_path=None,
     classes=[],
+    save_box=True,
     save_label=True,
     keep_ori_fn=False,
     color_level="category",
+    frame_range=None,
+    to_video=False,
+    frame_rate=25,
+    workers=None,
 ):
     """
-    Draws oriented bounding boxes on images from custom rotation annotations and saves the annotated images.
+    Draws annotations on images from custom dataset annotations.
+
+    Images are drawn by a pool of worker processes; the results are
+    collected in order, so they can be written straight into a video.
 
     Args:
-        save_dir (str): Directory path to save annotated images.
+        task (str): "polygon", "rectangle" or "rotation".
+        save_dir (str): Directory path to save annotated images, or the
+            output video file if `to_video` is set.
         image_path (str): Path to the directory containing input images.
         label_path (str, optional): Path to the directory containing label JSON files.
                                     If None, labels are expected alongside images.
         classes (list[str]): List of class names to consider for annotation.
-        save_label (bool): Whether to annotate boxes with class labels.
+        save_box (bool): Whether to draw bounding boxes around masks.
+        save_label (bool): Whether to annotate shapes with class labels.
         keep_ori_fn (bool): If True, keeps the original filename; otherwise, uses a frame index-based naming.
         color_level (str): "category" or "instance", whether to color the boxes by category or by instance.
-
-    Raises:
-        FileNotFoundError: If the specified image or label file does not exist.
-        ValueError: If an invalid image format is encountered.
+        frame_range (tuple, optional): (start, end) indexes of the images to draw, end excluded.
+        to_video (bool): Whether to write the frames into a video instead of images.
+        frame_rate (int): Frame rate of the output video.
+        workers (int, optional): Number of worker processes, all CPUs by default;
+                                 0 or 1 draws in this process.
     """
-    # Adjust label_path if incorrectly set to image_path
-    if label_path == image_path:
-        label_path = None
+    frames = list_frames(image_path, label_path, keep_ori_fn)
+    frames = select_frames(frames, frame_range)
+    options = {
+        "classes": classes,
+        "save_box": save_box,
+        "save_label": save_label,
+        "color_level": color_level,
+    }
+
+    video_sink = None
+    if to_video:
+        video_sink = VideoSink(save_dir, frame_rate)
+        frame_dir = None
+    else:
+        os.makedirs(save_dir, exist_ok=True)
+        frame_dir = save_dir
+    items = [(task, frame, options, frame_dir) for frame in frames]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(items))
+    executor = None
+    if workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        results = imap_ordered(executor, draw_frame, items, 2 * workers)
+    else:
+        results = (draw_frame(*item) for item in items)
 
-    # Create save directory
-    os.makedirs(save_dir, exist_ok=True)
+    try:
+        for annotated_frame in tqdm(results, total=len(items), colour="green"):
+            if video_sink is not None:
+                video_sink.write(annotated_frame)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        if video_sink is not None:
+            video_sink.release()
 
-    # Retrieve and sort image files
-    image_list = os.listdir(image_path)
-    sorted_image_list = natsort.natsorted(image_list)
-    valid_extensions = [".jpg", ".jpeg", ".JPG", ".JPEG", ".png", ".PNG"]
+    if video_sink is not None:
+        print(f"Video saved at {save_dir}")
 
-    # Map class indices to class names
-    id_to_classes = {i: c for i, c in enumerate(classes)}
 
-    for frame_idx, image_name in enumerate(
-        tqdm(sorted_image_list, colour="green")
-    ):
-        # Skip non-image files
-        if image_name.endswith(".json"):
-            continue
-
-        image_file = osp.join(image_path, image_name)
-        if osp.splitext(image_name)[-1] not in valid_extensions:
-            print(f"Invalid image format or JSON file: {image_file}")
-            continue
-
-        # Determine label file path
-        label_name = osp.splitext(image_name)[0] + ".json"
-        label_file = (
-            osp.join(label_path, label_name)
-            if label_path
-            else osp.join(image_path, label_name)
-        )
+def draw_polygon_from_custom(
+    save_dir,
+    image_path,
+    label_path=None,
+    classes=[],
+    save_box=True,
+    save_label=True,
+    keep_ori_fn=False,
+    color_level="category",
+    **kwargs,
+):
+    """
+    Draws masks on images from custom dataset annotations and saves the annotated images.
 
-        # Read the image
-        image = cv2.imread(image_file)
-        save_name = (
-            image_name
-            if keep_ori_fn
-            else f"annotated_frame_{frame_idx:05d}.jpg"
-        )
+    See `draw_from_custom` for the arguments.
+    """
+    draw_from_custom(
+        "polygon",
+        save_dir,
+        image_path,
+        label_path,
+        classes,
+        save_box,
+        save_label,
+        keep_ori_fn,
+        color_level,
+        **kwargs,
+    )
 
-        # If no label file exists, save the original image and proceed
-        if not osp.exists(label_file):
-            cv2.imwrite(osp.join(save_dir, save_name), image)
-            continue
 
-        # Load and parse annotation data
-        with open(label_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
+def draw_rectangle_from_custom(
+    save_dir,
+    image_path,
+    label_path=None,
+    classes=[],
+    save_label=True,
+    keep_ori_fn=False,
+    color_level="category",
+    **kwargs,
+):
+    """
+    Draws horizontal bounding boxes on images from custom rectangle annotations and saves the annotated images.
 
-        # Collect bounding box coordinates and class indices
-        xyxyxyxy_list, xyxy_list, cind_list = [], [], []
-        for i, shape in enumerate(data["shapes"]):
-            if (
-                shape["shape_type"] != "rotation"
-                or shape["label"] not in classes
-            ):
-                continue
-            if color_level == "category":
-                label_id = classes.index(shape["label"])
-            else:
-                label_id = i
-            cind_list.append(label_id)
-            points = shape["points"]
-            xyxy = sv.polygon_to_xyxy(polygon=points)
-            xyxy_list.append(xyxy)
-            xyxyxyxy = np.array(points, dtype=np.int32)
-            xyxyxyxy_list.append(xyxyxyxy)
-
-        # If no boxes found, save the original image and continue
-        if not xyxyxyxy_list:
-            cv2.imwrite(os.path.join(save_dir, save_name), image)
-            continue
+    See `draw_from_custom` for the arguments.
+    """
+    draw_from_custom(
+        "rectangle",
+        save_dir,
+        image_path,
+        label_path,
+        classes,
+        True,
+        save_label,
+        keep_ori_fn,
+        color_level,
+        **kwargs,
+    )
 
-        # Prepare bounding boxes and Detection object
-        xyxy = np.stack(xyxy_list, axis=0)
-        xyxyxyxy = np.stack(xyxyxyxy_list, axis=0)
-        object_ids = np.array(cind_list, dtype=np.int32)
-        detections = sv.Detections(
-            xyxy=xyxy,
-            mask=None,
-            class_id=object_ids,
-            data={"xyxyxyxy": xyxyxyxy},
-        )
 
-        # Annotate the image with boxes and optionally labels
-        annotated_frame = image.copy()
-        oriented_box_annotator = sv.OrientedBoxAnnotator()
-        annotated_frame = oriented_box_annotator.annotate(
-            scene=annotated_frame, detections=detections
-        )
-        if save_label:
-            label_annotator = sv.LabelAnnotator()
-            labels = [id_to_classes[i] for i in object_ids]
-            annotated_frame = label_annotator.annotate(
-                annotated_frame, detections=detections, labels=labels
-            )
+def draw_rotation_from_custom(
+    save_dir,
+    image_path,
+    label_path=None,
+    classes=[],
+    save_label=True,
+    keep_ori_fn=False,
+    color_level="category",
+    **kwargs,
+):
+    """
+    Draws oriented bounding boxes on images from custom rotation annotations and saves the annotated images.
 
-        # Save the annotated image
-        cv2.imwrite(osp.join(save_dir, save_name), annotated_frame)
+    See `draw_from_custom` for the arguments.
+    """
+    draw_from_custom(
+        "rotation",
+        save_dir,
+        image_path,
+        label_path,
+        classes,
+        True,
+        save_label,
+        keep_ori_fn,
+        color_level,
+        **kwargs,
+    )
 
 
 def main():
@@ -535,8 +597,32 @@ def main():
         default="category",
         help="Color level for boxes",
     )
+    parser.add_argument(
+        "--start_frame",
+        type=int,
+        default=0,
+        help="Index of the first image to use",
+    )
+    parser.add_argument(
+        "--end_frame",
+        type=int,
+        default=None,
+        help="Index after the last image to use",
+    )
+    parser.add_argument(
+        "--to_video",
+        action="store_true",
+        help="Write the annotated frames into the video --save_dir",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of drawing processes, all CPUs by default",
+    )
 
     args = parser.parse_args()
+    frame_range = (args.start_frame, args.end_frame)
 
     # Process classes argument
     if len(args.classes) == 1 and args.classes[0].endswith(".txt"):
@@ -548,38 +634,23 @@ def main():
 
     if args.task == "video":
         create_video_from_images(
-            args.image_path, args.save_dir, args.frame_rate
-        )
-    elif args.task == "polygon":
-        draw_polygon_from_custom(
-            args.save_dir,
-            args.image_path,
-            args.label_path,
-            args.classes,
-            args.save_box,
-            args.save_label,
-            args.keep_ori_fn,
-            args.color_level,
-        )
-    elif args.task == "rectangle":
-        draw_rectangle_from_custom(
-            args.save_dir,
-            args.image_path,
-            args.label_path,
-            args.classes,
-            args.save_label,
-            args.keep_ori_fn,
-            args.color_level,
+            args.image_path, args.save_dir, args.frame_rate, frame_range
         )
-    elif args.task == "rotation":
-        draw_rotation_from_custom(
+    else:
+        draw_from_custom(
+            args.task,
             args.save_dir,
             args.image_path,
             args.label_path,
             args.classes,
+            args.save_box or args.task != "polygon",
             args.save_label,
             args.keep_ori_fn,
             args.color_level,
+            frame_range=frame_range,
+            to_video=args.to_video,
+            frame_rate=args.frame_rate,
+            workers=args.workers,
         )
 
 
@@ -598,5 +669,8 @@ if __name__ == "__main__":
 
     4. Draw rotated box annotations:
     python tools/label_drawer.py rotation --save_dir <SAVE-DIR> --image_path <LOCAL-IMAGE_PATH> --label_path <LOCAL-LABEL_PATH> --classes classes.txt --save_label
+
+    5. Draw frames 100 to 599 straight into a review video:
+    python tools/label_drawer.py polygon --save_dir review.mp4 --to_video --start_frame 100 --end_frame 600 --image_path <LOCAL-IMAGE_PATH> --classes classes.txt --save_label --workers 8
     """
     main()
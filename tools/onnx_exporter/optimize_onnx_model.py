@@ -0,0 +1,531 @@
+import argparse
+import copy
+import importlib
+import json
+import os
+import os.path as osp
+import sys
+import time
+
+import cv2
+import numpy as np
+import onnx
+import onnxruntime as ort
+import yaml
+from onnxruntime.quantization import (
+    CalibrationDataReader,
+    QuantFormat,
+    QuantType,
+    quantize_dynamic,
+    quantize_static,
+)
+from tqdm import tqdm
+
+sys.path.append(".")
+from anylabeling.services.auto_labeling.utils.general import (  # noqa: E402
+    letterbox,
+)
+
+"""
+Make an exported ONNX model cheaper to run on CPU
+Written by the X-AnyLabeling team
+    Usage:
+        1. Export the model to onnx format and set up its model config
+           (e.g. one of anylabeling/configs/auto_labeling/*.yaml), with
+           `model_path` pointing to a local file or passed via --model
+        2. Quantize and convert the model, calibrating on the images of
+           a labeling project:
+        ```bash
+        python tools/onnx_exporter/optimize_onnx_model.py \
+            --model_config /path/to/yolov8s.yaml \
+            --model /path/to/yolov8s.onnx \
+            --images /path/to/project \
+            --modes dynamic static fp16 \
+            --output_dir /path/to/output
+        ```
+        3. Load one of the written `<name>-<mode>.yaml` files with
+           "Load Custom Model" in the app
+
+    Each variant is benchmarked against the FP32 model. For the YOLO
+    detectors listed in DETECTORS, detections on the project images are
+    also compared through the bundled SAHI `coco_evaluation`, which
+    needs `pip install pycocotools fire terminaltables`. Detection
+    boxes of the project labels are the ground truth; without labels
+    the FP32 detections are. FP16 conversion needs
+    `pip install onnxconverter-common`.
+"""
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff", ".webp")
+MODES = ("dynamic", "static", "fp16")
+DETECTORS = {
+    "yolov5": "yolov5:YOLOv5",
+    "yolov6": "yolov6:YOLOv6",
+    "yolov7": "yolov7:YOLOv7",
+    "yolov8": "yolov8:YOLOv8",
+    "yolov9": "yolov9:YOLOv9",
+    "yolov10": "yolov10:YOLOv10",
+    "yolo11": "yolo11:YOLO11",
+}
+
+
+def list_images(image_dir, limit=None):
+    """List the images of a project folder, sorted by name"""
+    files = sorted(
+        osp.join(image_dir, f)
+        for f in os.listdir(image_dir)
+        if f.lower().endswith(IMAGE_EXTENSIONS)
+    )
+    return files[:limit] if limit else files
+
+
+def read_image(image_file):
+    """Read an image as RGB, also from non-ASCII paths"""
+    image = cv2.imdecode(np.fromfile(image_file, dtype=np.uint8), -1)
+    if image is None:
+        raise ValueError(f"Could not read image: {image_file}")
+    if image.ndim == 2:
+        return cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
+    if image.shape[2] == 4:
+        return cv2.cvtColor(image, cv2.COLOR_BGRA2RGB)
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+
+def resolve_model_path(config, config_file, model_file=None):
+    """Find the local FP32 model of a model config"""
+    model_path = model_file or config["model_path"]
+    if model_path.startswith(("http://", "https://")):
+        raise ValueError(
+            f"{model_path} is a download url, "
+            "pass the downloaded model with --model"
+        )
+    if not osp.isabs(model_path) and not osp.isfile(model_path):
+        model_path = osp.join(osp.dirname(config_file), model_path)
+    if not osp.isfile(model_path):
+        raise FileNotFoundError(f"Model not found: {model_path}")
+    return osp.abspath(model_path)
+
+
+def get_input_size(model_file, input_size=None):
+    """Get the (height, width) of the model input"""
+    session = ort.InferenceSession(
+        model_file, providers=["CPUExecutionProvider"]
+    )
+    shape = session.get_inputs()[0].shape
+    if input_size:
+        return input_size, input_size
+    height, width = shape[2:4]
+    if not isinstance(height, int) or not isinstance(width, int):
+        raise ValueError(
+            f"Model input {shape} has a dynamic size, pass --input_size"
+        )
+    return height, width
+
+
+def preprocess(image, input_shape):
+    """Letterbox an RGB image to a normalized NCHW blob"""
+    image = letterbox(image, input_shape)[0]
+    blob = image.transpose(2, 0, 1)[np.newaxis].astype(np.float32)
+    return np.ascontiguousarray(blob / 255.0, dtype=np.float32)
+
+
+class ImageCalibrationReader(CalibrationDataReader):
+    """Feed project images to ONNX Runtime static quantization"""
+
+    def __init__(self, model_file, image_files, input_shape):
+        session = ort.InferenceSession(
+            model_file, providers=["CPUExecutionProvider"]
+        )
+        self.input_name = session.get_inputs()[0].name
+        self.input_shape = input_shape
+        self.image_files = iter(tqdm(image_files, desc="Calibrating"))
+
+    def get_next(self):
+        for image_file in self.image_files:
+            try:
+                image = read_image(image_file)
+            except ValueError as e:
+                print(e)
+                continue
+            return {self.input_name: preprocess(image, self.input_shape)}
+        return None
+
+
+def quantize_dynamic_model(model_file, output_file, per_channel=False):
+    quantize_dynamic(
+        model_file,
+        output_file,
+        per_channel=per_channel,
+        weight_type=QuantType.QInt8,
+    )
+
+
+def quantize_static_model(
+    model_file, output_file, calibration_files, input_shape, per_channel=False
+):
+    if not calibration_files:
+        raise ValueError("Static quantization needs calibration images")
+    reader = ImageCalibrationReader(model_file, calibration_files, input_shape)
+    quantize_static(
+        model_file,
+        output_file,
+        reader,
+        quant_format=QuantFormat.QDQ,
+        per_channel=per_channel,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+    )
+
+
+def convert_fp16_model(model_file, output_file):
+    try:
+        from onnxconverter_common import float16
+    except ImportError:
+        raise ImportError(
+            'Please run "pip install onnxconverter-common" '
+            "to convert models to FP16."
+        )
+
+    model = onnx.load(model_file)
+    # Inputs and outputs stay float32, so the app runs it unchanged
+    model = float16.convert_float_to_float16(model, keep_io_types=True)
+    onnx.save(model, output_file)
+
+
+def optimize(mode, model_file, output_file, calibration_files, args):
+    """Write the `mode` variant of a model"""
+    if mode == "dynamic":
+        quantize_dynamic_model(model_file, output_file, args.per_channel)
+    elif mode == "static":
+        quantize_static_model(
+            model_file,
+            output_file,
+            calibration_files,
+            args.input_shape,
+            args.per_channel,
+        )
+    elif mode == "fp16":
+        convert_fp16_model(model_file, output_file)
+    else:
+        raise ValueError(f"Unknown mode: {mode}")
+
+
+def benchmark(model_file, blobs, runs=50, warmup=5):
+    """Measure the latency of a model on preprocessed blobs.
+
+    Returns:
+        dict: Median and 90th percentile latency in ms, and the size
+            of the model file in MB.
+    """
+    session = ort.InferenceSession(
+        model_file, providers=["CPUExecutionProvider"]
+    )
+    input_name = session.get_inputs()[0].name
+    for i in range(warmup):
+        session.run(None, {input_name: blobs[i % len(blobs)]})
+    latencies = []
+    for i in range(runs):
+        start = time.perf_counter()
+        session.run(None, {input_name: blobs[i % len(blobs)]})
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        "latency_ms": float(np.median(latencies)),
+        "latency_p90_ms": float(np.percentile(latencies, 90)),
+        "size_mb": osp.getsize(model_file) / 2**20,
+    }
+
+
+def load_detector(config, model_file):
+    """Load the app's model class for a detector config"""
+    # Set up like the app: labeling utils before any model module, which
+    # resolves the shape/utils import cycle, and a user config
+    import anylabeling.views.labeling.utils  # noqa: F401
+    from anylabeling import config as app_config
+
+    if app_config.current_config_file is None:
+        config_file = osp.join(osp.expanduser("~"), ".xanylabelingrc")
+        app_config.current_config_file = (
+            config_file if osp.isfile(config_file) else "{}"
+        )
+    module_name, class_name = DETECTORS[config["type"]].split(":")
+    module = importlib.import_module(
+        f"anylabeling.services.auto_labeling.{module_name}"
+    )
+    config = dict(config, model_path=model_file)
+    return getattr(module, class_name)(config, on_message=print)
+
+
+def detect(config, model_file, image_files):
+    """Run a detector over images.
+
+    Returns:
+        list: Per image, the detections as (label, [x, y, w, h], score).
+    """
+    model = load_detector(config, model_file)
+    detections = []
+    for image_file in tqdm(image_files, desc=osp.basename(model_file)):
+        result = model.predict_shapes(read_image(image_file))
+        detections.append(
+            [
+                (shape.label, shape_to_bbox(shape.points), shape.score)
+                for shape in result.shapes
+                if shape.shape_type == "rectangle"
+            ]
+        )
+    return detections
+
+
+def shape_to_bbox(points):
+    """Get the COCO [x, y, w, h] box of shape points"""
+    points = np.array(
+        [[p.x(), p.y()] if hasattr(p, "x") else p for p in points],
+        dtype=float,
+    )
+    x1, y1 = points.min(axis=0)
+    x2, y2 = points.max(axis=0)
+    return [float(x1), float(y1), float(x2 - x1), float(y2 - y1)]
+
+
+def load_project_labels(image_files):
+    """Read the rectangles of the project label files, if there are any"""
+    labels, found = [], False
+    for image_file in image_files:
+        label_file = osp.splitext(image_file)[0] + ".json"
+        boxes = []
+        if osp.isfile(label_file):
+            found = True
+            with open(label_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for shape in data.get("shapes", []):
+                if shape.get("shape_type") == "rectangle":
+                    boxes.append(
+                        (shape["label"], shape_to_bbox(shape["points"]), 1.0)
+                    )
+        labels.append(boxes)
+    return labels if found else None
+
+
+def write_coco_files(classes, image_files, truth, detections, out_dir, name):
+    """Write a COCO dataset of the ground truth and a result file"""
+    category_ids = {label: i + 1 for i, label in enumerate(classes)}
+    dataset = {
+        "images": [],
+        "annotations": [],
+        "categories": [
+            {"id": i, "name": label} for label, i in category_ids.items()
+        ],
+    }
+    results = []
+    for image_id, image_file in enumerate(image_files, 1):
+        height, width = read_image(image_file).shape[:2]
+        dataset["images"].append(
+            {
+                "id": image_id,
+                "file_name": osp.basename(image_file),
+                "width": width,
+                "height": height,
+            }
+        )
+        for label, bbox, _ in truth[image_id - 1]:
+            if label not in category_ids:
+                continue
+            dataset["annotations"].append(
+                {
+                    "id": len(dataset["annotations"]) + 1,
+                    "image_id": image_id,
+                    "category_id": category_ids[label],
+                    "bbox": bbox,
+                    "area": bbox[2] * bbox[3],
+                    "iscrowd": 0,
+                }
+            )
+        for label, bbox, score in detections[image_id - 1]:
+            if label in category_ids:
+                results.append(
+                    {
+                        "image_id": image_id,
+                        "category_id": category_ids[label],
+                        "bbox": bbox,
+                        "score": score,
+                    }
+                )
+    os.makedirs(out_dir, exist_ok=True)
+    dataset_file = osp.join(out_dir, "dataset.json")
+    result_file = osp.join(out_dir, f"{name}_result.json")
+    with open(dataset_file, "w", encoding="utf-8") as f:
+        json.dump(dataset, f)
+    with open(result_file, "w", encoding="utf-8") as f:
+        json.dump(results, f)
+    return dataset_file, result_file
+
+
+def evaluate_map(dataset_file, result_file, out_dir):
+    """Get the COCO bbox mAP of a result file"""
+    from anylabeling.services.auto_labeling.utils.sahi.scripts.coco_evaluation import (  # noqa: E501
+        evaluate,
+    )
+
+    result = evaluate(
+        dataset_file, result_file, out_dir=out_dir, return_dict=True
+    )
+    return result["eval_results"]["bbox_mAP"]
+
+
+def compare_detections(config, variants, image_files, output_dir):
+    """Get the mAP of every variant on the project images.
+
+    Returns:
+        dict: mAP per variant name, or None if it cannot be computed.
+    """
+    if config["type"] not in DETECTORS:
+        print(f"Skipping mAP: {config['type']} is not a supported detector")
+        return None
+    if not image_files:
+        print("Skipping mAP: no images to evaluate")
+        return None
+    detections = {
+        name: detect(config, model_file, image_files)
+        for name, model_file in variants.items()
+    }
+    truth = load_project_labels(image_files)
+    if truth is None:
+        print("No project labels found, using FP32 detections as truth")
+        truth = detections["fp32"]
+    scores = {}
+    eval_dir = osp.join(output_dir, "eval")
+    for name, dets in detections.items():
+        dataset_file, result_file = write_coco_files(
+            config.get("classes", []),
+            image_files,
+            truth,
+            dets,
+            eval_dir,
+            name,
+        )
+        try:
+            scores[name] = evaluate_map(
+                dataset_file, result_file, osp.join(eval_dir, name)
+            )
+        except ImportError as e:
+            print(f"Skipping mAP: {e}")
+            return None
+    return scores
+
+
+def write_model_config(config, model_file, mode, output_dir):
+    """Write a model config for the optimized model, next to it"""
+    config = copy.deepcopy(config)
+    config["model_path"] = osp.basename(model_file)
+    config.pop("model_path_sha256", None)
+    config["name"] = f"{config.get('name', config['type'])}-{mode}"
+    display_name = config.get("display_name", config["type"])
+    config["display_name"] = f"{display_name} ({mode.upper()})"
+    config_file = osp.join(output_dir, f"{config['name']}.yaml")
+    with open(config_file, "w", encoding="utf-8") as f:
+        yaml.safe_dump(config, f, sort_keys=False, allow_unicode=True)
+    return config_file
+
+
+def print_report(report):
+    base = report["fp32"]
+    print(
+        f"\n{'model':<10}{'size (MB)':>12}{'latency (ms)':>15}"
+        f"{'p90 (ms)':>12}{'speedup':>10}{'mAP':>8}{'delta':>8}"
+    )
+    for name, row in report.items():
+        speedup = base["latency_ms"] / row["latency_ms"]
+        mean_ap = row.get("mAP")
+        map_text = f"{mean_ap:.3f}" if mean_ap is not None else "-"
+        delta = f"{mean_ap - base['mAP']:+.3f}" if mean_ap is not None else "-"
+        print(
+            f"{name:<10}{row['size_mb']:>12.1f}{row['latency_ms']:>15.2f}"
+            f"{row['latency_p90_ms']:>12.2f}{speedup:>9.2f}x"
+            f"{map_text:>8}{delta:>8}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Quantize an ONNX model and report speed and accuracy"
+    )
+    parser.add_argument(
+        "--model_config", required=True, help="Model config (.yaml) file"
+    )
+    parser.add_argument(
+        "--model", help="FP32 ONNX model, defaults to the config model_path"
+    )
+    parser.add_argument(
+        "--images", help="Project folder with calibration/test images"
+    )
+    parser.add_argument(
+        "--modes",
+        nargs="+",
+        choices=MODES,
+        default=["dynamic", "static"],
+        help="Variants to create",
+    )
+    parser.add_argument("--output_dir", default="optimized")
+    parser.add_argument(
+        "--num_calib", type=int, default=100, help="Calibration images"
+    )
+    parser.add_argument(
+        "--num_eval", type=int, default=200, help="Images to compare on"
+    )
+    parser.add_argument(
+        "--input_size", type=int, help="Input size for dynamic-size models"
+    )
+    parser.add_argument(
+        "--per_channel",
+        action="store_true",
+        help="Quantize weights per channel",
+    )
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=5)
+    args = parser.parse_args()
+
+    with open(args.model_config, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    model_file = resolve_model_path(config, args.model_config, args.model)
+    args.input_shape = get_input_size(model_file, args.input_size)
+    image_files = list_images(args.images) if args.images else []
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    name = osp.splitext(osp.basename(model_file))[0]
+    variants = {"fp32": model_file}
+    for mode in args.modes:
+        output_file = osp.join(args.output_dir, f"{name}-{mode}.onnx")
+        print(f"Creating the {mode} model: {output_file}")
+        optimize(
+            mode, model_file, output_file, image_files[: args.num_calib], args
+        )
+        variants[mode] = output_file
+
+    if image_files:
+        blobs = [
+            preprocess(read_image(f), args.input_shape)
+            for f in image_files[:8]
+        ]
+    else:
+        blobs = [np.random.rand(1, 3, *args.input_shape).astype(np.float32)]
+    report = {
+        variant: benchmark(variant_file, blobs, args.runs, args.warmup)
+        for variant, variant_file in variants.items()
+    }
+    scores = compare_detections(
+        config, variants, image_files[: args.num_eval], args.output_dir
+    )
+    for variant, row in report.items():
+        row["mAP"] = scores[variant] if scores else None
+    for mode in args.modes:
+        report[mode]["config"] = write_model_config(
+            config, variants[mode], mode, args.output_dir
+        )
+
+    print_report(report)
+    report_file = osp.join(args.output_dir, "report.json")
+    with open(report_file, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report saved to {report_file}")
+
+
+if __name__ == "__main__":
+    main()